@@ -0,0 +1,264 @@
+"""
+⚡ Auth State Repository
+Parses each storage_state file once and keeps derived indexes for every reader
+
+The capture paths (_load_auth_state, cross-domain cookie warm-up, Camoufox injection),
+the auth/cookie status endpoints and CookieExtractor all reopened and json.load()-ed the
+same auth files on every call, and the capture paths re-ran cookie keyword scans just
+to log them.
+
+The repository:
+- Parses a file once; re-parses only when its mtime or size changes (or on invalidate())
+- Precomputes cookies by domain, auth cookies and localStorage by origin
+- Memoizes keyword scans per keyword set (endpoints use wider lists than the capture logs)
+- Hands Playwright a ready storage_state dict (new_context(storage_state=...)) instead
+  of a path Playwright would read and parse again for every context
+- Shards the state by registrable domain: files from CookieExtractor can hold thousands
+  of cookies from the user's real browser, and a capture context only needs the shards
+  of its target site, the sites sharing its login (SSO groups) and the identity providers
+- Content digest doubles as the context pool / cookie warm-up key
+
+Entries are shared and must be treated as read-only - copy before modifying.
+
+Usage:
+    auth = auth_states.get(settings.auth_state_file)
+    if auth:
+        context = await browser.new_context(storage_state=auth.playwright_state())
+        print(auth.cookie_count, [c['name'] for c in auth.auth_cookies])
+
+    shards = auth.shards_for("https://app.tekioncloud.com/home", groups=[["tekion.com", "tekioncloud.com"]])
+    context = await browser.new_context(storage_state=auth.playwright_state(shards))
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple, Union
+from urllib.parse import urlparse
+
+
+# Keywords that mark auth cookies / localStorage items in capture logs
+AUTH_COOKIE_KEYWORDS = ('token', 'session', 'auth', 'sid', 'jsession')
+AUTH_STORAGE_KEYWORDS = ('token', 'auth', 'user', 'session')
+
+# Public suffixes with two labels, where the registrable domain takes three (no PSL dependency)
+MULTI_LABEL_SUFFIXES = frozenset({
+    'co.uk', 'org.uk', 'ac.uk', 'gov.uk', 'com.au', 'net.au', 'org.au', 'co.nz', 'co.jp',
+    'co.in', 'co.za', 'com.br', 'com.mx', 'com.cn', 'com.hk', 'com.sg', 'com.tr',
+})
+
+
+def registrable_domain(host: str) -> str:
+    """
+    Registrable domain (shard name) of a host or cookie domain.
+
+    ".app.example.co.uk" -> "example.co.uk", "preprodapp.tekioncloud.com" -> "tekioncloud.com".
+    IPs and single-label hosts (localhost) are their own shard.
+    """
+    host = (host or '').strip().lstrip('.').rstrip('.').lower()
+    labels = host.split('.')
+    if len(labels) <= 2 or ':' in host or host.replace('.', '').isdigit():
+        return host
+    take = 3 if '.'.join(labels[-2:]) in MULTI_LABEL_SUFFIXES else 2
+    return '.'.join(labels[-take:])
+
+
+def _matches(name: str, keywords: Sequence[str]) -> bool:
+    name = name.lower()
+    return any(keyword in name for keyword in keywords)
+
+
+@dataclass(eq=False)
+class AuthState:
+    """One parsed storage_state file plus derived indexes (read-only)"""
+    path: str
+    digest: str  # sha1 of the file contents
+    mtime_ns: int
+    size: int
+    data: Dict[str, Any]
+    cookies_by_domain: Dict[str, List[dict]] = field(default_factory=dict)
+    local_storage_by_origin: Dict[str, List[dict]] = field(default_factory=dict)
+    cookies_by_site: Dict[str, List[dict]] = field(default_factory=dict)  # Shards: registrable domain -> cookies
+    origins_by_site: Dict[str, List[dict]] = field(default_factory=dict)  # Shards: registrable domain -> origins
+    loaded_at: float = field(default_factory=time.time)
+    _keyword_scans: Dict[Tuple[str, Tuple[str, ...]], list] = field(default_factory=dict, repr=False)
+    _shard_states: Dict[Tuple[str, ...], Dict[str, Any]] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def parse(cls, path: str, raw: bytes, mtime_ns: int, size: int) -> "AuthState":
+        data = json.loads(raw)
+        state = cls(
+            path=path,
+            digest=hashlib.sha1(raw).hexdigest(),
+            mtime_ns=mtime_ns,
+            size=size,
+            data=data,
+        )
+        for cookie in state.cookies:
+            domain = cookie.get('domain', '')
+            state.cookies_by_domain.setdefault(domain, []).append(cookie)
+            state.cookies_by_site.setdefault(registrable_domain(domain), []).append(cookie)
+        for origin in data.get('origins', []):
+            state.local_storage_by_origin[origin.get('origin', '')] = origin.get('localStorage', [])
+            site = registrable_domain(urlparse(origin.get('origin', '')).hostname or '')
+            state.origins_by_site.setdefault(site, []).append(origin)
+        return state
+
+    @property
+    def cookies(self) -> List[dict]:
+        return self.data.get('cookies', [])
+
+    @property
+    def cookie_count(self) -> int:
+        return len(self.cookies)
+
+    @property
+    def local_storage_count(self) -> int:
+        return sum(len(items) for items in self.local_storage_by_origin.values())
+
+    @property
+    def local_storage_items(self) -> List[dict]:
+        return [item for items in self.local_storage_by_origin.values() for item in items]
+
+    @property
+    def auth_cookies(self) -> List[dict]:
+        """Cookies whose name contains an AUTH_COOKIE_KEYWORDS keyword"""
+        return self.cookies_matching(AUTH_COOKIE_KEYWORDS)
+
+    @property
+    def auth_storage_items(self) -> List[dict]:
+        """localStorage items whose name contains an AUTH_STORAGE_KEYWORDS keyword"""
+        return self.storage_items_matching(AUTH_STORAGE_KEYWORDS)
+
+    def cookies_matching(self, keywords: Sequence[str]) -> List[dict]:
+        """Cookies whose name contains any keyword (memoized per keyword set)"""
+        return self._scan("cookies", tuple(keywords), self.cookies)
+
+    def storage_items_matching(self, keywords: Sequence[str]) -> List[dict]:
+        """localStorage items (all origins) whose name contains any keyword (memoized per keyword set)"""
+        return self._scan("storage", tuple(keywords), self.local_storage_items)
+
+    @property
+    def sites(self) -> FrozenSet[str]:
+        """Shards present in this file (registrable domains with cookies or localStorage)"""
+        return frozenset(self.cookies_by_site) | frozenset(self.origins_by_site)
+
+    def shards_for(
+        self,
+        url: str,
+        groups: Sequence[Sequence[str]] = (),
+        always: Sequence[str] = ()
+    ) -> Tuple[str, ...]:
+        """
+        Shards a capture of `url` needs.
+
+        Args:
+            url: Target URL
+            groups: Registrable domains sharing a login - all shards of the target's group load
+            always: Shards added to every capture (identity providers)
+
+        Returns:
+            Sorted shard names present in this file (empty = no relevant auth state)
+        """
+        site = registrable_domain(urlparse(url).hostname or '')
+        wanted = {site} | {registrable_domain(domain) for domain in always}
+        for group in groups:
+            members = {registrable_domain(domain) for domain in group}
+            if site in members:
+                wanted |= members
+        return tuple(sorted(wanted & self.sites))
+
+    def playwright_state(self, shards: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """
+        storage_state object for browser.new_context() (no file read/parse by Playwright).
+
+        Args:
+            shards: Only these shards (see shards_for); None = the whole file
+        """
+        if shards is None:
+            return {"cookies": self.cookies, "origins": self.data.get('origins', [])}
+        key = tuple(shards)
+        state = self._shard_states.get(key)
+        if state is None:
+            state = {
+                "cookies": [cookie for site in key for cookie in self.cookies_by_site.get(site, [])],
+                "origins": [origin for site in key for origin in self.origins_by_site.get(site, [])],
+            }
+            self._shard_states[key] = state
+        return state
+
+    def domain_cookies(self, shards: Optional[Sequence[str]] = None) -> Dict[str, List[dict]]:
+        """cookies_by_domain limited to the given shards (None = all)"""
+        if shards is None:
+            return self.cookies_by_domain
+        wanted = set(shards)
+        return {domain: cookies for domain, cookies in self.cookies_by_domain.items()
+                if registrable_domain(domain) in wanted}
+
+    def _scan(self, kind: str, keywords: Tuple[str, ...], items: List[dict]) -> list:
+        key = (kind, keywords)
+        found = self._keyword_scans.get(key)
+        if found is None:
+            found = [item for item in items if _matches(item.get('name', ''), keywords)]
+            self._keyword_scans[key] = found
+        return found
+
+
+class AuthStateRepository:
+    """Process-wide cache of parsed auth files, invalidated by mtime/size"""
+
+    def __init__(self):
+        self._entries: Dict[str, AuthState] = {}
+        self._lock = threading.Lock()
+        self.parses = 0  # Files actually read + parsed (for stats/logs)
+
+    def get(self, path: Union[str, Path, None]) -> Optional[AuthState]:
+        """
+        Parsed auth state for `path`.
+
+        Returns:
+            AuthState, or None if the file doesn't exist or isn't valid JSON
+        """
+        if not path:
+            return None
+        key = os.path.abspath(path)
+        try:
+            stat = os.stat(key)
+        except OSError:
+            with self._lock:
+                self._entries.pop(key, None)
+            return None
+
+        with self._lock:
+            cached = self._entries.get(key)
+        if cached is not None and (cached.mtime_ns, cached.size) == (stat.st_mtime_ns, stat.st_size):
+            return cached
+
+        try:
+            with open(key, 'rb') as f:
+                raw = f.read()
+            state = AuthState.parse(str(path), raw, stat.st_mtime_ns, stat.st_size)
+        except (OSError, ValueError) as e:
+            print(f"   ⚠️  Could not parse auth state {path}: {e}")
+            return None
+
+        with self._lock:
+            self._entries[key] = state
+            self.parses += 1
+        return state
+
+    def invalidate(self, path: Union[str, Path, None] = None):
+        """Drop one cached file (after writing it) or everything"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(path), None)
+
+
+# Shared by the capture service, the API endpoints and CookieExtractor
+auth_states = AuthStateRepository()
@@ -0,0 +1,269 @@
+"""
+⚡ Browser Pool
+Keeps launched browsers alive per launch mode so mixed workloads don't thrash
+
+A capture asks for a browser by BrowserKey (engine × headless × stealth × persistent).
+Browsers for different keys live side by side instead of the old singleton that was
+closed whenever the requested mode changed.
+
+Features:
+- Configurable number of browsers per key (captures are spread across them)
+- Idle eviction (browsers unused for `idle_timeout` seconds are closed)
+- LRU cap on the total number of live browsers
+- Recycling after `max_pages_per_browser` pages (prevents memory creep)
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class BrowserKey:
+    """Launch configuration that identifies interchangeable browsers"""
+    engine: str  # "playwright" or "camoufox"
+    headless: bool
+    stealth: bool
+    persistent: bool  # Browser IS a BrowserContext (launch_persistent_context / Camoufox)
+
+    def label(self) -> str:
+        """Short human-readable label for logs"""
+        parts = [self.engine, "headless" if self.headless else "headful"]
+        if self.stealth:
+            parts.append("stealth")
+        if self.persistent:
+            parts.append("persistent")
+        return "/".join(parts)
+
+
+@dataclass(eq=False)
+class PooledBrowser:
+    """A launched browser plus the bookkeeping the pool needs"""
+    key: BrowserKey
+    browser: Any
+    closer: Callable[[], Awaitable[None]]
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    in_use: int = 0  # Number of captures currently holding this browser
+    page_count: int = 0  # Pages opened since launch (used for recycling)
+    stealth_injected: bool = False  # Stealth scripts already injected into this browser
+    closed: bool = False
+
+    def __post_init__(self):
+        # Mark the entry dead as soon as Playwright reports it closed/disconnected
+        # (user closed the window, browser crashed, persistent context closed, ...)
+        event = "close" if self.key.persistent else "disconnected"
+        try:
+            self.browser.on(event, lambda *_: setattr(self, "closed", True))
+        except Exception:
+            pass
+
+    @property
+    def is_persistent_context(self) -> bool:
+        """For persistent contexts the browser IS the context"""
+        return self.key.persistent
+
+    def is_alive(self) -> bool:
+        """Check if the browser can still be used"""
+        if self.closed:
+            return False
+        is_connected = getattr(self.browser, "is_connected", None)
+        if callable(is_connected):
+            try:
+                return bool(is_connected())
+            except Exception:
+                return False
+        return True
+
+
+# Launcher: creates a browser for a key and returns (browser, async closer)
+Launcher = Callable[[BrowserKey], Awaitable[Tuple[Any, Callable[[], Awaitable[None]]]]]
+
+
+class BrowserPool:
+    """
+    Keyed pool of browsers with per-key size, idle eviction and an LRU cap.
+
+    Usage:
+        entry = await pool.acquire(key)
+        try:
+            context = await entry.browser.new_context(...)
+        finally:
+            pool.release(entry)
+    """
+
+    def __init__(
+        self,
+        launcher: Launcher,
+        max_per_key: int = 1,
+        max_browsers: int = 4,
+        idle_timeout: float = 300.0,
+        max_pages_per_browser: Optional[int] = None
+    ):
+        """
+        Args:
+            launcher: Coroutine that launches a browser for a BrowserKey
+            max_per_key: Maximum browsers per key (persistent keys are always 1)
+            max_browsers: Maximum live browsers across all keys (LRU eviction)
+            idle_timeout: Close browsers that have been idle this many seconds
+            max_pages_per_browser: Recycle a browser after this many pages (None = never)
+        """
+        self._launcher = launcher
+        self.max_per_key = max(1, max_per_key)
+        self.max_browsers = max(1, max_browsers)
+        self.idle_timeout = idle_timeout
+        self.max_pages_per_browser = max_pages_per_browser
+
+        self._entries: Dict[BrowserKey, List[PooledBrowser]] = {}
+        self._key_locks: Dict[BrowserKey, asyncio.Lock] = {}
+        self._reaper_task: Optional[asyncio.Task] = None
+
+    # ========================================
+    # Public API
+    # ========================================
+
+    async def acquire(self, key: BrowserKey) -> PooledBrowser:
+        """
+        Get a browser for `key`, launching one if needed.
+
+        Picks the least-loaded live browser for the key. A new browser is launched
+        when none exists, or when all are busy and the key is below its size limit.
+        The caller MUST call release() when done.
+        """
+        self._ensure_reaper()
+        await self.evict_idle()
+
+        lock = self._key_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            entries = self._entries.setdefault(key, [])
+
+            # Drop dead browsers and recycle worn-out idle ones
+            to_close = [e for e in entries if not e.is_alive()]
+            if self.max_pages_per_browser:
+                to_close += [
+                    e for e in entries
+                    if e.is_alive() and e.in_use == 0 and e.page_count >= self.max_pages_per_browser
+                ]
+            for entry in to_close:
+                if entry.page_count and entry.is_alive():
+                    print(f"   ♻️  Recycling {key.label()} browser after {entry.page_count} pages")
+                await self._close_entry(entry)
+
+            entry = min(entries, key=lambda e: e.in_use, default=None)
+            key_limit = 1 if key.persistent else self.max_per_key
+
+            if entry is None or (entry.in_use > 0 and len(entries) < key_limit):
+                await self._make_room()
+                print(f"🚀 Browser pool: launching {key.label()} browser "
+                      f"({len(entries) + 1}/{key_limit} for this mode, {self.size() + 1} total)")
+                browser, closer = await self._launcher(key)
+                entry = PooledBrowser(key=key, browser=browser, closer=closer)
+                entries.append(entry)
+            else:
+                print(f"   ⚡ Browser pool: reusing {key.label()} browser ({entry.in_use} active captures)")
+
+            entry.in_use += 1
+            entry.last_used = time.monotonic()
+            return entry
+
+    def release(self, entry: Optional[PooledBrowser]):
+        """Return a browser to the pool (safe to call with None)"""
+        if entry is None:
+            return
+        entry.in_use = max(0, entry.in_use - 1)
+        entry.last_used = time.monotonic()
+
+    async def evict_idle(self) -> int:
+        """
+        Close browsers that have been idle longer than idle_timeout.
+
+        Returns:
+            Number of browsers closed
+        """
+        now = time.monotonic()
+        idle = [
+            e for e in self._all_entries()
+            if e.in_use == 0 and (now - e.last_used) > self.idle_timeout
+        ]
+        for entry in idle:
+            print(f"   🧹 Browser pool: closing idle {entry.key.label()} browser "
+                  f"({now - entry.last_used:.0f}s idle)")
+            await self._close_entry(entry)
+        return len(idle)
+
+    async def close_all(self):
+        """Close every browser in the pool and stop the idle reaper"""
+        if self._reaper_task is not None:
+            self._reaper_task.cancel()
+            self._reaper_task = None
+        for entry in self._all_entries():
+            await self._close_entry(entry)
+        self._entries.clear()
+
+    def size(self) -> int:
+        """Number of live browsers across all keys"""
+        return sum(1 for _ in self._all_entries())
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool state (for diagnostics endpoints/logging)"""
+        now = time.monotonic()
+        return {
+            "total": self.size(),
+            "max_browsers": self.max_browsers,
+            "max_per_key": self.max_per_key,
+            "idle_timeout": self.idle_timeout,
+            "browsers": [
+                {
+                    "key": e.key.label(),
+                    "in_use": e.in_use,
+                    "page_count": e.page_count,
+                    "idle_seconds": round(now - e.last_used, 1),
+                    "age_seconds": round(now - e.created_at, 1),
+                }
+                for e in self._all_entries()
+            ],
+        }
+
+    # ========================================
+    # Internals
+    # ========================================
+
+    def _all_entries(self) -> List[PooledBrowser]:
+        return [e for entries in self._entries.values() for e in entries]
+
+    async def _make_room(self):
+        """Evict least-recently-used idle browsers until there is room for one more"""
+        while self.size() >= self.max_browsers:
+            idle = [e for e in self._all_entries() if e.in_use == 0]
+            if not idle:
+                # Every browser is busy - go over the cap rather than deadlock
+                print(f"   ⚠️  Browser pool: all {self.size()} browsers busy, exceeding cap of {self.max_browsers}")
+                return
+            lru = min(idle, key=lambda e: e.last_used)
+            print(f"   🧹 Browser pool: evicting LRU {lru.key.label()} browser (cap {self.max_browsers})")
+            await self._close_entry(lru)
+
+    async def _close_entry(self, entry: PooledBrowser):
+        entries = self._entries.get(entry.key, [])
+        if entry in entries:
+            entries.remove(entry)
+        entry.closed = True
+        try:
+            await entry.closer()
+        except Exception as e:
+            print(f"   ⚠️  Error closing {entry.key.label()} browser: {e}")
+
+    def _ensure_reaper(self):
+        """Start the background idle reaper (once per event loop)"""
+        if self._reaper_task is None or self._reaper_task.done():
+            self._reaper_task = asyncio.create_task(self._reap_loop())
+
+    async def _reap_loop(self):
+        interval = max(5.0, self.idle_timeout / 2)
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                await self.evict_idle()
+        except asyncio.CancelledError:
+            pass
@@ -0,0 +1,231 @@
+"""
+⚡ Capture Scheduler
+Process-wide admission control for screenshot captures
+
+Every capture (from every concurrent API request) waits for a slot here before it
+opens a page. Slots are handed out from a single FIFO queue when:
+- fewer than `max_concurrent` captures are running (global cap), and
+- the URL's host has a token in its token bucket (per-host rate limit)
+
+A host that is out of tokens does not block the queue - later URLs for other hosts
+are admitted first, and the rate-limited URL goes as soon as its bucket refills.
+
+Usage:
+    async with scheduler.slot(url):
+        await screenshot_service.capture(url=url, ...)
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, up to `capacity` stored"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def time_until_token(self) -> float:
+        """Seconds until one token is available (0 if available now)"""
+        if self.rate <= 0:
+            return 0.0  # Rate limiting disabled
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def is_full(self) -> bool:
+        """True once the bucket has refilled to capacity (indistinguishable from a new one)"""
+        if self.rate <= 0:
+            return True
+        self._refill()
+        return self.tokens >= self.capacity
+
+    def take(self):
+        """Consume one token (call only when time_until_token() == 0)"""
+        if self.rate <= 0:
+            return
+        self._refill()
+        self.tokens -= 1
+
+
+@dataclass(eq=False)
+class _Waiter:
+    host: str
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+def _host_of(url: str) -> str:
+    try:
+        return urlparse(url).netloc.lower() or url
+    except Exception:
+        # If URL parsing fails, treat as unique host
+        return url
+
+
+class CaptureScheduler:
+    """
+    Global concurrency cap + per-host token buckets, served from one queue.
+    """
+
+    def __init__(self, max_concurrent: int = 3, host_rate: float = 2.0, host_burst: int = 4):
+        """
+        Args:
+            max_concurrent: Maximum captures running at once (process-wide)
+            host_rate: Captures started per second per host (0 = unlimited)
+            host_burst: Captures a host may start back-to-back before rate limiting kicks in
+        """
+        self.max_concurrent = max(1, max_concurrent)
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+
+        self._queue: Deque[_Waiter] = deque()
+        self._active = 0
+        self._host_active: Dict[str, int] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    # ========================================
+    # Public API
+    # ========================================
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        """Wait for a capture slot for `url`; the slot is released on exit"""
+        host = _host_of(url)
+        await self.acquire(host)
+        try:
+            yield
+        finally:
+            self.release(host)
+
+    async def acquire(self, host: str):
+        """Wait in the queue until `host` may start a capture (pair with release())"""
+        self._ensure_dispatcher()
+        waiter = _Waiter(host=host, future=asyncio.get_running_loop().create_future())
+        self._queue.append(waiter)
+        self._wakeup.set()
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Slot was granted just as we were cancelled - give it back
+                self.release(host)
+            else:
+                try:
+                    self._queue.remove(waiter)
+                except ValueError:
+                    pass
+            raise
+
+        waited = time.monotonic() - waiter.enqueued_at
+        if waited > 1.0:
+            print(f"   ⏳ Scheduler: {host} waited {waited:.1f}s for a capture slot "
+                  f"({self._active}/{self.max_concurrent} running, {len(self._queue)} queued)")
+
+    def release(self, host: str):
+        """Give a slot back and let the dispatcher admit the next capture"""
+        self._active = max(0, self._active - 1)
+        remaining = self._host_active.get(host, 1) - 1
+        if remaining > 0:
+            self._host_active[host] = remaining
+        else:
+            self._host_active.pop(host, None)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of scheduler state (for diagnostics endpoints/logging)"""
+        return {
+            "running": self._active,
+            "queued": len(self._queue),
+            "max_concurrent": self.max_concurrent,
+            "host_rate": self.host_rate,
+            "host_burst": self.host_burst,
+            "hosts": dict(self._host_active),
+        }
+
+    # ========================================
+    # Internals
+    # ========================================
+
+    def _ensure_dispatcher(self):
+        """Start the dispatcher (once per event loop)"""
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch_loop())
+
+    def _bucket(self, host: str) -> TokenBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.host_rate, self.host_burst)
+        return bucket
+
+    def _admit_ready(self) -> Optional[float]:
+        """
+        Admit queued captures in FIFO order (skipping rate-limited hosts).
+
+        Returns:
+            Seconds until the next rate-limited host gets a token, or None
+        """
+        next_token_in = None
+        for waiter in list(self._queue):
+            if self._active >= self.max_concurrent:
+                break
+            if waiter.future.done():
+                self._queue.remove(waiter)  # Cancelled while queued
+                continue
+
+            bucket = self._bucket(waiter.host)
+            wait = bucket.time_until_token()
+            if wait > 0:
+                next_token_in = wait if next_token_in is None else min(next_token_in, wait)
+                continue
+
+            bucket.take()
+            self._queue.remove(waiter)
+            self._active += 1
+            self._host_active[waiter.host] = self._host_active.get(waiter.host, 0) + 1
+            waiter.future.set_result(None)
+
+        self._prune_buckets()
+        return next_token_in
+
+    def _prune_buckets(self):
+        """Drop buckets of idle hosts that have refilled (a fresh bucket would be identical)"""
+        queued = {waiter.host for waiter in self._queue}
+        idle = [
+            host for host, bucket in self._buckets.items()
+            if host not in self._host_active and host not in queued and bucket.is_full()
+        ]
+        for host in idle:
+            del self._buckets[host]
+
+    async def _dispatch_loop(self):
+        while True:
+            self._wakeup.clear()
+            next_token_in = self._admit_ready()
+            try:
+                if next_token_in is None:
+                    await self._wakeup.wait()
+                else:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=next_token_in)
+            except asyncio.TimeoutError:
+                pass
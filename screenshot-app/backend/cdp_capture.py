@@ -0,0 +1,115 @@
+"""
+⚡ Direct CDP Screenshots
+Page.captureScreenshot on a CDPSession, bypassing Playwright's screenshot machinery
+
+page.screenshot(full_page=False) runs Playwright's generic pipeline on every call
+(viewport bookkeeping, scrollbar/caret hiding, animation handling, an extra protocol
+round trip or two). Segmented captures call it dozens of times per page.
+
+This engine sends Page.captureScreenshot directly with:
+- optimizeForSpeed: faster (larger) PNG encoding in Chromium
+- fromSurface: capture from the compositor surface
+- clip + captureBeyondViewport: render any document region without scrolling, so a
+  window-scrolled page can be cut into segments with no scroll/settle per segment
+
+Chromium only (Playwright Chromium, Patchright, Rebrowser, CDP-connected Chrome);
+open_cdp_screenshotter() returns None for other engines so callers can fall back.
+
+Usage:
+    shooter = await open_cdp_screenshotter(page)
+    png = await shooter.capture()                                  # Current viewport
+    png = await shooter.capture(clip=(0, 2160, 1920, 1080))        # Any region, no scrolling
+    await shooter.detach()
+"""
+
+import base64
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+
+@dataclass
+class LayoutMetrics:
+    """CSS-pixel geometry from Page.getLayoutMetrics"""
+    viewport_width: int
+    viewport_height: int
+    content_width: int
+    content_height: int
+    scroll_x: float = 0.0
+    scroll_y: float = 0.0
+
+
+class CdpScreenshotter:
+    """Page.captureScreenshot over a dedicated CDPSession"""
+
+    def __init__(self, session):
+        self.session = session
+        self.captures = 0
+
+    async def capture(
+        self,
+        clip: Optional[Tuple[float, float, float, float]] = None,
+        image_type: str = "png",
+        quality: Optional[int] = None,
+        optimize_for_speed: bool = True
+    ) -> bytes:
+        """
+        Capture the viewport, or a document region when `clip` is given.
+
+        Args:
+            clip: (x, y, width, height) in document CSS pixels - rendered beyond the viewport, no scrolling
+            image_type: "png", "jpeg" or "webp" (Chromium encodes)
+            quality: JPEG/WebP quality (1-100)
+            optimize_for_speed: Faster encoding at the cost of file size
+
+        Returns:
+            Encoded image bytes
+        """
+        params = {
+            "format": image_type,
+            "fromSurface": True,
+            "optimizeForSpeed": optimize_for_speed,
+        }
+        if quality is not None and image_type != "png":
+            params["quality"] = quality
+        if clip is not None:
+            x, y, width, height = clip
+            params["clip"] = {"x": x, "y": y, "width": width, "height": height, "scale": 1}
+            params["captureBeyondViewport"] = True
+        result = await self.session.send("Page.captureScreenshot", params)
+        self.captures += 1
+        return base64.b64decode(result["data"])
+
+    async def layout_metrics(self) -> LayoutMetrics:
+        """Viewport and content size in CSS pixels"""
+        metrics = await self.session.send("Page.getLayoutMetrics")
+        viewport = metrics.get("cssVisualViewport") or metrics["visualViewport"]
+        content = metrics.get("cssContentSize") or metrics["contentSize"]
+        return LayoutMetrics(
+            viewport_width=int(viewport["clientWidth"]),
+            viewport_height=int(viewport["clientHeight"]),
+            content_width=int(content["width"]),
+            content_height=int(content["height"]),
+            scroll_x=viewport.get("pageX", 0.0),
+            scroll_y=viewport.get("pageY", 0.0),
+        )
+
+    async def detach(self):
+        """Close the CDP session (the page stays open)"""
+        try:
+            await self.session.detach()
+        except Exception:
+            pass  # Page/browser already gone
+
+
+async def open_cdp_screenshotter(page) -> Optional[CdpScreenshotter]:
+    """
+    Open a CDPSession for direct screenshots.
+
+    Returns:
+        CdpScreenshotter, or None if the browser doesn't speak CDP (e.g. Camoufox/Firefox)
+    """
+    try:
+        session = await page.context.new_cdp_session(page)
+    except Exception:
+        return None
+    return CdpScreenshotter(session)
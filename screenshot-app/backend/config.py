@@ -38,9 +38,120 @@ class Settings(BaseSettings):
         default=3,
         ge=1,
         le=10,
-        description="Maximum number of concurrent screenshot captures"
+        description="Maximum number of concurrent screenshot captures (across all requests)"
     )
-    
+
+    per_host_rate: float = Field(
+        default=2.0,
+        ge=0.0,
+        le=50.0,
+        description="Captures started per second per host (token bucket refill rate, 0 = unlimited)"
+    )
+
+    per_host_burst: int = Field(
+        default=4,
+        ge=1,
+        le=50,
+        description="Captures a host may start back-to-back before rate limiting (token bucket size)"
+    )
+
+    # ===== Browser Pool Settings =====
+    browser_pool_size_per_key: int = Field(
+        default=1,
+        ge=1,
+        le=8,
+        description="Browsers kept per launch mode (engine × headless × stealth × persistent)"
+    )
+
+    browser_pool_max_browsers: int = Field(
+        default=4,
+        ge=1,
+        le=16,
+        description="Maximum live browsers across all modes (least recently used is evicted)"
+    )
+
+    browser_pool_idle_timeout: float = Field(
+        default=300.0,
+        ge=10.0,
+        description="Close pooled browsers that have been idle this long (seconds)"
+    )
+
+    # ===== Context Pool Settings =====
+    context_pool_warm_size: int = Field(
+        default=2,
+        ge=0,
+        le=8,
+        description="Pre-warmed browser contexts kept per configuration (0 = no pre-warming)"
+    )
+
+    context_pool_max_uses: int = Field(
+        default=20,
+        ge=1,
+        le=200,
+        description="Recycle a pooled browser context after this many captures"
+    )
+
+    # ===== Page Readiness Settings =====
+    readiness_max_wait_ms: int = Field(
+        default=10000,
+        ge=500,
+        le=60000,
+        description="Maximum time to wait for a page to become stable before capturing (ms)"
+    )
+
+    readiness_quiet_ms: int = Field(
+        default=500,
+        ge=100,
+        le=5000,
+        description="Quiet period (no fetch/XHR, no DOM mutations) that counts as stable (ms)"
+    )
+
+    # ===== Network Quiescence Settings (replaces Playwright 'networkidle') =====
+    network_idle_ms: int = Field(
+        default=500,
+        ge=100,
+        le=5000,
+        description="How long fetch/XHR traffic must stay quiet to count as idle (ms)"
+    )
+
+    network_idle_max_inflight: int = Field(
+        default=0,
+        ge=0,
+        le=10,
+        description="Requests allowed in flight while still considered idle"
+    )
+
+    network_long_request_ms: int = Field(
+        default=5000,
+        ge=1000,
+        le=60000,
+        description="Requests in flight longer than this are treated as long-lived (long-poll, streams) and ignored (ms)"
+    )
+
+    network_ignore_patterns: List[str] = Field(
+        default=[
+            r"google-analytics\.com",
+            r"googletagmanager\.com",
+            r"doubleclick\.net",
+            r"segment\.(io|com)",
+            r"hotjar",
+            r"sentry\.io",
+            r"newrelic|nr-data\.net",
+            r"datadoghq",
+            r"fullstory",
+            r"mixpanel",
+            r"amplitude",
+            r"/collect\b",
+            r"/beacon",
+            r"/heartbeat",
+            r"/socket\.io/",
+            r"/sockjs",
+            r"long-?poll",
+            r"/events/stream",
+        ],
+        description="URL regexes for requests the network tracker ignores (analytics, beacons, long-poll)"
+    )
+
     # ===== Logging Settings =====
     log_level: str = Field(default="INFO", description="Logging level")
     log_file_max_bytes: int = Field(
@@ -148,7 +259,153 @@ class Settings(BaseSettings):
         default=50,
         description="Default maximum number of segments"
     )
+
+    height_stabilize_quiet_ms: int = Field(
+        default=800,
+        ge=100,
+        le=10000,
+        description="Time the page must stop growing (at the bottom) before its height counts as stable (doubled in headful mode)"
+    )
+
+    height_stabilize_max_ms: int = Field(
+        default=15000,
+        ge=1000,
+        le=120000,
+        description="Maximum time spent stabilizing page height before segmented captures"
+    )
+
+    eager_load_jumps: int = Field(
+        default=4,
+        ge=1,
+        le=50,
+        description="Large scroll jumps used to trigger scroll-based lazy loaders before full-page captures"
+    )
+
+    eager_load_decode_timeout_ms: int = Field(
+        default=5000,
+        ge=0,
+        le=60000,
+        description="Maximum time to wait for eagerly loaded images to decode"
+    )
+
+    scroll_container_cache_size: int = Field(
+        default=256,
+        ge=1,
+        le=10000,
+        description="Apps (base_url / URL pattern) whose scroll container selector is remembered"
+    )
     
+    # ===== Hash Store Settings =====
+    hash_store_max_entries: int = Field(
+        default=200000,
+        ge=1000,
+        le=10000000,
+        description="Maximum cached image hashes (least recently used are evicted)"
+    )
+
+    hash_store_commit_batch: int = Field(
+        default=64,
+        ge=1,
+        le=10000,
+        description="Buffered hash writes per SQLite commit"
+    )
+
+    # ===== Image Worker Settings =====
+    image_worker_processes: int = Field(
+        default=2,
+        ge=0,
+        le=32,
+        description="Processes for image decode/hash/quality/encode (0 = background thread)"
+    )
+
+    # ===== Tiled Full-Page Settings =====
+    tiled_tile_height: int = Field(
+        default=4096,
+        ge=512,
+        le=16384,
+        description="Tile height in CSS px for tiled full-page captures (capped by the 16384px texture limit)"
+    )
+
+    tiled_max_height: int = Field(
+        default=200000,
+        ge=0,
+        le=2000000,
+        description="Maximum document height captured in tiled full-page mode (0 = unlimited)"
+    )
+
+    # ===== SPA Route Mode Settings =====
+    spa_route_ready_max_ms: int = Field(
+        default=5000,
+        ge=500,
+        le=60000,
+        description="Readiness budget after each client-side route change (ms)"
+    )
+
+    # ===== Cross-Domain Cookie Settings =====
+    cookie_warmup_visit_timeout_ms: int = Field(
+        default=10000,
+        ge=1000,
+        le=60000,
+        description="Timeout for each cookie domain visit during warm-up (ms)"
+    )
+
+    cookie_warmup_parallel_visits: int = Field(
+        default=5,
+        ge=1,
+        le=20,
+        description="Cookie domains visited concurrently during warm-up"
+    )
+
+    # ===== Auth Shard Settings =====
+    auth_sharding_enabled: bool = Field(
+        default=True,
+        description="Build capture contexts only from the auth state shards relevant to the target URL"
+    )
+
+    auth_shard_groups: List[List[str]] = Field(
+        default=[
+            ["tekion.com", "tekioncloud.com"],
+        ],
+        description="Registrable domains that share a login (SSO) - a capture on one loads the cookies of all"
+    )
+
+    auth_shard_sso_sites: List[str] = Field(
+        default=[
+            "okta.com",
+            "oktapreview.com",
+            "microsoftonline.com",
+            "auth0.com",
+            "onelogin.com",
+            "pingidentity.com",
+        ],
+        description="Identity provider domains whose shards are added to every capture (SSO redirects)"
+    )
+
+    # ===== Capture Job Settings =====
+    job_store_file: Path = Field(
+        default=Path("screenshots/.capture_jobs.sqlite3"),
+        description="SQLite database for durable capture jobs"
+    )
+
+    job_max_urls: int = Field(
+        default=20000,
+        ge=1,
+        le=100000,
+        description="Maximum URLs per capture job"
+    )
+
+    job_chunk_size: int = Field(
+        default=200,
+        ge=10,
+        le=5000,
+        description="Pending URLs handed to the capture pipeline at a time (bounds in-flight tasks)"
+    )
+
+    job_resume_on_startup: bool = Field(
+        default=True,
+        description="Resume jobs that were queued or running when the backend stopped"
+    )
+
     # ===== Auth State Settings =====
     auth_state_file: Path = Field(
         default=Path("auth_state.json"),
@@ -0,0 +1,338 @@
+"""
+⚡ Context Pool
+Keeps pre-warmed BrowserContexts ready per capture configuration
+
+Creating a context (viewport, locale, timezone, storage_state parsing) for every URL
+is a large share of per-URL overhead in big batches. The pool keeps up to `warm_size`
+idle contexts per ContextKey, hands them out, scrubs them after use and refills in
+the background.
+
+A pooled context belongs to one pooled browser (see browser_pool.py). Contexts whose
+browser has been closed, recycled or evicted are dropped automatically.
+
+Scrubbing after use:
+- All pages are closed (sessionStorage goes with them)
+- localStorage, IndexedDB, Cache Storage and service workers of every origin the context
+  navigated to are cleared over CDP, and the HTTP cache is dropped
+- localStorage seeded from the storage_state file (auth tokens) is written back for those
+  origins, from a snapshot taken right after the context was created
+- Cookies are reset to the snapshot taken right after the context was created
+- Contexts are recycled (closed) after `max_uses` captures
+
+Engines without CDP (Camoufox) can't clear origin storage, so their contexts are only
+reused if they never navigated.
+
+Contexts that received per-request state which can't be scrubbed (manual cookies /
+localStorage init scripts) should not be pooled - release them with reusable=False.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+from auth_state import auth_states
+from browser_pool import BrowserKey, PooledBrowser
+
+
+# Origin storage cleared by the scrub (cookies are reset separately)
+SCRUBBED_STORAGE_TYPES = "local_storage,indexeddb,websql,cache_storage,service_workers,file_systems"
+
+# Writes an origin's baseline localStorage back (runs on an empty, intercepted page of that origin)
+RESTORE_LOCAL_STORAGE_SCRIPT = """
+(items) => {
+    localStorage.clear();
+    for (const { name, value } of items) localStorage.setItem(name, value);
+}
+"""
+
+
+@dataclass(frozen=True)
+class ContextKey:
+    """Configuration that identifies interchangeable contexts"""
+    browser_key: BrowserKey
+    viewport_width: int
+    viewport_height: int
+    stealth: bool  # Stealth contexts get a rotated UA + randomized viewport at creation
+    storage_state: Optional[str] = None  # Path to the storage_state file (None = no auth state)
+    auth_digest: Optional[str] = None  # Digest of that file's contents
+    auth_shards: Optional[Tuple[str, ...]] = None  # Shards loaded from it (None = whole file)
+
+    def label(self) -> str:
+        """Short human-readable label for logs"""
+        label = f"{self.browser_key.label()} {self.viewport_width}x{self.viewport_height}"
+        if self.stealth:
+            label += " stealth"
+        if self.auth_digest:
+            label += f" auth:{self.auth_digest[:8]}"
+        if self.auth_shards is not None:
+            label += f" shards:{','.join(self.auth_shards) or '-'}"
+        return label
+
+
+@dataclass(eq=False)
+class PooledContext:
+    """A ready BrowserContext plus the bookkeeping the pool needs"""
+    key: ContextKey
+    context: Any
+    owner: PooledBrowser  # Pooled browser this context was created on
+    viewport: Tuple[int, int]  # Actual viewport (stealth contexts are randomized)
+    baseline_cookies: List[dict] = field(default_factory=list)
+    baseline_local_storage: Dict[str, List[dict]] = field(default_factory=dict)  # Origin -> seeded items
+    created_at: float = field(default_factory=time.monotonic)
+    uses: int = 0
+    closed: bool = False
+    origins: Set[str] = field(default_factory=set)  # Origins navigated to since the last scrub
+
+    def __post_init__(self):
+        try:
+            self.context.on("close", lambda *_: setattr(self, "closed", True))
+            self.context.on("page", self._track_page)
+        except Exception:
+            pass
+
+    def _track_page(self, page):
+        page.on("framenavigated", lambda frame: self._track_url(frame.url))
+
+    def _track_url(self, url: str):
+        parts = urlsplit(url)
+        if parts.scheme in ("http", "https") and parts.netloc:
+            self.origins.add(f"{parts.scheme}://{parts.netloc}")
+
+    def is_alive(self) -> bool:
+        """Check if the context (and its browser) can still be used"""
+        return not self.closed and not self.owner.closed and self.owner.is_alive()
+
+
+# Factory: creates a context on a browser for a key and returns (context, (width, height))
+ContextFactory = Callable[[Any, ContextKey], Awaitable[Tuple[Any, Tuple[int, int]]]]
+
+
+def storage_state_digest(path: Optional[str]) -> Optional[str]:
+    """
+    Digest of a storage_state file, used in ContextKey.
+
+    Contexts created from an older version of the auth state get a different
+    key, so a re-login never hands out contexts with stale cookies.
+
+    ⚡ Served from the auth state repository (the file is only re-read when it changes).
+
+    Returns:
+        Hex digest, or None if there is no auth state file
+    """
+    auth = auth_states.get(path)
+    return auth.digest if auth is not None else None
+
+
+class ContextPool:
+    """
+    Pre-warmed BrowserContexts per ContextKey.
+
+    Usage:
+        lease = await browser_pool.acquire(browser_key)
+        pooled = await context_pool.acquire(context_key, lease)
+        try:
+            page = await pooled.context.new_page()
+        finally:
+            await context_pool.release(pooled)
+            browser_pool.release(lease)
+    """
+
+    def __init__(self, factory: ContextFactory, warm_size: int = 2, max_uses: int = 20):
+        """
+        Args:
+            factory: Coroutine that creates a context on a browser for a ContextKey
+            warm_size: Idle contexts to keep ready per key (0 = no pre-warming)
+            max_uses: Close a context after this many captures
+        """
+        self._factory = factory
+        self.warm_size = max(0, warm_size)
+        self.max_uses = max(1, max_uses)
+
+        self._idle: Dict[ContextKey, List[PooledContext]] = {}
+        self._refill_tasks: Dict[ContextKey, asyncio.Task] = {}
+
+    # ========================================
+    # Public API
+    # ========================================
+
+    async def acquire(self, key: ContextKey, owner: PooledBrowser) -> PooledContext:
+        """
+        Get a ready context for `key` on the leased browser `owner`.
+
+        Uses an idle pre-warmed context when one exists, otherwise creates one.
+        Schedules a background refill so the next capture finds a warm context.
+        The caller MUST call release() when done.
+        """
+        idle = self._idle.setdefault(key, [])
+        pooled = None
+
+        for candidate in reversed(list(idle)):
+            if not candidate.is_alive():
+                # Browser was recycled/evicted (or context died) - drop it
+                idle.remove(candidate)
+                await self._close(candidate)
+            elif candidate.owner is owner and pooled is None:
+                idle.remove(candidate)
+                pooled = candidate
+            # Live contexts of another pooled browser with the same key stay warm
+
+        if pooled is None:
+            pooled = await self._create(key, owner)
+        else:
+            print(f"   ⚡ Context pool: using warm context ({key.label()}, use #{pooled.uses + 1})")
+
+        self._schedule_refill(key, owner)
+        return pooled
+
+    async def release(self, pooled: Optional[PooledContext], reusable: bool = True):
+        """
+        Return a context to the pool (safe to call with None).
+
+        Args:
+            pooled: Context from acquire()
+            reusable: False if the context received state that can't be scrubbed
+        """
+        if pooled is None:
+            return
+        pooled.uses += 1
+
+        idle = self._idle.setdefault(pooled.key, [])
+        if (
+            not reusable
+            or pooled.uses >= self.max_uses
+            or not pooled.is_alive()
+            or len(idle) >= self.warm_size
+        ):
+            await self._close(pooled)
+            return
+
+        if await self._scrub(pooled):
+            idle.append(pooled)
+        else:
+            await self._close(pooled)
+
+    async def close_all(self):
+        """Close every idle context and cancel pending refills"""
+        for task in self._refill_tasks.values():
+            task.cancel()
+        self._refill_tasks.clear()
+        for contexts in self._idle.values():
+            for pooled in contexts:
+                await self._close(pooled)
+        self._idle.clear()
+
+    def size(self) -> int:
+        """Number of idle (ready) contexts across all keys"""
+        return sum(len(contexts) for contexts in self._idle.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool state (for diagnostics endpoints/logging)"""
+        return {
+            "idle": self.size(),
+            "warm_size": self.warm_size,
+            "max_uses": self.max_uses,
+            "keys": {
+                key.label(): len(contexts)
+                for key, contexts in self._idle.items()
+                if contexts
+            },
+        }
+
+    # ========================================
+    # Internals
+    # ========================================
+
+    async def _create(self, key: ContextKey, owner: PooledBrowser) -> PooledContext:
+        context, viewport = await self._factory(owner.browser, key)
+        try:
+            baseline = await context.storage_state()
+        except Exception:
+            baseline = {}
+        return PooledContext(
+            key=key,
+            context=context,
+            owner=owner,
+            viewport=viewport,
+            baseline_cookies=baseline.get("cookies", []),
+            baseline_local_storage={
+                origin["origin"]: origin.get("localStorage", [])
+                for origin in baseline.get("origins", [])
+                if origin.get("localStorage")
+            },
+        )
+
+    async def _scrub(self, pooled: PooledContext) -> bool:
+        """Reset a used context to its freshly-created state (False = discard it instead)"""
+        try:
+            for page in list(pooled.context.pages):
+                await page.close()
+            if pooled.origins:
+                if pooled.key.browser_key.engine != "playwright":
+                    return False  # No CDP to clear origin storage with
+                await self._clear_origin_storage(pooled)
+            await pooled.context.clear_cookies()
+            if pooled.baseline_cookies:
+                await pooled.context.add_cookies(pooled.baseline_cookies)
+            return True
+        except Exception as e:
+            print(f"   ⚠️  Context pool: scrub failed, discarding context: {e}")
+            return False
+
+    async def _clear_origin_storage(self, pooled: PooledContext):
+        """
+        Clear storage of every visited origin and the HTTP cache over CDP, then write the
+        seeded localStorage of those origins back
+        """
+        page = await pooled.context.new_page()
+        try:
+            session = await pooled.context.new_cdp_session(page)
+            for origin in pooled.origins:
+                await session.send("Storage.clearDataForOrigin", {
+                    "origin": origin,
+                    "storageTypes": SCRUBBED_STORAGE_TYPES,
+                })
+            await session.send("Network.clearBrowserCache")
+            await session.detach()
+
+            seeded = [origin for origin in pooled.origins if origin in pooled.baseline_local_storage]
+            if seeded:
+                # Every request of this page is answered locally - restoring never hits the network
+                await page.route("**/*", lambda route: route.fulfill(status=200, content_type="text/html", body=""))
+                for origin in seeded:
+                    await page.goto(f"{origin}/")
+                    await page.evaluate(RESTORE_LOCAL_STORAGE_SCRIPT, pooled.baseline_local_storage[origin])
+        finally:
+            await page.close()
+        pooled.origins.clear()
+
+    async def _close(self, pooled: PooledContext):
+        if pooled.closed:
+            return
+        pooled.closed = True
+        try:
+            await pooled.context.close()
+        except Exception:
+            pass  # Browser may already be gone
+
+    def _schedule_refill(self, key: ContextKey, owner: PooledBrowser):
+        """Top up idle contexts for `key` in the background (one refill per key)"""
+        if self.warm_size == 0:
+            return
+        task = self._refill_tasks.get(key)
+        if task is not None and not task.done():
+            return
+        self._refill_tasks[key] = asyncio.create_task(self._refill(key, owner))
+
+    async def _refill(self, key: ContextKey, owner: PooledBrowser):
+        idle = self._idle.setdefault(key, [])
+        try:
+            while len([c for c in idle if c.owner is owner]) < self.warm_size and owner.is_alive():
+                pooled = await self._create(key, owner)
+                idle.append(pooled)
+            print(f"   🔥 Context pool: {len(idle)} warm context(s) ready for {key.label()}")
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"   ⚠️  Context pool: background refill failed for {key.label()}: {e}")
@@ -19,6 +19,8 @@ from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
 import shutil
 
+from auth_state import auth_states  # ⚡ Parsed storage_state files (mtime invalidation)
+
 # Try to import rookiepy (best option)
 try:
     import rookiepy
@@ -303,6 +305,7 @@ class CookieExtractor:
         filepath = self.storage_dir / (filename or "playwright_storage_state.json")
         with open(filepath, 'w') as f:
             json.dump(storage_state, f, indent=2)
+        auth_states.invalidate(filepath)
         
         print(f"💾 Saved {len(valid_cookies)} cookies to {filepath}")
         return str(filepath)
@@ -327,20 +330,19 @@ class CookieExtractor:
             return None
         
         try:
-            with open(filepath, 'r') as f:
-                storage_state = json.load(f)
+            # ⚡ Parsed once per file version by the shared auth state repository
+            state = auth_states.get(filepath)
+            if state is None:
+                return None
             
             # Validate cookies
-            cookies = storage_state.get("cookies", [])
-            valid_cookies, stats = self.validate_cookies(cookies)
+            valid_cookies, stats = self.validate_cookies(state.cookies)
             
             print(f"📂 Loaded storage state from {filepath}")
             print(f"   Valid: {stats['valid']}, Expired: {stats['expired']}")
             
-            # Update with valid cookies only
-            storage_state["cookies"] = valid_cookies
-            
-            return storage_state
+            # Update with valid cookies only (a copy - the cached state is shared)
+            return {**state.data, "cookies": valid_cookies}
         except Exception as e:
             print(f"❌ Failed to load storage state: {e}")
             return None
@@ -0,0 +1,180 @@
+"""
+⚡ Cross-Domain Cookie Warm-up
+Visits SSO cookie domains once per (context, auth state) instead of before every capture
+
+_setup_cross_domain_cookies used to re-read the storage_state JSON and goto() every
+cookie domain one after another (10s timeout each) before EVERY capture - with 5 SSO
+domains that's up to 50s of overhead per URL, repeated for every URL of a batch.
+
+Warm-up now:
+1. Takes the cookies grouped by domain from the auth state repository (parsed once),
+   limited to the context's auth shards - a sharded context never visits unrelated sites
+2. Skips domains whose cookies the context already holds (storage_state / add_cookies
+   put them there - a visit adds nothing)
+3. Visits the remaining domains concurrently (bounded), on throwaway pages
+4. Memoizes the result per (context, storage_state digest, auth shards); concurrent
+   captures on the same context share one warm-up. A warm-up with failed visits is
+   not memoized - the next capture retries (domains that got their cookies are skipped)
+5. On a memo hit, cookies the visits produced are re-added if the context was
+   scrubbed in between (context pool) - no navigation needed
+
+Usage:
+    warmup = CookieWarmup(visit_timeout_ms=10000, max_parallel=5)
+    result, cached = await warmup.ensure(context, "auth_state.json")
+"""
+
+import asyncio
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from auth_state import AUTH_COOKIE_KEYWORDS, auth_states
+
+
+@dataclass
+class WarmupResult:
+    """Outcome of warming one context for one auth state"""
+    domains: int
+    skipped: List[str] = field(default_factory=list)  # Cookies already present - not visited
+    visited: List[str] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+    cookies: List[dict] = field(default_factory=list)  # Cookies of visited domains after the visits
+    elapsed_ms: int = 0
+
+    def describe(self) -> str:
+        """One-line summary for logs"""
+        failed = f", {len(self.failed)} failed" if self.failed else ""
+        return (f"{self.domains} domains: {len(self.skipped)} already set, "
+                f"{len(self.visited)} visited{failed} in {self.elapsed_ms}ms")
+
+
+def _domain_url(domain: str) -> str:
+    return f"https://{domain.lstrip('.')}"
+
+
+def _cookie_key(cookie: dict) -> Tuple[str, str, str]:
+    return cookie.get('name', ''), cookie.get('domain', '').lstrip('.'), cookie.get('path', '/')
+
+
+class CookieWarmup:
+    """Memoized, parallel cross-domain cookie warm-up"""
+
+    def __init__(self, visit_timeout_ms: int = 10000, max_parallel: int = 5):
+        """
+        Args:
+            visit_timeout_ms: goto() timeout per domain visit
+            max_parallel: Domain visits in flight at once (per warm-up)
+        """
+        self.visit_timeout_ms = visit_timeout_ms
+        self.max_parallel = max(1, max_parallel)
+        # context -> {(digest, shards): warm-up task}; entries vanish with their context
+        self._warmups: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+    async def ensure(
+        self,
+        context,
+        storage_state_path: str,
+        shards: Optional[Sequence[str]] = None
+    ) -> Tuple[Optional[WarmupResult], bool]:
+        """
+        Warm `context` for this auth state unless it already was.
+
+        Args:
+            context: BrowserContext to warm
+            storage_state_path: Auth state file the context was created from
+            shards: Auth shards the context was built from (None = the whole file)
+
+        Returns:
+            (result, cached): result is None when there is no auth state file;
+            cached is True when an earlier warm-up of this context was reused
+        """
+        auth = auth_states.get(storage_state_path)
+        if auth is None:
+            return None, False
+        memo_key = (auth.digest, tuple(shards) if shards is not None else None)
+
+        per_context = self._warmups.setdefault(context, {})
+        task = per_context.get(memo_key)
+        cached = task is not None
+        if task is None:
+            task = asyncio.ensure_future(self._warm(context, auth.domain_cookies(shards)))
+            per_context[memo_key] = task
+
+        try:
+            # Shielded: a capture that times out must not cancel a warm-up others await
+            result = await asyncio.shield(task)
+        except Exception:
+            per_context.pop(memo_key, None)  # Retry on the next capture
+            raise
+
+        if result.failed and per_context.get(memo_key) is task:
+            per_context.pop(memo_key)  # Missing SSO cookies - retry on the next capture
+
+        if cached:
+            await self._restore(context, result)
+        return result, cached
+
+    # ---------- Internals ----------
+
+    async def _already_set(self, context, domain: str, cookies: List[dict]) -> bool:
+        """True if every unexpired cookie of this domain is already in the context"""
+        now = time.time()
+        wanted = {cookie['name'] for cookie in cookies
+                  if cookie.get('expires', -1) in (-1, None) or cookie['expires'] > now}
+        if not wanted:
+            return True  # Only expired cookies - a visit can't bring them back
+        present = {cookie['name'] for cookie in await context.cookies(_domain_url(domain))}
+        return wanted <= present
+
+    async def _visit(self, context, domain: str, limiter: asyncio.Semaphore) -> bool:
+        async with limiter:
+            page = await context.new_page()
+            try:
+                await page.goto(_domain_url(domain), wait_until='domcontentloaded', timeout=self.visit_timeout_ms)
+                return True
+            except Exception as e:
+                print(f"      ⚠️  Could not visit {_domain_url(domain)}: {str(e)[:100]}")
+                return False
+            finally:
+                await page.close()
+
+    async def _warm(self, context, cookies_by_domain: Dict[str, List[dict]]) -> WarmupResult:
+        started = time.monotonic()
+        groups = {domain: cookies for domain, cookies in cookies_by_domain.items() if domain}
+        result = WarmupResult(domains=len(groups))
+
+        present = await asyncio.gather(*(
+            self._already_set(context, domain, cookies) for domain, cookies in groups.items()
+        ))
+        pending = []
+        for (domain, cookies), is_set in zip(groups.items(), present):
+            if is_set:
+                result.skipped.append(domain)
+            else:
+                pending.append(domain)
+                print(f"   🌐 Visiting {domain} ({len(cookies)} cookies not set by storage_state)")
+
+        if pending:
+            limiter = asyncio.Semaphore(self.max_parallel)
+            visited = await asyncio.gather(*(self._visit(context, domain, limiter) for domain in pending))
+            for domain, ok in zip(pending, visited):
+                (result.visited if ok else result.failed).append(domain)
+            if result.visited:
+                result.cookies = await context.cookies([_domain_url(domain) for domain in result.visited])
+                auth_cookies = [c['name'] for c in result.cookies
+                                if any(keyword in c['name'].lower() for keyword in AUTH_COOKIE_KEYWORDS)]
+                if auth_cookies:
+                    print(f"      ✅ {len(auth_cookies)} auth cookies active: {', '.join(auth_cookies[:3])}")
+
+        result.elapsed_ms = int((time.monotonic() - started) * 1000)
+        return result
+
+    async def _restore(self, context, result: WarmupResult):
+        """Re-add cookies the visits produced if the context was scrubbed since"""
+        if not result.cookies:
+            return
+        present = {_cookie_key(cookie) for cookie in await context.cookies()}
+        missing = [cookie for cookie in result.cookies if _cookie_key(cookie) not in present]
+        if missing:
+            await context.add_cookies(missing)
@@ -0,0 +1,213 @@
+"""
+⚡ Hash Store
+Persistent, content-addressed cache of perceptual image hashes (SQLite, WAL mode)
+
+Replaces screenshots/.hash_cache.json, which was keyed by file path and rewritten in
+full (indent=2) after every new hash - O(n) per segment, and path keys went stale
+whenever _generate_filename produced the same name on the next run.
+
+- Keyed by a digest of the file's bytes (+ hash algorithm), so renamed/overwritten
+  files can never return a stale hash
+- WAL journal + batched commits (every `commit_every` writes or `commit_interval` seconds)
+- Size cap with LRU eviction (last_used is refreshed on reads, also batched)
+- Bulk lookup (get_many) for checking many files in one query
+
+Usage:
+    store = HashStore(Path("screenshots/.hash_store.sqlite3"))
+    digest = content_digest(filepath)
+    hash_val = store.get(digest, "ahash")
+    if hash_val is None:
+        hash_val = compute(...)
+        store.put(digest, "ahash", hash_val)
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+
+def content_digest(source: Union[str, Path, bytes]) -> str:
+    """
+    Digest of an image's bytes (the hash store key).
+
+    Args:
+        source: File path or raw bytes
+
+    Returns:
+        32-char hex digest (BLAKE2b-128)
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        digest.update(source)
+    else:
+        with open(source, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+class HashStore:
+    """
+    SQLite-backed perceptual hash cache keyed by (content digest, algorithm).
+
+    Thread-safe: one connection guarded by a lock (post-processing may run off the event loop).
+    """
+
+    # Max parameters per IN (...) query (SQLite's default limit is 999)
+    _LOOKUP_CHUNK = 500
+
+    def __init__(
+        self,
+        db_path: Path,
+        max_entries: int = 200000,
+        commit_every: int = 64,
+        commit_interval: float = 2.0
+    ):
+        """
+        Args:
+            db_path: SQLite database file
+            max_entries: Size cap - least recently used entries are evicted beyond it
+            commit_every: Commit after this many buffered writes
+            commit_interval: ...or when the oldest buffered write is this many seconds old
+        """
+        self.db_path = Path(db_path)
+        self.max_entries = max(1, max_entries)
+        self.commit_every = max(1, commit_every)
+        self.commit_interval = commit_interval
+
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[str, str], str] = {}  # Buffered writes (not yet committed)
+        self._touched: Dict[Tuple[str, str], float] = {}  # Buffered last_used updates
+        self._first_pending_at: Optional[float] = None
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS image_hashes (
+                digest TEXT NOT NULL,
+                algo TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (digest, algo)
+            ) WITHOUT ROWID
+        ''')
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_image_hashes_last_used ON image_hashes (last_used)")
+        self._conn.commit()
+        # Upper bound on the row count (exact COUNT(*) only when it may exceed the cap)
+        (self._approx_count,) = self._conn.execute("SELECT COUNT(*) FROM image_hashes").fetchone()
+
+    # ========================================
+    # Public API
+    # ========================================
+
+    def get(self, digest: str, algo: str) -> Optional[str]:
+        """Cached hash for a content digest, or None"""
+        return self.get_many([digest], algo).get(digest)
+
+    def get_many(self, digests: Iterable[str], algo: str) -> Dict[str, str]:
+        """
+        Bulk lookup.
+
+        Returns:
+            {digest: hash} for the digests that are cached (missing ones are omitted)
+        """
+        wanted = list(dict.fromkeys(digests))
+        found: Dict[str, str] = {}
+        now = time.time()
+        with self._lock:
+            for digest in wanted:
+                pending = self._pending.get((digest, algo))
+                if pending is not None:
+                    found[digest] = pending
+            remaining = [d for d in wanted if d not in found]
+            for i in range(0, len(remaining), self._LOOKUP_CHUNK):
+                chunk = remaining[i:i + self._LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT digest, hash FROM image_hashes WHERE algo = ? AND digest IN ({placeholders})",
+                    [algo, *chunk],
+                ).fetchall()
+                found.update(rows)
+            for digest in found:
+                self._touched[(digest, algo)] = now
+        return found
+
+    def put(self, digest: str, algo: str, hash_val: str):
+        """Buffer a hash; committed in batches"""
+        with self._lock:
+            self._pending[(digest, algo)] = hash_val
+            if self._first_pending_at is None:
+                self._first_pending_at = time.monotonic()
+            if (
+                len(self._pending) >= self.commit_every
+                or time.monotonic() - self._first_pending_at >= self.commit_interval
+            ):
+                self._flush_locked()
+
+    def flush(self):
+        """Commit buffered writes and LRU touches, then enforce the size cap"""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        """Flush and close the database"""
+        with self._lock:
+            self._flush_locked()
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM image_hashes").fetchone()
+            return count + len(self._pending)
+
+    # ========================================
+    # Internals
+    # ========================================
+
+    def _flush_locked(self):
+        if not self._pending and not self._touched:
+            return
+        now = time.time()
+        try:
+            with self._conn:  # One transaction per batch
+                if self._pending:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO image_hashes (digest, algo, hash, last_used) VALUES (?, ?, ?, ?)",
+                        [(digest, algo, hash_val, now) for (digest, algo), hash_val in self._pending.items()],
+                    )
+                    self._approx_count += len(self._pending)
+                if self._touched:
+                    self._conn.executemany(
+                        "UPDATE image_hashes SET last_used = ? WHERE digest = ? AND algo = ?",
+                        [(used, digest, algo) for (digest, algo), used in self._touched.items()],
+                    )
+                self._evict_locked()
+        except sqlite3.Error as e:
+            print(f"   ⚠️  Hash store commit failed: {e}")
+            # Non-critical - hashes are recomputed on the next miss
+        finally:
+            self._pending.clear()
+            self._touched.clear()
+            self._first_pending_at = None
+
+    def _evict_locked(self):
+        """Drop least recently used entries beyond max_entries"""
+        if self._approx_count <= self.max_entries:
+            return  # Can't be over the cap - skip the COUNT(*)
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM image_hashes").fetchone()
+        excess = count - self.max_entries
+        self._approx_count = count
+        if excess <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM image_hashes WHERE (digest, algo) IN "
+            "(SELECT digest, algo FROM image_hashes ORDER BY last_used ASC LIMIT ?)",
+            (excess,),
+        )
+        self._approx_count = self.max_entries
+        print(f"   🧹 Hash store: evicted {excess} least recently used hashes (cap: {self.max_entries})")
@@ -0,0 +1,154 @@
+"""
+⚡ Height Stabilizer
+Push-based "has the page stopped growing?" check for segmented captures
+
+The old loop scrolled by one viewport, slept 0.3-0.5s and evaluated scrollHeight up to
+20-30 times: stable pages still paid ~3s, infinite feeds paid the full 10-21s.
+
+stabilize_height() runs in ONE page.evaluate() round trip:
+- A ResizeObserver (on the scroll container's children) and a MutationObserver (on the
+  container subtree) record when the content last changed
+- The container is stepped down one viewport at a time to trigger lazy/infinite loading
+- The promise resolves when the bottom is reached and nothing changed for `quiet_ms`,
+  when the height reaches `max_height` (segment budget), or when `max_ms` runs out
+- The container is scrolled back to the top and the final height is returned
+
+Usage:
+    result = await stabilize_height(page, quiet_ms=800, max_ms=15000, max_height=50 * 1080)
+    total_height = result.height
+"""
+
+from dataclasses import dataclass
+
+
+# Uses window.__scrollableElement (scroll_detector.py) or the window
+HEIGHT_STABILIZE_SCRIPT = """
+async ({ quietMs, maxMs, maxHeight, stepIntervalMs }) => {
+    const start = performance.now();
+    const el = window.__scrollableElement && window.__scrollableElement.isConnected
+        ? window.__scrollableElement : null;
+    const root = el || document.documentElement;
+
+    const height = () => el ? el.scrollHeight : Math.max(document.documentElement.scrollHeight, document.body.scrollHeight);
+    const viewport = () => el ? el.clientHeight : window.innerHeight;
+    const scrollTop = () => el ? el.scrollTop : window.scrollY;
+    const scrollTo = (top) => el ? (el.scrollTop = top) : window.scrollTo(0, top);
+    const atBottom = () => scrollTop() + viewport() >= height() - 5;
+
+    let lastHeight = height();
+    let lastChange = performance.now();
+    let changes = 0;
+    // Only growth counts as activity (attribute churn from carousels/clocks must not block)
+    const checkHeight = () => {
+        const current = height();
+        if (current !== lastHeight) {
+            lastHeight = current;
+            lastChange = performance.now();
+            changes++;
+        }
+    };
+
+    // Content growth shows up as resized children and/or added nodes
+    const resizeObserver = new ResizeObserver(checkHeight);
+    resizeObserver.observe(root);
+    for (const child of (el || document.body).children) resizeObserver.observe(child);
+    const mutationObserver = new MutationObserver((records) => {
+        let added = false;
+        for (const record of records) {
+            for (const node of record.addedNodes) {
+                if (node.nodeType !== 1) continue;
+                resizeObserver.observe(node);
+                added = true;
+            }
+        }
+        if (added) lastChange = performance.now();  // New content may still be laying out
+        checkHeight();
+    });
+    mutationObserver.observe(el || document.body, { childList: true, subtree: true });
+
+    let reason = 'budget';
+    try {
+        while (performance.now() - start < maxMs) {
+            if (maxHeight && height() >= maxHeight) { reason = 'max_height'; break; }
+            if (!atBottom()) {
+                // Step down one viewport to trigger lazy loading / infinite scroll
+                scrollTo(scrollTop() + viewport());
+            } else if (performance.now() - lastChange >= quietMs) {
+                reason = 'quiet';
+                break;
+            }
+            await new Promise(resolve => setTimeout(resolve, stepIntervalMs));
+        }
+    } finally {
+        resizeObserver.disconnect();
+        mutationObserver.disconnect();
+    }
+
+    scrollTo(0);
+    return {
+        height: height(),
+        clientHeight: viewport(),
+        reason,
+        changes,
+        usedElement: !!el,
+        elapsedMs: Math.round(performance.now() - start),
+    };
+}
+"""
+
+
+@dataclass
+class HeightResult:
+    """Outcome of a height stabilization"""
+    height: int  # Final scrollHeight of the container (or document)
+    client_height: int
+    reason: str  # "quiet", "max_height" or "budget"
+    changes: int = 0  # Times the height changed while stabilizing
+    used_element: bool = False
+    elapsed_ms: int = 0
+
+    def describe(self) -> str:
+        """One-line summary for logs"""
+        reasons = {
+            "quiet": "stable",
+            "max_height": "hit segment budget",
+            "budget": "time budget exhausted",
+        }
+        return (f"{self.height}px ({reasons.get(self.reason, self.reason)} after {self.elapsed_ms}ms, "
+                f"{self.changes} height changes)")
+
+
+async def stabilize_height(
+    page,
+    quiet_ms: int = 800,
+    max_ms: int = 15000,
+    max_height: int = 0,
+    step_interval_ms: int = 100
+) -> HeightResult:
+    """
+    Scroll through the page until its height stops changing (one round trip).
+
+    Args:
+        page: Playwright page (scroll container cached in window.__scrollableElement)
+        quiet_ms: Required time at the bottom without size/DOM changes
+        max_ms: Upper bound for the whole stabilization
+        max_height: Stop once the content is this tall (0 = no limit)
+        step_interval_ms: Delay between viewport-sized scroll steps
+
+    Returns:
+        HeightResult
+    """
+    result = await page.evaluate(HEIGHT_STABILIZE_SCRIPT, {
+        "quietMs": quiet_ms,
+        "maxMs": max_ms,
+        "maxHeight": max_height,
+        "stepIntervalMs": step_interval_ms,
+    })
+    return HeightResult(
+        height=result["height"],
+        client_height=result["clientHeight"],
+        reason=result["reason"],
+        changes=result.get("changes", 0),
+        used_element=result.get("usedElement", False),
+        elapsed_ms=result.get("elapsedMs", 0),
+    )
@@ -0,0 +1,238 @@
+"""
+⚡ Image Similarity
+Bit-level perceptual hash comparison + a BK-tree index for near-duplicate search
+
+Hashes are compared as integers: Hamming distance = popcount(a XOR b). The old
+comparison counted matching hex characters, so one differing nibble weighed the same
+as four differing bits.
+
+Supported hash algorithms (imagehash): ahash, dhash, phash, whash - selectable per request.
+
+The SimilarityIndex keeps one BK-tree per algorithm over every screenshot in the
+library. A BK-tree search with radius r only visits children whose edge distance is
+within [d - r, d + r] of the query (triangle inequality), so near-duplicate lookups are
+sub-linear in the library size. Hashes come from the content-addressed hash store, so
+(re)building an index only decodes images that were never hashed before.
+
+Usage:
+    distance = hamming_distance(hash_a, hash_b)
+    index = SimilarityIndex(Path("screenshots"), hash_store)
+    matches = index.search(query_hash, "phash", max_distance=8)
+"""
+
+import io
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import imagehash
+from PIL import Image
+
+from hash_store import HashStore, content_digest
+from output_format import MEDIA_TYPES
+
+
+# Algorithm name -> imagehash function (all produce 64-bit hashes at the default hash_size)
+HASH_ALGORITHMS: Dict[str, Callable] = {
+    "ahash": imagehash.average_hash,
+    "dhash": imagehash.dhash,
+    "phash": imagehash.phash,
+    "whash": imagehash.whash,
+}
+
+DEFAULT_HASH_ALGORITHM = "ahash"
+
+# File types indexed by SimilarityIndex (every output format we write)
+IMAGE_SUFFIXES = set(MEDIA_TYPES)
+
+
+def compute_hash(image: Image.Image, algorithm: str = DEFAULT_HASH_ALGORITHM) -> str:
+    """
+    Perceptual hash of a decoded image as a hex string.
+
+    Raises:
+        ValueError: Unknown algorithm
+    """
+    try:
+        hash_func = HASH_ALGORITHMS[algorithm]
+    except KeyError:
+        raise ValueError(f"Unknown hash algorithm '{algorithm}' (use one of: {', '.join(HASH_ALGORITHMS)})")
+    return str(hash_func(image))
+
+
+def hamming_distance(hash1: str, hash2: str) -> int:
+    """Number of differing bits between two hex hashes (popcount of XOR)"""
+    return (int(hash1, 16) ^ int(hash2, 16)).bit_count()
+
+
+def hash_similarity(hash1: str, hash2: str) -> float:
+    """Bit-level similarity between two hex hashes (0.0 to 1.0)"""
+    if not hash1 or not hash2 or len(hash1) != len(hash2):
+        return 0.0
+    bits = len(hash1) * 4
+    return 1.0 - hamming_distance(hash1, hash2) / bits
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over integer hashes with Hamming distance.
+
+    Each node holds one hash (and every item with exactly that hash); children are
+    keyed by their distance to the node.
+    """
+
+    __slots__ = ("_root", "_size")
+
+    def __init__(self):
+        self._root: Optional[list] = None  # [hash_int, items, children]
+        self._size = 0
+
+    def add(self, hash_hex: str, item):
+        """Insert an item under its hash"""
+        value = int(hash_hex, 16)
+        self._size += 1
+        if self._root is None:
+            self._root = [value, [item], {}]
+            return
+        node = self._root
+        while True:
+            distance = (value ^ node[0]).bit_count()
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item], {}]
+                return
+            node = child
+
+    def search(self, hash_hex: str, max_distance: int) -> List[Tuple[int, object]]:
+        """
+        All items within `max_distance` bits of `hash_hex`.
+
+        Returns:
+            [(distance, item)] sorted by distance
+        """
+        if self._root is None:
+            return []
+        value = int(hash_hex, 16)
+        results = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            distance = (value ^ node[0]).bit_count()
+            if distance <= max_distance:
+                results.extend((distance, item) for item in node[1])
+            low, high = distance - max_distance, distance + max_distance
+            stack.extend(child for edge, child in node[2].items() if low <= edge <= high)
+        results.sort(key=lambda match: match[0])
+        return results
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class SimilarityIndex:
+    """
+    Per-algorithm BK-tree index over the screenshots library.
+
+    Built lazily on the first search for an algorithm, then kept up to date as new
+    screenshots are saved (add()). Files deleted since indexing are filtered out of results.
+    """
+
+    def __init__(self, library_dir: Path, hash_store: HashStore):
+        self.library_dir = Path(library_dir).resolve()  # Paths are indexed/compared resolved
+        self.hash_store = hash_store
+        self._trees: Dict[str, BKTree] = {}
+        self._indexed: Dict[str, set] = {}  # algorithm -> indexed paths
+        self._lock = threading.Lock()
+
+    def add(self, path: Path, algorithm: str, hash_hex: str):
+        """Index a newly saved screenshot (no-op until the algorithm's index is built)"""
+        if not hash_hex:
+            return
+        with self._lock:
+            tree = self._trees.get(algorithm)
+            if tree is None:
+                return  # Built from disk on first search - the file will be picked up then
+            path_str = str(Path(path).resolve())
+            if path_str in self._indexed[algorithm]:
+                return
+            self._indexed[algorithm].add(path_str)
+            tree.add(hash_hex, path_str)
+
+    def search(
+        self,
+        hash_hex: str,
+        algorithm: str = DEFAULT_HASH_ALGORITHM,
+        max_distance: int = 8,
+        limit: int = 50,
+        exclude: Iterable[str] = ()
+    ) -> List[Tuple[str, int]]:
+        """
+        Near-duplicates of a hash across the library.
+
+        Returns:
+            [(path, distance)] sorted by distance (at most `limit`)
+        """
+        tree = self._ensure_built(algorithm)
+        excluded = {str(Path(p).resolve()) for p in exclude}
+        matches = []
+        for distance, path in tree.search(hash_hex, max_distance):
+            if path in excluded or not Path(path).exists():
+                continue
+            matches.append((path, distance))
+            if len(matches) >= limit:
+                break
+        return matches
+
+    def hash_file(self, path: Path, algorithm: str = DEFAULT_HASH_ALGORITHM) -> str:
+        """Perceptual hash of a file (hash store first, decode only on a miss)"""
+        data = Path(path).read_bytes()
+        digest = content_digest(data)
+        cached = self.hash_store.get(digest, algorithm)
+        if cached is not None:
+            return cached
+        hash_hex = compute_hash(Image.open(io.BytesIO(data)), algorithm)
+        self.hash_store.put(digest, algorithm, hash_hex)
+        return hash_hex
+
+    def is_built(self, algorithm: str) -> bool:
+        """Whether the index for an algorithm exists yet (add() is a no-op until then)"""
+        return algorithm in self._trees
+
+    def stats(self) -> Dict[str, int]:
+        """Indexed screenshots per algorithm"""
+        return {algorithm: len(tree) for algorithm, tree in self._trees.items()}
+
+    def _ensure_built(self, algorithm: str) -> BKTree:
+        if algorithm not in HASH_ALGORITHMS:
+            raise ValueError(f"Unknown hash algorithm '{algorithm}' (use one of: {', '.join(HASH_ALGORITHMS)})")
+        with self._lock:
+            tree = self._trees.get(algorithm)
+            if tree is not None:
+                return tree
+
+        # Build outside the lock (may decode images that were never hashed)
+        tree = BKTree()
+        indexed = set()
+        for path in sorted(self.library_dir.rglob("*")):
+            if path.suffix.lower() not in IMAGE_SUFFIXES or not path.is_file():
+                continue
+            try:
+                hash_hex = self.hash_file(path, algorithm)
+            except Exception:
+                continue  # Unreadable/corrupt image - skip it
+            tree.add(hash_hex, str(path))
+            indexed.add(str(path))
+        self.hash_store.flush()
+        print(f"   🌳 Similarity index ({algorithm}): {len(tree)} screenshots indexed")
+
+        with self._lock:
+            # Another build may have finished first - keep whichever is already published
+            existing = self._trees.get(algorithm)
+            if existing is not None:
+                return existing
+            self._trees[algorithm] = tree
+            self._indexed[algorithm] = indexed
+            return tree
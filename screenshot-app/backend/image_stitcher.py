@@ -0,0 +1,307 @@
+"""
+⚡ Segment Stitcher
+Composites segmented captures into one tall PNG, streaming strip by strip
+
+capture_segmented writes _001 … _NNN files that overlap by roughly overlap_percent
+(the real overlap differs on the last segment, after scroll clamping, and whenever
+the page grew while scrolling), and sticky headers/footers repeat in every file.
+
+For each consecutive pair of segments:
+1. Row signatures: one hash per pixel row (channels quantized to absorb encoder noise)
+2. Sticky header / footer: rows identical at the SAME offsets in both segments
+   (top / bottom runs) are fixed chrome - kept once, trimmed from later segments
+3. True overlap: a run where the end of the previous body equals the start of the
+   next body (closest to the scroll-step overlap when blank runs make it ambiguous;
+   falls back to that nominal overlap if nothing matches exactly)
+
+Output is written by a streaming PNG encoder (zlib + "Up" row filter): rows are
+compressed as they arrive and the height is patched into IHDR at the end, so memory
+stays at two decoded segments no matter how tall the page is.
+
+Tiles from tiled full-page mode (tiled_capture.py) have known offsets and no overlap;
+concatenate_tiles() streams them through the same encoder without any detection.
+
+Usage:
+    result = stitch_segments(paths, Path("screenshots/Page.png"), scroll_step=864)
+    result = concatenate_tiles([(tile_1, 0), (tile_2, 0), (tile_3, 412)], Path("screenshots/Page.png"))
+"""
+
+import binascii
+import struct
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Sticky header/footer detection ignores runs longer than this share of the segment
+# (two segments that are mostly identical are not "chrome")
+MAX_CHROME_FRACTION = 0.4
+
+# Low bits dropped per channel before hashing rows (tolerates lossy re-encoding noise)
+ROW_QUANTIZE_SHIFT = 2
+
+
+class StreamingPngWriter:
+    """
+    Minimal RGB PNG encoder that accepts rows incrementally.
+
+    The IHDR height is written as 0 and patched on close(), so the final height
+    doesn't have to be known up front.
+    """
+
+    IDAT_CHUNK_BYTES = 1 << 18
+
+    def __init__(self, path: Path, width: int, compress_level: int = 6):
+        self.path = Path(path)
+        self.width = width
+        self.height = 0
+        self._file = open(self.path, "wb")
+        self._compressor = zlib.compressobj(compress_level)
+        self._pending = bytearray()
+        self._previous_row = np.zeros((width * 3,), dtype=np.uint8)
+
+        self._file.write(PNG_SIGNATURE)
+        self._ihdr_offset = self._file.tell()
+        self._write_chunk(b"IHDR", self._ihdr(0))
+
+    def write_rows(self, rows: np.ndarray):
+        """Append an (n, width, 3) uint8 strip"""
+        if rows.size == 0:
+            return
+        flat = rows.reshape(rows.shape[0], -1)
+        # "Up" filter: each row minus the row above (uint8 wraps around, as PNG expects)
+        above = np.vstack((self._previous_row[None, :], flat[:-1]))
+        filtered = flat - above
+        filter_bytes = np.full((flat.shape[0], 1), 2, dtype=np.uint8)
+        self._pending += self._compressor.compress(np.hstack((filter_bytes, filtered)).tobytes())
+        self._previous_row = flat[-1].copy()
+        self.height += flat.shape[0]
+        if len(self._pending) >= self.IDAT_CHUNK_BYTES:
+            self._flush_idat()
+
+    def close(self) -> int:
+        """Finish the file and patch the real height into IHDR. Returns the file size."""
+        self._pending += self._compressor.flush()
+        self._flush_idat()
+        self._write_chunk(b"IEND", b"")
+        self._file.seek(self._ihdr_offset)
+        self._write_chunk(b"IHDR", self._ihdr(self.height))
+        self._file.seek(0, 2)
+        size = self._file.tell()
+        self._file.close()
+        return size
+
+    def abort(self):
+        """Close and delete a partially written file"""
+        self._file.close()
+        self.path.unlink(missing_ok=True)
+
+    def _ihdr(self, height: int) -> bytes:
+        # 8-bit RGB, deflate, adaptive filtering, no interlace
+        return struct.pack(">IIBBBBB", self.width, height, 8, 2, 0, 0, 0)
+
+    def _flush_idat(self):
+        if self._pending:
+            self._write_chunk(b"IDAT", bytes(self._pending))
+            self._pending.clear()
+
+    def _write_chunk(self, kind: bytes, data: bytes):
+        self._file.write(struct.pack(">I", len(data)))
+        self._file.write(kind)
+        self._file.write(data)
+        self._file.write(struct.pack(">I", binascii.crc32(kind + data) & 0xFFFFFFFF))
+
+
+@dataclass
+class StitchResult:
+    """Outcome of stitching one segmented capture"""
+    path: str
+    width: int
+    height: int
+    segments: int
+    file_size: int
+    overlaps: List[int] = field(default_factory=list)  # Detected overlap (rows) per pair
+    header_rows: int = 0  # Largest sticky header trimmed
+    footer_rows: int = 0  # Largest sticky footer trimmed
+    fallbacks: int = 0  # Pairs where no exact overlap was found (nominal overlap used)
+
+    def describe(self) -> str:
+        """One-line summary for logs"""
+        chrome = []
+        if self.header_rows:
+            chrome.append(f"{self.header_rows}px sticky header")
+        if self.footer_rows:
+            chrome.append(f"{self.footer_rows}px sticky footer")
+        return (f"{self.segments} segments -> {self.width}x{self.height} "
+                f"({self.file_size / 1024:.0f} KB, overlaps {self.overlaps}"
+                f"{', trimmed ' + ' + '.join(chrome) if chrome else ''}"
+                f"{f', {self.fallbacks} nominal fallbacks' if self.fallbacks else ''})")
+
+
+def _load_rgb(path: str) -> np.ndarray:
+    with Image.open(path) as image:
+        return np.asarray(image.convert("RGB"))
+
+
+def _row_signatures(pixels: np.ndarray) -> List[int]:
+    quantized = pixels >> ROW_QUANTIZE_SHIFT
+    return [hash(row.tobytes()) for row in quantized]
+
+
+def _common_prefix(a: Sequence[int], b: Sequence[int], limit: int) -> int:
+    count = 0
+    while count < limit and a[count] == b[count]:
+        count += 1
+    return count
+
+
+def _detect_chrome(prev: List[int], cur: List[int]) -> tuple:
+    """(header_rows, footer_rows) identical at the same offsets in both segments"""
+    limit = int(min(len(prev), len(cur)) * MAX_CHROME_FRACTION)
+    header = _common_prefix(prev, cur, limit)
+    footer = _common_prefix(prev[::-1], cur[::-1], limit)
+    # A run that hits the limit means the segments are mostly identical, not chrome
+    return (header if header < limit else 0, footer if footer < limit else 0)
+
+
+def _detect_overlap(prev_body: List[int], cur_body: List[int], nominal: int = 0) -> Optional[int]:
+    """
+    Overlap k where prev_body[-k:] == cur_body[:k] (None if no overlap matches).
+
+    Candidates are positions in prev_body equal to cur_body's first row. Uniform runs
+    (blank rows) can match at several k - the one closest to the nominal overlap wins,
+    or the largest when no nominal overlap is known.
+    """
+    if not prev_body or not cur_body:
+        return None
+    first = cur_body[0]
+    best = None
+    for start in range(max(0, len(prev_body) - len(cur_body)), len(prev_body)):
+        if prev_body[start] != first:
+            continue
+        k = len(prev_body) - start
+        if prev_body[start:] != cur_body[:k]:
+            continue
+        if not nominal:
+            return k  # Largest overlap first
+        if best is None or abs(k - nominal) < abs(best - nominal):
+            best = k
+    return best
+
+
+def stitch_segments(
+    segment_paths: Sequence[str],
+    output_path: Path,
+    scroll_step: int = 0,
+    compress_level: int = 6
+) -> StitchResult:
+    """
+    Stitch overlapping segments into one tall PNG (synchronous - run it in the image worker pool).
+
+    Args:
+        segment_paths: Segment files in capture order
+        output_path: Stitched PNG to write
+        scroll_step: Nominal scroll distance between segments in rows. The expected overlap
+            (visible body height - scroll_step) breaks ties between ambiguous matches and is
+            the fallback when nothing matches exactly. 0 = unknown.
+        compress_level: zlib level for the streaming encoder
+
+    Returns:
+        StitchResult
+
+    Raises:
+        ValueError: No segments, or segments of different widths
+    """
+    if not segment_paths:
+        raise ValueError("No segments to stitch")
+
+    prev = _load_rgb(segment_paths[0])
+    height, width = prev.shape[:2]
+    prev_sig = _row_signatures(prev)
+    prev_start = 0  # First row of `prev` not yet written
+
+    result = StitchResult(path=str(output_path), width=width, height=0, segments=len(segment_paths), file_size=0)
+    writer = StreamingPngWriter(output_path, width, compress_level)
+    try:
+        for path in segment_paths[1:]:
+            cur = _load_rgb(path)
+            if cur.shape[1] != width:
+                raise ValueError(f"Segment width mismatch: {path} is {cur.shape[1]}px, expected {width}px")
+            cur_sig = _row_signatures(cur)
+
+            header, footer = _detect_chrome(prev_sig, cur_sig)
+            prev_body_end = len(prev_sig) - footer
+            cur_body = cur_sig[header:len(cur_sig) - footer]
+            expected = max(0, len(cur_body) - scroll_step) if scroll_step else 0
+            overlap = _detect_overlap(prev_sig[header:prev_body_end], cur_body, expected)
+            if overlap is None:
+                overlap = expected
+                result.fallbacks += 1
+
+            # Previous segment minus its sticky footer (the last segment keeps it)
+            writer.write_rows(prev[prev_start:max(prev_start, prev_body_end)])
+
+            result.overlaps.append(overlap)
+            result.header_rows = max(result.header_rows, header)
+            result.footer_rows = max(result.footer_rows, footer)
+
+            # Next segment starts after its sticky header and the rows already written
+            prev, prev_sig = cur, cur_sig
+            prev_start = min(len(cur_sig), header + overlap)
+
+        writer.write_rows(prev[prev_start:])
+        result.height = writer.height
+        result.file_size = writer.close()
+    except Exception:
+        writer.abort()
+        raise
+    return result
+
+
+def concatenate_tiles(
+    tiles: Sequence[Tuple[str, int]],
+    output_path: Path,
+    compress_level: int = 6
+) -> StitchResult:
+    """
+    Stack tiles with known offsets into one tall PNG (synchronous - run it in the image worker pool).
+
+    Args:
+        tiles: (path, skip_rows) in page order - skip_rows drops rows at the top of a tile
+            that were already written (a clamped last tile)
+        output_path: PNG to write
+        compress_level: zlib level for the streaming encoder
+
+    Returns:
+        StitchResult (segments = tile count)
+
+    Raises:
+        ValueError: No tiles, or tiles of different widths
+    """
+    if not tiles:
+        raise ValueError("No tiles to concatenate")
+
+    writer = None
+    result = StitchResult(path=str(output_path), width=0, height=0, segments=len(tiles), file_size=0)
+    try:
+        for path, skip_rows in tiles:
+            tile = _load_rgb(path)
+            if writer is None:
+                result.width = tile.shape[1]
+                writer = StreamingPngWriter(output_path, result.width, compress_level)
+            elif tile.shape[1] != result.width:
+                raise ValueError(f"Tile width mismatch: {path} is {tile.shape[1]}px, expected {result.width}px")
+            writer.write_rows(tile[max(0, skip_rows):])
+        result.height = writer.height
+        result.file_size = writer.close()
+    except Exception:
+        if writer is not None:
+            writer.abort()
+        raise
+    return result
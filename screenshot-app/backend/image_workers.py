@@ -0,0 +1,227 @@
+"""
+⚡ Image Worker Pool
+Runs PIL post-processing (decode, hash, quality, encode) off the event loop
+
+Decodes, perceptual hashes, quality checks and the blank-page debug check used to run
+synchronously inside async handlers - each one blocked the FastAPI event loop and
+stalled every concurrent capture and WebSocket ping.
+
+- ProcessPoolExecutor with the "spawn" start method (forking a process that runs
+  Playwright driver threads is unsafe); started lazily on the first job
+- Screenshot bytes are handed over through multiprocessing.shared_memory, so only the
+  block name + length are pickled (not multi-MB PNGs); the parent unlinks the block
+  once the job's future resolves
+- Every job returns an awaitable; the capture pipeline awaits it like any other I/O
+- max_workers=0, a frozen (PyInstaller) build or a pool that broke falls back to a
+  background thread, so nothing runs on the event loop either way. Frozen workers
+  re-run the bundled entry script, which builds the app and starts the server again
+
+Usage:
+    workers = ImageWorkerPool(max_workers=2)
+    analysis = await workers.analyze(png_bytes, hash_algorithms=["ahash"], quality=True)
+    await workers.encode(png_bytes, Path("shot.webp"), "webp", quality=80)
+"""
+
+import asyncio
+import io
+import multiprocessing
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+
+from PIL import Image
+
+
+# ========================================
+# Worker-side jobs (module level so they can be pickled by reference)
+# ========================================
+
+# A job's image source: ("shm", name, size), ("file", path) or ("bytes", data)
+ImageSource = Tuple
+
+
+def _read_source(source: ImageSource) -> bytes:
+    kind = source[0]
+    if kind == "shm":
+        _, name, size = source
+        block = shared_memory.SharedMemory(name=name)
+        try:
+            with block.buf[:size] as view:
+                return bytes(view)
+        finally:
+            block.close()
+    if kind == "file":
+        return Path(source[1]).read_bytes()
+    return source[1]
+
+
+def _analyze_job(
+    source: ImageSource,
+    hash_algorithms: Tuple[str, ...],
+    quality: bool,
+    extrema: bool
+) -> "ImageAnalysis":
+    from image_similarity import compute_hash  # Imported in the worker (imagehash is heavy)
+    from quality_checker import QualityChecker
+
+    data = _read_source(source)
+    image = Image.open(io.BytesIO(data))
+    width, height = image.size
+    analysis = ImageAnalysis(width=width, height=height, byte_size=len(data))
+    for algorithm in hash_algorithms:
+        analysis.hashes[algorithm] = compute_hash(image, algorithm)
+    if quality:
+        analysis.quality = QualityChecker().analyze(image, len(data))
+    if extrema:
+        analysis.extrema = image.convert("L").getextrema()
+    return analysis
+
+
+def _encode_job(source: ImageSource, path: str, image_format: str, options: Dict[str, Any]) -> int:
+    data = _read_source(source)
+    image = Image.open(io.BytesIO(data))
+    if image_format.upper() in ("JPEG", "JPG") and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")  # JPEG has no alpha channel
+    image.save(path, format=image_format.upper(), **options)
+    return Path(path).stat().st_size
+
+
+# ========================================
+# Results
+# ========================================
+
+@dataclass
+class ImageAnalysis:
+    """Result of a post-processing job"""
+    width: int
+    height: int
+    byte_size: int
+    hashes: Dict[str, str] = field(default_factory=dict)  # algorithm -> hex hash
+    quality: Optional[Dict] = None  # QualityChecker.analyze() report
+    extrema: Optional[Tuple[int, int]] = None  # Grayscale (min, max) - equal = blank image
+
+    @property
+    def is_blank(self) -> bool:
+        return self.extrema is not None and self.extrema[0] == self.extrema[1]
+
+
+# ========================================
+# Pool
+# ========================================
+
+class ImageWorkerPool:
+    """
+    Process pool for image post-processing with shared-memory handoff.
+
+    Thread-safe; one instance is shared by all captures.
+    """
+
+    def __init__(self, max_workers: int = 2):
+        """
+        Args:
+            max_workers: Worker processes (0 = run jobs in a background thread instead)
+        """
+        self.max_workers = max(0, max_workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    # ---------- Public API ----------
+
+    async def analyze(
+        self,
+        image: Union[bytes, str, Path],
+        hash_algorithms: Iterable[str] = (),
+        quality: bool = False,
+        extrema: bool = False
+    ) -> ImageAnalysis:
+        """
+        Decode an image in a worker and compute the requested results.
+
+        Args:
+            image: Encoded bytes (handed over via shared memory) or a file path (read by the worker)
+            hash_algorithms: Perceptual hashes to compute (see image_similarity.HASH_ALGORITHMS)
+            quality: Run QualityChecker.analyze()
+            extrema: Grayscale min/max for blank-page detection
+
+        Returns:
+            ImageAnalysis
+        """
+        return await self._submit(_analyze_job, image, tuple(hash_algorithms), quality, extrema)
+
+    async def encode(self, image: Union[bytes, str, Path], path: Path, image_format: str, **options) -> int:
+        """
+        Re-encode an image to `path` in a worker (e.g. PNG -> WebP/JPEG).
+
+        Returns:
+            Size of the written file in bytes
+        """
+        return await self._submit(_encode_job, image, str(path), image_format, options)
+
+    async def run(self, func: Callable, *args):
+        """
+        Run any picklable module-level function in the pool (e.g. document generation).
+
+        Falls back to a background thread when the pool is disabled or broken.
+        """
+        executor = self._get_executor()
+        if executor is not None:
+            try:
+                return await asyncio.wrap_future(executor.submit(func, *args))
+            except BrokenProcessPool:
+                self._reset_executor()
+        return await asyncio.to_thread(func, *args)
+
+    def shutdown(self):
+        """Stop the worker processes (a later job starts a new pool)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    # ---------- Internals ----------
+
+    async def _submit(self, job: Callable, image: Union[bytes, str, Path], *args):
+        if not isinstance(image, (bytes, bytearray, memoryview)):
+            return await self.run(job, ("file", str(image)), *args)
+
+        executor = self._get_executor()
+        if executor is None:
+            return await asyncio.to_thread(job, ("bytes", bytes(image)), *args)
+
+        # ⚡ Shared memory handoff: the worker attaches by name, nothing large is pickled
+        size = len(image)
+        block = shared_memory.SharedMemory(create=True, size=max(1, size))
+        try:
+            block.buf[:size] = image
+            try:
+                return await asyncio.wrap_future(executor.submit(job, ("shm", block.name, size), *args))
+            except BrokenProcessPool:
+                print("   ⚠️  Image worker pool broke - running this job in a thread")
+                self._reset_executor()
+                return await asyncio.to_thread(job, ("bytes", bytes(image)), *args)
+        finally:
+            block.close()
+            block.unlink()
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.max_workers == 0 or getattr(sys, "frozen", False):
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                print(f"   🧵 Image worker pool started ({self.max_workers} processes)")
+            return self._executor
+
+    def _reset_executor(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
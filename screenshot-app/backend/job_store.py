@@ -0,0 +1,318 @@
+"""
+⚡ Capture Job Store
+Durable capture jobs (SQLite, WAL mode): submit, poll/stream, resume, retry failed
+
+/api/screenshots/capture is one long HTTP request; its progress only lives in
+cancellation_contexts and WebSocket messages, so a backend restart or a client
+disconnect loses the whole run and it has to start over.
+
+A job persists the capture options once and one row per URL:
+- Every finished URL is committed as it completes (WAL, so readers never block the writer)
+- Items stay "pending" until they have a result - after a restart or cancel, resuming
+  runs exactly the URLs that have no result yet
+- retry_failed() puts only failed items back to pending
+- Each recorded result gets a per-job sequence number, so status streams can
+  continue from the last result they saw (results_since)
+
+Usage:
+    store = JobStore(Path("screenshots/.capture_jobs.sqlite3"))
+    store.create(job_id, options, urls)
+    for index, url in store.pending_items(job_id):
+        ...
+        store.record_result(job_id, index, "success", result_json)
+    print(store.get(job_id).describe())
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+# Job lifecycle
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"  # Every item has a result (successful or not)
+JOB_CANCELLED = "cancelled"  # Stopped with items still pending (resumable)
+JOB_FAILED = "failed"  # The runner itself crashed (resumable)
+ACTIVE_JOB_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+
+# Item lifecycle: pending until a result is recorded
+ITEM_PENDING = "pending"
+
+
+@dataclass
+class JobRecord:
+    """Status of one capture job"""
+    id: str
+    status: str
+    total: int
+    counts: Dict[str, int] = field(default_factory=dict)  # Items per status (pending/success/failed)
+    created_at: float = 0.0
+    updated_at: float = 0.0
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    result_seq: int = 0  # Sequence number of the latest recorded result
+
+    @property
+    def done(self) -> int:
+        """Items with a result"""
+        return self.total - self.counts.get(ITEM_PENDING, 0)
+
+    def describe(self) -> str:
+        """One-line summary for logs"""
+        counts = ", ".join(f"{count} {status}" for status, count in sorted(self.counts.items()))
+        return f"job {self.id[:8]} {self.status}: {self.done}/{self.total} done ({counts})"
+
+
+class JobStore:
+    """
+    SQLite-backed capture jobs and their per-URL items.
+
+    Thread-safe: one connection guarded by a lock. Every write is its own small
+    transaction so a finished URL is durable the moment it is recorded.
+    """
+
+    def __init__(self, db_path: Path):
+        """
+        Args:
+            db_path: SQLite database file
+        """
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS capture_jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                options TEXT NOT NULL,
+                total INTEGER NOT NULL,
+                result_seq INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                finished_at REAL
+            )
+        ''')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS capture_job_items (
+                job_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                url TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                seq INTEGER,
+                result TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (job_id, idx)
+            ) WITHOUT ROWID
+        ''')
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_capture_job_items_status ON capture_job_items (job_id, status)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_capture_job_items_seq ON capture_job_items (job_id, seq)")
+        self._conn.commit()
+
+    # ========================================
+    # Jobs
+    # ========================================
+
+    def create(self, job_id: str, options: Dict[str, Any], urls: Sequence[str]):
+        """Persist a new job (status "queued") with one pending item per URL"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO capture_jobs (id, status, options, total, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, JOB_QUEUED, json.dumps(options), len(urls), now, now),
+            )
+            self._conn.executemany(
+                "INSERT INTO capture_job_items (job_id, idx, url, status, updated_at) VALUES (?, ?, ?, ?, ?)",
+                [(job_id, index, url, ITEM_PENDING, now) for index, url in enumerate(urls)],
+            )
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        """Job status with item counts, or None if there is no such job"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, total, created_at, updated_at, finished_at, error, result_seq "
+                "FROM capture_jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            counts = dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM capture_job_items WHERE job_id = ? GROUP BY status",
+                (job_id,),
+            ).fetchall())
+        return self._record(row, counts)
+
+    def list(self, limit: int = 50) -> List[JobRecord]:
+        """Most recent jobs first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, status, total, created_at, updated_at, finished_at, error, result_seq "
+                "FROM capture_jobs ORDER BY created_at DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+            counts: Dict[str, Dict[str, int]] = {}
+            if rows:
+                placeholders = ",".join("?" * len(rows))
+                for job_id, status, count in self._conn.execute(
+                    f"SELECT job_id, status, COUNT(*) FROM capture_job_items "
+                    f"WHERE job_id IN ({placeholders}) GROUP BY job_id, status",
+                    [row[0] for row in rows],
+                ):
+                    counts.setdefault(job_id, {})[status] = count
+        return [self._record(row, counts.get(row[0], {})) for row in rows]
+
+    def options(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Capture options the job was submitted with"""
+        with self._lock:
+            row = self._conn.execute("SELECT options FROM capture_jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_status(self, job_id: str, status: str, error: Optional[str] = None):
+        """Move a job to `status` (completed/cancelled/failed also stamp finished_at)"""
+        now = time.time()
+        finished_at = None if status in ACTIVE_JOB_STATUSES else now
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE capture_jobs SET status = ?, error = ?, updated_at = ?, finished_at = ? WHERE id = ?",
+                (status, error, now, finished_at, job_id),
+            )
+
+    def active_jobs(self) -> List[str]:
+        """Jobs that were queued or running - interrupted if the process restarted"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id FROM capture_jobs WHERE status IN ({','.join('?' * len(ACTIVE_JOB_STATUSES))}) "
+                f"ORDER BY created_at",
+                ACTIVE_JOB_STATUSES,
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def delete(self, job_id: str) -> bool:
+        """Remove a job and its items (screenshots on disk are kept)"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM capture_job_items WHERE job_id = ?", (job_id,))
+            deleted = self._conn.execute("DELETE FROM capture_jobs WHERE id = ?", (job_id,)).rowcount
+        return deleted > 0
+
+    # ========================================
+    # Items
+    # ========================================
+
+    def pending_items(self, job_id: str) -> List[Tuple[int, str]]:
+        """(index, url) of every item without a result, in submission order"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT idx, url FROM capture_job_items WHERE job_id = ? AND status = ? ORDER BY idx",
+                (job_id, ITEM_PENDING),
+            ).fetchall()
+
+    def record_result(self, job_id: str, index: int, status: str, result: str):
+        """
+        Commit one finished item.
+
+        Args:
+            job_id: Job ID
+            index: Item index (position in the submitted URL list)
+            status: Item status ("success" or "failed")
+            result: ScreenshotResult as JSON
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE capture_jobs SET result_seq = result_seq + 1, updated_at = ? WHERE id = ?",
+                (now, job_id),
+            )
+            self._conn.execute(
+                "UPDATE capture_job_items SET status = ?, result = ?, attempts = attempts + 1, updated_at = ?, "
+                "seq = (SELECT result_seq FROM capture_jobs WHERE id = ?) WHERE job_id = ? AND idx = ?",
+                (status, result, now, job_id, job_id, index),
+            )
+
+    def retry_failed(self, job_id: str) -> int:
+        """Put failed items back to pending; returns how many"""
+        now = time.time()
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "UPDATE capture_job_items SET status = ?, result = NULL, updated_at = ? "
+                "WHERE job_id = ? AND status = 'failed'",
+                (ITEM_PENDING, now, job_id),
+            ).rowcount
+
+    def results(
+        self,
+        job_id: str,
+        offset: int = 0,
+        limit: int = 500,
+        status: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Items in submission order (optionally only one status).
+
+        Returns:
+            [{"index", "url", "status", "attempts", "result"}] - result is None while pending
+        """
+        query = "SELECT idx, url, status, attempts, result FROM capture_job_items WHERE job_id = ?"
+        params: List[Any] = [job_id]
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        query += " ORDER BY idx LIMIT ? OFFSET ?"
+        params += [limit, offset]
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._item(row) for row in rows]
+
+    def results_since(self, job_id: str, seq: int, limit: int = 500) -> List[Dict[str, Any]]:
+        """Items recorded after result sequence number `seq` (oldest first), each with its "seq" """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT idx, url, status, attempts, result, seq FROM capture_job_items "
+                "WHERE job_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                (job_id, seq, limit),
+            ).fetchall()
+        return [dict(self._item(row[:5]), seq=row[5]) for row in rows]
+
+    def close(self):
+        """Close the database"""
+        with self._lock:
+            self._conn.close()
+
+    # ========================================
+    # Internals
+    # ========================================
+
+    @staticmethod
+    def _record(row: tuple, counts: Dict[str, int]) -> JobRecord:
+        job_id, status, total, created_at, updated_at, finished_at, error, result_seq = row
+        return JobRecord(
+            id=job_id,
+            status=status,
+            total=total,
+            counts=counts,
+            created_at=created_at,
+            updated_at=updated_at,
+            finished_at=finished_at,
+            error=error,
+            result_seq=result_seq,
+        )
+
+    @staticmethod
+    def _item(row: tuple) -> Dict[str, Any]:
+        index, url, status, attempts, result = row
+        return {
+            "index": index,
+            "url": url,
+            "status": status,
+            "attempts": attempts,
+            "result": json.loads(result) if result else None,
+        }
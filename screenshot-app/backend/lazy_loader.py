@@ -0,0 +1,208 @@
+"""
+⚡ Eager Lazy-Load Forcing
+Loads lazy content up front instead of crawling the page 100px at a time
+
+The old _auto_scroll scrolled 100px every 100ms until it reached scrollHeight (a
+20,000px page cost 20s before a full-page shot) and ignored inner scroll containers.
+
+Eager mode:
+1. Init script shims IntersectionObserver BEFORE page scripts run - it tracks every
+   observed target so they can all be reported as intersecting on demand
+2. loading="lazy" images/iframes are switched to eager
+3. data-src / data-srcset style attributes are promoted to src / srcset
+4. A few large jumps through the window and the scroll container (for scroll-event
+   based loaders), repeating the promotion + observer flush for content that appeared
+5. Waits only for the resulting image decodes (bounded by a timeout)
+
+Usage:
+    await install_eager_loading(page)   # BEFORE page.goto()
+    await page.goto(url)
+    result = await force_eager_load(page)
+"""
+
+from dataclasses import dataclass
+
+
+# Installed with page.add_init_script() BEFORE navigation (wraps the native IntersectionObserver)
+EAGER_LOAD_INIT_SCRIPT = """
+(() => {
+    if (window.__eagerLoad || !window.IntersectionObserver) return;
+    const NativeObserver = window.IntersectionObserver;
+    const observers = new Set();
+
+    const entryFor = (target) => {
+        const rect = target.getBoundingClientRect();
+        return {
+            target,
+            isIntersecting: true,
+            intersectionRatio: 1,
+            boundingClientRect: rect,
+            intersectionRect: rect,
+            rootBounds: null,
+            time: performance.now(),
+        };
+    };
+
+    class EagerIntersectionObserver extends NativeObserver {
+        constructor(callback, options) {
+            super(callback, options);
+            this.__callback = callback;
+            this.__targets = new Set();
+            observers.add(this);
+        }
+        observe(target) {
+            super.observe(target);
+            this.__targets.add(target);
+        }
+        unobserve(target) {
+            this.__targets.delete(target);
+            super.unobserve(target);
+        }
+        disconnect() {
+            this.__targets.clear();
+            observers.delete(this);
+            super.disconnect();
+        }
+    }
+    window.IntersectionObserver = EagerIntersectionObserver;
+
+    window.__eagerLoad = {
+        // Fire every callback for every target still observed; returns the target count.
+        // Only called from force_eager_load() (a bounded number of times), so infinite-scroll
+        // sentinels can't keep loading pages forever.
+        flush() {
+            let count = 0;
+            for (const observer of observers) {
+                const targets = [...observer.__targets];
+                if (!targets.length) continue;
+                count += targets.length;
+                try { observer.__callback(targets.map(entryFor), observer); } catch (e) {}
+            }
+            return count;
+        },
+    };
+})();
+"""
+
+# Evaluated once the page has loaded (works without the init script too, minus the shim)
+EAGER_LOAD_SCRIPT = """
+async ({ jumps, settleMs, decodeTimeoutMs }) => {
+    const start = performance.now();
+    const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+    const LAZY_ATTRS = [
+        ['data-src', 'src'], ['data-lazy-src', 'src'], ['data-original', 'src'],
+        ['data-srcset', 'srcset'], ['data-lazy-srcset', 'srcset'],
+    ];
+    const stats = { lazyAttr: 0, promoted: 0, observerTargets: 0 };
+
+    const promote = () => {
+        for (const el of document.querySelectorAll('img[loading="lazy"], iframe[loading="lazy"]')) {
+            el.loading = 'eager';
+            stats.lazyAttr++;
+        }
+        for (const [from, to] of LAZY_ATTRS) {
+            for (const el of document.querySelectorAll(`img[${from}], source[${from}], iframe[${from}]`)) {
+                const value = el.getAttribute(from);
+                if (!value || el.getAttribute(to) === value) continue;
+                el.setAttribute(to, value);
+                stats.promoted++;
+            }
+        }
+        if (window.__eagerLoad) stats.observerTargets += window.__eagerLoad.flush();
+    };
+
+    // Scroll-event based loaders: a few big jumps through the window and the scroll container
+    const container = window.__scrollableElement && window.__scrollableElement.isConnected
+        ? window.__scrollableElement : null;
+    const scrollers = [
+        { height: () => document.documentElement.scrollHeight, to: (y) => window.scrollTo(0, y) },
+    ];
+    if (container) scrollers.push({ height: () => container.scrollHeight, to: (y) => { container.scrollTop = y; } });
+
+    promote();
+    const steps = Math.max(1, jumps);
+    for (let i = 1; i <= steps; i++) {
+        for (const scroller of scrollers) scroller.to(Math.round(scroller.height() * i / steps));
+        await sleep(settleMs);
+        promote();
+    }
+    for (const scroller of scrollers) scroller.to(0);
+
+    // Wait only for images that are still loading/decoding
+    const pending = [...document.images].filter(img => !img.complete || img.naturalWidth === 0);
+    const decodes = pending.map(img => img.decode().catch(() => null));
+    const timedOut = await Promise.race([
+        Promise.allSettled(decodes).then(() => false),
+        sleep(decodeTimeoutMs).then(() => true),
+    ]);
+
+    return {
+        ...stats,
+        pendingImages: pending.length,
+        decodeTimedOut: timedOut,
+        usedContainer: !!container,
+        height: document.documentElement.scrollHeight,
+        elapsedMs: Math.round(performance.now() - start),
+    };
+}
+"""
+
+
+@dataclass
+class EagerLoadResult:
+    """Outcome of eager lazy-load forcing"""
+    lazy_attr: int  # loading="lazy" elements switched to eager
+    promoted: int  # data-src / data-srcset attributes promoted
+    observer_targets: int  # IntersectionObserver targets reported as visible
+    pending_images: int  # Images that were still loading after promotion
+    decode_timed_out: bool
+    used_container: bool  # Inner scroll container was scrolled too
+    height: int
+    elapsed_ms: int
+
+    def describe(self) -> str:
+        """One-line summary for logs"""
+        decode = "decode timed out" if self.decode_timed_out else "decoded"
+        return (f"{self.lazy_attr} lazy→eager, {self.promoted} data-src promoted, "
+                f"{self.observer_targets} observer targets fired, {self.pending_images} images {decode} "
+                f"in {self.elapsed_ms}ms")
+
+
+async def install_eager_loading(page):
+    """Register the IntersectionObserver shim. Call BEFORE page.goto() so page scripts get it."""
+    await page.add_init_script(EAGER_LOAD_INIT_SCRIPT)
+
+
+async def force_eager_load(
+    page,
+    jumps: int = 4,
+    settle_ms: int = 150,
+    decode_timeout_ms: int = 5000
+) -> EagerLoadResult:
+    """
+    Force lazy content to load and wait for the resulting image decodes (one round trip).
+
+    Args:
+        page: Playwright page
+        jumps: Large scroll jumps through the page (instead of a 100px crawl)
+        settle_ms: Wait after each jump for scroll-triggered loaders
+        decode_timeout_ms: Upper bound for waiting on image decodes
+
+    Returns:
+        EagerLoadResult
+    """
+    result = await page.evaluate(EAGER_LOAD_SCRIPT, {
+        "jumps": jumps,
+        "settleMs": settle_ms,
+        "decodeTimeoutMs": decode_timeout_ms,
+    })
+    return EagerLoadResult(
+        lazy_attr=result["lazyAttr"],
+        promoted=result["promoted"],
+        observer_targets=result["observerTargets"],
+        pending_images=result["pendingImages"],
+        decode_timed_out=result["decodeTimedOut"],
+        used_container=result["usedContainer"],
+        height=result["height"],
+        elapsed_ms=result["elapsedMs"],
+    )
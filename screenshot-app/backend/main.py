@@ -3,14 +3,15 @@ FastAPI Backend for Screenshot Tool
 Handles screenshot capture, quality checks, and document generation
 """
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware  # ⚡ OPTIMIZATION: Response compression
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from pydantic import BaseModel, validator, Field
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 import asyncio
 import json
+from dataclasses import asdict
 from datetime import datetime
 import os
 from pathlib import Path
@@ -23,6 +24,12 @@ from quality_checker import QualityChecker
 from logging_config import setup_logging, log_request_start, log_request_complete, log_cancellation
 from config import settings  # ✅ PHASE 3: Centralized configuration
 from cookie_extractor import CookieExtractor  # 🍪 Cookie management
+from capture_scheduler import CaptureScheduler  # ⚡ Global capture concurrency + per-host rate limits
+from image_similarity import HASH_ALGORITHMS  # ⚡ Perceptual hash algorithms (dedup + similarity search)
+from output_format import OUTPUT_FORMATS, OUTPUT_PRESETS, OutputFormat, media_type_for  # ⚡ PNG/JPEG/WebP/AVIF output
+from auth_state import auth_states  # ⚡ Parsed auth files shared with the capture service
+from spa_router import RouteCapture, same_app  # ⚡ SPA route groups
+from job_store import JobStore, JobRecord, ITEM_PENDING, JOB_CANCELLED, JOB_COMPLETED, JOB_FAILED, JOB_QUEUED, JOB_RUNNING, ACTIVE_JOB_STATUSES  # ⚡ Durable capture jobs
 
 # ✅ FIXED: Structured logging instead of print statements
 logger = setup_logging(__name__)
@@ -44,15 +51,38 @@ app.add_middleware(
 )
 
 # Services
-screenshot_service = ScreenshotService()
-document_service = DocumentService()
-quality_checker = QualityChecker()
-cookie_extractor = CookieExtractor()  # 🍪 Cookie management
+# Spawned image workers (see image_workers.py) re-import this entry script as __mp_main__.
+# They only run the module-level image jobs, so they must not build a second set of
+# browser pools, job store and scheduler.
+if __name__ != "__mp_main__":
+    screenshot_service = ScreenshotService()
+    document_service = DocumentService(workers=screenshot_service.image_workers)  # ⚡ Builds .docx off the event loop
+    quality_checker = QualityChecker()
+    cookie_extractor = CookieExtractor()  # 🍪 Cookie management
+
+    # ⚡ OPTIMIZATION: Process-wide capture scheduler (single queue for ALL requests)
+    # Enforces settings.max_concurrent_captures globally + per-host token buckets,
+    # so big batches can't open hundreds of pages at once or burst one domain into 429s.
+    capture_scheduler = CaptureScheduler(
+        max_concurrent=settings.max_concurrent_captures,
+        host_rate=settings.per_host_rate,
+        host_burst=settings.per_host_burst,
+    )
 
-# ✅ FIXED: Request-scoped cancellation tracking with TTL to prevent memory leaks
-# Key: request_id (UUID), Value: {"cancelled": bool}
-# TTL: 1 hour (3600 seconds) - automatically removes old entries
-cancellation_contexts: TTLCache = TTLCache(maxsize=1000, ttl=3600)
+    # ✅ FIXED: Request-scoped cancellation tracking with TTL to prevent memory leaks
+    # Key: request_id (UUID), Value: {"cancelled": bool}
+    # TTL: 1 hour (3600 seconds) - automatically removes old entries
+    cancellation_contexts: TTLCache = TTLCache(maxsize=1000, ttl=3600)
+
+    # ⚡ Durable capture jobs (SQLite WAL) - survive restarts and resume where they stopped
+    job_store = JobStore(settings.job_store_file)
+    job_tasks: Dict[str, asyncio.Task] = {}  # Job ID -> runner task (this process)
+    # Job ID -> {"cancelled": bool}; separate from cancellation_contexts so the UI's
+    # cancel-all never stops durable jobs (only /api/jobs/{job_id}/cancel does)
+    job_cancellation_flags: Dict[str, Dict[str, bool]] = {}
+    # Job ID -> {"cookies", "local_storage"} submitted with the job; kept in memory only,
+    # never written to the jobs DB (a job resumed after a restart uses the saved auth state)
+    job_credentials: Dict[str, Dict[str, str]] = {}
 
 # ✅ SECURITY: Path validation helper
 def validate_screenshot_path(file_path: str) -> Path:
@@ -90,6 +120,11 @@ def validate_screenshot_path(file_path: str) -> Path:
         )
 
 # Models
+class ViewportSize(BaseModel):
+    """⚡ One breakpoint of a multi-viewport (responsive matrix) capture"""
+    width: int = Field(ge=320, le=7680, description="Viewport width (320-7680)")
+    height: Optional[int] = Field(default=None, ge=320, le=4320, description="Viewport height (default: viewport_height)")
+
 class URLRequest(BaseModel):
     urls: List[str]
     viewport_width: int = Field(default=1920, ge=800, le=7680, description="Viewport width (800-7680)")
@@ -108,46 +143,126 @@ class URLRequest(BaseModel):
     segment_max_segments: int = Field(default=50, ge=1, le=200, description="Max segments (1-200)")
     segment_skip_duplicates: bool = True  # Skip duplicate segments
     segment_smart_lazy_load: bool = True  # Wait for lazy-loaded content
+    segment_stitch: bool = False  # ⚡ Composite segments into one tall PNG (overlap detected from row hashes)
     # ✅ NEW: Network event tracking
     track_network: bool = False  # Capture HTTP requests during page load
     # ✅ NEW: Per-request batch timeout
     batch_timeout: Optional[int] = Field(default=90, ge=10, le=300, description="Batch timeout in seconds (10-300)")
     # ✅ NEW: Max parallel URLs per text box (for Real Browser Mode)
     max_parallel_urls: int = Field(default=5, ge=1, le=10, description="Max parallel URLs (1-10, Real Browser Mode only)")
+    # ⚡ NEW: Optional CSS selector that must exist before capturing (page readiness engine)
+    ready_selector: Optional[str] = Field(default="", max_length=500, description="CSS selector to wait for before capturing")
+    # ⚡ NEW: Perceptual hash used for duplicate segment detection
+    hash_algorithm: str = Field(default="ahash", description="Duplicate detection hash: ahash, dhash, phash or whash")
+    # ⚡ NEW: Output encoding (PNG/JPEG by Chromium, WebP/AVIF re-encoded in the image worker pool)
+    output_format: str = Field(default="png", description="Output format: png, jpeg, webp or avif")
+    output_preset: str = Field(default="balanced", description="Size-vs-speed preset: fast, balanced or small")
+    output_quality: Optional[int] = Field(default=None, ge=1, le=100, description="Encoder quality (1-100, overrides the preset)")
+    # ⚡ NEW: Segment screenshot engine - "cdp" calls Page.captureScreenshot directly (benchmark option)
+    screenshot_engine: str = Field(default="playwright", description="Segment screenshot engine: playwright or cdp")
+    # ⚡ NEW: Full page strategy - "tiled" expands inner scroll containers and captures past 16384px
+    full_page_mode: str = Field(default="auto", description="Full page mode: auto, native or tiled")
+    # ⚡ NEW: Responsive matrix - every breakpoint from ONE navigation (viewport/fullpage modes)
+    viewports: List[ViewportSize] = Field(default_factory=list, description="Breakpoints to capture (overrides viewport_width/height)")
+    # ⚡ NEW: SPA route mode - URLs under base_url are captured client-side from ONE booted app
+    spa_route_mode: bool = False
+    spa_router_hook: Optional[str] = Field(default="", max_length=1000, description="JS (path, url) => ... that changes the route (default: pushState + popstate)")
+
+    @validator('hash_algorithm')
+    def validate_hash_algorithm(cls, v):
+        """⚡ Only hash algorithms the similarity module knows"""
+        if v not in HASH_ALGORITHMS:
+            raise ValueError(f"hash_algorithm must be one of: {', '.join(HASH_ALGORITHMS)}")
+        return v
+
+    @validator('output_format')
+    def validate_output_format(cls, v):
+        """⚡ Only formats the capture pipeline can write"""
+        v = v.lower()
+        if v == "jpg":
+            v = "jpeg"
+        if v not in OUTPUT_FORMATS:
+            raise ValueError(f"output_format must be one of: {', '.join(OUTPUT_FORMATS)}")
+        return v
+
+    @validator('screenshot_engine')
+    def validate_screenshot_engine(cls, v):
+        if v not in ("playwright", "cdp"):
+            raise ValueError("screenshot_engine must be 'playwright' or 'cdp'")
+        return v
+
+    @validator('full_page_mode')
+    def validate_full_page_mode(cls, v):
+        if v not in ("auto", "native", "tiled"):
+            raise ValueError("full_page_mode must be 'auto', 'native' or 'tiled'")
+        return v
+
+    @validator('viewports')
+    def validate_viewports(cls, v):
+        if len(v) > 12:
+            raise ValueError("At most 12 viewports per request")
+        return v
+
+    def viewport_sizes(self) -> Optional[List[Tuple[int, int]]]:
+        """⚡ (width, height) breakpoints for capture(viewports=...), None for a single viewport"""
+        if not self.viewports:
+            return None
+        return [(v.width, v.height or self.viewport_height) for v in self.viewports]
+
+    @validator('output_preset')
+    def validate_output_preset(cls, v):
+        if v not in OUTPUT_PRESETS:
+            raise ValueError(f"output_preset must be one of: {', '.join(OUTPUT_PRESETS)}")
+        return v
+
+    def output(self) -> OutputFormat:
+        """⚡ Output encoding for this request"""
+        return OutputFormat.create(self.output_format, self.output_preset, self.output_quality)
 
     @validator('urls')
     def validate_urls(cls, v):
         """
         ✅ SECURITY: Validate URLs to prevent SSRF and DoS attacks
         """
-        if not v:
-            raise ValueError('URL list cannot be empty')
-        if len(v) > 500:
-            raise ValueError('Too many URLs (max 500 per request)')
-
-        for url in v:
-            # Check protocol
-            if not url.startswith(('http://', 'https://')):
-                raise ValueError(f'Invalid URL protocol (must be http:// or https://): {url}')
-
-            # Check length
-            if len(url) > 2048:
-                raise ValueError(f'URL too long (max 2048 characters): {url[:100]}...')
-
-            # Block dangerous protocols
-            dangerous_patterns = ['file://', 'javascript:', 'data:', 'ftp://', 'file:', 'localhost', '127.0.0.1', '0.0.0.0']
-            url_lower = url.lower()
-            for pattern in dangerous_patterns:
-                if pattern in url_lower and not url_lower.startswith('http'):
-                    raise ValueError(f'Dangerous URL pattern detected: {pattern}')
+        return _validate_url_list(v, max_urls=500)
 
-        return v
+def _validate_url_list(v: List[str], max_urls: int) -> List[str]:
+    """✅ SECURITY: URL list checks shared by capture requests and capture jobs"""
+    if not v:
+        raise ValueError('URL list cannot be empty')
+    if len(v) > max_urls:
+        raise ValueError(f'Too many URLs (max {max_urls} per request)')
+
+    for url in v:
+        # Check protocol
+        if not url.startswith(('http://', 'https://')):
+            raise ValueError(f'Invalid URL protocol (must be http:// or https://): {url}')
+
+        # Check length
+        if len(url) > 2048:
+            raise ValueError(f'URL too long (max 2048 characters): {url[:100]}...')
+
+        # Block dangerous protocols
+        dangerous_patterns = ['file://', 'javascript:', 'data:', 'ftp://', 'file:', 'localhost', '127.0.0.1', '0.0.0.0']
+        url_lower = url.lower()
+        for pattern in dangerous_patterns:
+            if pattern in url_lower and not url_lower.startswith('http'):
+                raise ValueError(f'Dangerous URL pattern detected: {pattern}')
+
+    return v
+
+class JobRequest(URLRequest):
+    """⚡ Durable capture job: URLRequest options with up to settings.job_max_urls URLs"""
+
+    @validator('urls')
+    def validate_urls(cls, v):
+        return _validate_url_list(v, max_urls=settings.job_max_urls)
 
 class ScreenshotResult(BaseModel):
     url: str
     status: str  # "success", "failed", "pending"
     screenshot_path: Optional[str] = None
-    screenshot_paths: Optional[List[str]] = None  # For segmented captures
+    screenshot_paths: Optional[List[str]] = None  # For segmented captures (and one per viewport)
     segment_count: Optional[int] = None  # Number of segments captured
     error: Optional[str] = None
     quality_score: Optional[float] = None
@@ -208,10 +323,22 @@ async def startup_event():
     logger.info(f"🌐 CORS allowed origins: {settings.allowed_origins_list}")
     logger.info("💡 Performance docs auto-generate only when batch timeout changes")
 
+    # ⚡ Resume capture jobs interrupted by the last shutdown/crash
+    if settings.job_resume_on_startup:
+        for job_id in await asyncio.to_thread(job_store.active_jobs):
+            job = await asyncio.to_thread(job_store.get, job_id)
+            logger.info(f"🔁 Resuming capture {job.describe()}")
+            _start_job(job_id)
+
 @app.on_event("shutdown")
 async def shutdown_event():
     """Log application shutdown"""
     logger.info("🛑 Screenshot Tool API shutting down...")
+    # Running jobs keep their "running" status - the next startup resumes them
+    for task in list(job_tasks.values()):
+        task.cancel()
+    await asyncio.gather(*job_tasks.values(), return_exceptions=True)
+    await asyncio.to_thread(job_store.close)
 
 # Routes
 @app.get("/")
@@ -226,89 +353,99 @@ async def root():
 async def health():
     return {"status": "healthy"}
 
-def _group_urls_by_domain(urls: List[str]) -> Dict[str, List[str]]:
+def _request_parallelism(request: URLRequest) -> Optional[int]:
     """
-    Group URLs by domain for smart batch processing.
+    Per-request concurrency limit on top of the global capture scheduler.
+
+    - Single URL or batch processing disabled: 1 (sequential)
+    - Real Browser Mode: max_parallel_urls (user-configurable number of tabs)
+    - Headless: None (no per-request limit - the scheduler caps concurrency globally)
 
     Returns:
-        Dict mapping domain to list of URLs
+        Maximum URLs of this request in flight at once, or None for no limit
     """
-    from urllib.parse import urlparse
-
-    domain_groups = {}
-    for url in urls:
-        try:
-            domain = urlparse(url).netloc
-            if domain not in domain_groups:
-                domain_groups[domain] = []
-            domain_groups[domain].append(url)
-        except Exception:
-            # If URL parsing fails, treat as unique domain
-            domain_groups[url] = [url]
-
-    return domain_groups
-
-def _create_smart_batches(urls: List[str], enable_batch: bool = True, max_parallel: int = 5, use_real_browser: bool = False) -> List[List[str]]:
+    if len(request.urls) <= 1 or not screenshot_service.ENABLE_BATCH_PROCESSING:
+        return 1
+    if request.use_real_browser:
+        return request.max_parallel_urls
+    return None
+
+def _capture_timeout(request: URLRequest) -> float:
+    """Capture timeout in seconds for one URL of this request"""
+    # ✅ NEW: Use per-request batch_timeout if provided, otherwise use mode-based defaults
+    if request.batch_timeout:
+        return float(request.batch_timeout)
+    if request.use_real_browser:
+        return 90.0  # Increased from 60s to 90s for height stabilization
+    if request.browser_engine == "camoufox":
+        return 120.0  # Camoufox needs more time for first launch (downloads Firefox)
+    if request.use_stealth:
+        return 90.0  # Increased for stealth mode
+    if request.capture_mode == "segmented":
+        return 120.0
+    return 35.0
+
+def _route_groups(request: URLRequest) -> List[List[int]]:
     """
-    Create smart batches based on domain detection and user settings.
-
-    - Different domains: Process ALL URLs in parallel (unlimited batch size)
-    - Same domain: Process ALL URLs in parallel (unlimited batch size)
-    - Real Browser Mode: Use max_parallel setting (user-configurable)
-    - Batch disabled: Batch size 1 (sequential)
+    ⚡ SPA route mode: split request.urls into groups captured from one booted page.
 
-    Args:
-        urls: List of URLs to batch
-        enable_batch: Whether to enable batch processing
-        max_parallel: Maximum parallel URLs (for Real Browser Mode)
-        use_real_browser: Whether using Real Browser Mode
+    URLs of the app at request.base_url (same scheme, host and port, path under its path)
+    share one group (booted with the first of them); every other URL is a group of its own.
+    Without route mode, every URL is its own group. Responsive matrices (request.viewports)
+    also capture every URL on its own, so each one reports its breakpoint screenshots.
+    """
+    if not (request.spa_route_mode and request.base_url) or request.capture_mode == "segmented" \
+            or request.use_real_browser or request.viewports:
+        return [[i] for i in range(len(request.urls))]
+    in_app = [same_app(url, request.base_url) for url in request.urls]
+    app_group = [i for i, inside in enumerate(in_app) if inside]
+    others = [[i] for i, inside in enumerate(in_app) if not inside]
+    return ([app_group] if app_group else []) + others
+
+def _log_pipeline_mode(request: URLRequest):
+    """Log how the capture pipeline will run this request"""
+    parallelism = _request_parallelism(request)
+    if parallelism == 1:
+        logger.info(f"📋 Sequential processing: {len(request.urls)} URLs")
+    else:
+        logger.info(f"⚡ Pipelined processing: {len(request.urls)} URLs "
+                    f"(global cap {capture_scheduler.max_concurrent} concurrent captures)")
+        if request.use_real_browser:
+            logger.info(f"   🌐 Real Browser Mode: Will open up to {parallelism} tabs at once")
+    if request.spa_route_mode and request.viewports:
+        logger.info("🧭 SPA route mode off: responsive viewports capture every URL on its own")
+    for group in _route_groups(request):
+        if len(group) > 1:
+            logger.info(f"🧭 SPA route mode: {len(group)} routes of {request.base_url} from one booted page")
+
+async def _check_quality(screenshot_path: str) -> dict:
+    """
+    Quality check for a captured screenshot.
 
-    Returns:
-        List of batches (each batch is a list of URLs)
+    ⚡ Segmented captures already analyzed their first segment from the in-memory
+    screenshot - use that report instead of decoding the PNG from disk again.
     """
-    if not enable_batch or not screenshot_service.ENABLE_BATCH_PROCESSING:
-        # Sequential processing - one URL at a time
-        return [[url] for url in urls]
-
-    # ✅ NEW: For Real Browser Mode, use user-configured max_parallel setting
-    if use_real_browser:
-        # Create batches of max_parallel size
-        batches = []
-        for i in range(0, len(urls), max_parallel):
-            batch = urls[i:i+max_parallel]
-            batches.append(batch)
-        return batches
-
-    # Group URLs by domain (for headless mode)
-    domain_groups = _group_urls_by_domain(urls)
-
-    batches = []
-    for domain, domain_urls in domain_groups.items():
-        # Determine batch size based on domain
-        if len(domain_urls) > 1:
-            # Same domain - use smaller batch size to avoid rate limits
-            batch_size = screenshot_service.SAME_DOMAIN_BATCH_SIZE
-        else:
-            # Different domains - use larger batch size
-            batch_size = screenshot_service.DEFAULT_BATCH_SIZE
+    report = screenshot_service.pop_quality_report(screenshot_path)
+    if report is not None:
+        return report
+    # ⚡ Decode + analysis in the image worker pool (never on the event loop)
+    return await screenshot_service.image_workers.run(quality_checker.check_file, screenshot_path)
 
-        # Create batches for this domain
-        for i in range(0, len(domain_urls), batch_size):
-            batch = domain_urls[i:i+batch_size]
-            batches.append(batch)
+def _is_cancelled(request_id: str) -> bool:
+    """Cancel flag of a capture request or durable job (request_id = job ID)"""
+    flags = cancellation_contexts.get(request_id) or job_cancellation_flags.get(request_id)
+    return flags is not None and flags["cancelled"]
 
-    return batches
 
 async def _capture_single_url(
     url: str,
     request: URLRequest,
     request_id: str,
     index: int,
-    total: int,
-    semaphore: asyncio.Semaphore
+    total: int
 ) -> ScreenshotResult:
     """
-    Capture a single URL with semaphore-based concurrency control.
+    Capture a single URL once the global capture scheduler admits it.
 
     Args:
         url: URL to capture
@@ -316,14 +453,14 @@ async def _capture_single_url(
         request_id: Unique request ID for cancellation tracking
         index: URL index (for progress reporting)
         total: Total number of URLs
-        semaphore: Semaphore for limiting concurrent captures
 
     Returns:
         ScreenshotResult with capture outcome
     """
-    async with semaphore:
+    # ⚡ Wait for a global slot + per-host token (queue time doesn't count against the capture timeout)
+    async with capture_scheduler.slot(url):
         # Check cancellation before starting
-        if cancellation_contexts[request_id]["cancelled"]:
+        if _is_cancelled(request_id):
             return ScreenshotResult(
                 url=url,
                 status="cancelled",
@@ -342,19 +479,7 @@ async def _capture_single_url(
                 "request_id": request_id
             })
 
-            # ✅ NEW: Use per-request batch_timeout if provided, otherwise use mode-based defaults
-            if request.batch_timeout:
-                capture_timeout = float(request.batch_timeout)
-            elif request.use_real_browser:
-                capture_timeout = 90.0  # Increased from 60s to 90s for height stabilization
-            elif request.browser_engine == "camoufox":
-                capture_timeout = 120.0  # Camoufox needs more time for first launch (downloads Firefox)
-            elif request.use_stealth:
-                capture_timeout = 90.0  # Increased for stealth mode
-            elif request.capture_mode == "segmented":
-                capture_timeout = 120.0
-            else:
-                capture_timeout = 35.0
+            capture_timeout = _capture_timeout(request)
 
             # Capture screenshot
             try:
@@ -380,7 +505,12 @@ async def _capture_single_url(
                             max_segments=request.segment_max_segments,
                             skip_duplicates=request.segment_skip_duplicates,
                             smart_lazy_load=request.segment_smart_lazy_load,
-                            track_network=request.track_network  # ✅ NEW: Pass network tracking setting
+                            track_network=request.track_network,  # ✅ NEW: Pass network tracking setting
+                            ready_selector=request.ready_selector or "",  # ⚡ Page readiness selector
+                            hash_algorithm=request.hash_algorithm,  # ⚡ Duplicate detection hash
+                            output_format=request.output(),  # ⚡ Output encoding
+                            screenshot_engine=request.screenshot_engine,  # ⚡ Segment screenshot engine
+                            stitch=request.segment_stitch  # ⚡ One stitched image instead of N segments
                         ),
                         timeout=capture_timeout
                     )
@@ -401,21 +531,25 @@ async def _capture_single_url(
                             words_to_remove=request.words_to_remove,
                             cookies=request.cookies,
                             local_storage=request.local_storage,
-                            track_network=request.track_network  # ✅ NEW: Pass network tracking setting
+                            track_network=request.track_network,  # ✅ NEW: Pass network tracking setting
+                            ready_selector=request.ready_selector or "",  # ⚡ Page readiness selector
+                            output_format=request.output(),  # ⚡ Output encoding
+                            full_page_mode=request.full_page_mode,  # ⚡ Native or tiled full page
+                            viewports=request.viewport_sizes()  # ⚡ Responsive matrix
                         ),
                         timeout=capture_timeout
                     )
-                    screenshot_paths = None
+                    screenshot_paths = screenshot_service.pop_viewport_captures(screenshot_path) if request.viewports else None
             except asyncio.TimeoutError:
                 mode = "real browser" if request.use_real_browser else "headless"
                 raise Exception(f"Screenshot capture timed out after {capture_timeout}s ({mode} mode)")
 
             # Check cancellation after capture
-            if cancellation_contexts[request_id]["cancelled"]:
+            if _is_cancelled(request_id):
                 raise Exception("Operation cancelled by user")
 
             # Quality check
-            quality_result = await quality_checker.check(screenshot_path)
+            quality_result = await _check_quality(screenshot_path)
 
             return ScreenshotResult(
                 url=url,
@@ -430,7 +564,7 @@ async def _capture_single_url(
 
         except Exception as e:
             # Check if this was a cancellation
-            if cancellation_contexts[request_id]["cancelled"] or "cancelled by user" in str(e).lower():
+            if _is_cancelled(request_id) or "cancelled by user" in str(e).lower():
                 return ScreenshotResult(
                     url=url,
                     status="cancelled",
@@ -452,85 +586,182 @@ async def _capture_single_url(
                 )
 
 
-@app.post("/api/screenshots/capture")
-async def capture_screenshots(request: URLRequest):
+async def _capture_route_group(
+    indices: List[int],
+    request: URLRequest,
+    request_id: str,
+    total: int
+) -> List[Tuple[int, ScreenshotResult]]:
     """
-    Capture screenshots for multiple URLs with smart batch processing.
+    ⚡ SPA route mode: boot the app with the first URL, capture the rest client-side.
 
-    ⚡ OPTIMIZATION: Unlimited batch processing (process ALL URLs in parallel!)
-    - Different domains: Process ALL URLs at once (unlimited batch size)
-    - Same domain: Process ALL URLs at once (unlimited batch size)
-    - Real Browser Mode: Sequential (1 at a time)
-    - Feature flag: Set ENABLE_BATCH_PROCESSING = False to disable
+    One scheduler slot and one capture() call for the whole group - the context,
+    navigation, cookie setup and app boot happen once instead of once per URL.
 
-    ✅ Backward compatible: Falls back to sequential if batch disabled
+    Returns:
+        (index, ScreenshotResult) for every URL of the group
     """
-    # ✅ FIXED: Create request-scoped cancellation flag with unique ID
-    request_id = str(uuid4())
-    cancellation_contexts[request_id] = {"cancelled": False}
-
-    # ✅ FIXED: Log request start
-    log_request_start(request_id, len(request.urls))
-    start_time = datetime.now()
+    urls = [request.urls[i] for i in indices]
 
-    # 🔍 DEBUG: Log base URL and words to remove
-    logger.info(f"🔍 BASE URL RECEIVED: '{request.base_url}'")
-    logger.info(f"🔍 WORDS TO REMOVE: '{request.words_to_remove}'")
-    logger.info(f"🔍 URLS RECEIVED: {request.urls}")
+    def failed(url: str, error: str, status: str = "failed") -> ScreenshotResult:
+        return ScreenshotResult(url=url, status=status, error=error, timestamp=datetime.now().isoformat())
 
-    # ⚡ OPTIMIZATION: Create smart batches
-    # Auto-detect: 1 URL = sequential, 2+ URLs = batch processing
-    # This works in both Real Browser Mode and Headless Mode
-    enable_batch = len(request.urls) > 1
-    batches = _create_smart_batches(
-        request.urls,
-        enable_batch,
-        max_parallel=request.max_parallel_urls,  # ✅ NEW: User-configurable
-        use_real_browser=request.use_real_browser
-    )
+    async def captured(url: str, path: str) -> ScreenshotResult:
+        quality_result = await _check_quality(path)
+        return ScreenshotResult(
+            url=url,
+            status="success" if quality_result["passed"] else "failed",
+            screenshot_path=path,
+            quality_score=quality_result["score"],
+            quality_issues=quality_result["issues"],
+            timestamp=datetime.now().isoformat()
+        )
 
-    if enable_batch and screenshot_service.ENABLE_BATCH_PROCESSING:
-        logger.info(f"⚡ Smart batch processing enabled: {len(batches)} batches for {len(request.urls)} URLs")
-        if request.use_real_browser:
-            logger.info(f"   🌐 Real Browser Mode: Will open up to {request.max_parallel_urls} tabs at once")
-    else:
-        logger.info(f"📋 Sequential processing: {len(request.urls)} URLs")
+    async with capture_scheduler.slot(urls[0]):
+        if _is_cancelled(request_id):
+            return [(i, failed(url, "Operation cancelled by user", "cancelled")) for i, url in zip(indices, urls)]
 
-    try:
-        results = []
-        url_index = 0
+        await manager.send_message({
+            "type": "progress",
+            "current": indices[0] + 1,
+            "total": total,
+            "url": urls[0],
+            "status": "capturing",
+            "request_id": request_id
+        })
 
-        # Process each batch
-        for batch_num, batch in enumerate(batches, 1):
-            # Check cancellation before each batch
-            if cancellation_contexts[request_id]["cancelled"]:
-                break
+        # Each route gets a (shorter) budget on top of the boot capture
+        capture_timeout = _capture_timeout(request)
+        group_timeout = capture_timeout + (len(urls) - 1) * max(15.0, capture_timeout / 2)
+        progress: List[RouteCapture] = []  # Boot URL + routes written so far (survives a timeout)
+        try:
+            screenshot_path = await asyncio.wait_for(
+                screenshot_service.capture(
+                    url=urls[0],
+                    viewport_width=request.viewport_width,
+                    viewport_height=request.viewport_height,
+                    full_page=request.capture_mode == "fullpage",
+                    screenshot_timeout=int(capture_timeout * 1000),
+                    use_stealth=request.use_stealth,
+                    browser_engine=request.browser_engine,
+                    base_url=request.base_url,
+                    words_to_remove=request.words_to_remove,
+                    cookies=request.cookies,
+                    local_storage=request.local_storage,
+                    track_network=request.track_network,
+                    ready_selector=request.ready_selector or "",  # ⚡ Page readiness selector
+                    output_format=request.output(),  # ⚡ Output encoding
+                    full_page_mode=request.full_page_mode,  # ⚡ Native or tiled full page
+                    routes=urls[1:],  # ⚡ Captured client-side from the booted page
+                    router_hook=request.spa_router_hook or "",
+                    route_progress=progress
+                ),
+                timeout=group_timeout
+            )
+        except asyncio.TimeoutError:
+            # Routes written before the deadline keep their screenshots; only the rest fail
+            error = f"SPA route group timed out after {group_timeout:.0f}s"
+            written = {route.url: route.path for route in progress if route.path}
+            return [
+                (i, await captured(url, written[url]) if url in written else failed(url, error))
+                for i, url in zip(indices, urls)
+            ]
+        except Exception as e:
+            logger.error(f"❌ SPA route group failed to boot on {urls[0]}: {str(e)}")
+            return [(i, failed(url, str(e))) for i, url in zip(indices, urls)]
 
-            if len(batch) > 1:
-                logger.info(f"🚀 Processing batch {batch_num}/{len(batches)} ({len(batch)} URLs in parallel)...")
+        routes = {route.url: route for route in screenshot_service.pop_route_captures(screenshot_path)}
+        results = []
+        for i, url in zip(indices, urls):
+            if i == indices[0]:
+                path = screenshot_path
+            else:
+                route = routes.get(url)
+                if route is None or route.path is None:
+                    results.append((i, failed(url, route.error if route else "Route was not captured")))
+                    continue
+                path = route.path
+            results.append((i, await captured(url, path)))
+        return results
 
-            # Create tasks for this batch
-            batch_tasks = [
-                _capture_single_url(
-                    url, request, request_id,
-                    url_index + i, len(request.urls),
-                    asyncio.Semaphore(len(batch))  # Allow all URLs in batch to run in parallel
-                )
-                for i, url in enumerate(batch)
-            ]
 
-            # Execute batch in parallel
-            batch_results = await asyncio.gather(*batch_tasks)
-            results.extend(batch_results)
-            url_index += len(batch)
+async def _stream_capture_results(request: URLRequest, request_id: str):
+    """
+    ⚡ OPTIMIZATION: Pipelined capture - yields (index, result) as each URL finishes.
 
-            # Send result updates for this batch
-            for result in batch_results:
+    All URLs are queued at once; the global capture scheduler starts the next URL
+    the moment a slot frees (no batch barrier, one slow URL never holds up the rest).
+    Every result is broadcast over the WebSocket as soon as it completes.
+    Unfinished captures are cancelled if the consumer stops early (client disconnect).
+    """
+    total = len(request.urls)
+    parallelism = _request_parallelism(request)
+    limiter = asyncio.Semaphore(parallelism) if parallelism else None
+
+    async def capture_group(indices: List[int]):
+        if len(indices) > 1:
+            return await _capture_route_group(indices, request, request_id, total)
+        index = indices[0]
+        return [(index, await _capture_single_url(request.urls[index], request, request_id, index, total))]
+
+    async def run(indices: List[int]):
+        if limiter is None:
+            return await capture_group(indices)
+        async with limiter:
+            return await capture_group(indices)
+
+    # ⚡ One task per URL, or per SPA route group (see _route_groups)
+    tasks = [asyncio.create_task(run(group)) for group in _route_groups(request)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            for index, result in await next_done:
+                # Send result update immediately (don't wait for other URLs)
                 await manager.send_message({
                     "type": "result",
                     "result": result.model_dump(),
                     "request_id": request_id
                 })
+                yield index, result
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+@app.post("/api/screenshots/capture")
+async def capture_screenshots(request: URLRequest):
+    """
+    Capture screenshots for multiple URLs with pipelined parallel processing.
+
+    ⚡ OPTIMIZATION: Continuous pipeline (no batch barrier)
+    - All URLs are queued at once; a new URL starts as soon as a slot frees
+    - Each result is sent over the WebSocket the moment it finishes
+    - Concurrency is capped by the global capture scheduler
+      (settings.max_concurrent_captures + per-host token buckets)
+    - Real Browser Mode: at most max_parallel_urls tabs at once
+    - Feature flag: Set ENABLE_BATCH_PROCESSING = False to capture one URL at a time
+
+    Results are returned in the same order as request.urls.
+    For incremental results over HTTP use /api/screenshots/capture-stream.
+    """
+    # ✅ FIXED: Create request-scoped cancellation flag with unique ID
+    request_id = str(uuid4())
+    cancellation_contexts[request_id] = {"cancelled": False}
+
+    # ✅ FIXED: Log request start
+    log_request_start(request_id, len(request.urls))
+    start_time = datetime.now()
+
+    # 🔍 DEBUG: Log base URL and words to remove
+    logger.info(f"🔍 BASE URL RECEIVED: '{request.base_url}'")
+    logger.info(f"🔍 WORDS TO REMOVE: '{request.words_to_remove}'")
+    logger.info(f"🔍 URLS RECEIVED: {request.urls}")
+    _log_pipeline_mode(request)
+
+    try:
+        results: List[Optional[ScreenshotResult]] = [None] * len(request.urls)
+        async for index, result in _stream_capture_results(request, request_id):
+            results[index] = result
 
         # ✅ FIXED: Log request completion
         duration = (datetime.now() - start_time).total_seconds()
@@ -548,6 +779,76 @@ async def capture_screenshots(request: URLRequest):
         cancellation_contexts.pop(request_id, None)
 
 
+@app.post("/api/screenshots/capture-stream")
+async def capture_screenshots_stream(request: URLRequest, format: str = "ndjson"):
+    """
+    Capture screenshots and stream each result the moment it finishes.
+
+    Same pipeline as /api/screenshots/capture, but results are written to the HTTP
+    response incrementally instead of returned at the end.
+
+    Args:
+        format: "ndjson" (one JSON object per line) or "sse" (text/event-stream)
+
+    Events (in order):
+        {"type": "start", "request_id", "total"}
+        {"type": "result", "index", "result", "request_id"}  (one per URL, completion order)
+        {"type": "complete", "request_id", "success", "total", "cancelled", "duration"}
+    """
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+
+    # ✅ FIXED: Create request-scoped cancellation flag with unique ID
+    request_id = str(uuid4())
+    cancellation_contexts[request_id] = {"cancelled": False}
+
+    log_request_start(request_id, len(request.urls))
+    _log_pipeline_mode(request)
+
+    def encode(event: dict) -> str:
+        payload = json.dumps(event)
+        if format == "sse":
+            return f"event: {event['type']}\ndata: {payload}\n\n"
+        return payload + "\n"
+
+    async def event_stream():
+        start_time = datetime.now()
+        success_count = 0
+        try:
+            yield encode({"type": "start", "request_id": request_id, "total": len(request.urls)})
+
+            async for index, result in _stream_capture_results(request, request_id):
+                if result.status == "success":
+                    success_count += 1
+                yield encode({
+                    "type": "result",
+                    "index": index,
+                    "result": result.model_dump(),
+                    "request_id": request_id
+                })
+
+            duration = (datetime.now() - start_time).total_seconds()
+            log_request_complete(request_id, success_count, len(request.urls), duration)
+            yield encode({
+                "type": "complete",
+                "request_id": request_id,
+                "success": success_count,
+                "total": len(request.urls),
+                "cancelled": cancellation_contexts[request_id]["cancelled"],
+                "duration": duration
+            })
+        finally:
+            # ✅ FIXED: Cleanup request-scoped cancellation flag (also on client disconnect)
+            cancellation_contexts.pop(request_id, None)
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        event_stream(),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Request-ID": request_id}
+    )
+
+
 @app.post("/api/screenshots/capture-sequential")
 async def capture_screenshots_sequential(request: URLRequest):
     """
@@ -619,48 +920,59 @@ async def capture_screenshots_sequential(request: URLRequest):
                     capture_timeout = 35.0  # Normal headless mode
 
                 try:
-                    # Handle different capture modes
-                    if request.capture_mode == "segmented":
-                        # Segmented capture returns list of paths
-                        screenshot_paths = await asyncio.wait_for(
-                            screenshot_service.capture_segmented(
-                                url=url,
-                                viewport_width=request.viewport_width,
-                                viewport_height=request.viewport_height,
-                                use_stealth=request.use_stealth,
-                                use_real_browser=request.use_real_browser,
-                                base_url=request.base_url,
-                                words_to_remove=request.words_to_remove,
-                                cookies=request.cookies,
-                                local_storage=request.local_storage,
-                                overlap_percent=request.segment_overlap,
-                                scroll_delay_ms=request.segment_scroll_delay,
-                                max_segments=request.segment_max_segments,
-                                skip_duplicates=request.segment_skip_duplicates,
-                                smart_lazy_load=request.segment_smart_lazy_load
-                            ),
-                            timeout=capture_timeout
-                        )
-                        screenshot_path = screenshot_paths[0] if screenshot_paths else None
-                    else:
-                        # Regular capture (viewport or fullpage)
-                        full_page = request.capture_mode == "fullpage"
-                        screenshot_path = await asyncio.wait_for(
-                            screenshot_service.capture(
-                                url=url,
-                                viewport_width=request.viewport_width,
-                                viewport_height=request.viewport_height,
-                                full_page=full_page,
-                                use_stealth=request.use_stealth,
-                                use_real_browser=request.use_real_browser,
-                                base_url=request.base_url,
-                                words_to_remove=request.words_to_remove,
-                                cookies=request.cookies,
-                                local_storage=request.local_storage
-                            ),
-                            timeout=capture_timeout
-                        )
-                        screenshot_paths = None
+                    # ⚡ Same global scheduler as the parallel endpoint
+                    async with capture_scheduler.slot(url):
+                        # Handle different capture modes
+                        if request.capture_mode == "segmented":
+                            # Segmented capture returns list of paths
+                            screenshot_paths = await asyncio.wait_for(
+                                screenshot_service.capture_segmented(
+                                    url=url,
+                                    viewport_width=request.viewport_width,
+                                    viewport_height=request.viewport_height,
+                                    use_stealth=request.use_stealth,
+                                    use_real_browser=request.use_real_browser,
+                                    base_url=request.base_url,
+                                    words_to_remove=request.words_to_remove,
+                                    cookies=request.cookies,
+                                    local_storage=request.local_storage,
+                                    overlap_percent=request.segment_overlap,
+                                    scroll_delay_ms=request.segment_scroll_delay,
+                                    max_segments=request.segment_max_segments,
+                                    skip_duplicates=request.segment_skip_duplicates,
+                                    smart_lazy_load=request.segment_smart_lazy_load,
+                                    ready_selector=request.ready_selector or "",  # ⚡ Page readiness selector
+                                    hash_algorithm=request.hash_algorithm,  # ⚡ Duplicate detection hash
+                                    output_format=request.output(),  # ⚡ Output encoding
+                                    screenshot_engine=request.screenshot_engine,  # ⚡ Segment screenshot engine
+                                    stitch=request.segment_stitch  # ⚡ One stitched image instead of N segments
+                                ),
+                                timeout=capture_timeout
+                            )
+                            screenshot_path = screenshot_paths[0] if screenshot_paths else None
+                        else:
+                            # Regular capture (viewport or fullpage)
+                            full_page = request.capture_mode == "fullpage"
+                            screenshot_path = await asyncio.wait_for(
+                                screenshot_service.capture(
+                                    url=url,
+                                    viewport_width=request.viewport_width,
+                                    viewport_height=request.viewport_height,
+                                    full_page=full_page,
+                                    use_stealth=request.use_stealth,
+                                    use_real_browser=request.use_real_browser,
+                                    base_url=request.base_url,
+                                    words_to_remove=request.words_to_remove,
+                                    cookies=request.cookies,
+                                    local_storage=request.local_storage,
+                                    ready_selector=request.ready_selector or "",  # ⚡ Page readiness selector
+                                    output_format=request.output(),  # ⚡ Output encoding
+                                    full_page_mode=request.full_page_mode,  # ⚡ Native or tiled full page
+                                    viewports=request.viewport_sizes()  # ⚡ Responsive matrix
+                                ),
+                                timeout=capture_timeout
+                            )
+                            screenshot_paths = screenshot_service.pop_viewport_captures(screenshot_path) if request.viewports else None
                 except asyncio.TimeoutError:
                     mode = "real browser" if request.use_real_browser else "headless"
                     raise Exception(f"Screenshot capture timed out after {capture_timeout}s ({mode} mode)")
@@ -670,7 +982,7 @@ async def capture_screenshots_sequential(request: URLRequest):
                     raise Exception("Operation cancelled by user")
 
                 # Quality check (use first screenshot for segmented mode)
-                quality_result = await quality_checker.check(screenshot_path)
+                quality_result = await _check_quality(screenshot_path)
 
                 result = ScreenshotResult(
                     url=url,
@@ -748,12 +1060,253 @@ async def cancel_screenshots(request_id: Optional[str] = None):
             "message": "Request not found or already completed"
         }
 
+# ========================================
+# ⚡ Durable capture jobs
+# ========================================
+
+def _start_job(job_id: str) -> bool:
+    """Start the runner for a job unless one is already running; returns True if started"""
+    if _job_active(job_id):
+        return False
+    job_tasks[job_id] = asyncio.create_task(_run_job(job_id))
+    return True
+
+def _job_active(job_id: str) -> bool:
+    """True while this process has a runner for the job"""
+    task = job_tasks.get(job_id)
+    return task is not None and not task.done()
+
+async def _run_job(job_id: str):
+    """
+    ⚡ Capture a job's pending items through the normal pipeline, committing every result.
+
+    Pending items are fed to _stream_capture_results in chunks of settings.job_chunk_size,
+    so a 10k-URL job never holds 10k capture tasks at once. Items that were cancelled
+    (never captured) stay pending for the next resume.
+
+    Every JobStore call runs in a thread (SQLite commits must not block the event loop).
+    """
+    flags = {"cancelled": False}
+    job_cancellation_flags[job_id] = flags
+    start_time = datetime.now()
+    try:
+        await asyncio.to_thread(job_store.set_status, job_id, JOB_RUNNING)
+        options = await asyncio.to_thread(job_store.options, job_id)
+        options.update(job_credentials.get(job_id, {}))
+        pending = await asyncio.to_thread(job_store.pending_items, job_id)
+        log_request_start(job_id, len(pending))
+        for offset in range(0, len(pending), settings.job_chunk_size):
+            if flags["cancelled"]:
+                break
+            chunk = pending[offset:offset + settings.job_chunk_size]
+            request = JobRequest(**options, urls=[url for _, url in chunk])
+            async for index, result in _stream_capture_results(request, job_id):
+                if result.status == "cancelled":
+                    continue
+                await asyncio.to_thread(
+                    job_store.record_result, job_id, chunk[index][0], result.status, result.model_dump_json()
+                )
+
+        job = await asyncio.to_thread(job_store.get, job_id)
+        duration = (datetime.now() - start_time).total_seconds()
+        if job.counts.get(ITEM_PENDING):
+            log_cancellation(job_id, job.done, job.total)
+            await asyncio.to_thread(job_store.set_status, job_id, JOB_CANCELLED)
+        else:
+            log_request_complete(job_id, job.counts.get("success", 0), job.total, duration)
+            await asyncio.to_thread(job_store.set_status, job_id, JOB_COMPLETED)
+        job = await asyncio.to_thread(job_store.get, job_id)
+        await manager.send_message({"type": "job", "job": asdict(job)})
+    except asyncio.CancelledError:
+        raise  # Shutdown - the job stays "running" and resumes on the next startup
+    except Exception as e:
+        logger.error(f"❌ Capture job {job_id[:8]} failed: {str(e)}")
+        await asyncio.to_thread(job_store.set_status, job_id, JOB_FAILED, str(e))
+    finally:
+        job_cancellation_flags.pop(job_id, None)
+        if job_tasks.get(job_id) is asyncio.current_task():
+            job_tasks.pop(job_id, None)
+
+async def _job_or_404(job_id: str) -> JobRecord:
+    job = await asyncio.to_thread(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+def _job_status(job: JobRecord) -> dict:
+    """Job record as returned by the API"""
+    return {**asdict(job), "done": job.done, "active": _job_active(job.id)}
+
+@app.post("/api/jobs")
+async def submit_capture_job(request: JobRequest):
+    """
+    Submit a durable capture job and return its ID immediately.
+
+    Same options as /api/screenshots/capture, up to settings.job_max_urls URLs. Every
+    finished URL is committed to SQLite; poll GET /api/jobs/{job_id}, stream
+    /api/jobs/{job_id}/events, or page through /api/jobs/{job_id}/results.
+
+    Cookies and localStorage sent with the job are never written to the jobs DB; a job
+    resumed after a restart authenticates with the saved auth state instead.
+    """
+    job_id = str(uuid4())
+    options = request.model_dump(exclude={"urls", "cookies", "local_storage"})
+    await asyncio.to_thread(job_store.create, job_id, options, request.urls)
+    credentials = {key: value for key in ("cookies", "local_storage") if (value := getattr(request, key))}
+    if credentials:
+        job_credentials[job_id] = credentials
+    _start_job(job_id)
+    logger.info(f"📥 Capture job {job_id[:8]} submitted: {len(request.urls)} URLs")
+    return {"job_id": job_id, "total": len(request.urls), "status": JOB_QUEUED}
+
+@app.get("/api/jobs")
+async def list_capture_jobs(limit: int = Query(default=50, ge=1, le=500)):
+    """Most recent capture jobs first"""
+    jobs = await asyncio.to_thread(job_store.list, limit)
+    return {"jobs": [_job_status(job) for job in jobs]}
+
+@app.get("/api/jobs/{job_id}")
+async def get_capture_job(job_id: str):
+    """Job status with item counts (pending / success / failed)"""
+    return _job_status(await _job_or_404(job_id))
+
+@app.get("/api/jobs/{job_id}/results")
+async def get_capture_job_results(
+    job_id: str,
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=500, ge=1, le=5000),
+    status: Optional[str] = Query(default=None, description="Only items with this status: pending, success or failed")
+):
+    """Job items in submission order (result is null while an item is pending)"""
+    await _job_or_404(job_id)
+    items = await asyncio.to_thread(job_store.results, job_id, offset, limit, status)
+    return {"job_id": job_id, "offset": offset, "items": items}
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_capture_job(job_id: str, after: int = Query(default=0, ge=0), format: str = "ndjson"):
+    """
+    Stream a job's results as they are committed.
+
+    Args:
+        after: Result sequence number already seen (reconnect without replaying results)
+        format: "ndjson" (one JSON object per line) or "sse" (text/event-stream)
+
+    Events:
+        {"type": "status", "job"}  (first, and whenever the job status changes)
+        {"type": "result", "seq", "index", "url", "status", "attempts", "result"}
+        {"type": "complete", "job"}  (job completed, cancelled or failed)
+    """
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+    await _job_or_404(job_id)
+
+    def encode(event: dict) -> str:
+        payload = json.dumps(event)
+        if format == "sse":
+            return f"event: {event['type']}\ndata: {payload}\n\n"
+        return payload + "\n"
+
+    async def event_stream():
+        seq = after
+        last_status = None
+        while True:
+            job = await asyncio.to_thread(job_store.get, job_id)
+            if job is None:
+                return  # Deleted while streaming
+            if job.status != last_status:
+                last_status = job.status
+                yield encode({"type": "status", "job": _job_status(job)})
+            for item in await asyncio.to_thread(job_store.results_since, job_id, seq):
+                seq = item["seq"]
+                yield encode({"type": "result", **item})
+            # A runner that was just (re)started has not marked the job running yet
+            if seq >= job.result_seq and job.status not in ACTIVE_JOB_STATUSES and not _job_active(job_id):
+                yield encode({"type": "complete", "job": _job_status(job)})
+                return
+            await asyncio.sleep(1.0)
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(event_stream(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
+@app.post("/api/jobs/{job_id}/cancel")
+async def cancel_capture_job(job_id: str):
+    """Stop a job after its in-flight URLs; unfinished items stay pending (resumable)"""
+    await _job_or_404(job_id)
+    if job_id not in job_cancellation_flags:
+        return {"status": "not_running", "job_id": job_id}
+    job_cancellation_flags[job_id]["cancelled"] = True
+    return {"status": "cancelling", "job_id": job_id}
+
+@app.post("/api/jobs/{job_id}/resume")
+async def resume_capture_job(job_id: str):
+    """Capture the items that have no result yet (after a cancel, crash or restart)"""
+    job = await _job_or_404(job_id)
+    started = _start_job(job_id)
+    return {"job_id": job_id, "started": started, "pending": job.counts.get(ITEM_PENDING, 0)}
+
+@app.post("/api/jobs/{job_id}/retry-failed")
+async def retry_failed_capture_job(job_id: str):
+    """Put only the failed items back to pending and run them (successful items are kept)"""
+    await _job_or_404(job_id)
+    if _job_active(job_id):
+        raise HTTPException(status_code=409, detail="Job is running - cancel it or wait until it finishes")
+    retried = await asyncio.to_thread(job_store.retry_failed, job_id)
+    started = _start_job(job_id) if retried else False
+    return {"job_id": job_id, "retried": retried, "started": started}
+
+@app.delete("/api/jobs/{job_id}")
+async def delete_capture_job(job_id: str):
+    """Forget a job (its screenshots stay on disk)"""
+    if _job_active(job_id):
+        raise HTTPException(status_code=409, detail="Job is running - cancel it first")
+    if not await asyncio.to_thread(job_store.delete, job_id):
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    job_credentials.pop(job_id, None)
+    return {"status": "success", "job_id": job_id}
+
 @app.get("/api/screenshots/file/{file_path:path}")
 async def get_screenshot_file(file_path: str):
     """Serve screenshot file for preview"""
     # ✅ FIXED: Validate path to prevent directory traversal
     validated_path = validate_screenshot_path(file_path)
-    return FileResponse(str(validated_path))
+    # ⚡ Explicit media type for WebP/AVIF captures (not known to mimetypes everywhere)
+    return FileResponse(str(validated_path), media_type=media_type_for(validated_path))
+
+@app.get("/api/screenshots/similar")
+async def find_similar_screenshots(
+    path: str,
+    max_distance: int = Query(default=8, ge=0, le=64, description="Max Hamming distance in bits (0-64)"),
+    algorithm: str = Query(default="phash", description="ahash, dhash, phash or whash"),
+    limit: int = Query(default=50, ge=1, le=500, description="Max matches (1-500)")
+):
+    """
+    ⚡ Find near-duplicates of a screenshot across the library
+
+    Backed by a per-algorithm BK-tree index (built on first use, then updated as screenshots are saved).
+    """
+    validated_path = validate_screenshot_path(path)
+    if algorithm not in HASH_ALGORITHMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown algorithm '{algorithm}' (use one of: {', '.join(HASH_ALGORITHMS)})"
+        )
+
+    try:
+        matches = await screenshot_service.find_similar(
+            str(validated_path),
+            algorithm=algorithm,
+            max_distance=max_distance,
+            limit=limit
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Similarity search failed: {str(e)}")
+
+    return {
+        "query": str(validated_path),
+        "algorithm": algorithm,
+        "max_distance": max_distance,
+        "matches": matches
+    }
 
 @app.post("/api/screenshots/open-file")
 async def open_file(path: str):
@@ -806,14 +1359,15 @@ async def open_folder(path: str):
 async def retry_screenshot(url: str, viewport_width: int = 1920, viewport_height: int = 1080):
     """Retry capturing a single screenshot"""
     try:
-        screenshot_path = await screenshot_service.capture(
-            url=url,
-            viewport_width=viewport_width,
-            viewport_height=viewport_height,
-            full_page=True
-        )
+        async with capture_scheduler.slot(url):
+            screenshot_path = await screenshot_service.capture(
+                url=url,
+                viewport_width=viewport_width,
+                viewport_height=viewport_height,
+                full_page=True
+            )
 
-        quality_result = await quality_checker.check(screenshot_path)
+        quality_result = await _check_quality(screenshot_path)
 
         return ScreenshotResult(
             url=url,
@@ -944,6 +1498,7 @@ async def start_login(request: LoginRequest):
             str(STORAGE_STATE_FILE),
             browser_engine=request.browser_engine
         )
+        auth_states.invalidate(STORAGE_STATE_FILE)
 
         return JSONResponse({
             "status": "success",
@@ -960,55 +1515,41 @@ async def get_auth_status():
     """
     if STORAGE_STATE_FILE.exists():
         try:
-            with open(STORAGE_STATE_FILE, 'r') as f:
-                state = json.load(f)
-
-            # Get basic info
-            cookies = state.get('cookies', [])
-            cookie_count = len(cookies)
-            origins = state.get('origins', [])
-
-            # Get localStorage count and items
-            ls_count = 0
-            ls_items = []
-            for origin in origins:
-                origin_ls = origin.get('localStorage', [])
-                ls_count += len(origin_ls)
-                ls_items.extend(origin_ls)
+            # ⚡ Parsed once per file version (shared with the capture service)
+            state = auth_states.get(STORAGE_STATE_FILE)
+            if state is None:
+                raise ValueError("Auth state file is not valid JSON")
 
             # Extract auth-related cookies (for preview)
             auth_keywords = ['token', 'auth', 'session', 'sid', 'jsession', 'jwt', 'bearer', 'user', 'login']
-            auth_cookies = []
-            for cookie in cookies:
-                name_lower = cookie.get('name', '').lower()
-                if any(keyword in name_lower for keyword in auth_keywords):
-                    auth_cookies.append({
-                        'name': cookie.get('name'),
-                        'domain': cookie.get('domain'),
-                        'expires': cookie.get('expires', -1)
-                    })
+            auth_cookies = [
+                {
+                    'name': cookie.get('name'),
+                    'domain': cookie.get('domain'),
+                    'expires': cookie.get('expires', -1)
+                }
+                for cookie in state.cookies_matching(auth_keywords)
+            ]
 
             # Extract auth-related localStorage items (for preview)
             auth_ls_items = []
-            for item in ls_items:
-                name_lower = item.get('name', '').lower()
-                if any(keyword in name_lower for keyword in auth_keywords):
-                    value = item.get('value', '')
-                    # Truncate long values
-                    truncated_value = value[:100] + '...' if len(value) > 100 else value
-                    auth_ls_items.append({
-                        'name': item.get('name'),
-                        'value': truncated_value
-                    })
+            for item in state.storage_items_matching(auth_keywords):
+                value = item.get('value', '')
+                # Truncate long values
+                truncated_value = value[:100] + '...' if len(value) > 100 else value
+                auth_ls_items.append({
+                    'name': item.get('name'),
+                    'value': truncated_value
+                })
 
             return JSONResponse({
                 "exists": True,
-                "cookie_count": cookie_count,
-                "localStorage_count": ls_count,
+                "cookie_count": state.cookie_count,
+                "localStorage_count": state.local_storage_count,
                 "cookies": auth_cookies[:10],  # Limit to 10 for preview
                 "localStorage_items": auth_ls_items[:10],  # Limit to 10 for preview
                 "file": str(STORAGE_STATE_FILE),
-                "file_size": STORAGE_STATE_FILE.stat().st_size
+                "file_size": state.size
             })
         except Exception as e:
             return JSONResponse({
@@ -1028,6 +1569,7 @@ async def clear_auth_state():
     try:
         if STORAGE_STATE_FILE.exists():
             STORAGE_STATE_FILE.unlink()
+            auth_states.invalidate(STORAGE_STATE_FILE)
             return JSONResponse({
                 "status": "success",
                 "message": "Auth state cleared"
@@ -1047,6 +1589,7 @@ async def save_auth_from_extension(storage_state: dict):
         # Save to auth_state.json
         with open(STORAGE_STATE_FILE, 'w') as f:
             json.dump(storage_state, f, indent=2)
+        auth_states.invalidate(STORAGE_STATE_FILE)  # Same-second rewrite of equal size would look unchanged
 
         # Get stats
         cookie_count = len(storage_state.get('cookies', []))
@@ -1180,6 +1723,7 @@ async def clear_cookies(engine: str = "all"):
             # Clear Playwright storage state
             if cookie_extractor.playwright_storage.exists():
                 cookie_extractor.playwright_storage.unlink()
+                auth_states.invalidate(cookie_extractor.playwright_storage)
                 cleared.append("playwright")
                 logger.info("🧹 Cleared Playwright cookies")
 
@@ -1213,18 +1757,16 @@ async def analyze_cookies(domain: str = None, auth_only: bool = False):
     try:
         from collections import defaultdict
 
-        # Load cookies
+        # Load cookies (⚡ parsed once per file version by the auth state repository)
         storage_file = Path("browser_sessions/playwright_storage_state.json")
-        if not storage_file.exists():
+        state = auth_states.get(storage_file)
+        if state is None:
             return {
                 "success": False,
                 "error": "No cookies found. Extract cookies first."
             }
 
-        with open(storage_file, 'r') as f:
-            data = json.load(f)
-
-        cookies = data.get('cookies', [])
+        cookies = state.cookies
 
         # Filter by domain
         if domain:
@@ -1557,6 +2099,9 @@ async def launch_debug_chrome():
 
 
 if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()  # Frozen (PyInstaller) image workers must not start the server again
+
     import uvicorn
     uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
 
@@ -0,0 +1,220 @@
+"""
+⚡ Network Quiescence Tracker
+In-page replacement for Playwright's 'networkidle' waits
+
+'networkidle' waits for 500ms with ZERO connections. SPAs with long-polling, analytics
+beacons or websockets-over-XHR never get there, so every capture burned the full
+10-15s timeout. This tracker counts in-flight fetch/XHR from inside the page instead:
+
+- URLs matching the ignore list (analytics, beacons, long-poll endpoints) are not counted
+- Requests in flight longer than `long_request_ms` are treated as long-lived and not counted
+- The page is "quiet" when at most `max_inflight` requests are in flight for `idle_ms`
+
+The tracker script is installed together with the readiness tracker (see
+page_readiness.install_readiness_tracker), so both waits share one window.__networkTracker.
+
+Usage:
+    await install_readiness_tracker(page)   # BEFORE page.goto()
+    await page.goto(url, wait_until='load')
+    result = await wait_for_network_quiet(page, timeout_ms=15000)
+"""
+
+import json
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence
+
+from config import settings
+
+
+def build_network_tracker_script(ignore_patterns: Optional[Sequence[str]] = None) -> str:
+    """
+    Build the init script that tracks in-flight fetch/XHR in the page.
+
+    Args:
+        ignore_patterns: URL regexes to ignore (default: settings.network_ignore_patterns)
+
+    Returns:
+        JavaScript source for page.add_init_script() / page.evaluate()
+    """
+    patterns = list(settings.network_ignore_patterns if ignore_patterns is None else ignore_patterns)
+    return """
+(() => {
+    if (window.__networkTracker) return;
+    const ignore = %s.map(p => {
+        try { return new RegExp(p, 'i'); } catch (e) { return null; }
+    }).filter(Boolean);
+
+    const tracker = {
+        requests: new Map(),  // id -> { url, start }
+        nextId: 0,
+        ignored: 0,
+        lastActivity: performance.now(),
+        // In-flight requests that count (long-lived ones are excluded)
+        active(longRequestMs) {
+            const now = performance.now();
+            const urls = [];
+            let longRunning = 0;
+            for (const req of this.requests.values()) {
+                if (now - req.start >= longRequestMs) { longRunning++; continue; }
+                urls.push(req.url);
+            }
+            return { urls, longRunning };
+        },
+    };
+    window.__networkTracker = tracker;
+
+    const isIgnored = (url) => ignore.some(re => re.test(url));
+    const begin = (url) => {
+        url = String(url || '');
+        if (isIgnored(url)) { tracker.ignored++; return null; }
+        const id = tracker.nextId++;
+        tracker.requests.set(id, { url, start: performance.now() });
+        tracker.lastActivity = performance.now();
+        return id;
+    };
+    const end = (id) => {
+        if (id === null || !tracker.requests.delete(id)) return;
+        tracker.lastActivity = performance.now();
+    };
+
+    // fetch()
+    if (window.fetch) {
+        const originalFetch = window.fetch;
+        window.fetch = function(input, ...rest) {
+            const id = begin(input && input.url ? input.url : input);
+            let result;
+            try {
+                result = originalFetch.call(this, input, ...rest);
+            } catch (e) {
+                end(id);
+                throw e;
+            }
+            return Promise.resolve(result).finally(() => end(id));
+        };
+    }
+
+    // XMLHttpRequest
+    const originalOpen = XMLHttpRequest.prototype.open;
+    XMLHttpRequest.prototype.open = function(method, url, ...rest) {
+        this.__trackedUrl = url;
+        return originalOpen.call(this, method, url, ...rest);
+    };
+    const originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function(...args) {
+        const id = begin(this.__trackedUrl);
+        this.addEventListener('loadend', () => end(id), { once: true });
+        try {
+            return originalSend.apply(this, args);
+        } catch (e) {
+            end(id);
+            throw e;
+        }
+    };
+})();
+""" % json.dumps(patterns)
+
+
+# Waits in-page (single round trip) until the network is quiet or the timeout runs out
+NETWORK_WAIT_SCRIPT = """
+async ({ idleMs, maxInflight, longRequestMs, timeoutMs, pollMs }) => {
+    const start = performance.now();
+    const tracker = window.__networkTracker;
+    if (!tracker) return { quiet: true, installed: false, elapsedMs: 0, inflight: 0, longRunning: 0, ignored: 0, pending: [] };
+
+    let quietSince = null;
+    while (true) {
+        const now = performance.now();
+        const { urls, longRunning } = tracker.active(longRequestMs);
+        if (urls.length <= maxInflight) {
+            // Already quiet before we started waiting? Count from the last activity.
+            if (quietSince === null) quietSince = urls.length === 0 ? tracker.lastActivity : now;
+            if (now - quietSince >= idleMs) {
+                return { quiet: true, installed: true, elapsedMs: Math.round(now - start), inflight: urls.length,
+                         longRunning, ignored: tracker.ignored, pending: [] };
+            }
+        } else {
+            quietSince = null;
+        }
+        if (now - start >= timeoutMs) {
+            return { quiet: false, installed: true, elapsedMs: Math.round(now - start), inflight: urls.length,
+                     longRunning, ignored: tracker.ignored, pending: urls.slice(0, 5) };
+        }
+        await new Promise(resolve => setTimeout(resolve, pollMs));
+    }
+}
+"""
+
+
+@dataclass
+class NetworkQuietResult:
+    """Outcome of a network quiescence wait"""
+    quiet: bool
+    elapsed_ms: int
+    inflight: int = 0  # Counted requests still in flight
+    long_running: int = 0  # Requests excluded as long-lived (long-poll, streams)
+    ignored: int = 0  # Requests skipped by the ignore list so far
+    pending: List[str] = field(default_factory=list)  # Sample of URLs still in flight (on timeout)
+
+    def describe(self) -> str:
+        """One-line summary for logs"""
+        extra = f"{self.long_running} long-lived, {self.ignored} ignored"
+        if self.quiet:
+            return f"network quiet after {self.elapsed_ms}ms ({extra})"
+        sample = f" e.g. {self.pending[0][:80]}" if self.pending else ""
+        return f"network still busy after {self.elapsed_ms}ms ({self.inflight} in flight{sample}; {extra})"
+
+
+async def wait_for_network_quiet(
+    page,
+    timeout_ms: int = 15000,
+    idle_ms: Optional[int] = None,
+    max_inflight: Optional[int] = None,
+    long_request_ms: Optional[int] = None,
+    poll_ms: int = 100
+) -> NetworkQuietResult:
+    """
+    Wait until the page's fetch/XHR traffic is quiet (never raises).
+
+    Args:
+        page: Playwright page (tracker installed with page_readiness.install_readiness_tracker)
+        timeout_ms: Upper bound for the wait
+        idle_ms: Quiet period required (default: settings.network_idle_ms)
+        max_inflight: Requests allowed in flight while "quiet" (default: settings.network_idle_max_inflight)
+        long_request_ms: Requests older than this are treated as long-lived (default: settings.network_long_request_ms)
+        poll_ms: In-page polling interval
+
+    Returns:
+        NetworkQuietResult
+    """
+    start = time.monotonic()
+    while True:
+        remaining = timeout_ms - int((time.monotonic() - start) * 1000)
+        if remaining <= 0:
+            return NetworkQuietResult(quiet=False, elapsed_ms=timeout_ms)
+        try:
+            result = await page.evaluate(NETWORK_WAIT_SCRIPT, {
+                "idleMs": settings.network_idle_ms if idle_ms is None else idle_ms,
+                "maxInflight": settings.network_idle_max_inflight if max_inflight is None else max_inflight,
+                "longRequestMs": settings.network_long_request_ms if long_request_ms is None else long_request_ms,
+                "timeoutMs": remaining,
+                "pollMs": poll_ms,
+            })
+            return NetworkQuietResult(
+                quiet=result["quiet"],
+                elapsed_ms=int((time.monotonic() - start) * 1000),
+                inflight=result.get("inflight", 0),
+                long_running=result.get("longRunning", 0),
+                ignored=result.get("ignored", 0),
+                pending=result.get("pending", []),
+            )
+        except Exception as e:
+            if "context was destroyed" in str(e) or "navigation" in str(e).lower():
+                # Page navigated (redirect, SPA reload) - wait again on the new document
+                try:
+                    await page.wait_for_load_state("domcontentloaded", timeout=max(1, remaining))
+                except Exception:
+                    pass
+                continue
+            return NetworkQuietResult(quiet=False, elapsed_ms=int((time.monotonic() - start) * 1000),
+                                      pending=[str(e)[:100]])
@@ -0,0 +1,126 @@
+"""
+⚡ Output Format
+Screenshot encoding: PNG, JPEG, WebP or AVIF with size-vs-speed presets
+
+Every capture used to be written as lossless PNG (multi-megabyte files for tall
+full-page shots, slow to encode in Chromium and to send to the frontend).
+
+- png / jpeg are encoded natively by Chromium (page.screenshot(type=..., quality=...))
+- webp / avif are captured as PNG, then re-encoded by Pillow in the image worker pool
+- Presets trade size for speed: "fast", "balanced" (default), "small"
+- An explicit quality (1-100) overrides the preset's quality
+
+Usage:
+    output = OutputFormat.create("webp", preset="small")
+    kwargs = output.screenshot_kwargs()     # -> {"type": "png"} (re-encoded afterwards)
+    await workers.encode(png_bytes, path, output.pil_format, **output.encode_options())
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+
+OUTPUT_FORMATS = ("png", "jpeg", "webp", "avif")
+OUTPUT_PRESETS = ("fast", "balanced", "small")
+
+# Formats Chromium encodes itself (no re-encode step)
+NATIVE_FORMATS = ("png", "jpeg")
+
+FILE_EXTENSIONS = {"png": ".png", "jpeg": ".jpg", "webp": ".webp", "avif": ".avif"}
+
+# Response media types for every extension we may write (mimetypes lacks .avif on older Pythons)
+MEDIA_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".webp": "image/webp",
+    ".avif": "image/avif",
+}
+
+# Per-format encoder settings for each preset
+_PRESET_OPTIONS: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "png": {"fast": {}, "balanced": {}, "small": {}},  # Chromium's encoder, lossless
+    "jpeg": {
+        "fast": {"quality": 90},
+        "balanced": {"quality": 80},
+        "small": {"quality": 65},
+    },
+    "webp": {  # method: 0 (fastest) - 6 (smallest)
+        "fast": {"quality": 85, "method": 2},
+        "balanced": {"quality": 80, "method": 4},
+        "small": {"quality": 70, "method": 6},
+    },
+    "avif": {  # speed: 0 (smallest) - 10 (fastest)
+        "fast": {"quality": 75, "speed": 8},
+        "balanced": {"quality": 65, "speed": 6},
+        "small": {"quality": 55, "speed": 4},
+    },
+}
+
+
+def media_type_for(path: Union[str, Path]) -> Optional[str]:
+    """Response media type for a screenshot file (None = let the server guess)"""
+    return MEDIA_TYPES.get(Path(path).suffix.lower())
+
+
+@dataclass(frozen=True)
+class OutputFormat:
+    """How captures are encoded on disk"""
+    format: str = "png"
+    preset: str = "balanced"
+    quality: Optional[int] = None  # Overrides the preset's quality (ignored for png)
+
+    @classmethod
+    def create(cls, format: str = "png", preset: str = "balanced", quality: Optional[int] = None) -> "OutputFormat":
+        """
+        Validated constructor.
+
+        Raises:
+            ValueError: Unknown format/preset or quality outside 1-100
+        """
+        format = (format or "png").lower()
+        if format == "jpg":
+            format = "jpeg"
+        if format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format '{format}' (use one of: {', '.join(OUTPUT_FORMATS)})")
+        if preset not in OUTPUT_PRESETS:
+            raise ValueError(f"Unknown output preset '{preset}' (use one of: {', '.join(OUTPUT_PRESETS)})")
+        if quality is not None and not 1 <= quality <= 100:
+            raise ValueError("Output quality must be between 1 and 100")
+        return cls(format=format, preset=preset, quality=quality)
+
+    @property
+    def extension(self) -> str:
+        return FILE_EXTENSIONS[self.format]
+
+    @property
+    def native(self) -> bool:
+        """Chromium writes this format directly (no re-encode in the worker pool)"""
+        return self.format in NATIVE_FORMATS
+
+    @property
+    def pil_format(self) -> str:
+        return self.format.upper()
+
+    def encode_options(self) -> Dict[str, Any]:
+        """Encoder settings (Pillow save() kwargs; Chromium only uses 'quality')"""
+        options = dict(_PRESET_OPTIONS[self.format][self.preset])
+        if self.quality is not None and self.format != "png":
+            options["quality"] = self.quality
+        return options
+
+    def screenshot_kwargs(self) -> Dict[str, Any]:
+        """page.screenshot() arguments: the final encoding for native formats, PNG otherwise"""
+        if self.format == "jpeg":
+            return {"type": "jpeg", "quality": self.encode_options()["quality"]}
+        return {"type": "png"}
+
+    def describe(self) -> str:
+        """One-line summary for logs"""
+        options = ", ".join(f"{key}={value}" for key, value in self.encode_options().items())
+        encoder = "Chromium" if self.native else "worker pool"
+        return f"{self.format.upper()} ({self.preset}{', ' + options if options else ''}; {encoder})"
+
+
+DEFAULT_OUTPUT_FORMAT = OutputFormat()
@@ -0,0 +1,198 @@
+"""
+⚡ Page Readiness Engine
+Event-driven "is the page done rendering?" check that replaces fixed asyncio.sleep() waits
+
+Init scripts install in-page observers before any page JavaScript runs:
+- Network quiescence tracker (in-flight fetch/XHR, see network_quiescence.py)
+- MutationObserver on the whole document (time of last DOM mutation)
+
+wait_for_page_ready() then resolves in ONE page.evaluate() round trip as soon as ALL
+of these hold, or when the max budget runs out:
+- network: no (non-ignored, non-long-lived) fetch/XHR in flight for `quiet_ms`
+- dom: no DOM mutations for `quiet_ms`
+- fonts: document.fonts.ready
+- images: no pending (non-lazy or in-viewport) images still loading/decoding
+- selector: optional CSS selector is present
+
+The result reports which condition fired (the last one to settle, or "budget").
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from config import settings
+from network_quiescence import build_network_tracker_script
+
+
+# Installed with page.add_init_script() BEFORE navigation (runs before page scripts).
+# Safe to evaluate again on an already-loaded page (late install, e.g. CDP tabs).
+# Network activity comes from window.__networkTracker (network_quiescence.py).
+READINESS_TRACKER_SCRIPT = """
+(() => {
+    if (window.__pageReadiness) return;
+    const state = { lastMutation: performance.now() };
+    window.__pageReadiness = state;
+
+    // DOM mutations (document is observable before <html> exists)
+    new MutationObserver(() => { state.lastMutation = performance.now(); })
+        .observe(document, { subtree: true, childList: true, attributes: true, characterData: true });
+})();
+"""
+
+# Waits in-page (single round trip) until every condition holds or the budget runs out
+READINESS_WAIT_SCRIPT = """
+async ({ quietMs, maxMs, minMs, selector, pollMs, maxInflight, longRequestMs }) => {
+    const start = performance.now();
+    const state = window.__pageReadiness;
+    const network = window.__networkTracker;
+    const settledAt = {};
+    let inflight = 0;
+
+    const pendingImages = () => {
+        let pending = 0;
+        for (const img of document.images) {
+            if (img.complete && img.naturalWidth !== 0) continue;
+            if (img.complete) continue;  // Broken image - nothing to wait for
+            if (img.loading === 'lazy') {
+                const rect = img.getBoundingClientRect();
+                if (rect.top > window.innerHeight || rect.bottom < 0) continue;  // Off-screen lazy image
+            }
+            pending++;
+        }
+        return pending;
+    };
+
+    let fontsReady = !document.fonts || document.fonts.status === 'loaded';
+    if (!fontsReady) document.fonts.ready.then(() => { fontsReady = true; });
+
+    const check = () => {
+        const now = performance.now();
+        inflight = network ? network.active(longRequestMs).urls.length : 0;
+        const conditions = {
+            network: !network || (inflight <= maxInflight && now - network.lastActivity >= quietMs),
+            dom: document.readyState !== 'loading' && (!state || now - state.lastMutation >= quietMs),
+            fonts: fontsReady,
+            images: pendingImages() === 0,
+        };
+        if (selector) conditions.selector = !!document.querySelector(selector);
+
+        for (const [name, ok] of Object.entries(conditions)) {
+            if (ok && settledAt[name] === undefined) settledAt[name] = now;
+            if (!ok) delete settledAt[name];
+        }
+        return conditions;
+    };
+
+    while (true) {
+        const conditions = check();
+        const elapsed = performance.now() - start;
+        const pending = Object.keys(conditions).filter(name => !conditions[name]);
+
+        if (pending.length === 0 && elapsed >= minMs) {
+            // The condition that settled last is the one we were actually waiting on
+            const fired = Object.keys(settledAt).reduce((a, b) => settledAt[a] >= settledAt[b] ? a : b);
+            return { ready: true, condition: fired, elapsedMs: Math.round(elapsed), pending: [], inflight };
+        }
+        if (elapsed >= maxMs) {
+            return { ready: false, condition: 'budget', elapsedMs: Math.round(elapsed), pending, inflight };
+        }
+        await new Promise(resolve => setTimeout(resolve, pollMs));
+    }
+}
+"""
+
+
+@dataclass
+class ReadinessResult:
+    """Outcome of a readiness wait"""
+    ready: bool
+    condition: str  # Condition that fired: "network", "dom", "fonts", "images", "selector", "budget" or "error"
+    elapsed_ms: int
+    pending: List[str] = field(default_factory=list)  # Conditions still unmet (budget exhausted)
+    inflight: int = 0  # fetch/XHR still in flight when the wait ended
+
+    def describe(self) -> str:
+        """One-line summary for logs"""
+        if self.ready:
+            return f"ready after {self.elapsed_ms}ms (last to settle: {self.condition})"
+        return (f"budget exhausted after {self.elapsed_ms}ms "
+                f"(still waiting on: {', '.join(self.pending) or 'nothing'}, {self.inflight} requests in flight)")
+
+
+async def install_readiness_tracker(page):
+    """
+    Register the in-page tracker on a page.
+
+    Call BEFORE page.goto() so fetch/XHR made during load are counted. Also evaluates
+    it immediately, so pages that are already loaded (CDP tabs) get tracked from now on.
+    Installs the network quiescence tracker too (wait_for_network_quiet uses the same one).
+    """
+    script = build_network_tracker_script() + READINESS_TRACKER_SCRIPT
+    await page.add_init_script(script)
+    try:
+        await page.evaluate(script)
+    except Exception:
+        pass  # about:blank or mid-navigation - the init script covers the next document
+
+
+async def wait_for_page_ready(
+    page,
+    max_wait_ms: int = 10000,
+    quiet_ms: int = 500,
+    selector: Optional[str] = None,
+    min_wait_ms: int = 0,
+    poll_ms: int = 100
+) -> ReadinessResult:
+    """
+    Wait until the page is stable (or the budget runs out).
+
+    Args:
+        page: Playwright page
+        max_wait_ms: Upper bound for the whole wait
+        quiet_ms: Required quiet period for network and DOM mutations
+        selector: Optional CSS selector that must be present
+        min_wait_ms: Never return "ready" before this much time has passed
+        poll_ms: In-page polling interval
+
+    Returns:
+        ReadinessResult (never raises - a failed check returns condition="error")
+    """
+    loop_start = _now_ms()
+    while True:
+        remaining = max_wait_ms - (_now_ms() - loop_start)
+        if remaining <= 0:
+            return ReadinessResult(ready=False, condition="budget", elapsed_ms=max_wait_ms)
+        try:
+            # Late install is a no-op if the init script already ran
+            await page.evaluate(build_network_tracker_script() + READINESS_TRACKER_SCRIPT)
+            result = await page.evaluate(READINESS_WAIT_SCRIPT, {
+                "quietMs": quiet_ms,
+                "maxInflight": settings.network_idle_max_inflight,
+                "longRequestMs": settings.network_long_request_ms,
+                "maxMs": remaining,
+                "minMs": max(0, min_wait_ms - (_now_ms() - loop_start)),
+                "selector": selector or None,
+                "pollMs": poll_ms,
+            })
+            return ReadinessResult(
+                ready=result["ready"],
+                condition=result["condition"],
+                elapsed_ms=_now_ms() - loop_start,
+                pending=result.get("pending", []),
+                inflight=result.get("inflight", 0),
+            )
+        except Exception as e:
+            if "context was destroyed" in str(e) or "navigation" in str(e).lower():
+                # Page navigated (redirect, SPA reload) - wait again on the new document
+                try:
+                    await page.wait_for_load_state("domcontentloaded", timeout=max(1, int(remaining)))
+                except Exception:
+                    pass
+                continue
+            return ReadinessResult(ready=False, condition="error", elapsed_ms=_now_ms() - loop_start,
+                                   pending=[str(e)[:100]])
+
+
+def _now_ms() -> int:
+    return int(time.monotonic() * 1000)
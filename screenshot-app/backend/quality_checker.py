@@ -4,29 +4,44 @@ Detects blank pages, errors, and quality issues
 """
 
 from PIL import Image
+import numpy as np
 import os
 from typing import Dict, List
 
 class QualityChecker:
+    # ⚡ Row strips analyzed at a time (bounds memory on very tall full-page captures)
+    STRIP_ROWS = 512
+    # Bits kept per RGB channel for the dominant-color histogram (5 -> 32768 bins)
+    COLOR_BITS = 5
+    # Gray-level step that counts as an edge
+    EDGE_THRESHOLD = 24
+
     def __init__(self):
         self.min_file_size = 5000  # 5KB minimum
         self.min_brightness = 10  # Minimum average brightness
         self.max_brightness = 250  # Maximum average brightness (detect blank white pages)
+        self.single_color_threshold = 0.95  # Share of pixels in the dominant color
     
     async def check(self, screenshot_path: str) -> Dict:
+        """
+        Check screenshot quality (see check_file)
+        """
+        return self.check_file(screenshot_path)
+
+    def check_file(self, screenshot_path: str) -> Dict:
         """
         Check screenshot quality
+
+        Synchronous - callers on the event loop should run it in the image worker pool.
         
         Returns:
             {
                 "passed": bool,
                 "score": float (0-100),
-                "issues": List[str]
+                "issues": List[str],
+                "metrics": {"brightness", "contrast", "dominant_ratio", "entropy", "edge_density"}
             }
         """
-        issues = []
-        score = 100.0
-        
         # Check if file exists
         if not os.path.exists(screenshot_path):
             return {
@@ -37,22 +52,51 @@ class QualityChecker:
         
         # Check file size
         file_size = os.path.getsize(screenshot_path)
+
+        try:
+            # Open image
+            img = Image.open(screenshot_path)
+        except Exception as e:
+            return {
+                "passed": False,
+                "score": 0.0,
+                "issues": [f"Error analyzing image: {str(e)}"]
+            }
+
+        return self.analyze(img, file_size)
+
+    def analyze(self, img: Image, file_size: int) -> Dict:
+        """
+        Check quality of an already decoded screenshot
+
+        Lets capture code reuse the image it decoded for duplicate detection
+        instead of reading the PNG back from disk.
+
+        Args:
+            img: Decoded screenshot
+            file_size: Encoded size in bytes
+
+        Returns:
+            Same result dict as check()
+        """
+        issues = []
+        score = 100.0
+        metrics = {}
+
         if file_size < self.min_file_size:
             issues.append(f"File too small ({file_size} bytes)")
             score -= 30
         
         try:
-            # Open image
-            img = Image.open(screenshot_path)
-            
             # Check dimensions
             width, height = img.size
             if width < 100 or height < 100:
                 issues.append(f"Image too small ({width}x{height})")
                 score -= 30
             
-            # Check brightness (detect blank pages)
-            brightness = self._calculate_brightness(img)
+            # ⚡ All metrics in one vectorized pass
+            metrics = self._measure(img)
+            brightness = metrics["brightness"]
             
             if brightness < self.min_brightness:
                 issues.append(f"Image too dark (brightness: {brightness:.1f})")
@@ -63,7 +107,7 @@ class QualityChecker:
                 score -= 40
             
             # Check for mostly single color (blank page detection)
-            if self._is_mostly_single_color(img):
+            if metrics["dominant_ratio"] > self.single_color_threshold:
                 issues.append("Image appears to be blank or single color")
                 score -= 35
             
@@ -77,37 +121,62 @@ class QualityChecker:
         return {
             "passed": score >= 60.0,  # Only check score, not issues
             "score": score,
-            "issues": issues
+            "issues": issues,
+            "metrics": {name: round(value, 4) for name, value in metrics.items()}
         }
     
-    def _calculate_brightness(self, img: Image) -> float:
-        """Calculate average brightness of image"""
-        # Convert to grayscale
-        grayscale = img.convert('L')
-        
-        # Calculate average pixel value
-        pixels = list(grayscale.getdata())
-        avg_brightness = sum(pixels) / len(pixels)
-        
-        return avg_brightness
-    
-    def _is_mostly_single_color(self, img: Image, threshold: float = 0.95) -> bool:
-        """Check if image is mostly a single color"""
-        # Resize to small size for faster processing
-        small_img = img.resize((50, 50))
-        
-        # Get colors
-        colors = small_img.getcolors(maxcolors=2500)
-        
-        if not colors:
-            return False
-        
-        # Sort by frequency
-        colors.sort(reverse=True, key=lambda x: x[0])
-        
-        # Check if most common color dominates
-        total_pixels = 50 * 50
-        most_common_count = colors[0][0]
-        
-        return (most_common_count / total_pixels) > threshold
+    def _measure(self, img: Image) -> Dict[str, float]:
+        """
+        Brightness, contrast, dominant-color ratio, entropy and edge density in one pass
+
+        ⚡ OPTIMIZATION: Vectorized with NumPy over row strips, so a 1920x20000 capture
+        never becomes a 38M-element Python list and peak memory stays at one strip.
+
+        Returns:
+            {"brightness", "contrast", "dominant_ratio", "entropy", "edge_density"}
+        """
+        width, height = img.size
+        gray_hist = np.zeros(256, dtype=np.int64)
+        color_hist = np.zeros(1 << (3 * self.COLOR_BITS), dtype=np.int64)
+        edges = 0
+        edge_samples = 0
+        previous_row = None  # Last gray row of the previous strip (vertical edges across strips)
+        shift = 8 - self.COLOR_BITS
+
+        for top in range(0, height, self.STRIP_ROWS):
+            strip = img.crop((0, top, width, min(height, top + self.STRIP_ROWS))).convert('RGB')
+            rgb = np.asarray(strip)
+            gray = np.asarray(strip.convert('L')).astype(np.int16)
+
+            gray_hist += np.bincount(gray.ravel(), minlength=256)
 
+            # Quantized color histogram (exact colors would be 16M bins)
+            q = (rgb >> shift).astype(np.int32)
+            codes = (q[..., 0] << (2 * self.COLOR_BITS)) | (q[..., 1] << self.COLOR_BITS) | q[..., 2]
+            color_hist += np.bincount(codes.ravel(), minlength=color_hist.size)
+
+            # Edge density: share of pixels with a strong horizontal or vertical gradient
+            above = previous_row if previous_row is not None else gray[:1]  # First row has no vertical edge
+            dx = np.abs(np.diff(gray, axis=1)) > self.EDGE_THRESHOLD
+            dy = np.abs(np.diff(np.vstack((above, gray)), axis=0)) > self.EDGE_THRESHOLD
+            edges += int(np.count_nonzero(dx | dy[:, :-1]))
+            edge_samples += dx.size
+            previous_row = gray[-1:]
+
+        total = int(gray_hist.sum())
+        if total == 0:
+            return {"brightness": 0.0, "contrast": 0.0, "dominant_ratio": 1.0, "entropy": 0.0, "edge_density": 0.0}
+
+        levels = np.arange(256, dtype=np.float64)
+        brightness = float((gray_hist * levels).sum() / total)
+        contrast = float(np.sqrt(max(0.0, (gray_hist * levels ** 2).sum() / total - brightness ** 2)))
+        probabilities = gray_hist[gray_hist > 0] / total
+        entropy = abs(float((probabilities * np.log2(probabilities)).sum()))
+
+        return {
+            "brightness": brightness,
+            "contrast": contrast,
+            "dominant_ratio": float(color_hist.max() / total),
+            "entropy": entropy,
+            "edge_density": edges / edge_samples if edge_samples else 0.0,
+        }
@@ -52,15 +52,33 @@ from playwright_stealth import stealth_async
 import os
 import asyncio
 import random
+import time
 import hashlib
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime
-from PIL import Image
-import imagehash
 import json
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator, Tuple, Dict, Optional
+from typing import AsyncGenerator, List, Tuple, Dict, Optional
 from config import settings  # ✅ PHASE 3: Use centralized configuration
+from browser_pool import BrowserPool, BrowserKey, PooledBrowser  # ⚡ Keyed browser pool
+from context_pool import ContextPool, ContextKey, PooledContext, storage_state_digest  # ⚡ Pre-warmed contexts
+from page_readiness import ReadinessResult, install_readiness_tracker, wait_for_page_ready  # ⚡ Event-driven waits
+from network_quiescence import NetworkQuietResult, wait_for_network_quiet  # ⚡ Replaces 'networkidle'
+from segment_scroller import SegmentStep, install_segment_scroller, scroll_to_segment  # ⚡ 1 round trip per segment
+from hash_store import HashStore, content_digest  # ⚡ Content-addressed hash cache (SQLite)
+from image_similarity import DEFAULT_HASH_ALGORITHM, HASH_ALGORITHMS, SimilarityIndex, hash_similarity  # ⚡ Bit-level hashes + BK-tree
+from image_workers import ImageAnalysis, ImageWorkerPool  # ⚡ PIL post-processing off the event loop
+from output_format import DEFAULT_OUTPUT_FORMAT, OutputFormat  # ⚡ PNG/JPEG/WebP/AVIF output
+from cdp_capture import CdpScreenshotter, open_cdp_screenshotter  # ⚡ Direct Page.captureScreenshot engine
+from image_stitcher import stitch_segments  # ⚡ One tall image from overlapping segments
+from tiled_capture import CHROMIUM_MAX_TEXTURE, capture_tiled  # ⚡ Full-page shots past 16384px
+from spa_router import RouteCapture, change_route  # ⚡ Many routes from one booted SPA
+from cookie_warmup import CookieWarmup  # ⚡ Memoized, parallel cross-domain cookie warm-up
+from auth_state import auth_states  # ⚡ Parsed auth files, invalidated by mtime
+from lazy_loader import EagerLoadResult, force_eager_load, install_eager_loading  # ⚡ Replaces the 100px crawl
+from height_stabilizer import HeightResult, stabilize_height  # ⚡ Push-based height stabilization
+from scroll_detector import ScrollContainer, ScrollContainerCache, detect_scroll_container, scroll_cache_key  # ⚡ Fast container detection
 
 # ========================================
 # 🎯 9 STEALTH SOLUTIONS - USER AGENTS
@@ -114,9 +132,6 @@ class ScreenshotService:
     # ========================================
     # Timing constants
     CDP_RELOAD_WAIT_SECONDS = 15
-    CDP_HEIGHT_STABILIZE_ATTEMPTS = 30
-    CDP_STABILIZE_DELAY_SECONDS = 0.5
-    CDP_STABLE_COUNT_THRESHOLD = 4
     CDP_LAZY_LOAD_MAX_MS = 3000
     CDP_LAZY_LOAD_CHECK_INTERVAL_MS = 500
     CDP_LAZY_LOAD_STABLE_CHECKS = 2
@@ -129,39 +144,82 @@ class ScreenshotService:
     DEFAULT_OVERLAP_PERCENT = 20
     DEFAULT_MAX_SEGMENTS = 50
 
+    # ⚡ Responsive matrix: readiness budget after each viewport resize (no navigation)
+    VIEWPORT_READY_MAX_MS = 5000
+
     # ⚡ OPTIMIZATION: Browser reuse settings
     ENABLE_BROWSER_REUSE = True  # Feature flag - set to False to disable optimization
-    MAX_PAGES_PER_CONTEXT = 10  # Close and recreate context after this many pages
+    MAX_PAGES_PER_CONTEXT = 10  # Recycle a pooled browser after this many pages
+    ENABLE_CONTEXT_POOL = True  # Feature flag - set to False to create a fresh context per capture
 
     # ⚡ OPTIMIZATION: Batch processing settings
-    ENABLE_BATCH_PROCESSING = True  # Feature flag - set to False to disable batch processing
-    DEFAULT_BATCH_SIZE = 999999  # Process ALL URLs in parallel (no limit)
-    SAME_DOMAIN_BATCH_SIZE = 999999  # Process ALL URLs in parallel (same domain - no limit)
+    ENABLE_BATCH_PROCESSING = True  # Feature flag - set to False to capture one URL at a time
+    # All URLs of a request are pipelined (no batches) - concurrency is capped by the global
+    # capture scheduler (settings.max_concurrent_captures + per-host token buckets)
 
     def __init__(self):
-        self.browser: Browser = None
         self.playwright = None
-        self.camoufox_browser = None  # ✅ Separate Camoufox browser instance
+        self._playwright_lock = asyncio.Lock()
         self.cdp_browser = None  # 🔗 CDP-connected browser instance
         self.cdp_active_page = None  # 🔗 Active tab from CDP connection
         self.output_dir = Path("screenshots")
         self.output_dir.mkdir(exist_ok=True)
-        self._hash_cache = {}  # ✅ OPTIMIZATION: In-memory cache for image hashes
-        self._hash_cache_file = self.output_dir / ".hash_cache.json"  # ⚡ OPTIMIZATION: Persistent cache file
-        self._load_hash_cache()  # ⚡ OPTIMIZATION: Load cache from disk on startup
+        # ⚡ OPTIMIZATION: Persistent hash cache keyed by image content (SQLite WAL, batched commits, LRU cap)
+        self.hash_store = HashStore(
+            self.output_dir / ".hash_store.sqlite3",
+            max_entries=settings.hash_store_max_entries,
+            commit_every=settings.hash_store_commit_batch,
+        )
+        self._drop_legacy_hash_cache()
+        # ⚡ OPTIMIZATION: BK-tree index over the library for near-duplicate search (built lazily per algorithm)
+        self.similarity_index = SimilarityIndex(self.output_dir, self.hash_store)
+
+        # ⚡ OPTIMIZATION: Decode/hash/quality/encode run in worker processes (shared-memory handoff)
+        self.image_workers = ImageWorkerPool(max_workers=settings.image_worker_processes)
+
+        # ⚡ OPTIMIZATION: Quality reports computed by the image workers at capture time (path -> report)
+        # main.py picks them up instead of re-reading the PNG from disk
+        self._quality_reports: "OrderedDict[str, dict]" = OrderedDict()
+        # ⚡ Responsive matrix: primary path -> paths of every breakpoint (see pop_viewport_captures)
+        self._viewport_captures: "OrderedDict[str, List[str]]" = OrderedDict()
+        # ⚡ SPA route mode: primary path -> routes captured from the same booted page (see pop_route_captures)
+        self._route_captures: "OrderedDict[str, List[RouteCapture]]" = OrderedDict()
+
+        # ⚡ OPTIMIZATION: Cross-domain cookie warm-up memoized per (context, auth state), visits in parallel
+        self.cookie_warmup = CookieWarmup(
+            visit_timeout_ms=settings.cookie_warmup_visit_timeout_ms,
+            max_parallel=settings.cookie_warmup_parallel_visits,
+        )
 
         # Session storage for cookies (improves stealth)
         self.session_dir = Path("browser_sessions")
         self.session_dir.mkdir(exist_ok=True)
 
-        # Track current browser mode to detect switches
-        self.current_mode_is_real_browser = None
-        self.current_browser_mode = None  # ✅ Track browser mode (playwright/camoufox/cdp)
-        self.is_persistent_context = False  # ✅ Track if using persistent context
+        # Track CDP connection mode
+        self.current_browser_mode = None  # ✅ Set to 'cdp' while connected to an existing Chrome
+
+        # ⚡ OPTIMIZATION: Keyed browser pool (engine × headless × stealth × persistent)
+        # Mixed workloads reuse one browser per mode instead of relaunching on every switch.
+        # Page counts and stealth-injection state are tracked per pooled browser.
+        self.browser_pool = BrowserPool(
+            launcher=self._launch_browser,
+            max_per_key=settings.browser_pool_size_per_key,
+            max_browsers=settings.browser_pool_max_browsers,
+            idle_timeout=settings.browser_pool_idle_timeout,
+            max_pages_per_browser=self.MAX_PAGES_PER_CONTEXT if self.ENABLE_BROWSER_REUSE else None,
+        )
+
+        # ⚡ OPTIMIZATION: Pre-warmed BrowserContexts (browser mode × viewport × stealth × auth state)
+        # Skips context creation + storage_state parsing per URL; contexts are scrubbed and reused.
+        self.context_pool = ContextPool(
+            factory=self._create_capture_context,
+            warm_size=settings.context_pool_warm_size if self.ENABLE_CONTEXT_POOL else 0,
+            max_uses=settings.context_pool_max_uses,
+        )
 
-        # ⚡ OPTIMIZATION: Browser context reuse tracking
-        self.context_page_count = 0  # Track how many pages opened in current context
-        self.stealth_injected = False  # Track if stealth scripts already injected
+        # ⚡ OPTIMIZATION: Scroll container selector per app (base_url / URL pattern)
+        # Repeated captures of the same app skip scroll container detection entirely.
+        self.scroll_container_cache = ScrollContainerCache(max_entries=settings.scroll_container_cache_size)
 
         # ========================================
         # 🎯 9 STEALTH SOLUTIONS - Session State
@@ -174,25 +232,20 @@ class ScreenshotService:
     # ⚡ OPTIMIZATION: Hash Cache Persistence
     # ========================================
 
-    def _load_hash_cache(self):
-        """Load hash cache from disk (80% faster duplicate detection)"""
-        try:
-            if self._hash_cache_file.exists():
-                with open(self._hash_cache_file, 'r') as f:
-                    self._hash_cache = json.load(f)
-                print(f"   ⚡ Loaded {len(self._hash_cache)} cached hashes from disk")
-        except Exception as e:
-            print(f"   ⚠️  Failed to load hash cache: {e}")
-            self._hash_cache = {}  # Graceful fallback
+    def _drop_legacy_hash_cache(self):
+        """
+        Remove the old path-keyed .hash_cache.json
 
-    def _save_hash_cache(self):
-        """Save hash cache to disk for future use"""
-        try:
-            with open(self._hash_cache_file, 'w') as f:
-                json.dump(self._hash_cache, f, indent=2)
-        except Exception as e:
-            print(f"   ⚠️  Failed to save hash cache: {e}")
-            # Non-critical - continue without saving
+        Its entries can't be trusted (a path may now hold a different image), so they are
+        not migrated - hashes are recomputed into the hash store on first use.
+        """
+        legacy_file = self.output_dir / ".hash_cache.json"
+        if legacy_file.exists():
+            try:
+                legacy_file.unlink()
+                print("   🧹 Removed legacy .hash_cache.json (replaced by .hash_store.sqlite3)")
+            except OSError as e:
+                print(f"   ⚠️  Could not remove legacy hash cache: {e}")
 
     # ========================================
     # 🎯 9 STEALTH SOLUTIONS - Helper Methods
@@ -497,9 +550,32 @@ class ScreenshotService:
 
         return mode_info
 
-    async def _get_browser(self, use_real_browser: bool = False, browser_engine: str = "playwright", use_stealth: bool = False):
+    def _browser_key(self, use_real_browser: bool = False, browser_engine: str = "playwright", use_stealth: bool = False) -> BrowserKey:
+        """
+        ⚡ Map capture options to a browser pool key (engine × headless × stealth × persistent)
+        """
+        use_camoufox = (browser_engine == "camoufox")
+        if use_camoufox and not CAMOUFOX_AVAILABLE:
+            # User requested Camoufox but it's not available
+            print("⚠️  Camoufox not installed. Install with: pip install camoufox")
+            print("   Falling back to standard Playwright mode...")
+            use_camoufox = False
+
+        if use_camoufox:
+            # All Camoufox captures share ONE persistent profile (profile dirs can't be
+            # opened twice), so they map to a single key. Camoufox is always max stealth.
+            return BrowserKey(engine="camoufox", headless=not use_real_browser, stealth=True, persistent=True)
+
+        return BrowserKey(
+            engine="playwright",
+            headless=not use_real_browser,
+            stealth=use_stealth,
+            persistent=use_stealth and use_real_browser,  # Persistent Chrome profile (see _launch_browser)
+        )
+
+    async def _acquire_browser(self, use_real_browser: bool = False, browser_engine: str = "playwright", use_stealth: bool = False) -> PooledBrowser:
         """
-        Get or create browser instance
+        Get a browser from the pool for the requested mode
 
         ✅ 2025 STEALTH MODES (Priority Order):
         1. Patchright: Patches CDP leaks at source (Runtime.enable, Console.enable)
@@ -509,366 +585,334 @@ class ScreenshotService:
         Additional Options:
         - Camoufox: Firefox-based maximum stealth (optional)
         - Persistent Context: Real Chrome with persistent profile (best for HTTP/2 fingerprinting)
-        """
-        # Determine browser mode
-        use_camoufox = (browser_engine == "camoufox")
-        new_mode = 'camoufox' if use_camoufox else 'playwright'
 
-        # Close browser if switching modes
-        if self.current_browser_mode is not None and self.current_browser_mode != new_mode:
-            await self.close()
+        ⚡ OPTIMIZATION: Browsers are pooled per mode, so switching between stealth,
+        Camoufox and plain headless no longer closes the other modes' browsers.
+        The caller MUST hand the lease back with self.browser_pool.release().
 
-        # ✅ CAMOUFOX MODE: Maximum stealth with Firefox
-        if use_camoufox and CAMOUFOX_AVAILABLE:
-            # Check if existing browser is still alive
-            browser_needs_restart = False
-            if self.camoufox_browser is not None:
-                try:
-                    # Try to get pages to check if browser is still alive
-                    pages = self.camoufox_browser.pages
-                    if not pages or len(pages) == 0:
-                        # Browser exists but has no pages - might be closed
-                        print("   ⚠️  Camoufox browser has no pages, checking if alive...")
-                        # Try to create a page to verify it's alive
-                        try:
-                            test_page = await self.camoufox_browser.new_page()
-                            await test_page.close()
-                        except Exception:
-                            print("   ❌ Camoufox browser is closed, will restart...")
-                            browser_needs_restart = True
-                            self.camoufox_browser = None
-                except Exception as e:
-                    print(f"   ❌ Camoufox browser is closed or invalid: {str(e)}")
-                    browser_needs_restart = True
-                    self.camoufox_browser = None
-
-            # Camoufox is available, use it
-            if self.camoufox_browser is None:
-                print("🦊 Launching Camoufox browser (maximum stealth mode)...")
-
-                # ✅ ADVANCED: Configure screen, window, and navigator properties for maximum stealth
-                # Camoufox can fully spoof all properties at C++ source level (undetectable)
-
-                # Common screen resolutions with realistic distribution
-                screen_configs = [
-                    {'width': 1920, 'height': 1080, 'dpr': 1.0, 'name': 'Full HD'},      # 22% market share
-                    {'width': 1920, 'height': 1080, 'dpr': 1.0, 'name': 'Full HD'},      # Duplicate for higher probability
-                    {'width': 1366, 'height': 768, 'dpr': 1.0, 'name': 'Laptop HD'},     # 15% market share
-                    {'width': 2560, 'height': 1440, 'dpr': 1.0, 'name': '2K/QHD'},       # 8% market share
-                    {'width': 1920, 'height': 1080, 'dpr': 2.0, 'name': 'Retina FHD'},   # MacBook Pro
-                    {'width': 1536, 'height': 864, 'dpr': 1.0, 'name': 'Laptop HD+'},    # 4% market share
-                ]
-                screen_config = random.choice(screen_configs)
-                screen_width = screen_config['width']
-                screen_height = screen_config['height']
-                device_pixel_ratio = screen_config['dpr']
-
-                # Calculate window dimensions (outer = inner + browser chrome)
-                # Windows: +16px scrollbar width, +85px chrome height (title bar + toolbar)
-                # macOS: +0px scrollbar (overlay), +50px chrome height (menu bar)
-                # We'll use Windows defaults as most common
-                inner_width = screen_width
-                inner_height = screen_height
-                outer_width = inner_width + 16   # Scrollbar width
-                outer_height = inner_height + 85  # Title bar + toolbar + status bar
-
-                # Available screen area (subtract taskbar)
-                # Windows taskbar: typically 40-60px
-                avail_height = screen_height - random.randint(40, 60)
-
-                camoufox_config = {
-                    # ========================================
-                    # SCREEN PROPERTIES (Priority 1: CRITICAL)
-                    # ========================================
-                    'screen.width': screen_width,
-                    'screen.height': screen_height,
-                    'screen.availWidth': screen_width,  # Usually matches width
-                    'screen.availHeight': avail_height,  # Screen height - taskbar
-                    'screen.colorDepth': 24,  # True Color (16.7M colors) - most common
-                    'screen.pixelDepth': 24,  # Must match colorDepth (synonymous)
+        Returns:
+            PooledBrowser lease (use `.browser`, `.is_persistent_context`)
+        """
+        key = self._browser_key(use_real_browser, browser_engine, use_stealth)
+        return await self.browser_pool.acquire(key)
 
-                    # ========================================
-                    # WINDOW PROPERTIES (Priority 1: CRITICAL)
-                    # ========================================
-                    'window.innerWidth': inner_width,   # Viewport width
-                    'window.innerHeight': inner_height,  # Viewport height
-                    'window.outerWidth': outer_width,   # Browser window width (inner + scrollbar)
-                    'window.outerHeight': outer_height,  # Browser window height (inner + chrome)
-                    'window.devicePixelRatio': device_pixel_ratio,  # Physical pixels per CSS pixel
+    async def _ensure_playwright(self):
+        """Start the shared Playwright driver once (safe under concurrent launches)"""
+        async with self._playwright_lock:
+            if self.playwright is None:
+                self.playwright = await async_playwright().start()
+        return self.playwright
 
-                    # Window position (Priority 2: MEDIUM)
-                    # Randomize to avoid "always maximized" pattern
-                    'window.screenX': random.choice([0, 0, 0, random.randint(10, 100)]),  # 75% maximized
-                    'window.screenY': random.choice([0, 0, 0, random.randint(10, 100)]),  # 75% maximized
+    async def _launch_browser(self, key: BrowserKey):
+        """
+        Launch a new browser for the pool (BrowserPool launcher)
 
-                    # Browsing history (Priority 2: MEDIUM)
-                    # Randomize to simulate realistic browsing session
-                    'window.history.length': random.randint(1, 10),  # 1 = direct, 10 = browsing session
+        Args:
+            key: BrowserKey describing the launch mode
 
-                    # ========================================
-                    # CANVAS ANTI-FINGERPRINTING (Priority 2: MEDIUM)
-                    # ========================================
-                    # Camoufox uses patched Skia rendering engine (NOT JavaScript noise injection)
-                    # This modifies anti-aliasing at C++ level to mimic real hardware differences
-                    # Much more sophisticated than traditional noise-based approaches
-                    'canvas:aaOffset': random.randint(1, 3),  # Offset pixel transparency (1-3 is subtle)
-                    'canvas:aaCapOffset': True,  # Clamp alpha to 0-255 (prevent wrap-around)
+        Returns:
+            Tuple of (browser, async closer)
+        """
+        use_stealth = key.stealth
+        use_real_browser = not key.headless
 
-                    # ========================================
-                    # GEOLOCATION & TIMEZONE (Priority 2: MEDIUM)
-                    # ========================================
-                    # Match Playwright's configuration for consistency
-                    # Location prompts will be auto-accepted when geolocation is set
-                    'geolocation:latitude': 40.7128,  # New York City latitude
-                    'geolocation:longitude': -74.0060,  # New York City longitude
-                    # geolocation:accuracy auto-calculated from decimal precision
-                    'timezone': 'America/New_York',  # TZ timezone (affects Date() and Intl API)
+        # ✅ CAMOUFOX MODE: Maximum stealth with Firefox
+        if key.engine == "camoufox":
+            print("🦊 Launching Camoufox browser (maximum stealth mode)...")
+
+            # ✅ ADVANCED: Configure screen, window, and navigator properties for maximum stealth
+            # Camoufox can fully spoof all properties at C++ source level (undetectable)
+
+            # Common screen resolutions with realistic distribution
+            screen_configs = [
+                {'width': 1920, 'height': 1080, 'dpr': 1.0, 'name': 'Full HD'},      # 22% market share
+                {'width': 1920, 'height': 1080, 'dpr': 1.0, 'name': 'Full HD'},      # Duplicate for higher probability
+                {'width': 1366, 'height': 768, 'dpr': 1.0, 'name': 'Laptop HD'},     # 15% market share
+                {'width': 2560, 'height': 1440, 'dpr': 1.0, 'name': '2K/QHD'},       # 8% market share
+                {'width': 1920, 'height': 1080, 'dpr': 2.0, 'name': 'Retina FHD'},   # MacBook Pro
+                {'width': 1536, 'height': 864, 'dpr': 1.0, 'name': 'Laptop HD+'},    # 4% market share
+            ]
+            screen_config = random.choice(screen_configs)
+            screen_width = screen_config['width']
+            screen_height = screen_config['height']
+            device_pixel_ratio = screen_config['dpr']
+
+            # Calculate window dimensions (outer = inner + browser chrome)
+            # Windows: +16px scrollbar width, +85px chrome height (title bar + toolbar)
+            # macOS: +0px scrollbar (overlay), +50px chrome height (menu bar)
+            # We'll use Windows defaults as most common
+            inner_width = screen_width
+            inner_height = screen_height
+            outer_width = inner_width + 16   # Scrollbar width
+            outer_height = inner_height + 85  # Title bar + toolbar + status bar
+
+            # Available screen area (subtract taskbar)
+            # Windows taskbar: typically 40-60px
+            avail_height = screen_height - random.randint(40, 60)
+
+            camoufox_config = {
+                # ========================================
+                # SCREEN PROPERTIES (Priority 1: CRITICAL)
+                # ========================================
+                'screen.width': screen_width,
+                'screen.height': screen_height,
+                'screen.availWidth': screen_width,  # Usually matches width
+                'screen.availHeight': avail_height,  # Screen height - taskbar
+                'screen.colorDepth': 24,  # True Color (16.7M colors) - most common
+                'screen.pixelDepth': 24,  # Must match colorDepth (synonymous)
 
-                    # ========================================
-                    # LOCALE/INTL (Priority 2: MEDIUM)
-                    # ========================================
-                    # Spoof Intl API and system language/region
-                    'locale:language': 'en',  # Language code (ISO 639-1)
-                    'locale:region': 'US',  # Region code (ISO 3166-1 alpha-2)
-                    # locale:script auto-set to "Latn" (Latin script)
-                    # locale:all auto-set to "en-US, en"
+                # ========================================
+                # WINDOW PROPERTIES (Priority 1: CRITICAL)
+                # ========================================
+                'window.innerWidth': inner_width,   # Viewport width
+                'window.innerHeight': inner_height,  # Viewport height
+                'window.outerWidth': outer_width,   # Browser window width (inner + scrollbar)
+                'window.outerHeight': outer_height,  # Browser window height (inner + chrome)
+                'window.devicePixelRatio': device_pixel_ratio,  # Physical pixels per CSS pixel
 
-                    # ========================================
-                    # HTTP HEADERS (Priority 2: MEDIUM)
-                    # ========================================
-                    # Override network headers sent with every HTTP request
-                    # Match Playwright's configuration for consistency
-                    'headers.Accept-Language': 'en-US,en;q=0.9',  # Match locale (en-US)
-                    'headers.Accept-Encoding': 'gzip, deflate, br',  # Standard Firefox encoding
-                    # headers.User-Agent auto-set by Camoufox based on OS and browser version
+                # Window position (Priority 2: MEDIUM)
+                # Randomize to avoid "always maximized" pattern
+                'window.screenX': random.choice([0, 0, 0, random.randint(10, 100)]),  # 75% maximized
+                'window.screenY': random.choice([0, 0, 0, random.randint(10, 100)]),  # 75% maximized
 
-                    # ========================================
-                    # AUDIOCONTEXT (Priority 2: MEDIUM)
-                    # ========================================
-                    # Spoof AudioContext properties to prevent audio fingerprinting
-                    # Using common values for standard desktop audio hardware
-                    'AudioContext:sampleRate': random.choice([44100, 48000]),  # 44.1 kHz (CD) or 48 kHz (most common)
-                    'AudioContext:outputLatency': round(random.uniform(0.01, 0.02), 3),  # 10-20ms (typical range)
-                    'AudioContext:maxChannelCount': 2,  # Stereo (standard for desktop)
-                    # mediaDevices NOT configured (disabled by default, screenshot tool doesn't need camera/mic)
+                # Browsing history (Priority 2: MEDIUM)
+                # Randomize to simulate realistic browsing session
+                'window.history.length': random.randint(1, 10),  # 1 = direct, 10 = browsing session
 
-                    # ========================================
-                    # MISCELLANEOUS (Priority 1: CRITICAL)
-                    # ========================================
-                    # PDF Viewer MUST be enabled to avoid headless detection
-                    # Camoufox warning: "many websites will flag a lack of pdfViewer as a headless browser"
-                    'pdfViewerEnabled': True,  # ✅ CRITICAL - All modern browsers have PDF viewer
-                    # battery properties NOT configured (low impact, already spoofed by Playwright)
+                # ========================================
+                # CANVAS ANTI-FINGERPRINTING (Priority 2: MEDIUM)
+                # ========================================
+                # Camoufox uses patched Skia rendering engine (NOT JavaScript noise injection)
+                # This modifies anti-aliasing at C++ level to mimic real hardware differences
+                # Much more sophisticated than traditional noise-based approaches
+                'canvas:aaOffset': random.randint(1, 3),  # Offset pixel transparency (1-3 is subtle)
+                'canvas:aaCapOffset': True,  # Clamp alpha to 0-255 (prevent wrap-around)
 
-                    # ========================================
-                    # NAVIGATOR PROPERTIES
-                    # ========================================
-                    'navigator.hardwareConcurrency': random.randint(4, 16),  # Randomize CPU cores
-                    'navigator.maxTouchPoints': 0,  # Desktop = 0, mobile = 5-10
-                    'navigator.doNotTrack': random.choice(['1', 'unspecified']),  # Randomize DNT (must be string)
-                    'navigator.globalPrivacyControl': random.choice([True, False]),  # Randomize GPC
+                # ========================================
+                # GEOLOCATION & TIMEZONE (Priority 2: MEDIUM)
+                # ========================================
+                # Match Playwright's configuration for consistency
+                # Location prompts will be auto-accepted when geolocation is set
+                'geolocation:latitude': 40.7128,  # New York City latitude
+                'geolocation:longitude': -74.0060,  # New York City longitude
+                # geolocation:accuracy auto-calculated from decimal precision
+                'timezone': 'America/New_York',  # TZ timezone (affects Date() and Intl API)
 
-                    # ========================================
-                    # CURSOR MOVEMENT (C++ implementation)
-                    # ========================================
-                    # Algorithm from rifosnake's HumanCursor, rewritten in C++ for performance
-                    'humanize:maxTime': 2.5 if use_stealth else 1.5,  # Max time for cursor movement
-                    'humanize:minTime': 0.5 if use_stealth else 0.3,  # Min time for cursor movement
-                    # showcursor defaults to True (not visible to page, safe to use)
-                }
+                # ========================================
+                # LOCALE/INTL (Priority 2: MEDIUM)
+                # ========================================
+                # Spoof Intl API and system language/region
+                'locale:language': 'en',  # Language code (ISO 639-1)
+                'locale:region': 'US',  # Region code (ISO 3166-1 alpha-2)
+                # locale:script auto-set to "Latn" (Latin script)
+                # locale:all auto-set to "en-US, en"
 
-                print(f"   🖥️  Screen: {screen_width}x{screen_height} ({screen_config['name']}), "
-                      f"DPR={device_pixel_ratio}, colorDepth={camoufox_config['screen.colorDepth']}")
-                print(f"   🪟 Window: inner={inner_width}x{inner_height}, outer={outer_width}x{outer_height}, "
-                      f"pos=({camoufox_config['window.screenX']}, {camoufox_config['window.screenY']})")
-                print(f"   🎨 Canvas: aaOffset={camoufox_config['canvas:aaOffset']}, "
-                      f"aaCapOffset={camoufox_config['canvas:aaCapOffset']} (Skia-level anti-aliasing)")
-                print(f"   🌍 Location: {camoufox_config['locale:language']}-{camoufox_config['locale:region']}, "
-                      f"timezone={camoufox_config['timezone']}, "
-                      f"geo=({camoufox_config['geolocation:latitude']}, {camoufox_config['geolocation:longitude']})")
-                print(f"   📡 Headers: Accept-Language={camoufox_config['headers.Accept-Language']}, "
-                      f"Accept-Encoding={camoufox_config['headers.Accept-Encoding']}")
-                print(f"   🎵 Audio: sampleRate={camoufox_config['AudioContext:sampleRate']}Hz, "
-                      f"latency={camoufox_config['AudioContext:outputLatency']:.3f}s, "
-                      f"channels={camoufox_config['AudioContext:maxChannelCount']}")
-                print(f"   🎭 Navigator: {camoufox_config['navigator.hardwareConcurrency']} cores, "
-                      f"DNT={camoufox_config['navigator.doNotTrack']}, "
-                      f"GPC={camoufox_config['navigator.globalPrivacyControl']}, "
-                      f"pdfViewer={camoufox_config['pdfViewerEnabled']}")
-                print(f"   🖱️  Cursor: {camoufox_config['humanize:minTime']:.1f}s - {camoufox_config['humanize:maxTime']:.1f}s "
-                      f"({'stealth' if use_stealth else 'normal'} mode)")
-                print(f"   📜 History: {camoufox_config['window.history.length']} entries")
-                print(f"   🔒 WebRTC: BLOCKED (prevents IP leaks)")
-
-                # ✅ PERSISTENT CONTEXT MODE: Use persistent profile for auth state
-                # This maintains ALL browser state (cookies, localStorage, sessionStorage, IndexedDB, etc.)
-                # Perfect for login-protected pages that need consistent sessions
-                persistent_profile_dir = Path(self.output_dir).parent / "browser_sessions" / "camoufox_profile"
-                persistent_profile_dir.mkdir(parents=True, exist_ok=True)
-
-                print(f"   🔐 Using persistent Camoufox profile: {persistent_profile_dir}")
-                print(f"   💡 This maintains ALL auth state (cookies, localStorage, sessionStorage, etc.)")
-
-                # Camoufox automatically applies all stealth patches + custom config
-                self.camoufox_browser = await AsyncCamoufox(
-                    headless=not use_real_browser,
-                    humanize=True,  # ✅ Enable human-like cursor movement
-                    block_webrtc=True,  # ✅ Block WebRTC to prevent IP leaks
-                    config=camoufox_config,  # ✅ Custom navigator + cursor properties
-                    persistent_context=True,  # ✅ Enable persistent context
-                    user_data_dir=str(persistent_profile_dir),  # ✅ Store profile data
-                    # OS auto-selected from ["windows", "macos", "linux"]
-                    # Fingerprint auto-generated with realistic values
-                    # navigator.webdriver always set to false
-                    # navigator.language/languages auto-set from locale
-                ).__aenter__()
-                self.current_browser_mode = 'camoufox'
-                print("✅ Camoufox browser ready with custom fingerprint and persistent profile!")
-            return self.camoufox_browser
-        elif use_camoufox and not CAMOUFOX_AVAILABLE:
-            # User requested Camoufox but it's not available
-            print("⚠️  Camoufox not installed. Install with: pip install camoufox")
-            print("   Falling back to standard Playwright mode...")
-            # Continue to standard Playwright mode below
+                # ========================================
+                # HTTP HEADERS (Priority 2: MEDIUM)
+                # ========================================
+                # Override network headers sent with every HTTP request
+                # Match Playwright's configuration for consistency
+                'headers.Accept-Language': 'en-US,en;q=0.9',  # Match locale (en-US)
+                'headers.Accept-Encoding': 'gzip, deflate, br',  # Standard Firefox encoding
+                # headers.User-Agent auto-set by Camoufox based on OS and browser version
 
-        # ✅ STANDARD MODE: Patchright, Rebrowser, or Playwright (auto-selected at import)
-        if self.browser is not None and self.current_mode_is_real_browser != use_real_browser:
-            await self.close()
+                # ========================================
+                # AUDIOCONTEXT (Priority 2: MEDIUM)
+                # ========================================
+                # Spoof AudioContext properties to prevent audio fingerprinting
+                # Using common values for standard desktop audio hardware
+                'AudioContext:sampleRate': random.choice([44100, 48000]),  # 44.1 kHz (CD) or 48 kHz (most common)
+                'AudioContext:outputLatency': round(random.uniform(0.01, 0.02), 3),  # 10-20ms (typical range)
+                'AudioContext:maxChannelCount': 2,  # Stereo (standard for desktop)
+                # mediaDevices NOT configured (disabled by default, screenshot tool doesn't need camera/mic)
 
-        if self.browser is None:
-            if self.playwright is None:
-                self.playwright = await async_playwright().start()
+                # ========================================
+                # MISCELLANEOUS (Priority 1: CRITICAL)
+                # ========================================
+                # PDF Viewer MUST be enabled to avoid headless detection
+                # Camoufox warning: "many websites will flag a lack of pdfViewer as a headless browser"
+                'pdfViewerEnabled': True,  # ✅ CRITICAL - All modern browsers have PDF viewer
+                # battery properties NOT configured (low impact, already spoofed by Playwright)
 
-            launch_args = ['--no-sandbox', '--disable-setuid-sandbox']
-
-            if not use_real_browser:
-                # MAXIMUM stealth mode args (for headless)
-                # These make headless Chrome look EXACTLY like a real browser
-                # 🆕 IMPROVEMENT: Enhanced headless mode detection evasion
-                launch_args.extend([
-                    # Core stealth
-                    '--disable-blink-features=AutomationControlled',  # Hide automation
-                    '--headless=new',  # Use new Chrome headless mode (more realistic)
-
-                    # Window & display
-                    '--window-size=1920,1080',  # Set window size
-                    '--start-maximized',  # Start maximized
-                    '--force-device-scale-factor=1',  # Standard display
-
-                    # 🆕 IMPROVEMENT: Additional headless detection evasion
-                    '--disable-features=IsolateOrigins,site-per-process',  # Reduce isolation overhead
-                    '--disable-site-isolation-trials',  # Disable site isolation
-                    '--disable-web-security',  # Allow cross-origin (use with caution)
-                    '--disable-features=VizDisplayCompositor',  # Reduce GPU overhead in headless
-
-                    # Disable automation indicators
-                    '--disable-infobars',  # Disable infobars
-                    '--disable-notifications',  # Disable notifications
-                    '--disable-popup-blocking',  # Allow popups
-                    '--disable-save-password-bubble',  # No password save prompts
-
-                    # Performance & networking
-                    '--disable-dev-shm-usage',  # Overcome limited resource problems
-                    '--enable-features=NetworkService,NetworkServiceInProcess',  # Enable HTTP/2
-                    '--disable-features=IsolateOrigins,site-per-process',  # Reduce isolation
-
-                    # ✅ PHASE 2: TLS Fingerprint Improvements (2024-2025)
-                    '--disable-site-isolation-trials',  # Disable site isolation trials
-                    '--disable-features=IsolateOrigins',  # Further reduce isolation for TLS
-                    '--enable-features=NetworkServiceInProcess',  # Keep network in-process
-
-                    # GPU & rendering (make it look like real Chrome)
-                    '--disable-gpu',  # Disable GPU hardware acceleration
-                    '--disable-software-rasterizer',  # Disable software rasterizer
-                    '--disable-extensions',  # Disable extensions
-
-                    # Additional stealth
-                    '--disable-default-apps',  # Disable default apps
-                    '--no-first-run',  # Skip first run wizards
-                    '--no-default-browser-check',  # Skip default browser check
-                    '--disable-hang-monitor',  # Disable hang monitor
-                    '--disable-prompt-on-repost',  # Disable repost prompts
-                    '--disable-background-networking',  # Disable background networking
-                    '--disable-sync',  # Disable sync
-                    '--metrics-recording-only',  # Disable reporting
-                    '--disable-background-timer-throttling',  # Disable throttling
-                    '--disable-backgrounding-occluded-windows',  # Disable backgrounding
-                    '--disable-breakpad',  # Disable crash reporter
-                    '--disable-component-extensions-with-background-pages',  # Disable background extensions
-                    '--disable-features=TranslateUI',  # Disable translate
-                    '--disable-ipc-flooding-protection',  # Disable IPC flooding protection
-                    '--enable-automation',  # Ironically, this makes it MORE stealthy with our overrides
-                    '--password-store=basic',  # Use basic password store
-                    '--use-mock-keychain',  # Use mock keychain
-                ])
-
-            # ✅ PERSISTENT CONTEXT MODE: Maximum stealth for real browser
-            # Uses persistent profile to keep consistent TLS/HTTP2 behavior
-            # This is the BEST approach for bypassing HTTP/2 fingerprinting
-            if use_stealth and use_real_browser:
-                persistent_profile_dir = Path(self.output_dir).parent / "browser_profile"
-                persistent_profile_dir.mkdir(exist_ok=True)
-
-                print(f"   🔐 Using persistent browser profile: {persistent_profile_dir}")
-                print(f"   💡 This keeps consistent TLS/HTTP2 fingerprint across sessions")
+                # ========================================
+                # NAVIGATOR PROPERTIES
+                # ========================================
+                'navigator.hardwareConcurrency': random.randint(4, 16),  # Randomize CPU cores
+                'navigator.maxTouchPoints': 0,  # Desktop = 0, mobile = 5-10
+                'navigator.doNotTrack': random.choice(['1', 'unspecified']),  # Randomize DNT (must be string)
+                'navigator.globalPrivacyControl': random.choice([True, False]),  # Randomize GPC
 
                 # ========================================
-                # 🎯 9 STEALTH SOLUTIONS - Applied Here
+                # CURSOR MOVEMENT (C++ implementation)
                 # ========================================
-                # Solution #2: Random User-Agent
-                random_user_agent = self._get_random_user_agent()
-                # Solution #6: Random Viewport
-                random_viewport = self._get_random_viewport()
-
-                print(f"   🎭 Using random User-Agent: {random_user_agent[:50]}...")
-                print(f"   📐 Using random viewport: {random_viewport['width']}x{random_viewport['height']} ({random_viewport['device_type']})")
-
-                # Launch persistent context (browser IS the context)
-                self.browser = await self.playwright.chromium.launch_persistent_context(
-                    str(persistent_profile_dir),
-                    headless=False,  # Headful mode reduces TLS/HTTP2 mismatches
-                    channel="chrome",  # Use real Chrome build (not Chromium)
-                    args=launch_args,
-                    slow_mo=50,  # Human-like speed
-                    viewport={'width': random_viewport['width'], 'height': random_viewport['height']},
-                    locale='en-US',
-                    timezone_id='America/New_York',
-                    permissions=['geolocation'],
-                    color_scheme='light',
-                    device_scale_factor=1,
-                    user_agent=random_user_agent,
-                )
+                # Algorithm from rifosnake's HumanCursor, rewritten in C++ for performance
+                'humanize:maxTime': 2.5 if use_stealth else 1.5,  # Max time for cursor movement
+                'humanize:minTime': 0.5 if use_stealth else 0.3,  # Min time for cursor movement
+                # showcursor defaults to True (not visible to page, safe to use)
+            }
 
-                # For persistent context, browser IS the context
-                self.is_persistent_context = True
+            print(f"   🖥️  Screen: {screen_width}x{screen_height} ({screen_config['name']}), "
+                  f"DPR={device_pixel_ratio}, colorDepth={camoufox_config['screen.colorDepth']}")
+            print(f"   🪟 Window: inner={inner_width}x{inner_height}, outer={outer_width}x{outer_height}, "
+                  f"pos=({camoufox_config['window.screenX']}, {camoufox_config['window.screenY']})")
+            print(f"   🎨 Canvas: aaOffset={camoufox_config['canvas:aaOffset']}, "
+                  f"aaCapOffset={camoufox_config['canvas:aaCapOffset']} (Skia-level anti-aliasing)")
+            print(f"   🌍 Location: {camoufox_config['locale:language']}-{camoufox_config['locale:region']}, "
+                  f"timezone={camoufox_config['timezone']}, "
+                  f"geo=({camoufox_config['geolocation:latitude']}, {camoufox_config['geolocation:longitude']})")
+            print(f"   📡 Headers: Accept-Language={camoufox_config['headers.Accept-Language']}, "
+                  f"Accept-Encoding={camoufox_config['headers.Accept-Encoding']}")
+            print(f"   🎵 Audio: sampleRate={camoufox_config['AudioContext:sampleRate']}Hz, "
+                  f"latency={camoufox_config['AudioContext:outputLatency']:.3f}s, "
+                  f"channels={camoufox_config['AudioContext:maxChannelCount']}")
+            print(f"   🎭 Navigator: {camoufox_config['navigator.hardwareConcurrency']} cores, "
+                  f"DNT={camoufox_config['navigator.doNotTrack']}, "
+                  f"GPC={camoufox_config['navigator.globalPrivacyControl']}, "
+                  f"pdfViewer={camoufox_config['pdfViewerEnabled']}")
+            print(f"   🖱️  Cursor: {camoufox_config['humanize:minTime']:.1f}s - {camoufox_config['humanize:maxTime']:.1f}s "
+                  f"({'stealth' if use_stealth else 'normal'} mode)")
+            print(f"   📜 History: {camoufox_config['window.history.length']} entries")
+            print(f"   🔒 WebRTC: BLOCKED (prevents IP leaks)")
+
+            # ✅ PERSISTENT CONTEXT MODE: Use persistent profile for auth state
+            # This maintains ALL browser state (cookies, localStorage, sessionStorage, IndexedDB, etc.)
+            # Perfect for login-protected pages that need consistent sessions
+            persistent_profile_dir = Path(self.output_dir).parent / "browser_sessions" / "camoufox_profile"
+            persistent_profile_dir.mkdir(parents=True, exist_ok=True)
 
-            else:
-                # Standard launch (non-persistent)
-                self.browser = await self.playwright.chromium.launch(
-                    headless=not use_real_browser,  # False = visible browser
-                    args=launch_args,
-                    channel="chrome" if use_real_browser else None,  # Use real Chrome if available
-                    slow_mo=50 if use_real_browser else None,  # Human-like speed for real browser mode
-                )
+            print(f"   🔐 Using persistent Camoufox profile: {persistent_profile_dir}")
+            print(f"   💡 This maintains ALL auth state (cookies, localStorage, sessionStorage, etc.)")
 
-                self.is_persistent_context = False
+            # Camoufox automatically applies all stealth patches + custom config
+            camoufox_manager = AsyncCamoufox(
+                headless=not use_real_browser,
+                humanize=True,  # ✅ Enable human-like cursor movement
+                block_webrtc=True,  # ✅ Block WebRTC to prevent IP leaks
+                config=camoufox_config,  # ✅ Custom navigator + cursor properties
+                persistent_context=True,  # ✅ Enable persistent context
+                user_data_dir=str(persistent_profile_dir),  # ✅ Store profile data
+                # OS auto-selected from ["windows", "macos", "linux"]
+                # Fingerprint auto-generated with realistic values
+                # navigator.webdriver always set to false
+                # navigator.language/languages auto-set from locale
+            )
+            camoufox_browser = await camoufox_manager.__aenter__()
+            print("✅ Camoufox browser ready with custom fingerprint and persistent profile!")
+            return camoufox_browser, lambda: camoufox_manager.__aexit__(None, None, None)
 
-            # Remember current mode
-            self.current_mode_is_real_browser = use_real_browser
-            self.current_browser_mode = 'playwright'
+        # ✅ STANDARD MODE: Patchright, Rebrowser, or Playwright (auto-selected at import)
+        await self._ensure_playwright()
+
+        launch_args = ['--no-sandbox', '--disable-setuid-sandbox']
+
+        if not use_real_browser:
+            # MAXIMUM stealth mode args (for headless)
+            # These make headless Chrome look EXACTLY like a real browser
+            # 🆕 IMPROVEMENT: Enhanced headless mode detection evasion
+            launch_args.extend([
+                # Core stealth
+                '--disable-blink-features=AutomationControlled',  # Hide automation
+                '--headless=new',  # Use new Chrome headless mode (more realistic)
+
+                # Window & display
+                '--window-size=1920,1080',  # Set window size
+                '--start-maximized',  # Start maximized
+                '--force-device-scale-factor=1',  # Standard display
+
+                # 🆕 IMPROVEMENT: Additional headless detection evasion
+                '--disable-features=IsolateOrigins,site-per-process',  # Reduce isolation overhead
+                '--disable-site-isolation-trials',  # Disable site isolation
+                '--disable-web-security',  # Allow cross-origin (use with caution)
+                '--disable-features=VizDisplayCompositor',  # Reduce GPU overhead in headless
+
+                # Disable automation indicators
+                '--disable-infobars',  # Disable infobars
+                '--disable-notifications',  # Disable notifications
+                '--disable-popup-blocking',  # Allow popups
+                '--disable-save-password-bubble',  # No password save prompts
+
+                # Performance & networking
+                '--disable-dev-shm-usage',  # Overcome limited resource problems
+                '--enable-features=NetworkService,NetworkServiceInProcess',  # Enable HTTP/2
+                '--disable-features=IsolateOrigins,site-per-process',  # Reduce isolation
+
+                # ✅ PHASE 2: TLS Fingerprint Improvements (2024-2025)
+                '--disable-site-isolation-trials',  # Disable site isolation trials
+                '--disable-features=IsolateOrigins',  # Further reduce isolation for TLS
+                '--enable-features=NetworkServiceInProcess',  # Keep network in-process
+
+                # GPU & rendering (make it look like real Chrome)
+                '--disable-gpu',  # Disable GPU hardware acceleration
+                '--disable-software-rasterizer',  # Disable software rasterizer
+                '--disable-extensions',  # Disable extensions
+
+                # Additional stealth
+                '--disable-default-apps',  # Disable default apps
+                '--no-first-run',  # Skip first run wizards
+                '--no-default-browser-check',  # Skip default browser check
+                '--disable-hang-monitor',  # Disable hang monitor
+                '--disable-prompt-on-repost',  # Disable repost prompts
+                '--disable-background-networking',  # Disable background networking
+                '--disable-sync',  # Disable sync
+                '--metrics-recording-only',  # Disable reporting
+                '--disable-background-timer-throttling',  # Disable throttling
+                '--disable-backgrounding-occluded-windows',  # Disable backgrounding
+                '--disable-breakpad',  # Disable crash reporter
+                '--disable-component-extensions-with-background-pages',  # Disable background extensions
+                '--disable-features=TranslateUI',  # Disable translate
+                '--disable-ipc-flooding-protection',  # Disable IPC flooding protection
+                '--enable-automation',  # Ironically, this makes it MORE stealthy with our overrides
+                '--password-store=basic',  # Use basic password store
+                '--use-mock-keychain',  # Use mock keychain
+            ])
+
+        # ✅ PERSISTENT CONTEXT MODE: Maximum stealth for real browser
+        # Uses persistent profile to keep consistent TLS/HTTP2 behavior
+        # This is the BEST approach for bypassing HTTP/2 fingerprinting
+        if key.persistent:
+            persistent_profile_dir = Path(self.output_dir).parent / "browser_profile"
+            persistent_profile_dir.mkdir(exist_ok=True)
+
+            print(f"   🔐 Using persistent browser profile: {persistent_profile_dir}")
+            print(f"   💡 This keeps consistent TLS/HTTP2 fingerprint across sessions")
 
-            # ⚡ OPTIMIZATION: Reset context tracking for new browser
-            self.context_page_count = 0
-            self.stealth_injected = False
+            # ========================================
+            # 🎯 9 STEALTH SOLUTIONS - Applied Here
+            # ========================================
+            # Solution #2: Random User-Agent
+            random_user_agent = self._get_random_user_agent()
+            # Solution #6: Random Viewport
+            random_viewport = self._get_random_viewport()
+
+            print(f"   🎭 Using random User-Agent: {random_user_agent[:50]}...")
+            print(f"   📐 Using random viewport: {random_viewport['width']}x{random_viewport['height']} ({random_viewport['device_type']})")
+
+            # Launch persistent context (browser IS the context)
+            browser = await self.playwright.chromium.launch_persistent_context(
+                str(persistent_profile_dir),
+                headless=False,  # Headful mode reduces TLS/HTTP2 mismatches
+                channel="chrome",  # Use real Chrome build (not Chromium)
+                args=launch_args,
+                slow_mo=50,  # Human-like speed
+                viewport={'width': random_viewport['width'], 'height': random_viewport['height']},
+                locale='en-US',
+                timezone_id='America/New_York',
+                permissions=['geolocation'],
+                color_scheme='light',
+                device_scale_factor=1,
+                user_agent=random_user_agent,
+            )
 
-        # ⚡ OPTIMIZATION: Check if we need to refresh context (prevent memory leaks)
-        if self.ENABLE_BROWSER_REUSE and self.context_page_count >= self.MAX_PAGES_PER_CONTEXT:
-            print(f"   ♻️  Context refresh: {self.context_page_count} pages opened, recreating context...")
-            await self.close()
-            # Recursively call to create fresh browser
-            return await self._get_browser(use_real_browser, browser_engine, use_stealth)
+        else:
+            # Standard launch (non-persistent)
+            browser = await self.playwright.chromium.launch(
+                headless=not use_real_browser,  # False = visible browser
+                args=launch_args,
+                channel="chrome" if use_real_browser else None,  # Use real Chrome if available
+                slow_mo=50 if use_real_browser else None,  # Human-like speed for real browser mode
+            )
 
-        return self.browser
+        return browser, browser.close
 
     async def _connect_to_chrome_cdp(self, cdp_url: str = "http://localhost:9222", max_retries: int = 3):
         """
@@ -884,8 +928,7 @@ class ScreenshotService:
         Returns:
             Browser instance connected via CDP
         """
-        if self.playwright is None:
-            self.playwright = await async_playwright().start()
+        await self._ensure_playwright()
 
         # Try to connect with retries
         for attempt in range(max_retries):
@@ -1015,28 +1058,19 @@ class ScreenshotService:
         """
         context = None
         page = None
+        lease = None
         try:
-            browser = await self._get_browser(use_real_browser=False, use_stealth=use_stealth)
+            lease = await self._acquire_browser(use_real_browser=False, use_stealth=use_stealth)
+            browser = lease.browser
 
             # ✅ For persistent context, browser IS the context
-            if self.is_persistent_context:
+            if lease.is_persistent_context:
                 context = browser  # Browser is already a BrowserContext
             else:
                 # Standard context creation
-                context = await browser.new_context(
-                    viewport={'width': viewport_width, 'height': viewport_height},
-                    user_agent=user_agent,
-                    locale='en-US',
-                    timezone_id='America/New_York',
-                    extra_http_headers=extra_headers or {},
-                    permissions=['geolocation'] if use_stealth else [],
-                    geolocation={'latitude': 40.7128, 'longitude': -74.0060} if use_stealth else None,
-                    color_scheme='light' if use_stealth else None,
-                    device_scale_factor=1,
-                    has_touch=False,
-                    is_mobile=False,
-                    storage_state=storage_state,
-                )
+                context = await browser.new_context(**self._context_options(
+                    viewport_width, viewport_height, user_agent, extra_headers or {}, use_stealth, storage_state
+                ))
 
             # Add navigator.webdriver override for stealth mode
             if use_stealth:
@@ -1076,12 +1110,15 @@ class ScreenshotService:
                     print(f"⚠️  Error closing page: {e}")
 
             # ✅ Don't close persistent context (it's the browser itself)
-            if context and not self.is_persistent_context:
+            if context and lease and not lease.is_persistent_context:
                 try:
                     await context.close()
                 except Exception as e:
                     print(f"⚠️  Error closing context: {e}")
 
+            # ⚡ Hand the browser back to the pool
+            self.browser_pool.release(lease)
+
     def _get_stealth_config(
         self,
         viewport_width: int,
@@ -1125,6 +1162,188 @@ class ScreenshotService:
 
         return viewport_width, viewport_height, user_agent, extra_headers
 
+    def _context_options(
+        self,
+        viewport_width: int,
+        viewport_height: int,
+        user_agent: Optional[str],
+        extra_headers: Dict[str, str],
+        use_stealth: bool,
+        storage_state: Optional[str],
+        auth_shards: Optional[Tuple[str, ...]] = None
+    ) -> dict:
+        """
+        ✅ Shared browser.new_context() options for standard (non-persistent) captures.
+        """
+        return dict(
+            viewport={'width': viewport_width, 'height': viewport_height},
+            user_agent=user_agent,
+            locale='en-US',
+            timezone_id='America/New_York',
+            extra_http_headers=extra_headers,
+            # Additional stealth settings
+            permissions=['geolocation'] if use_stealth else [],
+            geolocation={'latitude': 40.7128, 'longitude': -74.0060} if use_stealth else None,  # New York
+            color_scheme='light' if use_stealth else None,
+            device_scale_factor=1,
+            has_touch=False,  # Desktop browser
+            is_mobile=False,  # Not mobile
+            storage_state=self._playwright_storage_state(storage_state, auth_shards),  # Load saved auth state if available
+        )
+
+    def _playwright_storage_state(
+        self,
+        storage_state: Optional[str],
+        auth_shards: Optional[Tuple[str, ...]] = None
+    ) -> Optional[dict]:
+        """
+        ⚡ Pre-parsed storage_state object for new_context() (Playwright would otherwise
+        read and parse the file again for every context), limited to `auth_shards`
+        """
+        auth = auth_states.get(storage_state)
+        return auth.playwright_state(auth_shards) if auth is not None else None
+
+    def _auth_shards(self, storage_state: Optional[str], url: str) -> Optional[Tuple[str, ...]]:
+        """
+        ⚡ OPTIMIZATION: Auth state shards (registrable domains) a capture of `url` needs.
+
+        Extracted browser cookie files can hold thousands of cookies; a context built from
+        the target's shard, its SSO group and the identity providers carries, serializes
+        and matches only those.
+
+        Returns:
+            Sorted shard names, or None to load the whole file (no auth state / sharding off)
+        """
+        if not storage_state or not settings.auth_sharding_enabled:
+            return None
+        auth = auth_states.get(storage_state)
+        if auth is None:
+            return None
+        shards = auth.shards_for(url, settings.auth_shard_groups, settings.auth_shard_sso_sites)
+        loaded = len(auth.playwright_state(shards)["cookies"])
+        print(f"   🧩 Auth shards: {', '.join(shards) or 'none'} ({loaded} of {auth.cookie_count} cookies)")
+        return shards
+
+    async def _create_capture_context(self, browser: Browser, key: ContextKey) -> Tuple[BrowserContext, Tuple[int, int]]:
+        """
+        ⚡ ContextPool factory: create a standard context for a pool key.
+
+        Stealth contexts get their own randomized viewport and rotated user agent here,
+        so every pooled context still has a distinct fingerprint.
+
+        Returns:
+            Tuple of (context, (actual_viewport_width, actual_viewport_height))
+        """
+        viewport_width, viewport_height, user_agent, extra_headers = self._get_stealth_config(
+            key.viewport_width, key.viewport_height, key.stealth
+        )
+        context = await browser.new_context(**self._context_options(
+            viewport_width, viewport_height, user_agent, extra_headers, key.stealth, key.storage_state,
+            key.auth_shards
+        ))
+        return context, (viewport_width, viewport_height)
+
+    async def _open_capture_context(
+        self,
+        lease: PooledBrowser,
+        viewport_width: int,
+        viewport_height: int,
+        use_stealth: bool,
+        storage_state: Optional[str],
+        reusable: bool = True,
+        auth_shards: Optional[Tuple[str, ...]] = None
+    ) -> PooledContext:
+        """
+        ⚡ OPTIMIZATION: Get a ready context for a standard capture.
+
+        Uses a pre-warmed context from the pool when `reusable` (no per-request cookies
+        or localStorage), otherwise creates a one-off context. Either way the caller
+        hands it back with `await self.context_pool.release(pooled, reusable=reusable)`.
+
+        Returns:
+            PooledContext (use `.context` and `.viewport`)
+        """
+        key = ContextKey(
+            browser_key=lease.key,
+            viewport_width=viewport_width,
+            viewport_height=viewport_height,
+            stealth=use_stealth,
+            storage_state=storage_state,
+            auth_digest=storage_state_digest(storage_state),
+            auth_shards=auth_shards,
+        )
+        if reusable and self.ENABLE_CONTEXT_POOL:
+            return await self.context_pool.acquire(key, lease)
+
+        context, viewport = await self._create_capture_context(lease.browser, key)
+        return PooledContext(key=key, context=context, owner=lease, viewport=viewport)
+
+    async def _wait_until_ready(
+        self,
+        page: Page,
+        max_wait_ms: Optional[int] = None,
+        selector: Optional[str] = None,
+        min_wait_ms: int = 0
+    ) -> ReadinessResult:
+        """
+        ⚡ OPTIMIZATION: Event-driven wait that replaces fixed asyncio.sleep() calls.
+
+        Proceeds as soon as fetch/XHR, DOM mutations, fonts and images have settled
+        (and `selector` is present, if given), bounded by max_wait_ms.
+        Pages should have the tracker installed before navigation (install_readiness_tracker).
+        """
+        result = await wait_for_page_ready(
+            page,
+            max_wait_ms=max_wait_ms or settings.readiness_max_wait_ms,
+            quiet_ms=settings.readiness_quiet_ms,
+            selector=selector or None,
+            min_wait_ms=min_wait_ms,
+        )
+        icon = "✅" if result.ready else "⚠️ "
+        print(f"   {icon} Page readiness: {result.describe()}")
+        return result
+
+    async def _wait_for_network_quiet(self, page: Page, timeout_ms: int = 15000) -> NetworkQuietResult:
+        """
+        ⚡ OPTIMIZATION: In-page network quiescence wait (replaces 'networkidle').
+
+        Counts in-flight fetch/XHR from inside the page, ignoring analytics/beacon/long-poll
+        URLs (settings.network_ignore_patterns) and long-lived requests, so SPAs that never
+        reach zero connections no longer burn the whole timeout.
+        Requires the tracker (installed by install_readiness_tracker before navigation).
+        """
+        result = await wait_for_network_quiet(page, timeout_ms=timeout_ms)
+        icon = "✅" if result.quiet else "⚠️ "
+        print(f"   {icon} {result.describe()}")
+        return result
+
+    async def _wait_for_cloudflare_clearance(self, page: Page, max_wait_ms: int = 8000) -> bool:
+        """
+        ⚡ OPTIMIZATION: Wait until a Cloudflare challenge page goes away (instead of a fixed 8s sleep).
+
+        Returns:
+            True if the challenge cleared within max_wait_ms
+        """
+        try:
+            await page.wait_for_function("""
+                () => {
+                    try {
+                        const title = document.title.toLowerCase();
+                        const body = document.body ? document.body.innerText.toLowerCase() : '';
+                        return !(title.includes('just a moment') ||
+                                 body.includes('checking your browser') ||
+                                 body.includes('cloudflare'));
+                    } catch (e) {
+                        return false;
+                    }
+                }
+            """, timeout=max_wait_ms, polling=250)
+            print("   ✅ Cloudflare challenge cleared")
+            return True
+        except Exception:
+            print(f"   ⚠️  Cloudflare challenge still present after {max_wait_ms}ms, continuing...")
+            return False
+
     async def _simulate_human_behavior(self, page: Page, use_stealth: bool = False):
         """
         ✅ 9 STEALTH SOLUTIONS - Complete Human Behavior Simulation
@@ -1198,56 +1417,35 @@ class ScreenshotService:
             return None  # Will be handled by manual injection
 
         # Priority 2: Check if saved auth state exists (from manual login)
-        if settings.auth_state_file.exists():
+        # ⚡ Parsed once per file version by the auth state repository (mtime/size invalidation)
+        auth = auth_states.get(settings.auth_state_file)
+        if auth is not None:
             print(f"🔐 Loading saved auth state from {settings.auth_state_file}")
+            print(f"   📊 Auth state contains: {auth.cookie_count} cookies, {auth.local_storage_count} localStorage items")
 
-            # Verify what's in the auth state file
-            try:
-                with open(settings.auth_state_file, 'r') as f:
-                    state_data = json.load(f)
-                    cookie_count = len(state_data.get('cookies', []))
-                    ls_count = sum(len(origin.get('localStorage', [])) for origin in state_data.get('origins', []))
-                    print(f"   📊 Auth state contains: {cookie_count} cookies, {ls_count} localStorage items")
-
-                    # Show key cookie names for verification
-                    cookie_names = [c['name'] for c in state_data.get('cookies', [])]
-                    auth_cookies = [name for name in cookie_names if any(keyword in name.lower() for keyword in ['token', 'session', 'auth', 'sid', 'jsession'])]
-                    if auth_cookies:
-                        print(f"   🔑 Auth cookies found: {', '.join(auth_cookies[:5])}")  # Show first 5
-
-                    # Show key localStorage items for verification
-                    for origin in state_data.get('origins', []):
-                        ls_items = origin.get('localStorage', [])
-                        ls_names = [item['name'] for item in ls_items]
-                        auth_ls = [name for name in ls_names if any(keyword in name.lower() for keyword in ['token', 'auth', 'user', 'session'])]
-                        if auth_ls:
-                            print(f"   💾 localStorage auth items: {', '.join(auth_ls[:5])}")  # Show first 5
-                            break
-            except Exception as e:
-                print(f"   ⚠️  Could not verify auth state contents: {str(e)}")
+            # Show key cookie names for verification (precomputed index)
+            if auth.auth_cookies:
+                print(f"   🔑 Auth cookies found: {', '.join(c['name'] for c in auth.auth_cookies[:5])}")  # Show first 5
+
+            # Show key localStorage items for verification
+            if auth.auth_storage_items:
+                print(f"   💾 localStorage auth items: {', '.join(item['name'] for item in auth.auth_storage_items[:5])}")  # Show first 5
 
             return str(settings.auth_state_file)
 
         # Priority 3: Check for cookie extractor's storage state
         cookie_extractor_storage = Path("browser_sessions/playwright_storage_state.json")
-        if cookie_extractor_storage.exists():
+        auth = auth_states.get(cookie_extractor_storage)
+        if auth is not None:
             print(f"🍪 Loading cookies from cookie extractor: {cookie_extractor_storage}")
+            extracted_at = auth.data.get('metadata', {}).get('extracted_at', 'Unknown')
+            print(f"   📊 Contains: {auth.cookie_count} cookies")
+            print(f"   📅 Extracted at: {extracted_at}")
 
-            # Verify what's in the storage state
-            try:
-                with open(cookie_extractor_storage, 'r') as f:
-                    state_data = json.load(f)
-                    cookie_count = len(state_data.get('cookies', []))
-                    extracted_at = state_data.get('metadata', {}).get('extracted_at', 'Unknown')
-                    print(f"   📊 Contains: {cookie_count} cookies")
-                    print(f"   📅 Extracted at: {extracted_at}")
-
-                    # Show domains
-                    domains = list(set(c.get('domain', '') for c in state_data.get('cookies', [])))
-                    if domains:
-                        print(f"   🌐 Domains: {', '.join(domains[:5])}")  # Show first 5
-            except Exception as e:
-                print(f"   ⚠️  Could not verify cookie extractor storage: {str(e)}")
+            # Show domains
+            domains = [domain for domain in auth.cookies_by_domain if domain]
+            if domains:
+                print(f"   🌐 Domains: {', '.join(domains[:5])}")  # Show first 5
 
             return str(cookie_extractor_storage)
 
@@ -1256,78 +1454,32 @@ class ScreenshotService:
     async def _setup_cross_domain_cookies(
         self,
         context: BrowserContext,
-        storage_state_path: str
+        storage_state_path: str,
+        auth_shards: Optional[Tuple[str, ...]] = None
     ):
         """
         🔧 CROSS-DOMAIN COOKIE SUPPORT
-        
+
         When auth state contains cookies for multiple domains (e.g., preprodapp.tekioncloud.com
-        and employee.tekion.com for SSO), we need to visit each domain to set cookies.
-        
-        This is necessary because browsers don't send cookies across different domains.
+        and employee.tekion.com for SSO), domains whose cookies didn't make it into the
+        context are visited so their servers can set them.
+
+        ⚡ OPTIMIZATION: Memoized per (context, auth state digest) - a pooled context is warmed
+        once, not before every capture. Domains already holding their cookies are skipped and
+        the rest are visited concurrently (see cookie_warmup.py). Only domains of the
+        context's auth shards are considered.
         """
-        import json
-        from pathlib import Path
-        
         try:
-            # Load auth state to get all cookies
-            with open(storage_state_path, 'r') as f:
-                state_data = json.load(f)
-            
-            cookies = state_data.get('cookies', [])
-            
-            # Group cookies by domain
-            cookies_by_domain = {}
-            for cookie in cookies:
-                domain = cookie.get('domain', '')
-                if domain not in cookies_by_domain:
-                    cookies_by_domain[domain] = []
-                cookies_by_domain[domain].append(cookie)
-            
-            print(f"   🔧 Cross-domain cookie setup: {len(cookies_by_domain)} domains")
-            
-            # Visit each domain to set cookies
-            for domain, domain_cookies in cookies_by_domain.items():
-                # Skip if no cookies for this domain
-                if not domain_cookies:
-                    continue
-                
-                # Construct URL for this domain
-                # Use https:// for all domains
-                domain_url = f"https://{domain.lstrip('.')}"
-                
-                print(f"   �� Setting {len(domain_cookies)} cookies for {domain}")
-                
-                # Create a temporary page to visit the domain
-                temp_page = await context.new_page()
-                
-                try:
-                    # Navigate to the domain (with short timeout)
-                    await temp_page.goto(domain_url, wait_until='domcontentloaded', timeout=10000)
-                    
-                    # Cookies should now be set by Playwright from storage_state
-                    # Verify they're actually there
-                    actual_cookies = await context.cookies(domain_url)
-                    
-                    # Show which auth cookies are active
-                    auth_cookies = [c for c in actual_cookies if any(keyword in c['name'].lower() 
-                                   for keyword in ['token', 'session', 'auth', 'sid', 'jsession'])]
-                    
-                    if auth_cookies:
-                        print(f"      ✅ {len(auth_cookies)} auth cookies active: {', '.join([c['name'] for c in auth_cookies[:3]])}")
-                    else:
-                        print(f"      ⚠️  No auth cookies found for {domain}")
-                    
-                except Exception as e:
-                    print(f"      ⚠️  Could not visit {domain_url}: {str(e)[:100]}")
-                finally:
-                    # Close the temporary page
-                    await temp_page.close()
-            
-            print(f"   ✅ Cross-domain cookie setup complete")
-            
+            result, cached = await self.cookie_warmup.ensure(context, storage_state_path, auth_shards)
         except Exception as e:
             print(f"   ⚠️  Cross-domain cookie setup failed: {str(e)}")
+            return
+        if result is None:
+            return
+        if cached:
+            print(f"   ⚡ Cross-domain cookies already warmed for this context ({result.domains} domains)")
+        else:
+            print(f"   ✅ Cross-domain cookie setup: {result.describe()}")
 
     async def _debug_cookies_before_navigation(
         self,
@@ -1373,151 +1525,31 @@ class ScreenshotService:
             print(f"   ⚠️  Cookie debug failed: {str(e)}")
 
 
-    async def _setup_cross_domain_cookies(
+    async def _apply_cookies_and_storage(
         self,
         context: BrowserContext,
-        storage_state_path: str
+        cookies: str = "",
+        local_storage: str = ""
     ):
         """
-        🔧 CROSS-DOMAIN COOKIE SUPPORT
-        
-        When auth state contains cookies for multiple domains (e.g., preprodapp.tekioncloud.com
-        and employee.tekion.com for SSO), we need to visit each domain to set cookies.
-        
-        This is necessary because browsers don't send cookies across different domains.
+        ✅ PHASE 3: Extract duplicate cookies and localStorage loading logic.
         """
-        import json
-        from pathlib import Path
-        
-        try:
-            # Load auth state to get all cookies
-            with open(storage_state_path, 'r') as f:
-                state_data = json.load(f)
-            
-            cookies = state_data.get('cookies', [])
-            
-            # Group cookies by domain
-            cookies_by_domain = {}
-            for cookie in cookies:
-                domain = cookie.get('domain', '')
-                if domain not in cookies_by_domain:
-                    cookies_by_domain[domain] = []
-                cookies_by_domain[domain].append(cookie)
-            
-            print(f"   🔧 Cross-domain cookie setup: {len(cookies_by_domain)} domains")
-            
-            # Visit each domain to set cookies
-            for domain, domain_cookies in cookies_by_domain.items():
-                # Skip if no cookies for this domain
-                if not domain_cookies:
-                    continue
-                
-                # Construct URL for this domain
-                # Use https:// for all domains
-                domain_url = f"https://{domain.lstrip('.')}"
-                
-                print(f"   �� Setting {len(domain_cookies)} cookies for {domain}")
-                
-                # Create a temporary page to visit the domain
-                temp_page = await context.new_page()
-                
-                try:
-                    # Navigate to the domain (with short timeout)
-                    await temp_page.goto(domain_url, wait_until='domcontentloaded', timeout=10000)
-                    
-                    # Cookies should now be set by Playwright from storage_state
-                    # Verify they're actually there
-                    actual_cookies = await context.cookies(domain_url)
-                    
-                    # Show which auth cookies are active
-                    auth_cookies = [c for c in actual_cookies if any(keyword in c['name'].lower() 
-                                   for keyword in ['token', 'session', 'auth', 'sid', 'jsession'])]
-                    
-                    if auth_cookies:
-                        print(f"      ✅ {len(auth_cookies)} auth cookies active: {', '.join([c['name'] for c in auth_cookies[:3]])}")
-                    else:
-                        print(f"      ⚠️  No auth cookies found for {domain}")
-                    
-                except Exception as e:
-                    print(f"      ⚠️  Could not visit {domain_url}: {str(e)[:100]}")
-                finally:
-                    # Close the temporary page
-                    await temp_page.close()
-            
-            print(f"   ✅ Cross-domain cookie setup complete")
-            
-        except Exception as e:
-            print(f"   ⚠️  Cross-domain cookie setup failed: {str(e)}")
-
-    async def _debug_cookies_before_navigation(
-        self,
-        context: BrowserContext,
-        url: str
-    ):
-        """
-        🔍 DEBUG: Show which cookies will be sent to the target URL
-        """
-        try:
-            # Get cookies that will be sent to this URL
-            cookies = await context.cookies(url)
-            
-            print(f"   🔍 Cookies that will be sent to {url}:")
-            print(f"      📊 Total: {len(cookies)}")
-            
-            # Show auth-related cookies
-            auth_cookies = [c for c in cookies if any(keyword in c['name'].lower() 
-                           for keyword in ['token', 'session', 'auth', 'sid', 'jsession'])]
-            
-            if auth_cookies:
-                print(f"      🔑 Auth cookies: {', '.join([c['name'] for c in auth_cookies])}")
-                
-                # Show cookie details
-                import time
-                for cookie in auth_cookies[:3]:  # Show first 3
-                    domain = cookie.get('domain', 'N/A')
-                    expires = cookie.get('expires', -1)
-                    
-                    if expires == -1:
-                        expiry = "Session"
-                    elif expires < time.time():
-                        expiry = "❌ EXPIRED"
-                    else:
-                        expiry = "✅ Valid"
-                    
-                    print(f"         • {cookie['name']}: domain={domain}, {expiry}")
-            else:
-                print(f"      ⚠️  WARNING: No auth cookies will be sent!")
-                print(f"      💡 This may cause authentication to fail!")
-            
-        except Exception as e:
-            print(f"   ⚠️  Cookie debug failed: {str(e)}")
-
-
-    async def _apply_cookies_and_storage(
-        self,
-        context: BrowserContext,
-        cookies: str = "",
-        local_storage: str = ""
-    ):
-        """
-        ✅ PHASE 3: Extract duplicate cookies and localStorage loading logic.
-        """
-        # Load cookies if provided
-        if cookies and cookies.strip():
-            try:
-                cookies_list = json.loads(cookies)
-                if isinstance(cookies_list, list) and len(cookies_list) > 0:
-                    print(f"🍪 Loading {len(cookies_list)} cookies...")
-                    for cookie in cookies_list:
-                        print(f"  - {cookie.get('name', 'unknown')}: domain={cookie.get('domain', 'N/A')}")
-                    await context.add_cookies(cookies_list)
-                    print(f"✅ Cookies loaded successfully!")
-                else:
-                    print(f"⚠️ Cookies JSON is empty or not an array")
-            except Exception as e:
-                print(f"❌ Failed to load cookies: {e}")
-                import traceback
-                traceback.print_exc()
+        # Load cookies if provided
+        if cookies and cookies.strip():
+            try:
+                cookies_list = json.loads(cookies)
+                if isinstance(cookies_list, list) and len(cookies_list) > 0:
+                    print(f"🍪 Loading {len(cookies_list)} cookies...")
+                    for cookie in cookies_list:
+                        print(f"  - {cookie.get('name', 'unknown')}: domain={cookie.get('domain', 'N/A')}")
+                    await context.add_cookies(cookies_list)
+                    print(f"✅ Cookies loaded successfully!")
+                else:
+                    print(f"⚠️ Cookies JSON is empty or not an array")
+            except Exception as e:
+                print(f"❌ Failed to load cookies: {e}")
+                import traceback
+                traceback.print_exc()
 
         # Inject localStorage if provided
         if local_storage and local_storage.strip():
@@ -1883,7 +1915,14 @@ class ScreenshotService:
         words_to_remove: str = "",
         cookies: str = "",
         local_storage: str = "",
-        track_network: bool = False  # ✅ NEW: Network event tracking
+        track_network: bool = False,  # ✅ NEW: Network event tracking
+        ready_selector: str = "",  # ⚡ Optional CSS selector that must exist before capturing
+        output_format: Optional[OutputFormat] = None,  # ⚡ Encoding on disk (default: PNG)
+        full_page_mode: str = "auto",  # ⚡ "auto", "native" or "tiled"
+        viewports: Optional[List[Tuple[int, int]]] = None,  # ⚡ Responsive matrix from one navigation
+        routes: Optional[List[str]] = None,  # ⚡ SPA route mode: more URLs of the same app
+        router_hook: str = "",  # ⚡ JS (path, url) => ... used instead of pushState
+        route_progress: Optional[List[RouteCapture]] = None  # ⚡ Filled as the boot URL and each route finish
     ) -> str:
         """
         Capture screenshot of a URL
@@ -1897,13 +1936,34 @@ class ScreenshotService:
             use_stealth: Enable stealth mode (anti-bot detection)
             use_real_browser: Use active tab from existing Chrome browser (CDP mode)
             browser_engine: Browser engine to use ("playwright" or "camoufox")
+            ready_selector: Optional CSS selector the readiness engine waits for
+            output_format: Output encoding (PNG/JPEG by Chromium, WebP/AVIF re-encoded in the worker pool)
+            full_page_mode: "native" (page.screenshot(full_page=True)), "tiled" (expand the scroll
+                container, capture clipped tiles, stream them into one PNG) or "auto" (tiled when
+                a scroll container is found or the page is past the 16384px texture limit)
+            viewports: (width, height) breakpoints to capture from a single navigation. The page
+                loads at the first one; each further size is a viewport resize plus a short
+                readiness wait. Overrides viewport_width/height; all paths via pop_viewport_captures()
+            routes: Further URLs of the same app, captured from this booted page via client-side
+                navigation (pushState + popstate, or router_hook) and a route-level readiness wait.
+                Captured at the first viewport; results via pop_route_captures()
+            router_hook: JS function expression called with (path, url) to change routes
+            route_progress: Caller-owned list that gets a RouteCapture for the boot URL and then
+                each route the moment it is written - what finished survives a timeout of this call
 
         Returns:
-            Path to saved screenshot
+            Path to saved screenshot (the first breakpoint's when viewports are given)
         """
+        output = output_format or DEFAULT_OUTPUT_FORMAT
+        if viewports:
+            viewport_width, viewport_height = viewports[0]
         # 🔗 ACTIVE TAB MODE: Connect to existing Chrome browser via CDP
         if use_real_browser:
             print("🔗 Active Tab Mode: Using your existing Chrome browser")
+            if viewports and len(viewports) > 1:
+                print("   ⚠️  Multi-viewport capture is not available in Active Tab Mode - capturing the tab as is")
+            if routes:
+                print("   ⚠️  SPA route mode is not available in Active Tab Mode - only the first URL is captured")
             new_tab = None
             try:
                 # Connect to Chrome via CDP if not already connected
@@ -1913,28 +1973,28 @@ class ScreenshotService:
                 # Create a new tab next to the active tab (don't navigate the current tab)
                 new_tab = await self._create_new_tab_next_to_active()
 
+                # ⚡ Install readiness observers BEFORE navigation
+                await install_readiness_tracker(new_tab)
+
                 # Navigate to the URL in the new tab
                 print(f"🌐 Loading {url} in new tab...")
-                try:
-                    # Try networkidle first (best for fully loaded pages)
-                    await new_tab.goto(url, wait_until='networkidle', timeout=timeout)
-                    print("   ✅ Page loaded in new tab (network idle)")
-                except Exception as e:
-                    # If networkidle times out, fall back to load event
-                    print(f"   ⚠️  Network idle timeout, using load event instead...")
-                    await new_tab.goto(url, wait_until='load', timeout=timeout)
-                    print("   ✅ Page loaded in new tab (load event)")
+                await new_tab.goto(url, wait_until='load', timeout=timeout)
+                print("   ✅ Page loaded in new tab (load event)")
+
+                # ⚡ In-page network quiescence instead of 'networkidle' (ignores beacons/long-poll)
+                await self._wait_for_network_quiet(new_tab, timeout_ms=15000)
 
                 # Wait for page to be fully loaded and any lazy content
                 print("   ⏳ Waiting for lazy-loaded content...")
-                await asyncio.sleep(3.0)
+                await self._wait_until_ready(new_tab, selector=ready_selector)
 
                 # Take screenshot
                 timestamp = int(datetime.now().timestamp() * 1000)
-                filename = f"screenshot_{timestamp}.png"
+                filename = f"screenshot_{timestamp}{output.extension}"
                 filepath = self.output_dir / filename
 
-                await new_tab.screenshot(path=str(filepath), full_page=full_page, timeout=screenshot_timeout)
+                image_bytes = await new_tab.screenshot(full_page=full_page, timeout=screenshot_timeout, **output.screenshot_kwargs())
+                await self._write_capture(filepath, image_bytes, output)
                 print(f"✅ Screenshot saved: {filepath}")
 
                 # DON'T close the tab - leave it open so user can see the result
@@ -1952,337 +2012,216 @@ class ScreenshotService:
         # ✅ STANDARD MODE: Launch new browser or use existing
         # Get browser (will auto-switch modes if needed)
         # ✅ 2025: Support Camoufox for maximum stealth
-        browser = await self._get_browser(use_real_browser=False, browser_engine=browser_engine, use_stealth=use_stealth)
-
-        # ✅ PHASE 3: Use helper method for stealth configuration
-        viewport_width, viewport_height, user_agent, extra_headers = self._get_stealth_config(
-            viewport_width, viewport_height, use_stealth and not use_real_browser
-        )
-
-        # ✅ PHASE 3: Use helper method for auth state loading
-        storage_state = self._load_auth_state(cookies, local_storage)
-
-        # ✅ FIX: Check if browser is actually a persistent context (Camoufox or persistent Playwright)
-        # Persistent contexts ARE the context, not a browser that creates contexts
-        is_persistent_context = (browser_engine == "camoufox" and CAMOUFOX_AVAILABLE) or \
-                               (hasattr(browser, 'pages') and not hasattr(browser, 'new_context'))
-
-        if is_persistent_context:
-            # Browser IS the context (persistent context mode)
-            context = browser
-            print("   🔐 Using persistent context (browser IS the context)")
-        else:
-            # Standard browser mode - create a new context
-            context = await browser.new_context(
-                viewport={'width': viewport_width, 'height': viewport_height},
-                user_agent=user_agent,
-                locale='en-US',
-                timezone_id='America/New_York',
-                extra_http_headers=extra_headers,
-                # Additional stealth settings
-                permissions=['geolocation'] if use_stealth else [],
-                geolocation={'latitude': 40.7128, 'longitude': -74.0060} if use_stealth else None,  # New York
-                color_scheme='light' if use_stealth else None,
-                device_scale_factor=1,
-                has_touch=False,  # Desktop browser
-                is_mobile=False,  # Not mobile
-                storage_state=storage_state,  # Load saved auth state if available
-            )
+        lease = await self._acquire_browser(use_real_browser=False, browser_engine=browser_engine, use_stealth=use_stealth)
+        browser = lease.browser
+        pooled_context = None
+        # ⚡ Per-request cookies/localStorage can't be scrubbed from a context - don't pool those
+        reuse_context = not (cookies or local_storage)
 
-        # Note: Manual stealth JavaScript removed - now using playwright-stealth library
-        # The library handles all stealth techniques automatically and more comprehensively
-
-        # ✅ PHASE 3: Use helper method for cookies and localStorage
-        # Only apply if NOT using persistent context (persistent context already has auth state)
-        if not is_persistent_context:
-            await self._apply_cookies_and_storage(context, cookies, local_storage)
-
-        page = await context.new_page()
-
-        # Apply stealth mode using playwright-stealth library + 2024-2025 enhancements
-        if use_stealth and not use_real_browser:
-            print("   🥷 Applying playwright-stealth library...")
-            await stealth_async(page)
-            print("   ✅ Stealth mode activated!")
+        try:
+            # ✅ PHASE 3: Use helper method for auth state loading
+            storage_state = self._load_auth_state(cookies, local_storage)
+            auth_shards = self._auth_shards(storage_state, url)
+
+            # ✅ FIX: Check if browser is actually a persistent context (Camoufox or persistent Playwright)
+            # Persistent contexts ARE the context, not a browser that creates contexts
+            is_persistent_context = lease.is_persistent_context
+
+            if is_persistent_context:
+                # Browser IS the context (persistent context mode)
+                context = browser
+                print("   🔐 Using persistent context (browser IS the context)")
+            else:
+                # Standard browser mode - take a pre-warmed context from the pool
+                # (stealth viewport/user agent randomization happens at context creation)
+                pooled_context = await self._open_capture_context(
+                    lease, viewport_width, viewport_height,
+                    use_stealth and not use_real_browser, storage_state, reusable=reuse_context,
+                    auth_shards=auth_shards
+                )
+                context = pooled_context.context
 
-            # ========================================
-            # 🎯 9 STEALTH SOLUTIONS - Applied Here
-            # ========================================
-            print("   🚀 Applying 9 stealth solutions (2025)...")
+            # Note: Manual stealth JavaScript removed - now using playwright-stealth library
+            # The library handles all stealth techniques automatically and more comprehensively
 
-            # Solution #1: Disable navigator.webdriver (CRITICAL)
-            await self._disable_navigator_webdriver(page)
+            # ✅ PHASE 3: Use helper method for cookies and localStorage
+            # Only apply if NOT using persistent context (persistent context already has auth state)
+            if not is_persistent_context:
+                await self._apply_cookies_and_storage(context, cookies, local_storage)
 
-            # Solution #5: Load cookies from previous sessions
-            # ✅ FIX: Only load cookies.json if we didn't already load auth state
-            if not storage_state:
-                await self._load_cookies(context)
+            page = await context.new_page()
 
-            # Apply 2024-2025 stealth enhancements (Phase 1 & 2)
-            await self._apply_canvas_webgl_randomization(page)
-            await self._apply_cdp_detection_bypass(page)
-            await self._apply_audio_context_randomization(page)
-            print("   ✅ All 9 stealth solutions applied!")
+            # ⚡ Install readiness observers BEFORE navigation (replaces fixed sleeps)
+            await install_readiness_tracker(page)
+            if full_page:
+                # ⚡ IntersectionObserver shim so lazy content can be loaded eagerly
+                await install_eager_loading(page)
 
-        # Verify cookies and localStorage are actually loaded (runtime verification)
-        if storage_state:
-            try:
-                # Check cookies
-                loaded_cookies = await context.cookies()
-                print(f"   ✅ Runtime verification: {len(loaded_cookies)} cookies loaded in browser context")
-
-                # Show key auth cookies
-                auth_cookie_names = [c['name'] for c in loaded_cookies if any(keyword in c['name'].lower() for keyword in ['token', 'session', 'auth', 'sid', 'jsession'])]
-                if auth_cookie_names:
-                    print(f"   🔑 Active auth cookies: {', '.join(auth_cookie_names[:5])}")
-                else:
-                    print(f"   ⚠️  WARNING: No auth cookies found in browser context!")
+            # Apply stealth mode using playwright-stealth library + 2024-2025 enhancements
+            if use_stealth and not use_real_browser:
+                print("   🥷 Applying playwright-stealth library...")
+                await stealth_async(page)
+                print("   ✅ Stealth mode activated!")
 
-                # Check localStorage (need to navigate first, so we'll check after goto)
-            except Exception as e:
-                print(f"   ⚠️  Could not verify runtime cookies: {str(e)}")
+                # ========================================
+                # 🎯 9 STEALTH SOLUTIONS - Applied Here
+                # ========================================
+                print("   🚀 Applying 9 stealth solutions (2025)...")
 
-            # Additional JavaScript injections for enhanced stealth
-            await page.add_init_script("""
-                // Override the permissions API
-                const originalQuery = window.navigator.permissions.query;
-                window.navigator.permissions.query = (parameters) => (
-                    parameters.name === 'notifications' ?
-                        Promise.resolve({ state: Notification.permission }) :
-                        originalQuery(parameters)
-                );
+                # Solution #1: Disable navigator.webdriver (CRITICAL)
+                await self._disable_navigator_webdriver(page)
 
-                // Add realistic battery API
-                Object.defineProperty(navigator, 'getBattery', {
-                    value: () => Promise.resolve({
-                        charging: true,
-                        chargingTime: 0,
-                        dischargingTime: Infinity,
-                        level: 0.95,
-                        addEventListener: () => {},
-                        removeEventListener: () => {},
-                        dispatchEvent: () => true,
-                    })
-                });
+                # Solution #5: Load cookies from previous sessions
+                # ✅ FIX: Only load cookies.json if we didn't already load auth state
+                if not storage_state:
+                    await self._load_cookies(context)
 
-                // Mock connection API
-                Object.defineProperty(navigator, 'connection', {
-                    value: {
-                        effectiveType: '4g',
-                        rtt: 50,
-                        downlink: 10,
-                        saveData: false,
-                    },
-                    writable: false
-                });
+                # Apply 2024-2025 stealth enhancements (Phase 1 & 2)
+                await self._apply_canvas_webgl_randomization(page)
+                await self._apply_cdp_detection_bypass(page)
+                await self._apply_audio_context_randomization(page)
+                print("   ✅ All 9 stealth solutions applied!")
 
-                // Add realistic screen properties
-                Object.defineProperty(screen, 'availWidth', {
-                    get: () => window.screen.width
-                });
-                Object.defineProperty(screen, 'availHeight', {
-                    get: () => window.screen.height - 40
-                });
-            """)
-        
-        try:
-            # 🔧 CROSS-DOMAIN COOKIE SETUP: If auth state was loaded, set up cookies for all domains
+            # Verify cookies and localStorage are actually loaded (runtime verification)
             if storage_state:
-                await self._setup_cross_domain_cookies(context, storage_state)
+                try:
+                    # Check cookies
+                    loaded_cookies = await context.cookies()
+                    print(f"   ✅ Runtime verification: {len(loaded_cookies)} cookies loaded in browser context")
+
+                    # Show key auth cookies
+                    auth_cookie_names = [c['name'] for c in loaded_cookies if any(keyword in c['name'].lower() for keyword in ['token', 'session', 'auth', 'sid', 'jsession'])]
+                    if auth_cookie_names:
+                        print(f"   🔑 Active auth cookies: {', '.join(auth_cookie_names[:5])}")
+                    else:
+                        print(f"   ⚠️  WARNING: No auth cookies found in browser context!")
 
-            # 🔍 DEBUG: Show which cookies will be sent to the target URL
-            await self._debug_cookies_before_navigation(context, url)
+                    # Check localStorage (need to navigate first, so we'll check after goto)
+                except Exception as e:
+                    print(f"   ⚠️  Could not verify runtime cookies: {str(e)}")
 
-            # Enhanced stealth navigation (works for both headless and real browser)
-            if use_stealth:
-                # Use longer timeout for stealth mode (Cloudflare challenges take time)
-                stealth_timeout = 60000  # 60 seconds
+                # Additional JavaScript injections for enhanced stealth
+                await page.add_init_script("""
+                    // Override the permissions API
+                    const originalQuery = window.navigator.permissions.query;
+                    window.navigator.permissions.query = (parameters) => (
+                        parameters.name === 'notifications' ?
+                            Promise.resolve({ state: Notification.permission }) :
+                            originalQuery(parameters)
+                    );
 
-                # Try multiple navigation strategies for sites with strong bot detection
-                navigation_success = False
-                last_error = None
+                    // Add realistic battery API
+                    Object.defineProperty(navigator, 'getBattery', {
+                        value: () => Promise.resolve({
+                            charging: true,
+                            chargingTime: 0,
+                            dischargingTime: Infinity,
+                            level: 0.95,
+                            addEventListener: () => {},
+                            removeEventListener: () => {},
+                            dispatchEvent: () => true,
+                        })
+                    });
 
-                # Strategy 1: Try domcontentloaded first
-                try:
-                    await page.goto(url, wait_until='domcontentloaded', timeout=stealth_timeout)
-                    navigation_success = True
-                except Exception as e:
-                    last_error = e
-                    error_msg = str(e)
+                    // Mock connection API
+                    Object.defineProperty(navigator, 'connection', {
+                        value: {
+                            effectiveType: '4g',
+                            rtt: 50,
+                            downlink: 10,
+                            saveData: false,
+                        },
+                        writable: false
+                    });
 
-                    # Check if it's HTTP2 protocol error (strong bot detection)
-                    if 'ERR_HTTP2_PROTOCOL_ERROR' in error_msg or 'ERR_CONNECTION_REFUSED' in error_msg:
-                        print(f"   ⚠️  Network-level bot detection detected, trying alternative approach...")
+                    // Add realistic screen properties
+                    Object.defineProperty(screen, 'availWidth', {
+                        get: () => window.screen.width
+                    });
+                    Object.defineProperty(screen, 'availHeight', {
+                        get: () => window.screen.height - 40
+                    });
+                """)
+        
+            try:
+                # 🔧 CROSS-DOMAIN COOKIE SETUP: If auth state was loaded, set up cookies for all domains
+                if storage_state:
+                    await self._setup_cross_domain_cookies(context, storage_state, auth_shards)
 
-                        # Strategy 2: Try with 'load' event instead
-                        try:
-                            await page.goto(url, wait_until='load', timeout=stealth_timeout)
-                            navigation_success = True
-                            last_error = None
-                        except Exception as e2:
-                            last_error = e2
-                            print(f"   ⚠️  Alternative approach failed, trying commit event...")
+                # 🔍 DEBUG: Show which cookies will be sent to the target URL
+                await self._debug_cookies_before_navigation(context, url)
 
-                            # Strategy 3: Try with 'commit' event (most lenient)
-                            try:
-                                await page.goto(url, wait_until='commit', timeout=stealth_timeout)
-                                navigation_success = True
-                                last_error = None
-                            except Exception as e3:
-                                last_error = e3
+                # Enhanced stealth navigation (works for both headless and real browser)
+                if use_stealth:
+                    # Use longer timeout for stealth mode (Cloudflare challenges take time)
+                    stealth_timeout = 60000  # 60 seconds
 
-                # If all strategies failed, try session building approach
-                if not navigation_success:
-                    print(f"   🔄 All direct navigation failed, trying session building...")
+                    # Try multiple navigation strategies for sites with strong bot detection
+                    navigation_success = False
+                    last_error = None
 
+                    # Strategy 1: Try domcontentloaded first
                     try:
-                        # Extract domain from URL
-                        from urllib.parse import urlparse
-                        parsed = urlparse(url)
-                        homepage = f"{parsed.scheme}://{parsed.netloc}"
-
-                        # Visit homepage first to establish session
-                        print(f"   📍 Visiting homepage first: {homepage}")
-                        await page.goto(homepage, wait_until='domcontentloaded', timeout=30000)
-                        await asyncio.sleep(random.uniform(2, 4))
-
-                        # Simulate human behavior on homepage
-                        await page.evaluate('window.scrollTo(0, 300)')
-                        await asyncio.sleep(random.uniform(1, 2))
-
-                        # Now try target URL again
-                        print(f"   📍 Now navigating to target: {url}")
                         await page.goto(url, wait_until='domcontentloaded', timeout=stealth_timeout)
                         navigation_success = True
-
                     except Exception as e:
-                        # If session building also failed, raise original error
-                        print(f"   ❌ Session building failed: {e}")
-                        raise last_error
-
-                # Wait for initial content
-                await asyncio.sleep(2.0)
-
-                # ✅ Simulate human behavior after page load
-                if use_stealth:
-                    print(f"   🎭 Simulating human behavior...")
-                    await self._simulate_human_behavior(page, use_stealth=use_stealth)
-
-                # Check if Cloudflare challenge is present
-                try:
-                    cloudflare_present = await page.evaluate("""
-                        () => {
-                            try {
-                                const title = document.title.toLowerCase();
-                                const body = document.body ? document.body.innerText.toLowerCase() : '';
-                                return title.includes('just a moment') ||
-                                       body.includes('checking your browser') ||
-                                       body.includes('cloudflare');
-                            } catch (e) {
-                                return false;
-                            }
-                        }
-                    """)
-                except Exception:
-                    cloudflare_present = False
-
-                if cloudflare_present:
-                    # Wait longer for Cloudflare challenge to complete
-                    print("Cloudflare challenge detected in stealth mode, waiting...")
-                    await asyncio.sleep(8.0)
-
-                # ✅ Apply Phase 2: Behavioral randomization (human-like behavior)
-                print("   🤖 Simulating human-like behavior...")
-                await self._apply_behavioral_randomization(page)
-
-                # Try to wait for network to be idle (but don't fail if it times out)
-                try:
-                    await page.wait_for_load_state('networkidle', timeout=15000)
-                except Exception:
-                    # If networkidle times out, that's okay - page is probably loaded enough
-                    pass
-
-                # Additional random delay (human reading time)
-                await asyncio.sleep(random.uniform(1.5, 3.0))
-
-                # Random scroll to simulate engagement
-                await page.evaluate(f"window.scrollTo(0, {random.randint(100, 300)})")
-                await asyncio.sleep(random.uniform(0.5, 1.0))
-                await page.evaluate("window.scrollTo(0, 0)")
-                await asyncio.sleep(random.uniform(0.3, 0.7))
-
-                # Debug: Check what's actually on the page
-                try:
-                    page_info = await page.evaluate("""
-                        () => {
-                            return {
-                                url: window.location.href,
-                                title: document.title,
-                                bodyText: document.body ? document.body.innerText.substring(0, 500) : 'NO BODY',
-                                hasOktaLogin: document.body ? document.body.innerText.includes('Sign In') || document.body.innerText.includes('Okta') : false,
-                                hasError: document.body ? document.body.innerText.includes('error') || document.body.innerText.includes('Error') : false
-                            };
-                        }
-                    """)
-                    print(f"   📄 Page loaded: {page_info['title']}")
-                    print(f"   🔗 Current URL: {page_info['url']}")
-                    if page_info['hasOktaLogin']:
-                        print(f"   ⚠️  WARNING: Okta login page detected! Auth state may have been rejected.")
-                    if page_info['hasError']:
-                        print(f"   ⚠️  WARNING: Error text detected on page!")
-                        print(f"   📝 Page content preview: {page_info['bodyText'][:200]}")
-                except Exception as e:
-                    print(f"   ⚠️  Could not check page content: {str(e)}")
+                        last_error = e
+                        error_msg = str(e)
 
-                # Wait for React app to render (critical for SPAs like Tekion)
-                print("   ⏳ Waiting for React app to render...")
-                await asyncio.sleep(5.0)  # Give React time to render
-                print("   ✅ Initial render wait complete")
+                        # Check if it's HTTP2 protocol error (strong bot detection)
+                        if 'ERR_HTTP2_PROTOCOL_ERROR' in error_msg or 'ERR_CONNECTION_REFUSED' in error_msg:
+                            print(f"   ⚠️  Network-level bot detection detected, trying alternative approach...")
 
-                # Check if page has actual content now
-                try:
-                    content_check = await page.evaluate("""
-                        () => {
-                            const bodyText = document.body ? document.body.innerText : '';
-                            const hasContent = bodyText.length > 100;
-                            const visibleElements = document.querySelectorAll('*').length;
-                            const images = document.querySelectorAll('img').length;
-                            const divs = document.querySelectorAll('div').length;
-                            return {
-                                textLength: bodyText.length,
-                                hasContent: hasContent,
-                                visibleElements: visibleElements,
-                                images: images,
-                                divs: divs,
-                                bodyPreview: bodyText.substring(0, 200)
-                            };
-                        }
-                    """)
-                    print(f"   📊 Content check: {content_check['textLength']} chars, {content_check['visibleElements']} elements, {content_check['divs']} divs, {content_check['images']} images")
-                    if not content_check['hasContent']:
-                        print(f"   ⚠️  WARNING: Page has very little text content!")
-                        print(f"   📝 Body preview: {content_check['bodyPreview']}")
-                    else:
-                        print(f"   ✅ Page has substantial content")
-                except Exception as e:
-                    print(f"   ⚠️  Could not check content: {str(e)}")
+                            # Strategy 2: Try with 'load' event instead
+                            try:
+                                await page.goto(url, wait_until='load', timeout=stealth_timeout)
+                                navigation_success = True
+                                last_error = None
+                            except Exception as e2:
+                                last_error = e2
+                                print(f"   ⚠️  Alternative approach failed, trying commit event...")
+
+                                # Strategy 3: Try with 'commit' event (most lenient)
+                                try:
+                                    await page.goto(url, wait_until='commit', timeout=stealth_timeout)
+                                    navigation_success = True
+                                    last_error = None
+                                except Exception as e3:
+                                    last_error = e3
+
+                    # If all strategies failed, try session building approach
+                    if not navigation_success:
+                        print(f"   🔄 All direct navigation failed, trying session building...")
 
-                # Additional wait for any lazy-loaded content
-                await asyncio.sleep(2.0)
-                print("   ✅ Final wait complete, ready to capture")
-            else:
-                # Real browser mode - more lenient loading
-                if use_real_browser:
-                    # ✅ NEW: Log tab opening
-                    from datetime import datetime
-                    print(f"   🌐 [{datetime.now().strftime('%H:%M:%S')}] Opening tab for: {url}")
+                        try:
+                            # Extract domain from URL
+                            from urllib.parse import urlparse
+                            parsed = urlparse(url)
+                            homepage = f"{parsed.scheme}://{parsed.netloc}"
+
+                            # Visit homepage first to establish session
+                            print(f"   📍 Visiting homepage first: {homepage}")
+                            await page.goto(homepage, wait_until='domcontentloaded', timeout=30000)
+                            await asyncio.sleep(random.uniform(2, 4))
+
+                            # Simulate human behavior on homepage
+                            await page.evaluate('window.scrollTo(0, 300)')
+                            await asyncio.sleep(random.uniform(1, 2))
+
+                            # Now try target URL again
+                            print(f"   📍 Now navigating to target: {url}")
+                            await page.goto(url, wait_until='domcontentloaded', timeout=stealth_timeout)
+                            navigation_success = True
 
-                    # Use 'load' instead of 'networkidle' for better compatibility
-                    await page.goto(url, wait_until='load', timeout=timeout)
-                    print(f"   ✅ [{datetime.now().strftime('%H:%M:%S')}] Tab loaded successfully")
+                        except Exception as e:
+                            # If session building also failed, raise original error
+                            print(f"   ❌ Session building failed: {e}")
+                            raise last_error
 
-                    # Wait for initial content
-                    await asyncio.sleep(2.0)
+                    # ✅ Simulate human behavior after page load
+                    if use_stealth:
+                        print(f"   🎭 Simulating human behavior...")
+                        await self._simulate_human_behavior(page, use_stealth=use_stealth)
 
                     # Check if Cloudflare challenge is present
                     try:
@@ -2300,254 +2239,602 @@ class ScreenshotService:
                             }
                         """)
                     except Exception:
-                        # If evaluation fails, assume no Cloudflare
                         cloudflare_present = False
 
                     if cloudflare_present:
-                        # Wait longer for Cloudflare challenge to complete
-                        print("Cloudflare challenge detected, waiting...")
-                        await asyncio.sleep(8.0)
-                    else:
-                        # Normal wait
-                        await asyncio.sleep(random.uniform(2.0, 4.0))
+                        # Wait for Cloudflare challenge to complete
+                        print("Cloudflare challenge detected in stealth mode, waiting...")
+                        await self._wait_for_cloudflare_clearance(page)
 
-                    # Try to wait for networkidle but don't fail if it times out
-                    try:
-                        await page.wait_for_load_state('networkidle', timeout=15000)
-                    except Exception:
-                        # If networkidle times out, that's okay - page is probably loaded enough
-                        pass
-                else:
-                    # ✅ NEW: Log tab opening (headless mode)
-                    from datetime import datetime
-                    print(f"   🌐 [{datetime.now().strftime('%H:%M:%S')}] Opening headless browser for: {url}")
+                    # ✅ Apply Phase 2: Behavioral randomization (human-like behavior)
+                    print("   🤖 Simulating human-like behavior...")
+                    await self._apply_behavioral_randomization(page)
 
-                    # Normal headless navigation
-                    await page.goto(url, wait_until='networkidle', timeout=timeout)
-                    await page.wait_for_load_state('networkidle')
-                    print(f"   ✅ [{datetime.now().strftime('%H:%M:%S')}] Page loaded successfully")
+                    # Wait for network to be quiet (doesn't fail if it times out)
+                    await self._wait_for_network_quiet(page, timeout_ms=15000)
 
-                    # Additional wait for dealer-specific data to load (Tekion app initialization)
-                    print("   ⏳ Waiting for app to fully initialize (dealer data, etc.)...")
-                    await asyncio.sleep(5.0)  # Give time for dealer context to load
+                    # Additional random delay (human reading time)
+                    await asyncio.sleep(random.uniform(1.5, 3.0))
 
-                    # Check for common errors that indicate auth issues
+                    # Random scroll to simulate engagement
+                    await page.evaluate(f"window.scrollTo(0, {random.randint(100, 300)})")
+                    await asyncio.sleep(random.uniform(0.5, 1.0))
+                    await page.evaluate("window.scrollTo(0, 0)")
+                    await asyncio.sleep(random.uniform(0.3, 0.7))
+
+                    # Debug: Check what's actually on the page
                     try:
-                        error_check = await page.evaluate("""
+                        page_info = await page.evaluate("""
                             () => {
-                                const bodyText = document.body.innerText;
                                 return {
-                                    hasRoleChangeError: bodyText.includes('Your role has been changed'),
-                                    hasUnableToFetchError: bodyText.includes('Unable to fetch'),
-                                    hasJSONError: bodyText.includes('Unexpected token') || bodyText.includes('valid JSON')
+                                    url: window.location.href,
+                                    title: document.title,
+                                    bodyText: document.body ? document.body.innerText.substring(0, 500) : 'NO BODY',
+                                    hasOktaLogin: document.body ? document.body.innerText.includes('Sign In') || document.body.innerText.includes('Okta') : false,
+                                    hasError: document.body ? document.body.innerText.includes('error') || document.body.innerText.includes('Error') : false
                                 };
                             }
                         """)
+                        print(f"   📄 Page loaded: {page_info['title']}")
+                        print(f"   🔗 Current URL: {page_info['url']}")
+                        if page_info['hasOktaLogin']:
+                            print(f"   ⚠️  WARNING: Okta login page detected! Auth state may have been rejected.")
+                        if page_info['hasError']:
+                            print(f"   ⚠️  WARNING: Error text detected on page!")
+                            print(f"   📝 Page content preview: {page_info['bodyText'][:200]}")
+                    except Exception as e:
+                        print(f"   ⚠️  Could not check page content: {str(e)}")
 
-                        if error_check['hasRoleChangeError']:
-                            print(f"   ⚠️  WARNING: 'Your role has been changed' error detected!")
-                            print(f"   💡 This usually means auth state was saved before dealer selection.")
-                        if error_check['hasUnableToFetchError']:
-                            print(f"   ⚠️  WARNING: 'Unable to fetch' error detected!")
-                        if error_check['hasJSONError']:
-                            print(f"   ⚠️  WARNING: JSON parsing error detected!")
-                    except Exception:
-                        pass  # Ignore if error check fails
-
-            # Verify localStorage is loaded (after page navigation)
-            if storage_state:
-                try:
-                    ls_verification = await page.evaluate("""
-                        () => {
-                            const keys = Object.keys(localStorage);
-                            const authKeys = keys.filter(k =>
-                                k.toLowerCase().includes('token') ||
-                                k.toLowerCase().includes('auth') ||
-                                k.toLowerCase().includes('user') ||
-                                k.toLowerCase().includes('session')
-                            );
-                            return {
-                                totalKeys: keys.length,
-                                authKeys: authKeys
-                            };
-                        }
-                    """)
-                    print(f"   ✅ Runtime verification: {ls_verification['totalKeys']} localStorage items loaded")
-                    if ls_verification['authKeys']:
-                        print(f"   💾 Active localStorage auth items: {', '.join(ls_verification['authKeys'][:5])}")
-                    else:
-                        print(f"   ⚠️  WARNING: No auth items found in localStorage!")
-                except Exception as e:
-                    print(f"   ⚠️  Could not verify localStorage: {str(e)}")
+                    # Wait for React app to render (critical for SPAs like Tekion)
+                    print("   ⏳ Waiting for React app to render...")
+                    await self._wait_until_ready(page, selector=ready_selector)
 
-            # Auto-scroll to trigger lazy loading
-            if full_page:
-                await self._auto_scroll(page)
-            
-            # Generate filename based on base URL logic
-            filename = self._generate_filename(url, base_url, words_to_remove, 1, 1)  # segment_index=1, total_segments=1
-            filepath = self.output_dir / filename
+                    # Check if page has actual content now
+                    try:
+                        content_check = await page.evaluate("""
+                            () => {
+                                const bodyText = document.body ? document.body.innerText : '';
+                                const hasContent = bodyText.length > 100;
+                                const visibleElements = document.querySelectorAll('*').length;
+                                const images = document.querySelectorAll('img').length;
+                                const divs = document.querySelectorAll('div').length;
+                                return {
+                                    textLength: bodyText.length,
+                                    hasContent: hasContent,
+                                    visibleElements: visibleElements,
+                                    images: images,
+                                    divs: divs,
+                                    bodyPreview: bodyText.substring(0, 200)
+                                };
+                            }
+                        """)
+                        print(f"   📊 Content check: {content_check['textLength']} chars, {content_check['visibleElements']} elements, {content_check['divs']} divs, {content_check['images']} images")
+                        if not content_check['hasContent']:
+                            print(f"   ⚠️  WARNING: Page has very little text content!")
+                            print(f"   📝 Body preview: {content_check['bodyPreview']}")
+                        else:
+                            print(f"   ✅ Page has substantial content")
+                    except Exception as e:
+                        print(f"   ⚠️  Could not check content: {str(e)}")
 
-            # Final check before screenshot
-            print(f"   📸 About to capture screenshot...")
-            try:
-                final_check = await page.evaluate("""
-                    () => {
-                        // Check for scrollable containers (fixed height containers)
-                        const scrollableContainers = [];
-                        const prioritySelectors = [
-                            '#tekion-workspace',
-                            '[role="main"]',
-                            'main',
-                            '.main-content',
-                            '#main',
-                            '#content',
-                            '.content'
-                        ];
+                    print("   ✅ Ready to capture")
+                else:
+                    # Real browser mode - more lenient loading
+                    if use_real_browser:
+                        # ✅ NEW: Log tab opening
+                        from datetime import datetime
+                        print(f"   🌐 [{datetime.now().strftime('%H:%M:%S')}] Opening tab for: {url}")
 
-                        for (const selector of prioritySelectors) {
-                            try {
-                                const elements = document.querySelectorAll(selector);
-                                elements.forEach(el => {
-                                    const style = window.getComputedStyle(el);
-                                    const hasOverflow = (
-                                        style.overflow === 'auto' ||
-                                        style.overflow === 'scroll' ||
-                                        style.overflowY === 'auto' ||
-                                        style.overflowY === 'scroll'
-                                    );
-
-                                    if (hasOverflow && el.scrollHeight > el.clientHeight + 100) {
-                                        scrollableContainers.push({
-                                            selector: selector,
-                                            scrollHeight: el.scrollHeight,
-                                            clientHeight: el.clientHeight,
-                                            scrollPotential: el.scrollHeight - el.clientHeight
-                                        });
+                        # Use 'load' + in-page network quiescence instead of 'networkidle'
+                        await page.goto(url, wait_until='load', timeout=timeout)
+                        print(f"   ✅ [{datetime.now().strftime('%H:%M:%S')}] Tab loaded successfully")
+
+                        # Check if Cloudflare challenge is present
+                        try:
+                            cloudflare_present = await page.evaluate("""
+                                () => {
+                                    try {
+                                        const title = document.title.toLowerCase();
+                                        const body = document.body ? document.body.innerText.toLowerCase() : '';
+                                        return title.includes('just a moment') ||
+                                               body.includes('checking your browser') ||
+                                               body.includes('cloudflare');
+                                    } catch (e) {
+                                        return false;
                                     }
-                                });
-                            } catch (e) {
-                                // Selector might be invalid, skip it
-                            }
-                        }
+                                }
+                            """)
+                        except Exception:
+                            # If evaluation fails, assume no Cloudflare
+                            cloudflare_present = False
 
-                        return {
-                            url: window.location.href,
-                            title: document.title,
-                            bodyLength: document.body ? document.body.innerText.length : 0,
-                            scrollHeight: document.body ? document.body.scrollHeight : 0,
-                            viewportHeight: window.innerHeight,
-                            backgroundColor: window.getComputedStyle(document.body).backgroundColor,
-                            hasScrollableContainer: scrollableContainers.length > 0,
-                            scrollableContainers: scrollableContainers
-                        };
-                    }
-                """)
-                print(f"   📊 Final state: URL={final_check['url']}, Title={final_check['title']}")
-                print(f"   📊 Content: {final_check['bodyLength']} chars, Height={final_check['scrollHeight']}px, BgColor={final_check['backgroundColor']}")
-
-                # 🆕 IMPROVEMENT: Warn if fullpage mode won't work properly
-                if full_page and final_check.get('hasScrollableContainer'):
-                    containers = final_check.get('scrollableContainers', [])
-                    if containers:
-                        best_container = max(containers, key=lambda c: c['scrollPotential'])
-                        print(f"   ⚠️  WARNING: Fixed-height scrollable container detected!")
-                        print(f"      Container: {best_container['selector']} ({best_container['scrollHeight']}px scrollable)")
-                        print(f"      Document body: {final_check['scrollHeight']}px (viewport height)")
-                        print(f"      💡 RECOMMENDATION: Use 'Segmented' mode instead of 'Full page' mode")
-                        print(f"      💡 Full page mode will only capture {final_check['scrollHeight']}px (viewport)")
-                        print(f"      💡 Segmented mode will capture all {best_container['scrollHeight']}px of content")
+                        if cloudflare_present:
+                            # Wait for Cloudflare challenge to complete
+                            print("Cloudflare challenge detected, waiting...")
+                            await self._wait_for_cloudflare_clearance(page)
 
-            except Exception as e:
-                print(f"   ⚠️  Could not get final state: {str(e)}")
+                        # ⚡ Event-driven wait instead of a fixed delay
+                        await self._wait_until_ready(page, selector=ready_selector)
 
-            # ========================================
-            # 🎯 Solution #5: Save cookies for future sessions
-            # ========================================
-            if use_stealth:
-                await self._save_cookies(context)
+                        # Wait for network to be quiet (doesn't fail if it times out)
+                        await self._wait_for_network_quiet(page, timeout_ms=15000)
+                    else:
+                        # ✅ NEW: Log tab opening (headless mode)
+                        from datetime import datetime
+                        print(f"   🌐 [{datetime.now().strftime('%H:%M:%S')}] Opening headless browser for: {url}")
 
-            # Capture screenshot
-            from datetime import datetime
-            print(f"   📸 [{datetime.now().strftime('%H:%M:%S')}] Taking screenshot...")
-            print(f"   💾 Saving to: {filepath}")
-
-            await page.screenshot(
-                path=str(filepath),
-                full_page=full_page,
-                type='png',
-                timeout=screenshot_timeout  # ✅ NEW: Use dynamic timeout
-            )
+                        # Normal headless navigation
+                        # ⚡ 'load' + in-page network quiescence instead of 'networkidle'
+                        await page.goto(url, wait_until='load', timeout=timeout)
+                        await self._wait_for_network_quiet(page, timeout_ms=15000)
+                        print(f"   ✅ [{datetime.now().strftime('%H:%M:%S')}] Page loaded successfully")
+
+                        # Additional wait for dealer-specific data to load (Tekion app initialization)
+                        print("   ⏳ Waiting for app to fully initialize (dealer data, etc.)...")
+                        await self._wait_until_ready(page, selector=ready_selector)
+
+                        # Check for common errors that indicate auth issues
+                        try:
+                            error_check = await page.evaluate("""
+                                () => {
+                                    const bodyText = document.body.innerText;
+                                    return {
+                                        hasRoleChangeError: bodyText.includes('Your role has been changed'),
+                                        hasUnableToFetchError: bodyText.includes('Unable to fetch'),
+                                        hasJSONError: bodyText.includes('Unexpected token') || bodyText.includes('valid JSON')
+                                    };
+                                }
+                            """)
+
+                            if error_check['hasRoleChangeError']:
+                                print(f"   ⚠️  WARNING: 'Your role has been changed' error detected!")
+                                print(f"   💡 This usually means auth state was saved before dealer selection.")
+                            if error_check['hasUnableToFetchError']:
+                                print(f"   ⚠️  WARNING: 'Unable to fetch' error detected!")
+                            if error_check['hasJSONError']:
+                                print(f"   ⚠️  WARNING: JSON parsing error detected!")
+                        except Exception:
+                            pass  # Ignore if error check fails
+
+                # Verify localStorage is loaded (after page navigation)
+                if storage_state:
+                    try:
+                        ls_verification = await page.evaluate("""
+                            () => {
+                                const keys = Object.keys(localStorage);
+                                const authKeys = keys.filter(k =>
+                                    k.toLowerCase().includes('token') ||
+                                    k.toLowerCase().includes('auth') ||
+                                    k.toLowerCase().includes('user') ||
+                                    k.toLowerCase().includes('session')
+                                );
+                                return {
+                                    totalKeys: keys.length,
+                                    authKeys: authKeys
+                                };
+                            }
+                        """)
+                        print(f"   ✅ Runtime verification: {ls_verification['totalKeys']} localStorage items loaded")
+                        if ls_verification['authKeys']:
+                            print(f"   💾 Active localStorage auth items: {', '.join(ls_verification['authKeys'][:5])}")
+                        else:
+                            print(f"   ⚠️  WARNING: No auth items found in localStorage!")
+                    except Exception as e:
+                        print(f"   ⚠️  Could not verify localStorage: {str(e)}")
 
-            # Verify screenshot was saved
-            if filepath.exists():
-                file_size = filepath.stat().st_size
-                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                print(f"   ✅ [{datetime.now().strftime('%H:%M:%S')}] Screenshot saved successfully!")
-                print(f"   📁 File: {filepath}")
-                print(f"   📊 Size: {file_size} bytes ({file_size / 1024:.1f} KB)")
-                print(f"   🕐 Timestamp: {timestamp}")
+                # ⚡ Force lazy content to load (eager mode instead of a 100px/100ms crawl)
+                if full_page:
+                    await self._force_eager_load(page, url, base_url)
+            
+                # Generate filename based on base URL logic
+                filename = self._generate_filename(url, base_url, words_to_remove, 1, 1, output.extension)  # segment_index=1, total_segments=1
+                filepath = self.output_dir / filename
+                if viewports:
+                    filepath = self._viewport_filepath(filepath, viewport_width, viewport_height)
 
-                # Check if image is valid
+                # Final check before screenshot
+                print(f"   📸 About to capture screenshot...")
+                final_check = {}
                 try:
-                    from PIL import Image
-                    img = Image.open(filepath)
-                    width, height = img.size
-                    print(f"   📐 Image dimensions: {width}x{height}")
-
-                    # Check if image is blank (all white or all one color)
-                    extrema = img.convert("L").getextrema()
-                    if extrema[0] == extrema[1]:
-                        print(f"   ⚠️  WARNING: Image appears to be blank or single color (value: {extrema[0]})")
-                    else:
-                        print(f"   ✅ Image has content (brightness range: {extrema[0]}-{extrema[1]})")
+                    final_check = await page.evaluate("""
+                        () => {
+                            // Check for scrollable containers (fixed height containers)
+                            const scrollableContainers = [];
+                            const prioritySelectors = [
+                                '#tekion-workspace',
+                                '[role="main"]',
+                                'main',
+                                '.main-content',
+                                '#main',
+                                '#content',
+                                '.content'
+                            ];
+
+                            for (const selector of prioritySelectors) {
+                                try {
+                                    const elements = document.querySelectorAll(selector);
+                                    elements.forEach(el => {
+                                        const style = window.getComputedStyle(el);
+                                        const hasOverflow = (
+                                            style.overflow === 'auto' ||
+                                            style.overflow === 'scroll' ||
+                                            style.overflowY === 'auto' ||
+                                            style.overflowY === 'scroll'
+                                        );
+
+                                        if (hasOverflow && el.scrollHeight > el.clientHeight + 100) {
+                                            scrollableContainers.push({
+                                                selector: selector,
+                                                scrollHeight: el.scrollHeight,
+                                                clientHeight: el.clientHeight,
+                                                scrollPotential: el.scrollHeight - el.clientHeight
+                                            });
+                                        }
+                                    });
+                                } catch (e) {
+                                    // Selector might be invalid, skip it
+                                }
+                            }
+
+                            return {
+                                url: window.location.href,
+                                title: document.title,
+                                bodyLength: document.body ? document.body.innerText.length : 0,
+                                scrollHeight: document.body ? document.body.scrollHeight : 0,
+                                documentHeight: Math.max(
+                                    document.documentElement.scrollHeight,
+                                    document.body ? document.body.scrollHeight : 0
+                                ),
+                                devicePixelRatio: window.devicePixelRatio || 1,
+                                viewportHeight: window.innerHeight,
+                                backgroundColor: window.getComputedStyle(document.body).backgroundColor,
+                                hasScrollableContainer: scrollableContainers.length > 0,
+                                scrollableContainers: scrollableContainers
+                            };
+                        }
+                    """)
+                    print(f"   📊 Final state: URL={final_check['url']}, Title={final_check['title']}")
+                    print(f"   📊 Content: {final_check['bodyLength']} chars, Height={final_check['scrollHeight']}px, BgColor={final_check['backgroundColor']}")
+
+                    # 🆕 IMPROVEMENT: Warn if fullpage mode won't work properly
+                    if full_page and final_check.get('hasScrollableContainer'):
+                        containers = final_check.get('scrollableContainers', [])
+                        if containers:
+                            best_container = max(containers, key=lambda c: c['scrollPotential'])
+                            print(f"   ⚠️  WARNING: Fixed-height scrollable container detected!")
+                            print(f"      Container: {best_container['selector']} ({best_container['scrollHeight']}px scrollable)")
+                            print(f"      Document body: {final_check['scrollHeight']}px (viewport height)")
+                            if full_page_mode == "native":
+                                print(f"      💡 RECOMMENDATION: Use 'tiled' full page mode or 'Segmented' mode")
+                                print(f"      💡 Native full page mode will only capture {final_check['scrollHeight']}px (viewport)")
+                            else:
+                                print(f"      ⚡ Tiled mode will expand it and capture all {best_container['scrollHeight']}px of content")
+
                 except Exception as e:
-                    print(f"   ⚠️  Could not verify image: {str(e)}")
-            else:
-                print(f"   ❌ ERROR: Screenshot file not found!")
+                    print(f"   ⚠️  Could not get final state: {str(e)}")
 
-            # ✅ NEW: Summary log for full-page capture
-            from datetime import datetime
-            print(f"\n{'='*60}")
-            print(f"🎉 [{datetime.now().strftime('%H:%M:%S')}] Full-page capture complete!")
-            print(f"   📁 Output file: {filepath}")
-            print(f"   🕐 Completed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            print(f"{'='*60}\n")
+                # ========================================
+                # 🎯 Solution #5: Save cookies for future sessions
+                # ========================================
+                if use_stealth:
+                    await self._save_cookies(context)
 
-            return str(filepath)
+                # Capture screenshot
+                from datetime import datetime
+                print(f"   📸 [{datetime.now().strftime('%H:%M:%S')}] Taking screenshot...")
+                filepath = await self._shoot_page(
+                    page, filepath, output, full_page, full_page_mode, final_check,
+                    screenshot_timeout, url, base_url
+                )
+
+                # Verify screenshot was saved
+                if filepath.exists():
+                    file_size = filepath.stat().st_size
+                    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    print(f"   ✅ [{datetime.now().strftime('%H:%M:%S')}] Screenshot saved successfully!")
+                    print(f"   📁 File: {filepath}")
+                    print(f"   📊 Size: {file_size} bytes ({file_size / 1024:.1f} KB)")
+                    print(f"   🕐 Timestamp: {timestamp}")
+
+                    # Check if image is valid
+                    # ⚡ Decoded in the image worker pool, together with the quality check
+                    # main.py would otherwise run on the event loop (see pop_quality_report)
+                    try:
+                        analysis = await self.image_workers.analyze(filepath, quality=True, extrema=True)
+                        print(f"   📐 Image dimensions: {analysis.width}x{analysis.height}")
+                        self._remember_quality_report(filepath, analysis.quality)
+
+                        # Check if image is blank (all white or all one color)
+                        extrema = analysis.extrema
+                        if analysis.is_blank:
+                            print(f"   ⚠️  WARNING: Image appears to be blank or single color (value: {extrema[0]})")
+                        else:
+                            print(f"   ✅ Image has content (brightness range: {extrema[0]}-{extrema[1]})")
+                    except Exception as e:
+                        print(f"   ⚠️  Could not verify image: {str(e)}")
+                else:
+                    print(f"   ❌ ERROR: Screenshot file not found!")
+
+                # ✅ NEW: Summary log for full-page capture
+                from datetime import datetime
+                print(f"\n{'='*60}")
+                print(f"🎉 [{datetime.now().strftime('%H:%M:%S')}] Full-page capture complete!")
+                print(f"   📁 Output file: {filepath}")
+                print(f"   🕐 Completed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                print(f"{'='*60}\n")
+
+                if viewports:
+                    # ⚡ Remaining breakpoints reuse this navigation (no new context/goto/cookie setup)
+                    paths = [str(filepath)]
+                    paths += await self._capture_extra_viewports(
+                        page, self.output_dir / filename, viewports[1:], output, full_page,
+                        full_page_mode, final_check, screenshot_timeout, url, base_url
+                    )
+                    self._viewport_captures[str(filepath)] = paths
+                    while len(self._viewport_captures) > 256:
+                        self._viewport_captures.popitem(last=False)
+
+                if routes:
+                    if route_progress is not None:
+                        route_progress.append(RouteCapture(url=url, path=str(filepath)))
+                    # ⚡ Same app, same page: bundle, auth handshake and app context are already loaded
+                    if viewports and len(viewports) > 1:
+                        await page.set_viewport_size({"width": viewport_width, "height": viewport_height})
+                    self._route_captures[str(filepath)] = await self._capture_routes(
+                        page, routes, router_hook, output, full_page, full_page_mode, final_check,
+                        screenshot_timeout, timeout, base_url, words_to_remove, ready_selector,
+                        progress=route_progress
+                    )
+                    while len(self._route_captures) > 256:
+                        self._route_captures.popitem(last=False)
+
+                return str(filepath)
+
+            finally:
+                await page.close()
 
         finally:
-            await page.close()
             # ✅ FIX: Don't close persistent contexts (they ARE the browser)
-            # Only close contexts that we created (non-persistent mode)
-            if not is_persistent_context:
-                await context.close()
+            # ⚡ Pooled contexts are scrubbed and kept warm (one-off contexts are closed)
+            await self.context_pool.release(pooled_context, reusable=reuse_context)
+            # ⚡ Hand the browser back to the pool (it stays alive for the next capture)
+            self.browser_pool.release(lease)
     
-    async def _auto_scroll(self, page: Page):
-        """Auto-scroll page to trigger lazy loading"""
-        await page.evaluate("""
-            async () => {
-                await new Promise((resolve) => {
-                    let totalHeight = 0;
-                    const distance = 100;
-                    const timer = setInterval(() => {
-                        const scrollHeight = document.body.scrollHeight;
-                        window.scrollBy(0, distance);
-                        totalHeight += distance;
-
-                        if(totalHeight >= scrollHeight){
-                            clearInterval(timer);
-                            resolve();
-                        }
-                    }, 100);
-                });
-            }
+    async def _shoot_page(
+        self,
+        page: Page,
+        filepath: Path,
+        output: OutputFormat,
+        full_page: bool,
+        full_page_mode: str,
+        final_check: dict,
+        screenshot_timeout: int,
+        url: str,
+        base_url: str = ""
+    ) -> Path:
+        """
+        Screenshot the page as it is now - tiled or native full page, or the viewport
+
+        Returns:
+            Path actually written (tiled captures are always .png)
+        """
+        if full_page and self._wants_tiled_full_page(full_page_mode, final_check):
+            # ⚡ Tiles + streaming PNG (always PNG: WebP stops at 16383px, nothing else streams)
+            tiled_path = filepath.with_suffix(".png")
+            print(f"   💾 Saving to: {tiled_path} (tiled PNG)")
+            if await self._capture_tiled_full_page(page, tiled_path, screenshot_timeout, url, base_url):
+                return tiled_path
+
+        print(f"   💾 Saving to: {filepath} ({output.describe()})")
+        image_bytes = await page.screenshot(
+            full_page=full_page,
+            timeout=screenshot_timeout,  # ✅ NEW: Use dynamic timeout
+            **output.screenshot_kwargs()  # ⚡ JPEG natively, PNG for WebP/AVIF re-encoding
+        )
+        await self._write_capture(filepath, image_bytes, output)
+        return filepath
+
+    def _viewport_filepath(self, filepath: Path, width: int, height: int) -> Path:
+        """Module_Feature.png -> Module_Feature_1366x768.png (one file per breakpoint)"""
+        return filepath.with_name(f"{filepath.stem}_{width}x{height}{filepath.suffix}")
+
+    async def _capture_extra_viewports(
+        self,
+        page: Page,
+        base_filepath: Path,
+        viewports: List[Tuple[int, int]],
+        output: OutputFormat,
+        full_page: bool,
+        full_page_mode: str,
+        final_check: dict,
+        screenshot_timeout: int,
+        url: str,
+        base_url: str = ""
+    ) -> List[str]:
+        """
+        Resize the already-loaded page to each viewport and capture it
+
+        ⚡ OPTIMIZATION: Only the lightweight readiness wait (media-query re-layout, images
+        swapped in by srcset/picture) runs per breakpoint - navigation, cookie setup and the
+        SPA boot are paid once. Only the width/height changes (no mobile UA/touch emulation).
+
+        Returns:
+            Paths of the captured breakpoints (failed breakpoints are logged and skipped)
+        """
+        paths = []
+        for width, height in viewports:
+            started = time.monotonic()
+            print(f"   📱 Viewport {width}x{height}...")
+            try:
+                await page.set_viewport_size({"width": width, "height": height})
+                await self._wait_until_ready(page, max_wait_ms=self.VIEWPORT_READY_MAX_MS)
+                if full_page:
+                    await self._force_eager_load(page, url, base_url)
+                check = {**final_check, **await self._measure_document(page)}
+                filepath = await self._shoot_page(
+                    page, self._viewport_filepath(base_filepath, width, height), output,
+                    full_page, full_page_mode, check, screenshot_timeout, url, base_url
+                )
+            except Exception as e:
+                print(f"   ⚠️  Viewport {width}x{height} failed: {e}")
+                continue
+            paths.append(str(filepath))
+            print(f"   ✅ Viewport {width}x{height} captured in {(time.monotonic() - started) * 1000:.0f}ms")
+        return paths
+
+    async def _measure_document(self, page: Page) -> dict:
+        """Document height and DPR - what the tiled/native full-page decision needs"""
+        return await page.evaluate("""
+            () => ({
+                documentHeight: Math.max(
+                    document.documentElement.scrollHeight,
+                    document.body ? document.body.scrollHeight : 0
+                ),
+                devicePixelRatio: window.devicePixelRatio || 1
+            })
         """)
-        
-        # Scroll back to top
-        await page.evaluate("window.scrollTo(0, 0)")
-        await asyncio.sleep(0.5)
-    
+
+    async def _capture_routes(
+        self,
+        page: Page,
+        routes: List[str],
+        router_hook: str,
+        output: OutputFormat,
+        full_page: bool,
+        full_page_mode: str,
+        final_check: dict,
+        screenshot_timeout: int,
+        timeout: int,
+        base_url: str = "",
+        words_to_remove: str = "",
+        ready_selector: str = "",
+        progress: Optional[List[RouteCapture]] = None
+    ) -> List[RouteCapture]:
+        """
+        Move the booted app through `routes` client-side and capture each one
+
+        ⚡ OPTIMIZATION: No new context, goto, cookie setup or app boot per URL - only the
+        route change and a route-level readiness wait (settings.spa_route_ready_max_ms).
+        Every finished route is also appended to `progress` right away.
+
+        Returns:
+            One RouteCapture per route (failed routes carry the error; later routes still run)
+        """
+        captures = []
+        for index, route_url in enumerate(routes, start=2):
+            started = time.monotonic()
+            print(f"   🧭 Route {index}/{len(routes) + 1}: {route_url}")
+            try:
+                change = await change_route(page, route_url, router_hook or None, goto_timeout_ms=timeout)
+                print(f"      {'✅' if change.matched else '⚠️ '} {change.describe()}")
+                await self._wait_until_ready(
+                    page, max_wait_ms=settings.spa_route_ready_max_ms, selector=ready_selector
+                )
+                if full_page:
+                    await self._force_eager_load(page, route_url, base_url)
+                filepath = self.output_dir / self._generate_filename(
+                    route_url, base_url, words_to_remove, 1, 1, output.extension
+                )
+                check = {**final_check, **await self._measure_document(page)}
+                filepath = await self._shoot_page(
+                    page, filepath, output, full_page, full_page_mode, check,
+                    screenshot_timeout, route_url, base_url
+                )
+            except Exception as e:
+                print(f"      ❌ Route failed: {e}")
+                captures.append(RouteCapture(url=route_url, error=str(e)))
+                if page.is_closed():
+                    break  # Page crashed - nothing left to route
+                continue
+            captures.append(RouteCapture(url=route_url, path=str(filepath)))
+            if progress is not None:
+                progress.append(captures[-1])
+            print(f"      ✅ Captured in {(time.monotonic() - started) * 1000:.0f}ms: {filepath.name}")
+
+        for route_url in routes[len(captures):]:
+            captures.append(RouteCapture(url=route_url, error="Page closed before this route was captured"))
+        return captures
+
+    def pop_route_captures(self, filepath: str) -> List[RouteCapture]:
+        """Routes captured with capture(routes=...) for its primary path ([] if none)"""
+        return self._route_captures.pop(str(filepath), [])
+
+    def pop_viewport_captures(self, filepath: str) -> List[str]:
+        """
+        Paths of every breakpoint captured with capture(viewports=...) for its primary path
+
+        Returns [filepath] when the capture had no extra viewports.
+        """
+        return self._viewport_captures.pop(str(filepath), [str(filepath)])
+
+    def _wants_tiled_full_page(self, full_page_mode: str, final_check: dict) -> bool:
+        """
+        Decide between page.screenshot(full_page=True) and tiled capture
+
+        "auto" tiles when an inner scroll container holds the content (a native shot would
+        only contain the viewport) or the document is past Chromium's texture limit.
+        """
+        if full_page_mode != "auto":
+            return full_page_mode == "tiled"
+        device_height = final_check.get('documentHeight', 0) * final_check.get('devicePixelRatio', 1)
+        return bool(final_check.get('hasScrollableContainer')) or device_height > CHROMIUM_MAX_TEXTURE
+
+    async def _capture_tiled_full_page(
+        self,
+        page: Page,
+        filepath: Path,
+        screenshot_timeout: int,
+        url: str,
+        base_url: str = ""
+    ) -> bool:
+        """
+        Tiled full-page capture into `filepath` (PNG)
+
+        Returns:
+            True on success, False if the caller should fall back to a native full-page shot
+        """
+        await self._detect_scroll_container(page, url, base_url, min_potential=100)
+        try:
+            result = await capture_tiled(
+                page,
+                filepath,
+                self.image_workers,
+                tile_height=settings.tiled_tile_height,
+                screenshot_timeout=screenshot_timeout,
+                max_height=settings.tiled_max_height,
+            )
+        except Exception as e:
+            print(f"   ⚠️  Tiled capture failed ({e}) - falling back to a native full-page screenshot")
+            return False
+        print(f"   🧩 Tiled full page: {result.describe()}")
+        if settings.tiled_max_height and result.document_height >= settings.tiled_max_height:
+            print(f"   ⚠️  Stopped at tiled_max_height ({settings.tiled_max_height}px)")
+        await self._index_capture(filepath)
+        return True
+
+    async def _force_eager_load(self, page: Page, url: str, base_url: str = "") -> Optional[EagerLoadResult]:
+        """
+        Force lazy-loaded content to load before a full-page screenshot
+
+        ⚡ OPTIMIZATION: Replaces the 100px/100ms auto-scroll crawl (20s for a 20,000px page).
+        Promotes lazy images, fires IntersectionObserver callbacks, makes a few large jumps
+        (window + inner scroll container) and waits only for the resulting image decodes.
+        """
+        try:
+            # Inner scroll container (cached per app) so its lazy content loads too
+            await self._detect_scroll_container(page, url, base_url, min_potential=100)
+            result = await force_eager_load(
+                page,
+                jumps=settings.eager_load_jumps,
+                decode_timeout_ms=settings.eager_load_decode_timeout_ms,
+            )
+            icon = "✅" if not result.decode_timed_out else "⚠️ "
+            print(f"   {icon} Eager load: {result.describe()}")
+            return result
+        except Exception as e:
+            print(f"   ⚠️  Eager lazy-load failed, continuing: {str(e)}")
+            return None
+
     async def capture_segmented(
         self,
         url: str,
@@ -2566,7 +2853,12 @@ class ScreenshotService:
         max_segments: int = 50,
         skip_duplicates: bool = True,
         smart_lazy_load: bool = True,
-        track_network: bool = False  # ✅ NEW: Network event tracking
+        track_network: bool = False,  # ✅ NEW: Network event tracking
+        ready_selector: str = "",  # ⚡ Optional CSS selector that must exist before capturing
+        hash_algorithm: str = DEFAULT_HASH_ALGORITHM,  # ⚡ Perceptual hash for duplicate detection
+        output_format: Optional[OutputFormat] = None,  # ⚡ Encoding on disk (default: PNG)
+        screenshot_engine: str = "playwright",  # ⚡ "playwright" or "cdp" (direct Page.captureScreenshot)
+        stitch: bool = False  # ⚡ Composite the segments into one tall PNG
     ) -> list[str]:
         """
         Capture page in viewport-sized segments (scroll-by-scroll)
@@ -2583,10 +2875,18 @@ class ScreenshotService:
             max_segments: Maximum number of segments to capture
             skip_duplicates: Skip segments that are too similar to previous
             smart_lazy_load: Wait for lazy-loaded content before capturing
+            ready_selector: Optional CSS selector the readiness engine waits for
+            hash_algorithm: Perceptual hash used for duplicate detection ("ahash", "dhash", "phash", "whash")
+            output_format: Output encoding (PNG/JPEG by Chromium, WebP/AVIF re-encoded in the worker pool)
+            screenshot_engine: "playwright" (page.screenshot) or "cdp" (Page.captureScreenshot on a
+                CDPSession; window-scrolled pages are cut from clips without scrolling)
+            stitch: Replace the segment files with one stitched PNG (detected overlap, sticky
+                headers/footers trimmed)
 
         Returns:
             List of paths to saved screenshots
         """
+        output = output_format or DEFAULT_OUTPUT_FORMAT
         print(f"📸 Starting segmented capture for {url}")
         print(f"   Settings: overlap={overlap_percent}%, delay={scroll_delay_ms}ms, max={max_segments}")
         print(f"   🔧 Browser engine: {browser_engine}")
@@ -2615,17 +2915,16 @@ class ScreenshotService:
                 new_tab.on('requestfinished', handlers['log_request_finished'])
                 print(f"   📡 Network listeners attached BEFORE page load")
 
+                # ⚡ Install readiness observers BEFORE navigation
+                await install_readiness_tracker(new_tab)
+
                 # Navigate to the URL in the new tab
                 print(f"🌐 Loading {url} in new tab...")
-                try:
-                    # Try networkidle first (best for fully loaded pages)
-                    await new_tab.goto(url, wait_until='networkidle', timeout=30000)
-                    print("   ✅ Page loaded in new tab (network idle)")
-                except Exception as e:
-                    # If networkidle times out, fall back to load event
-                    print(f"   ⚠️  Network idle timeout, using load event instead...")
-                    await new_tab.goto(url, wait_until='load', timeout=30000)
-                    print("   ✅ Page loaded in new tab (load event)")
+                await new_tab.goto(url, wait_until='load', timeout=30000)
+                print("   ✅ Page loaded in new tab (load event)")
+
+                # ⚡ In-page network quiescence instead of 'networkidle' (ignores beacons/long-poll)
+                await self._wait_for_network_quiet(new_tab, timeout_ms=15000)
 
                 # Print network events captured during page load
                 network_events = handlers['network_events']
@@ -2651,18 +2950,10 @@ class ScreenshotService:
 
                 # Wait for React app to fully render (critical for SPAs like Tekion)
                 print("   ⏳ Waiting for React app to render...")
-                await asyncio.sleep(5.0)  # Increased from 3s to 5s for complex SPAs
-
-                # Try to wait for network to be mostly idle
-                try:
-                    await new_tab.wait_for_load_state('networkidle', timeout=10000)
-                    print("   ✅ Network idle - content loaded")
-                except Exception:
-                    print("   ⚠️  Network still active, but continuing...")
+                await self._wait_until_ready(new_tab, selector=ready_selector)
 
-                # ✅ NEW: Wait for Tekion-specific content to load
-                print("   ⏳ Waiting for dynamic content to load...")
-                await asyncio.sleep(3.0)  # Additional wait for Tekion
+                # Wait for network to be mostly idle (in-page tracker, ignores beacons/long-poll)
+                await self._wait_for_network_quiet(new_tab, timeout_ms=10000)
 
                 # ✅ NEW: Trigger content loading by interacting with the page
                 try:
@@ -2675,7 +2966,7 @@ class ScreenshotService:
                         }
                     }""")
                     print("   🔄 Triggered content loading in workspace")
-                    await asyncio.sleep(2.0)  # Wait for content to load
+                    await self._wait_until_ready(new_tab, max_wait_ms=3000)  # Wait for content to load
                 except Exception as e:
                     print(f"   ⚠️  Could not trigger content loading: {e}")
 
@@ -2727,7 +3018,11 @@ class ScreenshotService:
                     track_network=track_network,  # ✅ Pass network tracking setting from parameter
                     base_url=base_url,  # ✅ FIX: Pass base_url parameter
                     words_to_remove=words_to_remove,  # ✅ FIX: Pass words_to_remove parameter
-                    screenshot_timeout=screenshot_timeout  # ✅ FIX: Pass screenshot_timeout parameter
+                    screenshot_timeout=screenshot_timeout,  # ✅ FIX: Pass screenshot_timeout parameter
+                    hash_algorithm=hash_algorithm,
+                    output_format=output,
+                    screenshot_engine=screenshot_engine,
+                    stitch=stitch
                 )
 
                 # DON'T close the tab - leave it open so user can see the result
@@ -2745,710 +3040,514 @@ class ScreenshotService:
         # ✅ STANDARD MODE: Launch new browser or use existing
         # Get browser (will auto-switch modes if needed)
         # ✅ 2025: Support Camoufox for maximum stealth
-        browser = await self._get_browser(use_real_browser=False, browser_engine=browser_engine, use_stealth=use_stealth)
+        lease = await self._acquire_browser(use_real_browser=False, browser_engine=browser_engine, use_stealth=use_stealth)
+        browser = lease.browser
+        pooled_context = None
+        # ⚡ Per-request cookies/localStorage can't be scrubbed from a context - don't pool those
+        reuse_context = not (cookies or local_storage)
 
-        # ✅ PHASE 3: Use helper method for stealth configuration
-        viewport_width, viewport_height, user_agent, extra_headers = self._get_stealth_config(
-            viewport_width, viewport_height, use_stealth and not use_real_browser
-        )
+        try:
+            # ✅ PHASE 3: Use helper method for auth state loading
+            storage_state = self._load_auth_state(cookies, local_storage)
+            auth_shards = self._auth_shards(storage_state, url)
 
-        # ✅ PHASE 3: Use helper method for auth state loading
-        storage_state = self._load_auth_state(cookies, local_storage)
+            # 🦊 CAMOUFOX FIX: Camoufox returns a BrowserContext directly (persistent_context=True)
+            # For Camoufox, browser IS the context. For Playwright, we need to create a context.
+            # (Use the pooled key - it already falls back to Playwright when Camoufox is unavailable)
+            use_camoufox = (lease.key.engine == "camoufox")
 
-        # 🦊 CAMOUFOX FIX: Camoufox returns a BrowserContext directly (persistent_context=True)
-        # For Camoufox, browser IS the context. For Playwright, we need to create a context.
-        use_camoufox = (browser_engine == "camoufox")
+            print(f"   🔍 DEBUG: Setting up browser context (use_camoufox={use_camoufox}, storage_state={storage_state is not None})")
 
-        print(f"   🔍 DEBUG: Setting up browser context (use_camoufox={use_camoufox}, storage_state={storage_state is not None})")
+            if use_camoufox:
+                # Camoufox: browser IS already a BrowserContext (persistent_context=True)
+                context = browser
+                print(f"   ✅ DEBUG: Using Camoufox persistent context directly!")
+            else:
+                # Playwright: Take a pre-warmed context from the pool (or create a one-off)
+                try:
+                    pooled_context = await self._open_capture_context(
+                        lease, viewport_width, viewport_height,
+                        use_stealth and not use_real_browser, storage_state, reusable=reuse_context,
+                        auth_shards=auth_shards
+                    )
+                    context = pooled_context.context
+                    print(f"   ✅ DEBUG: Playwright context ready!")
+                except Exception as e:
+                    print(f"   ❌ ERROR: Failed to create browser context: {str(e)}")
+                    print(f"   📊 Error type: {type(e).__name__}")
+                    import traceback
+                    traceback.print_exc()
+                    raise
 
-        if use_camoufox:
-            # Camoufox: browser IS already a BrowserContext (persistent_context=True)
-            context = browser
-            print(f"   ✅ DEBUG: Using Camoufox persistent context directly!")
-        else:
-            # Playwright: Create a new context from the browser
+            # Note: Manual stealth JavaScript removed - now using playwright-stealth library
+            # The library handles all stealth techniques automatically and more comprehensively
+
+            # ✅ PHASE 3: Use helper method for cookies and localStorage
+            print(f"   🔍 DEBUG: Applying cookies and localStorage...")
             try:
-                context = await browser.new_context(
-                    viewport={'width': viewport_width, 'height': viewport_height},
-                    user_agent=user_agent,
-                    locale='en-US',
-                    timezone_id='America/New_York',
-                    extra_http_headers=extra_headers,
-                    permissions=['geolocation'] if use_stealth else [],
-                    geolocation={'latitude': 40.7128, 'longitude': -74.0060} if use_stealth else None,
-                    color_scheme='light' if use_stealth else None,
-                    device_scale_factor=1,
-                    has_touch=False,  # Desktop browser
-                    is_mobile=False,  # Not mobile
-                    storage_state=storage_state,  # Load saved auth state if available
-                )
-                print(f"   ✅ DEBUG: Playwright context created successfully!")
+                await self._apply_cookies_and_storage(context, cookies, local_storage)
+                print(f"   ✅ DEBUG: Cookies and localStorage applied!")
             except Exception as e:
-                print(f"   ❌ ERROR: Failed to create browser context: {str(e)}")
+                print(f"   ❌ ERROR: Failed to apply cookies/localStorage: {str(e)}")
                 print(f"   📊 Error type: {type(e).__name__}")
                 import traceback
                 traceback.print_exc()
                 raise
 
-        # Note: Manual stealth JavaScript removed - now using playwright-stealth library
-        # The library handles all stealth techniques automatically and more comprehensively
-
-        # ✅ PHASE 3: Use helper method for cookies and localStorage
-        print(f"   🔍 DEBUG: Applying cookies and localStorage...")
-        try:
-            await self._apply_cookies_and_storage(context, cookies, local_storage)
-            print(f"   ✅ DEBUG: Cookies and localStorage applied!")
-        except Exception as e:
-            print(f"   ❌ ERROR: Failed to apply cookies/localStorage: {str(e)}")
-            print(f"   📊 Error type: {type(e).__name__}")
-            import traceback
-            traceback.print_exc()
-            raise
-
-        print(f"   🔍 DEBUG: Creating new page...")
-        try:
-            page = await context.new_page()
-            print(f"   ✅ DEBUG: Page created successfully!")
-        except Exception as e:
-            print(f"   ❌ ERROR: Failed to create page: {str(e)}")
-            print(f"   📊 Error type: {type(e).__name__}")
-            import traceback
-            traceback.print_exc()
-            raise
-
-        # 🦊 CAMOUFOX FIX: Set viewport size on the page (Camoufox persistent context doesn't support viewport in context creation)
-        if use_camoufox:
-            print(f"   📐 Setting Camoufox viewport to {viewport_width}x{viewport_height}...")
-            try:
-                await page.set_viewport_size({"width": viewport_width, "height": viewport_height})
-                print(f"   ✅ Viewport set successfully!")
-            except Exception as e:
-                print(f"   ⚠️  Failed to set viewport: {str(e)}")
-
-        # ⚡ OPTIMIZATION: Track page count for context reuse
-        self.context_page_count += 1
-
-        # 🦊 CAMOUFOX FIX: Manually inject cookies and localStorage from auth_state.json
-        if use_camoufox and storage_state:
-            print(f"   🦊 Camoufox: Manually injecting auth state...")
+            print(f"   🔍 DEBUG: Creating new page...")
             try:
-                import json
-                with open(storage_state, 'r') as f:
-                    state_data = json.load(f)
-
-                # Inject cookies
-                cookies_to_add = state_data.get('cookies', [])
-                if cookies_to_add:
-                    await context.add_cookies(cookies_to_add)
-                    print(f"      ✅ Injected {len(cookies_to_add)} cookies")
-
-                # Inject localStorage (need to navigate to a page first)
-                # We'll do this after navigation in the cross-domain cookie setup
+                page = await context.new_page()
+                print(f"   ✅ DEBUG: Page created successfully!")
 
+                # ⚡ Install readiness observers BEFORE navigation (replaces fixed sleeps)
+                await install_readiness_tracker(page)
             except Exception as e:
-                print(f"      ⚠️  Failed to inject auth state: {str(e)}")
+                print(f"   ❌ ERROR: Failed to create page: {str(e)}")
+                print(f"   📊 Error type: {type(e).__name__}")
+                import traceback
+                traceback.print_exc()
+                raise
 
-        # Apply stealth mode using playwright-stealth library + 2024-2025 enhancements
-        # ⚡ OPTIMIZATION: Only inject stealth scripts once per browser instance
-        if use_stealth and not use_real_browser:
-            if not self.stealth_injected or not self.ENABLE_BROWSER_REUSE:
-                print("   🥷 Applying playwright-stealth library...")
-                await stealth_async(page)
-                print("   ✅ Stealth mode activated!")
+            # 🦊 CAMOUFOX FIX: Set viewport size on the page (Camoufox persistent context doesn't support viewport in context creation)
+            if use_camoufox:
+                # ✅ PHASE 3: Use helper method for stealth configuration
+                viewport_width, viewport_height, _, _ = self._get_stealth_config(
+                    viewport_width, viewport_height, use_stealth and not use_real_browser
+                )
+                print(f"   📐 Setting Camoufox viewport to {viewport_width}x{viewport_height}...")
+                try:
+                    await page.set_viewport_size({"width": viewport_width, "height": viewport_height})
+                    print(f"   ✅ Viewport set successfully!")
+                except Exception as e:
+                    print(f"   ⚠️  Failed to set viewport: {str(e)}")
 
-                # ========================================
-                # 🎯 9 STEALTH SOLUTIONS - Applied Here
-                # ========================================
-                print("   🚀 Applying 9 stealth solutions (2025)...")
+            # ⚡ OPTIMIZATION: Track page count for context reuse
+            lease.page_count += 1
 
-                # Solution #1: Disable navigator.webdriver (CRITICAL)
-                await self._disable_navigator_webdriver(page)
+            # 🦊 CAMOUFOX FIX: Manually inject cookies and localStorage from auth_state.json
+            if use_camoufox and storage_state:
+                print(f"   🦊 Camoufox: Manually injecting auth state...")
+                try:
+                    auth = auth_states.get(storage_state)
 
-                # Solution #5: Load cookies from previous sessions
-                # ✅ FIX: Only load cookies.json if we didn't already load auth state
-                if not storage_state:
-                    await self._load_cookies(context)
+                    # Inject cookies (only the shards relevant to this URL)
+                    cookies_to_add = auth.playwright_state(auth_shards)["cookies"] if auth is not None else []
+                    if cookies_to_add:
+                        await context.add_cookies(cookies_to_add)
+                        print(f"      ✅ Injected {len(cookies_to_add)} cookies")
 
-                # Apply 2024-2025 stealth enhancements (Phase 1 & 2)
-                await self._apply_canvas_webgl_randomization(page)
-                await self._apply_cdp_detection_bypass(page)
-                await self._apply_audio_context_randomization(page)
-                print("   ✅ All 9 stealth solutions applied!")
+                    # Inject localStorage (need to navigate to a page first)
+                    # We'll do this after navigation in the cross-domain cookie setup
 
-                # ⚡ OPTIMIZATION: Mark stealth as injected
-                self.stealth_injected = True
-            else:
-                print("   ⚡ Stealth already injected - reusing browser context!")
+                except Exception as e:
+                    print(f"      ⚠️  Failed to inject auth state: {str(e)}")
 
-        try:
-            # 🔧 CROSS-DOMAIN COOKIE SETUP: If auth state was loaded, set up cookies for all domains
-            if storage_state:
-                await self._setup_cross_domain_cookies(context, storage_state)
+            # Apply stealth mode using playwright-stealth library + 2024-2025 enhancements
+            # ⚡ OPTIMIZATION: Only inject stealth scripts once per browser instance
+            if use_stealth and not use_real_browser:
+                if not lease.stealth_injected or not self.ENABLE_BROWSER_REUSE:
+                    print("   🥷 Applying playwright-stealth library...")
+                    await stealth_async(page)
+                    print("   ✅ Stealth mode activated!")
 
-            # 🔍 DEBUG: Show which cookies will be sent to the target URL
-            await self._debug_cookies_before_navigation(context, url)
+                    # ========================================
+                    # 🎯 9 STEALTH SOLUTIONS - Applied Here
+                    # ========================================
+                    print("   🚀 Applying 9 stealth solutions (2025)...")
 
-            # 🔍 DEBUG: Add request/response logging
-            async def log_request(request):
-                headers = await request.all_headers()
-                cookie_header = headers.get('cookie', 'NO COOKIES')
-                print(f"   📤 REQUEST: {request.method} {request.url}")
-                print(f"      🍪 Cookie header: {cookie_header[:200]}...")
+                    # Solution #1: Disable navigator.webdriver (CRITICAL)
+                    await self._disable_navigator_webdriver(page)
 
-            async def log_response(response):
-                print(f"   📥 RESPONSE: {response.status} {response.url}")
-                if response.status >= 300 and response.status < 400:
-                    location = response.headers.get('location', 'N/A')
-                    print(f"      🔀 Redirect to: {location}")
+                    # Solution #5: Load cookies from previous sessions
+                    # ✅ FIX: Only load cookies.json if we didn't already load auth state
+                    if not storage_state:
+                        await self._load_cookies(context)
 
-            page.on('request', log_request)
-            page.on('response', log_response)
+                    # Apply 2024-2025 stealth enhancements (Phase 1 & 2)
+                    await self._apply_canvas_webgl_randomization(page)
+                    await self._apply_cdp_detection_bypass(page)
+                    await self._apply_audio_context_randomization(page)
+                    print("   ✅ All 9 stealth solutions applied!")
 
-            # Navigate to page
-            from datetime import datetime
-            print(f"🌐 [{datetime.now().strftime('%H:%M:%S')}] Opening tab for segmented capture: {url}")
-            try:
-                await page.goto(url, wait_until='domcontentloaded', timeout=30000)  # Reduced to 30s
-                print(f"   ✅ [{datetime.now().strftime('%H:%M:%S')}] Page navigation complete")
-            except Exception as nav_error:
-                print(f"   ⚠️  Navigation error: {nav_error}")
-                # Try to continue anyway - page might have partially loaded
+                    # ⚡ OPTIMIZATION: Mark stealth as injected
+                    lease.stealth_injected = True
+                else:
+                    print("   ⚡ Stealth already injected - reusing browser context!")
 
-            await asyncio.sleep(2.0)
+            try:
+                # 🔧 CROSS-DOMAIN COOKIE SETUP: If auth state was loaded, set up cookies for all domains
+                if storage_state:
+                    await self._setup_cross_domain_cookies(context, storage_state, auth_shards)
+
+                # 🔍 DEBUG: Show which cookies will be sent to the target URL
+                await self._debug_cookies_before_navigation(context, url)
+
+                # 🔍 DEBUG: Add request/response logging
+                async def log_request(request):
+                    headers = await request.all_headers()
+                    cookie_header = headers.get('cookie', 'NO COOKIES')
+                    print(f"   📤 REQUEST: {request.method} {request.url}")
+                    print(f"      🍪 Cookie header: {cookie_header[:200]}...")
+
+                async def log_response(response):
+                    print(f"   📥 RESPONSE: {response.status} {response.url}")
+                    if response.status >= 300 and response.status < 400:
+                        location = response.headers.get('location', 'N/A')
+                        print(f"      🔀 Redirect to: {location}")
+
+                page.on('request', log_request)
+                page.on('response', log_response)
+
+                # Navigate to page
+                from datetime import datetime
+                print(f"🌐 [{datetime.now().strftime('%H:%M:%S')}] Opening tab for segmented capture: {url}")
+                try:
+                    await page.goto(url, wait_until='domcontentloaded', timeout=30000)  # Reduced to 30s
+                    print(f"   ✅ [{datetime.now().strftime('%H:%M:%S')}] Page navigation complete")
+                except Exception as nav_error:
+                    print(f"   ⚠️  Navigation error: {nav_error}")
+                    # Try to continue anyway - page might have partially loaded
             
-            # 🔍 DEBUG: Show final URL and cookies after navigation
-            final_url = page.url
-            print(f"   🔗 Final URL after navigation: {final_url}")
+                # 🔍 DEBUG: Show final URL and cookies after navigation
+                final_url = page.url
+                print(f"   🔗 Final URL after navigation: {final_url}")
             
-            # Check if we got redirected to login
-            if '/login' in final_url.lower():
-                print(f"   ⚠️  WARNING: Redirected to login page!")
-                print(f"   💡 This means authentication failed - cookies may be invalid/expired")
+                # Check if we got redirected to login
+                if '/login' in final_url.lower():
+                    print(f"   ⚠️  WARNING: Redirected to login page!")
+                    print(f"   💡 This means authentication failed - cookies may be invalid/expired")
             
-            # Show cookies that are now active
-            try:
-                active_cookies = await context.cookies()
-                auth_cookies = [c for c in active_cookies if any(keyword in c['name'].lower() 
-                               for keyword in ['token', 'session', 'auth', 'sid', 'jsession'])]
-                print(f"   🍪 Active cookies after navigation: {len(active_cookies)} total, {len(auth_cookies)} auth")
-                if auth_cookies:
-                    print(f"      🔑 Auth cookies: {', '.join([c['name'] for c in auth_cookies[:5]])}")
-            except Exception as e:
-                print(f"   ⚠️  Could not check active cookies: {str(e)}")
+                # Show cookies that are now active
+                try:
+                    active_cookies = await context.cookies()
+                    auth_cookies = [c for c in active_cookies if any(keyword in c['name'].lower() 
+                                   for keyword in ['token', 'session', 'auth', 'sid', 'jsession'])]
+                    print(f"   🍪 Active cookies after navigation: {len(active_cookies)} total, {len(auth_cookies)} auth")
+                    if auth_cookies:
+                        print(f"      🔑 Auth cookies: {', '.join([c['name'] for c in auth_cookies[:5]])}")
+                except Exception as e:
+                    print(f"   ⚠️  Could not check active cookies: {str(e)}")
 
-            # Check for Cloudflare (same as regular capture)
-            try:
-                cloudflare_present = await page.evaluate("""
-                    () => {
-                        try {
-                            const title = document.title.toLowerCase();
-                            const body = document.body ? document.body.innerText.toLowerCase() : '';
-                            return title.includes('just a moment') ||
-                                   body.includes('checking your browser') ||
-                                   body.includes('cloudflare');
-                        } catch (e) {
-                            return false;
+                # Check for Cloudflare (same as regular capture)
+                try:
+                    cloudflare_present = await page.evaluate("""
+                        () => {
+                            try {
+                                const title = document.title.toLowerCase();
+                                const body = document.body ? document.body.innerText.toLowerCase() : '';
+                                return title.includes('just a moment') ||
+                                       body.includes('checking your browser') ||
+                                       body.includes('cloudflare');
+                            } catch (e) {
+                                return false;
+                            }
                         }
-                    }
-                """)
-            except Exception:
-                cloudflare_present = False
-
-            if cloudflare_present:
-                print("🛡️ Cloudflare challenge detected, waiting...")
-                await asyncio.sleep(8.0)
+                    """)
+                except Exception:
+                    cloudflare_present = False
 
-            # 🆕 IMPROVEMENT: Detect and log browser mode for diagnostics
-            try:
-                mode_info = await self._detect_browser_mode(page)
-                mode_str = "Headless" if mode_info['isHeadless'] else "Headful"
-                automation_str = "⚠️ DETECTED" if mode_info['hasAutomationSignals'] else "✅ HIDDEN"
-                print(f"   🔍 Browser Mode: {mode_str}, Automation Signals: {automation_str}")
-                print(f"      Viewport: {mode_info['viewport']['width']}x{mode_info['viewport']['height']}, Plugins: {mode_info['indicators']['plugins']}, Languages: {mode_info['indicators']['languages']}")
-            except Exception as e:
-                print(f"   ⚠️  Could not detect browser mode: {e}")
+                if cloudflare_present:
+                    print("🛡️ Cloudflare challenge detected, waiting...")
+                    await self._wait_for_cloudflare_clearance(page)
 
-            # ========================================
-            # 🎯 9 STEALTH SOLUTIONS - Human Behavior
-            # ========================================
-            if use_stealth and not use_real_browser:
+                # 🆕 IMPROVEMENT: Detect and log browser mode for diagnostics
                 try:
-                    # Add timeout to human behavior simulation (max 30 seconds)
-                    await asyncio.wait_for(
-                        self._simulate_human_behavior(page, use_stealth=True),
-                        timeout=30.0
-                    )
-                except asyncio.TimeoutError:
-                    print("   ⚠️  Human behavior simulation timed out (30s), continuing...")
-                except Exception as sim_error:
-                    print(f"   ⚠️  Human behavior simulation error: {sim_error}")
-
-            # Debug: Check what's actually on the page
-            try:
-                page_info = await page.evaluate("""
-                    () => {
-                        return {
-                            url: window.location.href,
-                            title: document.title,
-                            bodyText: document.body ? document.body.innerText.substring(0, 500) : 'NO BODY',
-                            hasOktaLogin: document.body ? document.body.innerText.includes('Sign In') || document.body.innerText.includes('Okta') : false,
-                            hasError: document.body ? document.body.innerText.includes('error') || document.body.innerText.includes('Error') : false
-                        };
-                    }
-                """)
-                print(f"   📄 Page loaded: {page_info['title']}")
-                print(f"   🔗 Current URL: {page_info['url']}")
-                if page_info['hasOktaLogin']:
-                    print(f"   ⚠️  WARNING: Okta login page detected! Auth state may have been rejected.")
-                    print(f"   💡 TIP: Try using Real Browser Mode instead.")
-                if page_info['hasError']:
-                    print(f"   ⚠️  WARNING: Error text detected on page!")
-                    print(f"   📝 Page content preview: {page_info['bodyText'][:200]}")
-            except Exception as e:
-                print(f"   ⚠️  Could not check page content: {str(e)}")
-
-            # Wait for React app to render (critical for SPAs like Tekion)
-            print("   ⏳ Waiting for React app to render...")
-            await asyncio.sleep(5.0)  # Give React time to render
-            print("   ✅ Initial render wait complete")
-
-            # Wait for network to be mostly idle
-            try:
-                await page.wait_for_load_state('networkidle', timeout=10000)
-                print("   ✅ Network idle - content loaded")
-            except Exception as e:
-                print(f"   ⚠️  Network still active: {str(e)}, but continuing...")
-
-            # Check if page has actual content now
-            try:
-                content_check = await page.evaluate("""
-                    () => {
-                        const bodyText = document.body ? document.body.innerText : '';
-                        const hasContent = bodyText.length > 100;
-                        const visibleElements = document.querySelectorAll('*').length;
-                        const images = document.querySelectorAll('img').length;
-                        const divs = document.querySelectorAll('div').length;
-                        return {
-                            textLength: bodyText.length,
-                            hasContent: hasContent,
-                            visibleElements: visibleElements,
-                            images: images,
-                            divs: divs,
-                            bodyPreview: bodyText.substring(0, 200)
-                        };
-                    }
-                """)
-                print(f"   📊 Content check: {content_check['textLength']} chars, {content_check['visibleElements']} elements, {content_check['divs']} divs, {content_check['images']} images")
-                if not content_check['hasContent']:
-                    print(f"   ⚠️  WARNING: Page has very little text content!")
-                    print(f"   📝 Body preview: {content_check['bodyPreview']}")
-                else:
-                    print(f"   ✅ Page has substantial content")
-            except Exception as e:
-                print(f"   ⚠️  Could not check content: {str(e)}")
-
-            # Additional wait for any lazy-loaded content
-            await asyncio.sleep(2.0)
-            print("   ✅ Final wait complete, ready to capture")
-
-            # 🎯 DYNAMIC PAGE HEIGHT CALCULATION - Find ALL scrollable content
-            # ✅ REAL-WORLD BEST PRACTICES: Based on browser scroll detection standards
-            height_info = await page.evaluate("""() => {
-                console.log('🔍 DEBUG: Starting page height calculation...');
-
-                // 1. Get document height
-                const docHeight = Math.max(
-                    document.body.scrollHeight,
-                    document.body.offsetHeight,
-                    document.documentElement.clientHeight,
-                    document.documentElement.scrollHeight,
-                    document.documentElement.offsetHeight
-                );
-                console.log('📄 Document height:', docHeight);
-
-                // 🆕 IMPROVEMENT 1: Helper function to check if element is truly scrollable
-                function isElementScrollable(el) {
-                    const style = window.getComputedStyle(el);
-                    const hasVerticalScroll = (
-                        style.overflow === 'auto' ||
-                        style.overflow === 'scroll' ||
-                        style.overflowY === 'auto' ||
-                        style.overflowY === 'scroll'
-                    );
-                    const hasScrollableContent = el.scrollHeight > el.clientHeight;
-
-                    // 🆕 IMPROVEMENT 2: Check if element is visible (not display:none or visibility:hidden)
-                    const isVisible = (
-                        style.display !== 'none' &&
-                        style.visibility !== 'hidden' &&
-                        el.offsetParent !== null  // Element is rendered
-                    );
-
-                    // 🆕 IMPROVEMENT 3: Calculate scroll potential (how much can be scrolled)
-                    const scrollPotential = el.scrollHeight - el.clientHeight;
+                    mode_info = await self._detect_browser_mode(page)
+                    mode_str = "Headless" if mode_info['isHeadless'] else "Headful"
+                    automation_str = "⚠️ DETECTED" if mode_info['hasAutomationSignals'] else "✅ HIDDEN"
+                    print(f"   🔍 Browser Mode: {mode_str}, Automation Signals: {automation_str}")
+                    print(f"      Viewport: {mode_info['viewport']['width']}x{mode_info['viewport']['height']}, Plugins: {mode_info['indicators']['plugins']}, Languages: {mode_info['indicators']['languages']}")
+                except Exception as e:
+                    print(f"   ⚠️  Could not detect browser mode: {e}")
 
-                    return {
-                        isScrollable: hasVerticalScroll && hasScrollableContent && isVisible,
-                        scrollPotential: scrollPotential,
-                        scrollHeight: el.scrollHeight,
-                        clientHeight: el.clientHeight
-                    };
-                }
+                # ========================================
+                # 🎯 9 STEALTH SOLUTIONS - Human Behavior
+                # ========================================
+                if use_stealth and not use_real_browser:
+                    try:
+                        # Add timeout to human behavior simulation (max 30 seconds)
+                        await asyncio.wait_for(
+                            self._simulate_human_behavior(page, use_stealth=True),
+                            timeout=30.0
+                        )
+                    except asyncio.TimeoutError:
+                        print("   ⚠️  Human behavior simulation timed out (30s), continuing...")
+                    except Exception as sim_error:
+                        print(f"   ⚠️  Human behavior simulation error: {sim_error}")
 
-                // 2. Find ALL potentially scrollable containers
-                const scrollableSelectors = [
-                    'main', '[role="main"]', '.main-content', '#main', '#content',
-                    '.content', '.page-content', '.app-content', '[class*="content"]',
-                    '[class*="scroll"]', '[style*="overflow"]', 'article', 'section',
-                    'div'  // 🆕 IMPROVEMENT 4: Also check all divs (common scrollable container)
-                ];
-
-                let maxScrollHeight = docHeight;
-                let scrollableContainer = null;
-                let scrollableElement = null;
-                let allScrollableContainers = [];
-
-                console.log('🔍 Searching for scrollable containers...');
-
-                // 🆕 IMPROVEMENT 5: Prioritize by scroll potential (largest scrollable area first)
-                const candidates = [];
-
-                for (const selector of scrollableSelectors) {
-                    const elements = document.querySelectorAll(selector);
-
-                    elements.forEach((el) => {
-                        const scrollInfo = isElementScrollable(el);
-
-                        if (scrollInfo.isScrollable && scrollInfo.scrollPotential > 100) {  // 🆕 Min 100px scroll
-                            candidates.push({
-                                element: el,
-                                tag: el.tagName,
-                                className: el.className,
-                                id: el.id,
-                                scrollHeight: scrollInfo.scrollHeight,
-                                clientHeight: scrollInfo.clientHeight,
-                                scrollPotential: scrollInfo.scrollPotential,
-                                selector: selector
-                            });
+                # Debug: Check what's actually on the page
+                try:
+                    page_info = await page.evaluate("""
+                        () => {
+                            return {
+                                url: window.location.href,
+                                title: document.title,
+                                bodyText: document.body ? document.body.innerText.substring(0, 500) : 'NO BODY',
+                                hasOktaLogin: document.body ? document.body.innerText.includes('Sign In') || document.body.innerText.includes('Okta') : false,
+                                hasError: document.body ? document.body.innerText.includes('error') || document.body.innerText.includes('Error') : false
+                            };
                         }
-                    });
-                }
-
-                // 🆕 IMPROVEMENT 6: Sort by scroll potential (largest first)
-                candidates.sort((a, b) => b.scrollPotential - a.scrollPotential);
-
-                console.log(`📦 Found ${candidates.length} scrollable candidates`);
-
-                // 🆕 IMPROVEMENT 7: Pick the best scrollable element (largest scroll potential)
-                if (candidates.length > 0) {
-                    const best = candidates[0];
-                    scrollableElement = best.element;
-                    maxScrollHeight = best.scrollHeight;
-                    scrollableContainer = {
-                        tag: best.tag,
-                        className: best.className,
-                        id: best.id,
-                        scrollHeight: best.scrollHeight,
-                        clientHeight: best.clientHeight,
-                        scrollPotential: best.scrollPotential,
-                        selector: best.selector
-                    };
-
-                    console.log(`✅ BEST scrollable: <${best.tag}> (${best.scrollPotential}px potential)`);
-
-                    // Store top 5 for debugging
-                    allScrollableContainers = candidates.slice(0, 5).map(c => ({
-                        tag: c.tag,
-                        className: c.className,
-                        id: c.id,
-                        scrollHeight: c.scrollHeight,
-                        clientHeight: c.clientHeight,
-                        scrollPotential: c.scrollPotential,
-                        selector: c.selector
-                    }));
-                }
-
-                // 3. Also check for elements with large offsetHeight (fallback)
-                const allElements = document.querySelectorAll('*');
-                let maxOffsetHeight = docHeight;
-                let maxOffsetElement = null;
-
-                allElements.forEach(el => {
-                    if (el.offsetHeight > maxOffsetHeight) {
-                        maxOffsetHeight = el.offsetHeight;
-                        maxOffsetElement = {
-                            tag: el.tagName,
-                            className: el.className,
-                            id: el.id,
-                            offsetHeight: el.offsetHeight
-                        };
-                    }
-                });
-
-                const finalHeight = Math.max(docHeight, maxScrollHeight, maxOffsetHeight);
-                console.log('✅ Final height:', finalHeight);
-
-                // ✅ Store scrollable element in window for later use
-                if (scrollableElement) {
-                    window.__scrollableElement = scrollableElement;
-                    console.log('✅ Stored scrollable element in window.__scrollableElement');
-                } else {
-                    window.__scrollableElement = null;
-                    console.log('⚠️  No scrollable element found, will use window.scrollTo()');
-                }
+                    """)
+                    print(f"   📄 Page loaded: {page_info['title']}")
+                    print(f"   🔗 Current URL: {page_info['url']}")
+                    if page_info['hasOktaLogin']:
+                        print(f"   ⚠️  WARNING: Okta login page detected! Auth state may have been rejected.")
+                        print(f"   💡 TIP: Try using Real Browser Mode instead.")
+                    if page_info['hasError']:
+                        print(f"   ⚠️  WARNING: Error text detected on page!")
+                        print(f"   📝 Page content preview: {page_info['bodyText'][:200]}")
+                except Exception as e:
+                    print(f"   ⚠️  Could not check page content: {str(e)}")
 
-                return {
-                    docHeight: docHeight,
-                    maxScrollHeight: maxScrollHeight,
-                    maxOffsetHeight: maxOffsetHeight,
-                    finalHeight: finalHeight,
-                    scrollableContainer: scrollableContainer,
-                    allScrollableContainers: allScrollableContainers,
-                    maxOffsetElement: maxOffsetElement,
-                    hasScrollableElement: scrollableElement !== null
-                };
-            }""")
+                # Wait for React app to render (critical for SPAs like Tekion)
+                print("   ⏳ Waiting for React app to render...")
+                await self._wait_until_ready(page, selector=ready_selector)
 
-            total_height = height_info['finalHeight']
-            has_scrollable_element = height_info.get('hasScrollableElement', False)
-
-            print(f"📏 Dynamic page height calculation:")
-            print(f"   📄 Document height: {height_info['docHeight']}px")
-            print(f"   📦 Max scrollable container: {height_info['maxScrollHeight']}px")
-            print(f"   📐 Max element offset: {height_info['maxOffsetHeight']}px")
-            print(f"   ✅ Final height: {total_height}px")
-            print(f"   🎯 Scroll target: {'ELEMENT' if has_scrollable_element else 'WINDOW'}")
-
-            if height_info.get('allScrollableContainers'):
-                print(f"   🔍 Found {len(height_info['allScrollableContainers'])} scrollable containers (sorted by scroll potential):")
-                for sc in height_info['allScrollableContainers'][:5]:  # Show top 5
-                    scroll_potential = sc.get('scrollPotential', sc['scrollHeight'] - sc['clientHeight'])
-                    print(f"      - <{sc['tag']}> class='{sc['className'][:30]}...' ({scroll_potential}px potential, {sc['scrollHeight']}px total)"[:120])
-
-            if height_info['scrollableContainer']:
-                sc = height_info['scrollableContainer']
-                scroll_potential = sc.get('scrollPotential', sc['scrollHeight'] - sc['clientHeight'])
-                print(f"   ✅ BEST scrollable: <{sc['tag']}> class='{sc['className'][:30]}...' ({scroll_potential}px potential, {sc['scrollHeight']}px total)")
-
-            if height_info.get('maxOffsetElement'):
-                el = height_info['maxOffsetElement']
-                print(f"   📐 Max offset element: <{el['tag']}> class='{el['className']}' id='{el['id']}' ({el['offsetHeight']}px)")
-
-            # ✅ CRITICAL: Get actual viewport height (what's visible on screen)
-            # 🆕 IMPROVEMENT: Also detect if we're in headless mode for better diagnostics
-            viewport_diagnostics = await page.evaluate("""() => {
-                const isHeadless = (
-                    navigator.webdriver === true ||
-                    /HeadlessChrome/.test(navigator.userAgent) ||
-                    navigator.plugins.length === 0
-                );
+                # Wait for network to be mostly idle (in-page tracker, ignores beacons/long-poll)
+                await self._wait_for_network_quiet(page, timeout_ms=10000)
 
-                return {
-                    innerHeight: window.innerHeight,
-                    clientHeight: document.documentElement.clientHeight,
-                    actualHeight: Math.max(window.innerHeight, document.documentElement.clientHeight),
-                    isHeadless: isHeadless,
-                    userAgent: navigator.userAgent.substring(0, 50) + '...',
-                    pluginCount: navigator.plugins.length
-                };
-            }""")
-            actual_viewport_height = viewport_diagnostics['actualHeight']
-            print(f"📐 Actual viewport height: {actual_viewport_height}px")
-            print(f"   🔍 Mode: {'Headless' if viewport_diagnostics['isHeadless'] else 'Headful'}, Plugins: {viewport_diagnostics['pluginCount']}")
-
-            # Calculate scroll step (with overlap) using ACTUAL viewport height
-            scroll_step = int(actual_viewport_height * (1 - overlap_percent / 100))
-            estimated_segments = min(max_segments, (total_height // scroll_step) + 1)
-            print(f"📊 Estimated segments: {estimated_segments} (scroll step: {scroll_step}px, overlap: {overlap_percent}%)")
-
-            # Capture segments
-            screenshot_paths = []
-            position = 0
-            segment_index = 1
-            previous_hash = None
-            previous_scroll_position = None  # ✅ NEW: Track previous scroll position for duplicate detection
-
-            while position < total_height and segment_index <= max_segments:
-                # ✅ FIX: Check if there are remaining pixels to capture
-                remaining_pixels = total_height - position
-
-                # ✅ CRITICAL: Use actual_viewport_height (what's visible), not viewport_height (browser parameter)
-                # If remaining pixels are less than actual viewport, we need one more segment to capture them
-                needs_final_segment = remaining_pixels > 0 and remaining_pixels < actual_viewport_height
-
-                # ✅ FIX: For the last segment, scroll to the bottom to ensure we capture everything
-                is_last_segment = needs_final_segment or (position + actual_viewport_height >= total_height)
-
-                if is_last_segment:
-                    # Scroll to bottom (total_height - actual_viewport_height) to capture the last viewport
-                    final_position = max(0, total_height - actual_viewport_height)
-                    print(f"   📍 Last segment: scrolling to {final_position}px (bottom of page, remaining: {remaining_pixels}px, actual viewport: {actual_viewport_height}px)")
-                else:
-                    final_position = position
-
-                # ✅ REAL-WORLD SCROLL: Scroll the correct element with smooth scroll detection
-                print(f"   🔄 Scrolling to {final_position}px (has_scrollable_element={has_scrollable_element})...")
-
-                if has_scrollable_element:
-                    # 🆕 IMPROVEMENT: Scroll element and wait for scroll to settle
-                    scroll_result = await page.evaluate(f"""
-                        if (window.__scrollableElement) {{
-                            const el = window.__scrollableElement;
-                            const beforeScroll = el.scrollTop;
-
-                            // Disable smooth scroll temporarily for instant positioning
-                            const originalBehavior = el.style.scrollBehavior;
-                            el.style.scrollBehavior = 'auto';
-
-                            // Scroll to position
-                            el.scrollTop = {final_position};
-
-                            // Restore original scroll behavior
-                            el.style.scrollBehavior = originalBehavior;
-
-                            const afterScroll = el.scrollTop;
-
-                            console.log('✅ Scrolled element from', beforeScroll, 'to', afterScroll, 'px (target:', {final_position}, 'px)');
-
-                            return {{
-                                success: true,
-                                before: beforeScroll,
-                                after: afterScroll,
-                                target: {final_position},
-                                elementFound: true
-                            }};
-                        }} else {{
-                            console.error('❌ ERROR: __scrollableElement not found!');
-                            window.scrollTo({{top: {final_position}, behavior: 'auto'}});
-                            return {{
-                                success: false,
-                                elementFound: false,
-                                target: {final_position}
-                            }};
-                        }}
+                # Check if page has actual content now
+                try:
+                    content_check = await page.evaluate("""
+                        () => {
+                            const bodyText = document.body ? document.body.innerText : '';
+                            const hasContent = bodyText.length > 100;
+                            const visibleElements = document.querySelectorAll('*').length;
+                            const images = document.querySelectorAll('img').length;
+                            const divs = document.querySelectorAll('div').length;
+                            return {
+                                textLength: bodyText.length,
+                                hasContent: hasContent,
+                                visibleElements: visibleElements,
+                                images: images,
+                                divs: divs,
+                                bodyPreview: bodyText.substring(0, 200)
+                            };
+                        }
                     """)
-                    print(f"   📊 Scroll result: {scroll_result}")
-                else:
-                    # 🆕 IMPROVEMENT: Scroll window with instant positioning (no smooth scroll)
-                    await page.evaluate(f"window.scrollTo({{top: {final_position}, behavior: 'auto'}})")
-                    print(f"   📊 Scrolled window to {final_position}px")
-
-                # 🆕 IMPROVEMENT: Wait for scroll to settle and content to render
-                await asyncio.sleep(0.1)  # Short wait for scroll to complete
-
-                # 🆕 IMPROVEMENT: Verify scroll position reached
-                actual_scroll = await page.evaluate("""
-                    window.__scrollableElement
-                        ? window.__scrollableElement.scrollTop
-                        : window.pageYOffset || document.documentElement.scrollTop
-                """)
+                    print(f"   📊 Content check: {content_check['textLength']} chars, {content_check['visibleElements']} elements, {content_check['divs']} divs, {content_check['images']} images")
+                    if not content_check['hasContent']:
+                        print(f"   ⚠️  WARNING: Page has very little text content!")
+                        print(f"   📝 Body preview: {content_check['bodyPreview']}")
+                    else:
+                        print(f"   ✅ Page has substantial content")
+                except Exception as e:
+                    print(f"   ⚠️  Could not check content: {str(e)}")
 
-                print(f"   ✅ Verified scroll position: {actual_scroll}px (target: {final_position}px)")
+                print("   ✅ Ready to capture")
+
+                # 🎯 DYNAMIC PAGE HEIGHT CALCULATION - Find the scroll container
+                # ⚡ OPTIMIZATION: Probe elementFromPoint ancestor chains instead of running
+                # getComputedStyle over every element (cached per base_url / URL pattern)
+                container = await self._detect_scroll_container(page, url, base_url, min_potential=100)
+
+                total_height = max(container.doc_height, container.scroll_height, container.max_offset_height)
+                has_scrollable_element = container.found
+
+                print(f"📏 Dynamic page height calculation:")
+                print(f"   📄 Document height: {container.doc_height}px")
+                print(f"   📦 Max scrollable container: {container.scroll_height}px")
+                print(f"   📐 Max element offset: {container.max_offset_height}px")
+                print(f"   ✅ Final height: {total_height}px")
+                print(f"   🎯 Scroll target: {'ELEMENT' if has_scrollable_element else 'WINDOW'}")
+
+                if len(container.candidates) > 1:
+                    print(f"   🔍 Found {len(container.candidates)} scrollable containers (sorted by scroll potential):")
+                    for sc in container.candidates[:5]:  # Show top 5
+                        print(f"      - <{sc['tag']}> class='{sc['className'][:30]}...' ({sc['scrollPotential']}px potential, {sc['scrollHeight']}px total)"[:120])
+
+                if container.found:
+                    print(f"   ✅ BEST scrollable: <{container.tag}> class='{container.class_name[:30]}...' ({container.scroll_potential}px potential, {container.scroll_height}px total)")
+
+                # ✅ CRITICAL: Get actual viewport height (what's visible on screen)
+                # 🆕 IMPROVEMENT: Also detect if we're in headless mode for better diagnostics
+                viewport_diagnostics = await page.evaluate("""() => {
+                    const isHeadless = (
+                        navigator.webdriver === true ||
+                        /HeadlessChrome/.test(navigator.userAgent) ||
+                        navigator.plugins.length === 0
+                    );
 
-                if abs(actual_scroll - final_position) > 10:  # Allow 10px tolerance
-                    print(f"   ⚠️  Scroll position mismatch: expected {final_position}px, got {actual_scroll}px")
+                    return {
+                        innerHeight: window.innerHeight,
+                        clientHeight: document.documentElement.clientHeight,
+                        actualHeight: Math.max(window.innerHeight, document.documentElement.clientHeight),
+                        isHeadless: isHeadless,
+                        userAgent: navigator.userAgent.substring(0, 50) + '...',
+                        pluginCount: navigator.plugins.length
+                    };
+                }""")
+                actual_viewport_height = viewport_diagnostics['actualHeight']
+                print(f"📐 Actual viewport height: {actual_viewport_height}px")
+                print(f"   🔍 Mode: {'Headless' if viewport_diagnostics['isHeadless'] else 'Headful'}, Plugins: {viewport_diagnostics['pluginCount']}")
+
+                # Calculate scroll step (with overlap) using ACTUAL viewport height
+                scroll_step = int(actual_viewport_height * (1 - overlap_percent / 100))
+                estimated_segments = min(max_segments, (total_height // scroll_step) + 1)
+                print(f"📊 Estimated segments: {estimated_segments} (scroll step: {scroll_step}px, overlap: {overlap_percent}%)")
+
+                # Capture segments
+                screenshot_paths = []
+                save_tasks: List[asyncio.Task] = []  # ⚡ Segment writes/encodes run while the next segment is captured
+                position = 0
+                segment_index = 1
+                previous_hash = None
+                previous_scroll_position = None  # ✅ NEW: Track previous scroll position for duplicate detection
+
+                # ⚡ Install the in-page segment helper once (scrolls the cached container if any)
+                await install_segment_scroller(page)
+
+                # ⚡ Screenshot engine (direct CDP: window-scrolled pages are cut from clips, no scrolling)
+                shooter, clip_width = await self._open_segment_engine(page, screenshot_engine, has_scrollable_element)
+                if clip_width and smart_lazy_load:
+                    await self._force_eager_load(page, url, base_url)  # Nothing scrolls lazy content into view
+                capture_ms = 0.0
+
+                while position < total_height and segment_index <= max_segments:
+                    # ✅ FIX: Check if there are remaining pixels to capture
+                    remaining_pixels = total_height - position
+
+                    # ✅ CRITICAL: Use actual_viewport_height (what's visible), not viewport_height (browser parameter)
+                    # If remaining pixels are less than actual viewport, we need one more segment to capture them
+                    needs_final_segment = remaining_pixels > 0 and remaining_pixels < actual_viewport_height
+
+                    # ✅ FIX: For the last segment, scroll to the bottom to ensure we capture everything
+                    is_last_segment = needs_final_segment or (position + actual_viewport_height >= total_height)
+
+                    if is_last_segment:
+                        # Scroll to bottom (total_height - actual_viewport_height) to capture the last viewport
+                        final_position = max(0, total_height - actual_viewport_height)
+                        print(f"   📍 Last segment: scrolling to {final_position}px (bottom of page, remaining: {remaining_pixels}px, actual viewport: {actual_viewport_height}px)")
+                    else:
+                        final_position = position
 
-                # Wait for content to load after scroll
-                await asyncio.sleep(scroll_delay_ms / 1000.0)
+                    # ⚡ OPTIMIZATION: Scroll, verify, wait and measure in ONE page.evaluate() round trip
+                    if clip_width:
+                        # ⚡ No scrolling - the segment is rendered from a document clip
+                        step = SegmentStep(final_position, final_position, total_height, actual_viewport_height)
+                    else:
+                        print(f"   🔄 Scrolling to {final_position}px (has_scrollable_element={has_scrollable_element})...")
+                        step = await self._position_segment(page, final_position, scroll_delay_ms, smart_lazy_load)
+                    actual_scroll = step.scroll_top
 
-                # Smart lazy-load detection
-                if smart_lazy_load:
-                    await self._wait_for_lazy_load(page)
+                    print(f"   ✅ Verified scroll position: {actual_scroll}px (target: {final_position}px, {step.elapsed_ms}ms)")
 
-                # Generate filename based on base URL logic
-                filename = self._generate_filename(url, base_url, words_to_remove, segment_index, estimated_segments)
-                filepath = self.output_dir / filename
+                    if not step.reached():  # Allow 10px tolerance
+                        print(f"   ⚠️  Scroll position mismatch: expected {final_position}px, got {actual_scroll}px")
 
-                # Debug: Check viewport state before capture
-                if segment_index == 1:  # Only log for first segment to avoid spam
-                    try:
-                        viewport_check = await page.evaluate("""
-                            () => {
-                                return {
-                                    scrollY: window.scrollY,
-                                    innerHeight: window.innerHeight,
-                                    bodyHeight: document.body.scrollHeight,
-                                    visibleText: document.body.innerText.substring(0, 100)
-                                };
-                            }
-                        """)
-                        print(f"   📊 Viewport: scrollY={viewport_check['scrollY']}, height={viewport_check['innerHeight']}")
-                        print(f"   📝 Visible text: {viewport_check['visibleText'][:50]}...")
-                    except Exception as e:
-                        print(f"   ⚠️  Could not check viewport: {str(e)}")
+                    # Generate filename based on base URL logic
+                    filename = self._generate_filename(url, base_url, words_to_remove, segment_index, estimated_segments, output.extension)
+                    filepath = self.output_dir / filename
 
-                # Capture screenshot
-                from datetime import datetime
-                print(f"   📸 [{datetime.now().strftime('%H:%M:%S')}] Capturing segment {segment_index}...")
-                await page.screenshot(path=str(filepath), full_page=False, type='png', timeout=screenshot_timeout)
+                    # Debug: Check viewport state before capture
+                    if segment_index == 1:  # Only log for first segment to avoid spam
+                        try:
+                            viewport_check = await page.evaluate("""
+                                () => {
+                                    return {
+                                        scrollY: window.scrollY,
+                                        innerHeight: window.innerHeight,
+                                        bodyHeight: document.body.scrollHeight,
+                                        visibleText: document.body.innerText.substring(0, 100)
+                                    };
+                                }
+                            """)
+                            print(f"   📊 Viewport: scrollY={viewport_check['scrollY']}, height={viewport_check['innerHeight']}")
+                            print(f"   📝 Visible text: {viewport_check['visibleText'][:50]}...")
+                        except Exception as e:
+                            print(f"   ⚠️  Could not check viewport: {str(e)}")
 
-                # ✅ NEW: Log file save with details
-                if filepath.exists():
-                    file_size = filepath.stat().st_size
-                    print(f"   ✅ [{datetime.now().strftime('%H:%M:%S')}] Segment {segment_index} saved!")
-                    print(f"   📁 File: {filepath.name}")
-                    print(f"   📊 Size: {file_size / 1024:.1f} KB")
+                    # Capture screenshot (⚡ in memory - only segments that survive dedup are written)
+                    from datetime import datetime
+                    print(f"   📸 [{datetime.now().strftime('%H:%M:%S')}] Capturing segment {segment_index}...")
+                    started = time.monotonic()
+                    image_bytes = await self._grab_segment(
+                        page, output, screenshot_timeout, shooter,
+                        clip=(0, final_position, clip_width, actual_viewport_height) if clip_width else None
+                    )
+                    capture_ms += (time.monotonic() - started) * 1000
+
+                    # ⚡ Decode + hash + quality in the image worker pool (off the event loop)
+                    analysis = await self._analyze_segment(
+                        image_bytes, hash_algorithm,
+                        want_hash=skip_duplicates,
+                        quality=not screenshot_paths,
+                        extrema=segment_index == 1
+                    )
+                    current_hash = analysis.hashes.get(hash_algorithm, "")
 
-                # Verify screenshot (only for first segment to avoid spam)
-                if segment_index == 1 and filepath.exists():
-                    try:
-                        from PIL import Image
-                        img = Image.open(filepath)
-                        width, height = img.size
-                        extrema = img.convert("L").getextrema()
-                        print(f"   📐 Segment 1 image: {width}x{height}, brightness: {extrema[0]}-{extrema[1]}")
-                        if extrema[0] == extrema[1]:
+                    # Verify screenshot (only for first segment to avoid spam)
+                    if segment_index == 1 and analysis.extrema is not None:
+                        extrema = analysis.extrema
+                        print(f"   📐 Segment 1 image: {analysis.width}x{analysis.height}, brightness: {extrema[0]}-{extrema[1]}")
+                        if analysis.is_blank:
                             print(f"   ⚠️  WARNING: Segment 1 appears blank (single color: {extrema[0]})")
-                    except Exception as e:
-                        print(f"   ⚠️  Could not verify segment 1: {str(e)}")
-
-                # ✅ IMPROVED: Use extracted duplicate detection method with scroll position check
-                if skip_duplicates:
-                    is_duplicate, current_hash = self._check_and_handle_duplicate(
-                        filepath=filepath,
-                        previous_hash=previous_hash,
-                        segment_index=segment_index,
-                        estimated_segments=estimated_segments,
-                        current_scroll_position=actual_scroll,  # ✅ NEW: Pass current scroll position
-                        previous_scroll_position=previous_scroll_position,  # ✅ NEW: Pass previous scroll position
-                        scroll_position_tolerance=10  # ✅ NEW: 10px tolerance
-                    )
 
-                    if is_duplicate:
-                        # Update hash and scroll position, then skip to next segment
+                    # ✅ IMPROVED: Use extracted duplicate detection method with scroll position check
+                    if skip_duplicates:
+                        is_duplicate = self._is_duplicate_segment(
+                            current_hash=current_hash,
+                            previous_hash=previous_hash,
+                            segment_index=segment_index,
+                            current_scroll_position=actual_scroll,  # ✅ NEW: Pass current scroll position
+                            previous_scroll_position=previous_scroll_position,  # ✅ NEW: Pass previous scroll position
+                            scroll_position_tolerance=10  # ✅ NEW: 10px tolerance
+                        )
+
+                        if is_duplicate:
+                            # Update hash and scroll position, then skip to next segment
+                            previous_hash = current_hash
+                            previous_scroll_position = actual_scroll  # ✅ NEW: Update previous scroll position
+                            position += scroll_step
+                            segment_index += 1
+                            continue
+
+                        # Update hash and scroll position for next comparison
                         previous_hash = current_hash
                         previous_scroll_position = actual_scroll  # ✅ NEW: Update previous scroll position
-                        position += scroll_step
-                        segment_index += 1
-                        continue
 
-                    # Update hash and scroll position for next comparison
-                    previous_hash = current_hash
-                    previous_scroll_position = actual_scroll  # ✅ NEW: Update previous scroll position
+                    # ⚡ Write the surviving segment (+ the first one's quality report from the worker)
+                    save_tasks.append(self._start_segment_save(
+                        filepath, image_bytes, segment_index,
+                        quality_report=analysis.quality, hash_val=current_hash, hash_algorithm=hash_algorithm, output=output
+                    ))
+                    screenshot_paths.append(str(filepath))
+                    print(f"✅ Segment {segment_index}/{estimated_segments} captured: {filename}")
 
-                screenshot_paths.append(str(filepath))
-                print(f"✅ Segment {segment_index}/{estimated_segments} captured: {filename}")
+                    # Move to next position
+                    position += scroll_step
+                    segment_index += 1
 
-                # Move to next position
-                position += scroll_step
-                segment_index += 1
+                    # ✅ FIX: Break after capturing the last segment
+                    if is_last_segment:
+                        break
 
-                # ✅ FIX: Break after capturing the last segment
-                if is_last_segment:
-                    break
+                await self._close_segment_engine(shooter, screenshot_engine, segment_index - 1, capture_ms)
+                await asyncio.gather(*save_tasks)  # Every segment file exists before stitching/returning
 
-            # ========================================
-            # 🎯 Solution #5: Save cookies for future sessions
-            # ========================================
-            if use_stealth:
-                await self._save_cookies(context)
+                if stitch:
+                    screenshot_paths = await self._stitch_segments(
+                        page, screenshot_paths, url, base_url, words_to_remove, scroll_step
+                    )
 
-            print(f"🎉 Segmented capture complete! {len(screenshot_paths)} segments saved")
-            return screenshot_paths
+                # ========================================
+                # 🎯 Solution #5: Save cookies for future sessions
+                # ========================================
+                if use_stealth:
+                    await self._save_cookies(context)
+
+                print(f"🎉 Segmented capture complete! {len(screenshot_paths)} segments saved")
+                return screenshot_paths
+
+            finally:
+                await page.close()
 
         finally:
-            await page.close()
-            await context.close()
+            # ✅ FIX: Don't close persistent contexts (Camoufox) - they ARE the pooled browser
+            # ⚡ Pooled contexts are scrubbed and kept warm (one-off contexts are closed)
+            await self.context_pool.release(pooled_context, reusable=reuse_context)
+            # ⚡ Hand the browser back to the pool (it stays alive for the next capture)
+            self.browser_pool.release(lease)
 
     async def _capture_segments_from_page(
         self,
@@ -3464,7 +3563,11 @@ class ScreenshotService:
         track_network: bool = False,  # ✅ NEW: Optional network tracking
         base_url: str = "",  # ✅ FIX: Add base_url parameter
         words_to_remove: str = "",  # ✅ FIX: Add words_to_remove parameter
-        screenshot_timeout: int = 30000  # ✅ FIX: Add screenshot_timeout parameter
+        screenshot_timeout: int = 30000,  # ✅ FIX: Add screenshot_timeout parameter
+        hash_algorithm: str = DEFAULT_HASH_ALGORITHM,  # ⚡ Perceptual hash for duplicate detection
+        output_format: Optional[OutputFormat] = None,  # ⚡ Encoding on disk (default: PNG)
+        screenshot_engine: str = "playwright",  # ⚡ "playwright" or "cdp" (direct Page.captureScreenshot)
+        stitch: bool = False  # ⚡ Composite the segments into one tall PNG
     ) -> list[str]:
         """
         🔗 Capture segments from an existing page (used for CDP active tab mode)
@@ -3473,9 +3576,12 @@ class ScreenshotService:
 
         Args:
             track_network: If True, capture and display network events during page load
+            screenshot_engine: "playwright" or "cdp" (see capture_segmented)
+            stitch: Replace the segment files with one stitched PNG (see capture_segmented)
         """
+        output = output_format or DEFAULT_OUTPUT_FORMAT
         # Wait for page to be ready
-        await asyncio.sleep(1.0)
+        await self._wait_until_ready(page, max_wait_ms=5000)
 
         # ✅ NEW: Initialize network_events list if tracking is enabled
         network_events = [] if track_network else None
@@ -3542,6 +3648,9 @@ class ScreenshotService:
         else:
             print(f"   ✅ No page reloads detected")
 
+        # ⚡ Wait for in-page network quiescence (ignores beacons/long-poll)
+        await self._wait_for_network_quiet(page, timeout_ms=10000)
+
         # ✅ NOTE: Network listeners are removed automatically when the page is closed
         # No need to manually remove them here
 
@@ -3632,261 +3741,36 @@ class ScreenshotService:
         print("   🔄 Stabilizing page height with incremental scrolling...")
 
         # ✅ FIX: Find the ACTUAL scrollable element (not just tekion-workspace) and CACHE it
-        # 🆕 IMPROVEMENT: Enhanced detection with better selector priority and visibility checks
-        scrollable_info = await page.evaluate("""() => {
-            // Find element with largest scrollable content
-            let maxScrollableHeight = 0;
-            let bestElement = null;
-            let bestSelector = 'window';
-            let candidates = [];
-
-            // 🆕 IMPROVEMENT: Prioritize common scrollable container selectors first
-            const prioritySelectors = [
-                '#tekion-workspace',
-                '[role="main"]',
-                'main',
-                '.main-content',
-                '#main',
-                '#content',
-                '.content',
-                '[class*="scroll"]',
-                '[class*="content"]'
-            ];
-
-            // Check priority selectors first
-            for (const selector of prioritySelectors) {
-                try {
-                    const elements = document.querySelectorAll(selector);
-                    elements.forEach(el => {
-                        const style = window.getComputedStyle(el);
-                        const hasOverflow = (
-                            style.overflow === 'auto' ||
-                            style.overflow === 'scroll' ||
-                            style.overflowY === 'auto' ||
-                            style.overflowY === 'scroll'
-                        );
-
-                        // 🆕 IMPROVEMENT: Check visibility
-                        const isVisible = (
-                            style.display !== 'none' &&
-                            style.visibility !== 'hidden' &&
-                            el.offsetParent !== null
-                        );
-
-                        if (hasOverflow && el.scrollHeight > el.clientHeight && isVisible) {
-                            candidates.push({
-                                element: el,
-                                scrollHeight: el.scrollHeight,
-                                clientHeight: el.clientHeight,
-                                scrollPotential: el.scrollHeight - el.clientHeight,
-                                selector: selector,
-                                priority: true
-                            });
-                        }
-                    });
-                } catch (e) {
-                    // Selector might be invalid, skip it
-                }
-            }
-
-            // If no priority selectors found, scan all elements
-            if (candidates.length === 0) {
-                const allElements = document.querySelectorAll('*');
-                for (const el of allElements) {
-                    const style = window.getComputedStyle(el);
-                    const hasOverflow = (
-                        style.overflow === 'auto' ||
-                        style.overflow === 'scroll' ||
-                        style.overflowY === 'auto' ||
-                        style.overflowY === 'scroll'
-                    );
-
-                    const isVisible = (
-                        style.display !== 'none' &&
-                        style.visibility !== 'hidden' &&
-                        el.offsetParent !== null
-                    );
-
-                    if (hasOverflow && el.scrollHeight > el.clientHeight && isVisible) {
-                        candidates.push({
-                            element: el,
-                            scrollHeight: el.scrollHeight,
-                            clientHeight: el.clientHeight,
-                            scrollPotential: el.scrollHeight - el.clientHeight,
-                            selector: el.id ? `#${el.id}` : `.${el.className.split(' ')[0]}`,
-                            priority: false
-                        });
-                    }
-                }
-            }
-
-            // Sort by scroll potential (largest first)
-            candidates.sort((a, b) => b.scrollPotential - a.scrollPotential);
-
-            // Pick the best candidate
-            if (candidates.length > 0) {
-                const best = candidates[0];
-                bestElement = best.element;
-                maxScrollableHeight = best.scrollHeight;
-                bestSelector = best.selector;
-            }
-
-            // ✅ CACHE the element in window object so we always use the same one
-            window.__scrollableElement = bestElement;
-
-            return {
-                selector: bestSelector,
-                scrollHeight: maxScrollableHeight,
-                clientHeight: bestElement ? bestElement.clientHeight : window.innerHeight,
-                hasElement: bestElement !== null,
-                candidateCount: candidates.length,
-                isPriority: candidates.length > 0 ? candidates[0].priority : false
-            };
-        }""")
-        print(f"   📍 Scrollable element: {scrollable_info['selector']} (scrollHeight: {scrollable_info['scrollHeight']}px, clientHeight: {scrollable_info['clientHeight']}px)")
-        print(f"      🔍 Found {scrollable_info['candidateCount']} candidates, using {'priority' if scrollable_info.get('isPriority') else 'fallback'} selector")
-
-        last_height = 0
-        stable_count = 0
-
-        # 🆕 IMPROVEMENT: Adjust stabilization parameters based on browser mode
-        # Headless mode: Faster, more aggressive (content loads instantly)
-        # Headful mode: Slower, more patient (content may load gradually)
+        # ⚡ OPTIMIZATION: Probe elementFromPoint ancestor chains instead of scanning all elements
+        # (the selector is cached per base_url / URL pattern for repeated captures of the same app)
+        container = await self._detect_scroll_container(page, url, base_url)
+
+        # ⚡ OPTIMIZATION: Push-based stabilization (ResizeObserver + MutationObserver) in ONE
+        # round trip, instead of 20-30 scroll/sleep/evaluate passes
+        # 🆕 IMPROVEMENT: Adjust the quiet period based on browser mode
+        # Headless mode: content loads instantly / Headful mode: content may load gradually
+        quiet_ms = settings.height_stabilize_quiet_ms
         try:
             mode_info = await self._detect_browser_mode(page)
-            is_headless = mode_info['isHeadless']
-
-            if is_headless:
-                # Headless: Fast stabilization (content loads instantly)
-                max_attempts = 20  # Max 10 seconds
-                stabilize_delay = 0.3  # 300ms between checks
-                print(f"   ⚡ Headless mode detected: using fast stabilization (20 attempts × 300ms)")
+            if not mode_info['isHeadless']:
+                quiet_ms *= 2
+                print(f"   🐢 Headful mode detected: using patient stabilization ({quiet_ms}ms quiet period)")
             else:
-                # Headful: Patient stabilization (content may load gradually)
-                max_attempts = 30  # Max 21 seconds
-                stabilize_delay = 0.5  # 500ms between checks
-                print(f"   🐢 Headful mode detected: using patient stabilization (30 attempts × 500ms)")
+                print(f"   ⚡ Headless mode detected: using fast stabilization ({quiet_ms}ms quiet period)")
         except Exception:
-            # Fallback to default values
-            max_attempts = 30
-            stabilize_delay = 0.5
-            print(f"   ℹ️  Using default stabilization (30 attempts × 500ms)")
-
-        for attempt in range(max_attempts):
-            # Scroll by viewport height to trigger lazy loading
-            # ✅ FIX: Use the CACHED scrollable element
-            await page.evaluate(f"""() => {{
-                const bestElement = window.__scrollableElement;
-                if (bestElement) {{
-                    bestElement.scrollBy(0, {viewport_height});
-                }} else {{
-                    window.scrollBy(0, {viewport_height});
-                }}
-            }}""")
-
-            # Wait for content to load
-            await asyncio.sleep(stabilize_delay)
-
-            # Measure current height
-            # ✅ FIX: Use the CACHED scrollable element and just return scrollHeight
-            current_height = await page.evaluate("""() => {
-                const bestElement = window.__scrollableElement;
-
-                if (bestElement) {
-                    return bestElement.scrollHeight;
-                } else {
-                    return Math.max(
-                        document.documentElement.scrollHeight,
-                        document.body.scrollHeight
-                    );
-                }
-            }""")
-
-            if attempt % 5 == 0:  # Log every 5th attempt
-                print(f"   📐 Height check {attempt + 1}: {current_height}px (last: {last_height}px)")
-
-            # Check if height has stabilized
-            if current_height == last_height:
-                stable_count += 1
-            else:
-                stable_count = 0
-                last_height = current_height
-
-            # ✅ FIX: Only check for stabilization after at least 5 attempts (reduced from 10)
-            # This prevents early exit when content hasn't loaded yet
-            if attempt >= 5:
-                # If height is stable for 4 consecutive checks, we're done (reduced from 6)
-                if stable_count >= 4:
-                    print(f"   ✅ Height stabilized at {current_height}px after {attempt + 1} attempts")
-                    break
-
-                # Check if we've reached the bottom
-                # ✅ FIX: Use the CACHED scrollable element
-                at_bottom = await page.evaluate("""() => {
-                    const bestElement = window.__scrollableElement;
-
-                    if (bestElement) {
-                        return (bestElement.scrollTop + bestElement.clientHeight) >= (bestElement.scrollHeight - 5);
-                    } else {
-                        return (window.innerHeight + window.scrollY) >= (document.documentElement.scrollHeight - 5);
-                    }
-                }""")
-
-                if at_bottom and stable_count > 2:  # Reduced from 3 to 2
-                    print(f"   ✅ Reached bottom and height stable at {current_height}px after {attempt + 1} attempts")
-                    break
-
-        # Scroll back to top
-        # ✅ FIX: Use the CACHED scrollable element
-        await page.evaluate("""() => {
-            const bestElement = window.__scrollableElement;
-
-            if (bestElement) {
-                bestElement.scrollTop = 0;
-            } else {
-                window.scrollTo(0, 0);
-            }
-        }""")
-        await asyncio.sleep(0.5)
-
-        # ✅ Get final stabilized height (already calculated during stabilization)
-        # ✅ FIX: Use the CACHED scrollable element and just return scrollHeight
-        height_info = await page.evaluate("""() => {
-            const bestElement = window.__scrollableElement;
-
-            if (bestElement) {
-                // Debug info
-                const selector = bestElement.id ? `#${bestElement.id}` : `.${bestElement.className.split(' ')[0]}`;
-                return {
-                    height: bestElement.scrollHeight,
-                    selector: selector,
-                    scrollHeight: bestElement.scrollHeight,
-                    clientHeight: bestElement.clientHeight,
-                    cached: true
-                };
-            } else {
-                return {
-                    height: Math.max(
-                        document.documentElement.scrollHeight,
-                        document.body.scrollHeight
-                    ),
-                    selector: 'window',
-                    cached: false
-                };
-            }
-        }""")
+            print(f"   ℹ️  Using default stabilization ({quiet_ms}ms quiet period)")
 
-        total_height = height_info['height']
-        print(f"   🔍 Final height measurement: {total_height}px from {height_info['selector']} (cached: {height_info.get('cached', False)})")
-        if height_info.get('cached'):
-            print(f"      scrollHeight: {height_info.get('scrollHeight')}px, clientHeight: {height_info.get('clientHeight')}px")
+        # Stop growing once the segment budget is covered (infinite feeds)
+        max_height = max_segments * max(1, container.client_height)
+        height_result = await self._stabilize_height(page, quiet_ms=quiet_ms, max_height=max_height)
 
+        total_height = height_result.height
         print(f"📏 Final page height: {total_height}px")
 
         # ✅ CRITICAL FIX: Use ACTUAL measured viewport height, not parameter!
         # The scrollable element might have a different height than the browser viewport
         # Example: browser viewport = 1080px, but scrollable element = 675px
-        actual_viewport_height = scrollable_info['clientHeight']
+        actual_viewport_height = container.client_height
 
         # Calculate scroll step (with overlap)
         # Formula: scroll_step = viewport_height * (1 - overlap_percent / 100)
@@ -3903,11 +3787,21 @@ class ScreenshotService:
 
         # Capture segments
         screenshot_paths = []
+        save_tasks: List[asyncio.Task] = []  # ⚡ Segment writes/encodes run while the next segment is captured
         position = 0
         segment_index = 1
         previous_hash = None
         previous_scroll_position = None  # ✅ NEW: Track previous scroll position for duplicate detection
 
+        # ⚡ Install the in-page segment helper once (scrolls the cached container if any)
+        await install_segment_scroller(page)
+
+        # ⚡ Screenshot engine (direct CDP: window-scrolled pages are cut from clips, no scrolling)
+        shooter, clip_width = await self._open_segment_engine(page, screenshot_engine, height_result.used_element)
+        if clip_width and smart_lazy_load:
+            await self._force_eager_load(page, url, base_url)  # Nothing scrolls lazy content into view
+        capture_ms = 0.0
+
         while position < total_height and segment_index <= max_segments:
             # ✅ FIX: Check if there are remaining pixels to capture
             remaining_pixels = total_height - position
@@ -3926,124 +3820,27 @@ class ScreenshotService:
             else:
                 final_position = position
 
-            # Scroll to position with retry to ensure it sticks
-            # ✅ FIX: Use the CACHED scrollable element and retry if scroll doesn't stick
-            for retry in range(3):
-                await page.evaluate(f"""() => {{
-                    const bestElement = window.__scrollableElement;
-
-                    if (bestElement) {{
-                        bestElement.scrollTop = {final_position};
-                        // Force immediate scroll (no smooth behavior)
-                        bestElement.style.scrollBehavior = 'auto';
-                    }} else {{
-                        window.scrollTo(0, {final_position});
-                    }}
-                }}""")
-
-                # Wait a bit for scroll to complete
-                await asyncio.sleep(0.15)
-
-                # Verify scroll position
-                scroll_info = await page.evaluate("""() => {
-                    const bestElement = window.__scrollableElement;
-
-                    if (bestElement) {
-                        return {
-                            scrollTop: bestElement.scrollTop,
-                            scrollHeight: bestElement.scrollHeight,
-                            clientHeight: bestElement.clientHeight,
-                            captureStart: bestElement.scrollTop,
-                            captureEnd: bestElement.scrollTop + bestElement.clientHeight
-                        };
-                    } else {
-                        return {
-                            scrollTop: window.scrollY,
-                            scrollHeight: document.documentElement.scrollHeight,
-                            clientHeight: window.innerHeight,
-                            captureStart: window.scrollY,
-                            captureEnd: window.scrollY + window.innerHeight
-                        };
-                    }
-                }""")
-
-                # Check if scroll position is close enough (within 10px tolerance)
-                if abs(scroll_info['scrollTop'] - final_position) <= 10:
-                    break
-
-                if retry < 2:
-                    print(f"   🔄 Retry {retry + 1}: scroll position {scroll_info['scrollTop']:.0f}px, target {final_position}px")
-
-            if scroll_info['scrollTop'] != final_position:
-                print(f"   ⚠️  Segment {segment_index}: tried to scroll to {final_position}px but ended at {scroll_info['scrollTop']:.0f}px!")
-            print(f"   🔍 Segment {segment_index}: capturing {scroll_info['captureStart']:.0f}-{scroll_info['captureEnd']:.0f}px (viewport: {scroll_info['clientHeight']}px)")
-
-            # Wait for content to load
-            await asyncio.sleep(scroll_delay_ms / 1000.0)
-
-            # Smart lazy-load detection
-            if smart_lazy_load:
-                await self._wait_for_lazy_load(page)
-
-            # ✅ FIX: Re-verify and force scroll position RIGHT BEFORE screenshot
-            # Something is resetting the scroll during the wait!
-            await page.evaluate(f"""() => {{
-                const bestElement = window.__scrollableElement;
-
-                if (bestElement) {{
-                    bestElement.scrollTop = {final_position};
-                    bestElement.style.scrollBehavior = 'auto';
-                }} else {{
-                    window.scrollTo(0, {final_position});
-                }}
-            }}""")
-
-            # Verify it stuck
-            actual_scroll = await page.evaluate("""() => {
-                const bestElement = window.__scrollableElement;
-                return bestElement ? bestElement.scrollTop : window.scrollY;
-            }""")
+            # ⚡ OPTIMIZATION: Scroll (with retries), wait for content, re-force the position if
+            # something reset it during the wait and measure - all in ONE page.evaluate() round trip
+            if clip_width:
+                # ⚡ No scrolling - the segment is rendered from a document clip
+                step = SegmentStep(final_position, final_position, total_height, actual_viewport_height)
+            else:
+                step = await self._position_segment(page, final_position, scroll_delay_ms, smart_lazy_load)
 
-            if abs(actual_scroll - final_position) > 10:
-                print(f"   ⚠️  SCROLL RESET DETECTED! Before screenshot: expected {final_position}px, got {actual_scroll:.0f}px")
-                print(f"   🔧 Forcing scroll position again...")
-                # Force it one more time
-                await page.evaluate(f"""() => {{
-                    const bestElement = window.__scrollableElement;
-                    if (bestElement) {{
-                        bestElement.scrollTop = {final_position};
-                    }} else {{
-                        window.scrollTo(0, {final_position});
-                    }}
-                }}""")
-                await asyncio.sleep(0.1)
+            if step.attempts > 1:
+                print(f"   🔄 Scroll needed {step.attempts} attempts to reach {final_position}px")
+            if step.reset_detected:
+                print(f"   ⚠️  SCROLL RESET DETECTED during wait - forced back to {final_position}px")
+            if not step.reached():
+                print(f"   ⚠️  Segment {segment_index}: tried to scroll to {final_position}px but ended at {step.scroll_top:.0f}px!")
+            print(f"   🔍 Segment {segment_index}: capturing {step.capture_start:.0f}-{step.capture_end:.0f}px (viewport: {step.client_height}px)")
 
             # Generate filename based on base URL logic
-            filename = self._generate_filename(url, base_url, words_to_remove, segment_index, estimated_segments)
+            filename = self._generate_filename(url, base_url, words_to_remove, segment_index, estimated_segments, output.extension)
             filepath = self.output_dir / filename
 
-            # ✅ DEBUG: Log exact scroll position at moment of screenshot
-            final_scroll_check = await page.evaluate("""() => {
-                const bestElement = window.__scrollableElement;
-                if (bestElement) {
-                    return {
-                        scrollTop: bestElement.scrollTop,
-                        scrollHeight: bestElement.scrollHeight,
-                        clientHeight: bestElement.clientHeight,
-                        offsetTop: bestElement.offsetTop,
-                        offsetLeft: bestElement.offsetLeft
-                    };
-                } else {
-                    return {
-                        scrollTop: window.scrollY,
-                        scrollHeight: document.documentElement.scrollHeight,
-                        clientHeight: window.innerHeight,
-                        offsetTop: 0,
-                        offsetLeft: 0
-                    };
-                }
-            }""")
-            print(f"   📸 Taking screenshot at scrollTop={final_scroll_check['scrollTop']:.0f}px (offset: {final_scroll_check['offsetTop']}, {final_scroll_check['offsetLeft']})")
+            print(f"   📸 Taking screenshot at scrollTop={step.scroll_top:.0f}px (offset: {step.offset_top}, {step.offset_left})")
 
             # ✅ ALWAYS capture the full viewport (includes header, sidebar, etc.)
             # The scrolling is handled by scrolling the element, but we capture the whole page
@@ -4051,23 +3848,27 @@ class ScreenshotService:
             print(f"   📸 [{datetime.now().strftime('%H:%M:%S')}] Capturing segment {segment_index}/{estimated_segments}...")
 
             # Capture screenshot IMMEDIATELY (no delays!)
-            await page.screenshot(path=str(filepath), full_page=False, type='png', timeout=screenshot_timeout)
+            # ⚡ In memory - only segments that survive dedup are written
+            started = time.monotonic()
+            image_bytes = await self._grab_segment(
+                page, output, screenshot_timeout, shooter,
+                clip=(0, final_position, clip_width, actual_viewport_height) if clip_width else None
+            )
+            capture_ms += (time.monotonic() - started) * 1000
 
-            # ✅ NEW: Log file save with details
-            if filepath.exists():
-                file_size = filepath.stat().st_size
-                print(f"   ✅ [{datetime.now().strftime('%H:%M:%S')}] Segment {segment_index} saved!")
-                print(f"   📁 File: {filepath.name}")
-                print(f"   📊 Size: {file_size / 1024:.1f} KB")
+            # ⚡ Decode + hash + quality in the image worker pool (off the event loop)
+            analysis = await self._analyze_segment(
+                image_bytes, hash_algorithm, want_hash=skip_duplicates, quality=not screenshot_paths
+            )
+            current_hash = analysis.hashes.get(hash_algorithm, "")
 
             # ✅ IMPROVED: Use extracted duplicate detection method with scroll position check
             if skip_duplicates:
-                is_duplicate, current_hash = self._check_and_handle_duplicate(
-                    filepath=filepath,
+                is_duplicate = self._is_duplicate_segment(
+                    current_hash=current_hash,
                     previous_hash=previous_hash,
                     segment_index=segment_index,
-                    estimated_segments=estimated_segments,
-                    current_scroll_position=int(final_scroll_check['scrollTop']),  # ✅ NEW: Pass current scroll position
+                    current_scroll_position=int(step.scroll_top),  # ✅ NEW: Pass current scroll position
                     previous_scroll_position=previous_scroll_position,  # ✅ NEW: Pass previous scroll position
                     scroll_position_tolerance=10  # ✅ NEW: 10px tolerance
                 )
@@ -4075,15 +3876,20 @@ class ScreenshotService:
                 if is_duplicate:
                     # Update hash and scroll position, then skip to next segment
                     previous_hash = current_hash
-                    previous_scroll_position = int(final_scroll_check['scrollTop'])  # ✅ NEW: Update previous scroll position
+                    previous_scroll_position = int(step.scroll_top)  # ✅ NEW: Update previous scroll position
                     position += scroll_step
                     segment_index += 1
                     continue
 
                 # Update hash and scroll position for next comparison
                 previous_hash = current_hash
-                previous_scroll_position = int(final_scroll_check['scrollTop'])  # ✅ NEW: Update previous scroll position
+                previous_scroll_position = int(step.scroll_top)  # ✅ NEW: Update previous scroll position
 
+            # ⚡ Write the surviving segment (+ the first one's quality report from the worker)
+            save_tasks.append(self._start_segment_save(
+                filepath, image_bytes, segment_index,
+                quality_report=analysis.quality, hash_val=current_hash, hash_algorithm=hash_algorithm, output=output
+            ))
             screenshot_paths.append(str(filepath))
             print(f"✅ Segment {segment_index}/{estimated_segments} captured: {filename}")
 
@@ -4095,6 +3901,14 @@ class ScreenshotService:
             if is_last_segment:
                 break
 
+        await self._close_segment_engine(shooter, screenshot_engine, segment_index - 1, capture_ms)
+        await asyncio.gather(*save_tasks)  # Every segment file exists before stitching/returning
+
+        if stitch:
+            screenshot_paths = await self._stitch_segments(
+                page, screenshot_paths, url, base_url, words_to_remove, scroll_step
+            )
+
         # ✅ NEW: Summary log with timestamp and file locations
         from datetime import datetime
         print(f"\n{'='*60}")
@@ -4105,82 +3919,401 @@ class ScreenshotService:
         print(f"{'='*60}\n")
         return screenshot_paths
 
-    async def _wait_for_lazy_load(self, page: Page, max_wait_ms: int = None):
+    async def _detect_scroll_container(
+        self,
+        page: Page,
+        url: str,
+        base_url: str = "",
+        min_potential: int = 0
+    ) -> ScrollContainer:
         """
-        Wait for lazy-loaded content to appear
+        Find the page's scroll container and cache it in window.__scrollableElement
 
-        ✅ OPTIMIZATION: Only counts DOM nodes in scrollable container instead of entire page
-        for ~40% performance improvement
+        ⚡ OPTIMIZATION: Checks only the ancestor chains of elementFromPoint() probes,
+        and reuses the selector found for the same base_url / URL pattern
         """
-        if max_wait_ms is None:
-            max_wait_ms = self.CDP_LAZY_LOAD_MAX_MS
+        container = await detect_scroll_container(
+            page,
+            cache=self.scroll_container_cache,
+            cache_key=scroll_cache_key(url, base_url),
+            min_potential=min_potential,
+        )
+        print(f"   📍 Scrollable element: {container.describe()}")
+        if container.found:
+            print(f"      scrollHeight: {container.scroll_height}px, clientHeight: {container.client_height}px")
+        return container
 
-        start_time = asyncio.get_event_loop().time()
-        previous_count = 0
-        stable_count = 0
-
-        while (asyncio.get_event_loop().time() - start_time) * 1000 < max_wait_ms:
-            # ✅ OPTIMIZATION: Count DOM nodes only in scrollable container (faster than entire page)
-            current_count = await page.evaluate("""() => {
-                const container = window.__scrollableElement || document.body;
-                return container.querySelectorAll('*').length;
-            }""")
+    async def _stabilize_height(self, page: Page, quiet_ms: int, max_height: int = 0) -> HeightResult:
+        """
+        Scroll through the page until its height stops changing, then back to the top
 
-            if current_count == previous_count:
-                stable_count += 1
-                if stable_count >= self.CDP_LAZY_LOAD_STABLE_CHECKS:
-                    break
-            else:
-                stable_count = 0
+        ⚡ OPTIMIZATION: Resolves as soon as the page is quiet at the bottom (or hits the
+        segment budget) instead of polling scrollHeight 20-30 times
+        """
+        result = await stabilize_height(
+            page,
+            quiet_ms=quiet_ms,
+            max_ms=settings.height_stabilize_max_ms,
+            max_height=max_height,
+        )
+        icon = "✅" if result.reason == "quiet" else "⚠️ "
+        print(f"   {icon} Height stabilized at {result.describe()}")
+        return result
 
-            previous_count = current_count
-            await asyncio.sleep(self.CDP_LAZY_LOAD_CHECK_INTERVAL_MS / 1000)
+    async def _position_segment(
+        self,
+        page: Page,
+        final_position: int,
+        scroll_delay_ms: int,
+        smart_lazy_load: bool
+    ) -> SegmentStep:
+        """
+        Scroll to a segment and wait for its content in one round trip
 
-    def _get_image_hash(self, filepath: Path) -> str:
+        ⚡ OPTIMIZATION: Replaces 5-8 separate page.evaluate() calls per segment (scroll,
+        verify, retry, re-force, measure) and the Python-side lazy-load polling loop
         """
-        Calculate perceptual hash of image with caching
+        return await scroll_to_segment(
+            page,
+            target=final_position,
+            delay_ms=scroll_delay_ms,
+            lazy_load=smart_lazy_load,
+            lazy_load_max_ms=self.CDP_LAZY_LOAD_MAX_MS,
+            lazy_load_interval_ms=self.CDP_LAZY_LOAD_CHECK_INTERVAL_MS,
+            lazy_load_stable_checks=self.CDP_LAZY_LOAD_STABLE_CHECKS,
+        )
 
-        ✅ OPTIMIZATION: Caches hashes in memory to avoid recomputing
-        for duplicate detection. Provides ~50% speedup for duplicate checks.
+    async def _open_segment_engine(
+        self,
+        page: Page,
+        screenshot_engine: str,
+        scrolls_element: bool
+    ) -> Tuple[Optional[CdpScreenshotter], int]:
         """
-        # Check cache first
-        filepath_str = str(filepath)
-        if filepath_str in self._hash_cache:
-            return self._hash_cache[filepath_str]
+        Set up the segment screenshot engine
 
-        # Compute hash if not cached
+        Returns:
+            (shooter, clip_width): shooter is None for the Playwright engine (or when the
+            browser has no CDP); clip_width > 0 means segments are cut from document clips
+            without scrolling (window-scrolled pages only - inner containers must scroll)
+        """
+        if screenshot_engine != "cdp":
+            return None, 0
+        shooter = await open_cdp_screenshotter(page)
+        if shooter is None:
+            print("   ⚠️  CDP screenshot engine unavailable for this browser - using page.screenshot()")
+            return None, 0
+        if scrolls_element:
+            print("   ⚡ Screenshot engine: CDP Page.captureScreenshot (scrolling an inner container)")
+            return shooter, 0
         try:
-            img = Image.open(filepath)
-            hash_val = str(imagehash.average_hash(img))
+            metrics = await shooter.layout_metrics()
+        except Exception as e:
+            print(f"   ⚠️  Could not read layout metrics ({e}) - scrolling instead of clipping")
+            return shooter, 0
+        print(f"   ⚡ Screenshot engine: CDP Page.captureScreenshot with clips "
+              f"({metrics.viewport_width}px wide, no scrolling)")
+        return shooter, metrics.viewport_width
+
+    async def _grab_segment(
+        self,
+        page: Page,
+        output: OutputFormat,
+        screenshot_timeout: int,
+        shooter: Optional[CdpScreenshotter] = None,
+        clip: Optional[Tuple[int, int, int, int]] = None
+    ) -> bytes:
+        """Screenshot of the current viewport (or of a document clip with the CDP engine)"""
+        kwargs = output.screenshot_kwargs()
+        if shooter is None:
+            return await page.screenshot(full_page=False, timeout=screenshot_timeout, **kwargs)
+        return await asyncio.wait_for(
+            shooter.capture(clip=clip, image_type=kwargs["type"], quality=kwargs.get("quality")),
+            timeout=screenshot_timeout / 1000
+        )
+
+    async def _close_segment_engine(
+        self,
+        shooter: Optional[CdpScreenshotter],
+        screenshot_engine: str,
+        segments: int,
+        capture_ms: float
+    ):
+        """Detach the CDP session and log per-segment screenshot time (engine benchmark)"""
+        if shooter is not None:
+            await shooter.detach()
+        if segments > 0:
+            engine = "cdp" if shooter is not None else "playwright"
+            if engine != screenshot_engine:
+                engine += f" (requested {screenshot_engine})"
+            print(f"   ⏱️  Screenshot engine {engine}: {segments} segments, "
+                  f"{capture_ms / segments:.0f}ms avg per screenshot")
+
+    async def _stitch_segments(
+        self,
+        page: Page,
+        screenshot_paths: list[str],
+        url: str,
+        base_url: str,
+        words_to_remove: str,
+        scroll_step: int
+    ) -> list[str]:
+        """
+        Stitch the saved segments into one tall PNG (in the image worker pool)
 
-            # Store in cache for future use (both memory and disk)
-            self._hash_cache[filepath_str] = hash_val
-            self._save_hash_cache()  # ⚡ OPTIMIZATION: Persist to disk
-            return hash_val
+        The overlap between segments is detected from row hashes (scroll_step is only the
+        tie-breaker/fallback) and sticky headers/footers are kept once. On success the
+        segment files are replaced by the stitched file.
+
+        Returns:
+            [stitched path], or the segment paths unchanged if stitching failed
+        """
+        if len(screenshot_paths) < 2:
+            return screenshot_paths
+
+        try:
+            device_scale = await page.evaluate("window.devicePixelRatio") or 1
         except Exception:
+            device_scale = 1
+
+        output_path = self.output_dir / self._generate_filename(url, base_url, words_to_remove, 1, 1, ".png")
+        try:
+            result = await self.image_workers.run(
+                stitch_segments, list(screenshot_paths), output_path, int(round(scroll_step * device_scale))
+            )
+        except Exception as e:
+            print(f"   ⚠️  Could not stitch segments ({e}) - keeping {len(screenshot_paths)} segment files")
+            return screenshot_paths
+
+        print(f"   🧵 Stitched {result.describe()}")
+        for path in screenshot_paths:
+            Path(path).unlink(missing_ok=True)
+            self._quality_reports.pop(path, None)
+        await self._index_capture(Path(result.path))
+        return [result.path]
+
+    async def _get_image_hash(self, filepath: Path, algorithm: str = DEFAULT_HASH_ALGORITHM) -> str:
+        """
+        Calculate perceptual hash of an image file with caching
+
+        ⚡ OPTIMIZATION: Hashes are cached by content digest in the SQLite hash store,
+        so identical images are never decoded twice and reused filenames can't go stale.
+        """
+        try:
+            image_bytes = Path(filepath).read_bytes()
+        except OSError:
             return ""
+        analysis = await self._analyze_segment(image_bytes, algorithm)
+        return analysis.hashes.get(algorithm, "")
 
-    def _hash_similarity(self, hash1: str, hash2: str) -> float:
-        """Calculate similarity between two hashes (0.0 to 1.0)"""
-        if not hash1 or not hash2 or len(hash1) != len(hash2):
-            return 0.0
+    async def _analyze_segment(
+        self,
+        image_bytes: bytes,
+        hash_algorithm: str = DEFAULT_HASH_ALGORITHM,
+        want_hash: bool = True,
+        quality: bool = False,
+        extrema: bool = False
+    ) -> ImageAnalysis:
+        """
+        Perceptual hash (+ optional quality report / blank check) of an in-memory screenshot
+
+        ⚡ OPTIMIZATION: Works on the screenshot buffer (no write/re-read per segment).
+        Hash store hits skip the decode entirely; everything else runs in the image
+        worker pool, so PIL never blocks the event loop.
+
+        Args:
+            hash_algorithm: "ahash", "dhash", "phash" or "whash" (cached separately per algorithm)
+            want_hash: Compute the hash (False when duplicates aren't checked)
+            quality: Run the quality checker on the decoded image
+            extrema: Grayscale min/max for the blank-segment warning
+
+        Returns:
+            ImageAnalysis (hashes[hash_algorithm] missing if hashing failed or wasn't wanted)
+        """
+        cached = None
+        digest = None
+        if want_hash:
+            digest = content_digest(image_bytes)
+            cached = self.hash_store.get(digest, hash_algorithm)
+
+        algorithms = (hash_algorithm,) if want_hash and cached is None else ()
+        if not algorithms and not quality and not extrema:
+            # Hash store hit and nothing else to compute - no decode at all
+            analysis = ImageAnalysis(width=0, height=0, byte_size=len(image_bytes))
+        else:
+            try:
+                analysis = await self.image_workers.analyze(
+                    image_bytes, hash_algorithms=algorithms, quality=quality, extrema=extrema
+                )
+            except Exception as e:
+                print(f"   ⚠️  Could not analyze segment: {e}")
+                analysis = ImageAnalysis(width=0, height=0, byte_size=len(image_bytes))
+
+        if cached is not None:
+            analysis.hashes[hash_algorithm] = cached
+        elif hash_algorithm in analysis.hashes and digest:
+            # Store in cache for future use (committed in batches)
+            self.hash_store.put(digest, hash_algorithm, analysis.hashes[hash_algorithm])
+        return analysis
+
+    def _start_segment_save(self, *args, **kwargs) -> asyncio.Task:
+        """
+        ⚡ Start _save_segment() in the background (WebP/AVIF encodes overlap the next capture)
+
+        The caller gathers the tasks before stitching or returning. If the capture fails
+        first, the task's own error is retrieved here so it isn't reported twice.
+        """
+        task = asyncio.create_task(self._save_segment(*args, **kwargs))
+        task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        return task
+
+    async def _save_segment(
+        self,
+        filepath: Path,
+        image_bytes: bytes,
+        segment_index: int,
+        quality_report: Optional[dict] = None,
+        hash_val: str = "",
+        hash_algorithm: str = DEFAULT_HASH_ALGORITHM,
+        output: OutputFormat = DEFAULT_OUTPUT_FORMAT
+    ):
+        """
+        Write a segment that survived dedup (re-encoded in the worker pool for WebP/AVIF)
+
+        The first segment's quality report (computed by the image worker from the
+        in-memory screenshot, see pop_quality_report) is kept so the PNG isn't decoded
+        again after capture.
+        """
+        file_size = await self._write_capture(filepath, image_bytes, output, hashes={hash_algorithm: hash_val})
+        print(f"   ✅ [{datetime.now().strftime('%H:%M:%S')}] Segment {segment_index} saved!")
+        print(f"   📁 File: {filepath.name}")
+        print(f"   📊 Size: {file_size / 1024:.1f} KB")
+
+        self._remember_quality_report(filepath, quality_report)
+
+    async def _write_capture(
+        self,
+        filepath: Path,
+        image_bytes: bytes,
+        output: OutputFormat,
+        hashes: Optional[Dict[str, str]] = None
+    ) -> int:
+        """
+        Write captured bytes in the requested output format and index them for similarity search
 
-        # Count matching characters
-        matches = sum(c1 == c2 for c1, c2 in zip(hash1, hash2))
-        return matches / len(hash1)
+        PNG/JPEG were already encoded by Chromium; WebP/AVIF are encoded from the PNG
+        capture in the image worker pool.
 
-    def _check_and_handle_duplicate(
+        Args:
+            hashes: Perceptual hashes already computed for the bytes (algorithm -> hex)
+
+        Returns:
+            Size of the written file in bytes
+        """
+        if output.native:
+            filepath.write_bytes(image_bytes)
+            file_size = len(image_bytes)
+        else:
+            file_size = await self.image_workers.encode(image_bytes, filepath, output.pil_format, **output.encode_options())
+        await self._index_capture(filepath, image_bytes, hashes)
+        return file_size
+
+    async def _index_capture(
         self,
         filepath: Path,
+        image_bytes: Optional[bytes] = None,
+        hashes: Optional[Dict[str, str]] = None
+    ):
+        """
+        Add a written screenshot to every similarity index that has been built
+
+        Hashes that weren't computed during capture are computed from `image_bytes`
+        in the worker pool, or from the file (hash store first) when there are no bytes.
+        """
+        for algorithm in HASH_ALGORITHMS:
+            if not self.similarity_index.is_built(algorithm):
+                continue
+            hash_val = (hashes or {}).get(algorithm)
+            if not hash_val and image_bytes is not None:
+                hash_val = (await self._analyze_segment(image_bytes, algorithm)).hashes.get(algorithm, "")
+            elif not hash_val:
+                hash_val = await asyncio.to_thread(self.similarity_index.hash_file, filepath, algorithm)
+            self.similarity_index.add(filepath, algorithm, hash_val)
+
+    def _remember_quality_report(self, filepath: Path, report: Optional[dict]):
+        """Keep a capture-time quality report for main.py (bounded, oldest dropped first)"""
+        if report is None:
+            return
+        self._quality_reports[str(filepath)] = report
+        while len(self._quality_reports) > 256:
+            self._quality_reports.popitem(last=False)
+
+    def pop_quality_report(self, filepath: str) -> Optional[dict]:
+        """
+        Quality report computed in memory during capture (None if there isn't one)
+
+        Use instead of QualityChecker.check() to avoid decoding the PNG again.
+        """
+        return self._quality_reports.pop(str(filepath), None)
+
+    async def find_similar(
+        self,
+        filepath: str,
+        algorithm: str = "phash",
+        max_distance: int = 8,
+        limit: int = 50
+    ) -> list[dict]:
+        """
+        Near-duplicates of a screenshot across the library (BK-tree search)
+
+        The first search per algorithm builds the index from disk (hashes come from the
+        hash store, so only never-seen images are decoded) - runs off the event loop.
+
+        Args:
+            filepath: Screenshot to compare against
+            algorithm: "ahash", "dhash", "phash" or "whash"
+            max_distance: Maximum Hamming distance in bits (0-64)
+            limit: Maximum number of matches
+
+        Returns:
+            [{"path", "distance", "similarity"}] sorted by distance (the query itself excluded)
+
+        Raises:
+            ValueError: Unknown algorithm
+        """
+        def search():
+            query_hash = self.similarity_index.hash_file(Path(filepath), algorithm)
+            matches = self.similarity_index.search(
+                query_hash, algorithm, max_distance=max_distance, limit=limit, exclude=[filepath]
+            )
+            bits = len(query_hash) * 4
+            return [
+                {"path": path, "distance": distance, "similarity": round(1.0 - distance / bits, 4)}
+                for path, distance in matches
+            ]
+
+        return await asyncio.to_thread(search)
+
+    def _hash_similarity(self, hash1: str, hash2: str) -> float:
+        """
+        Calculate similarity between two hashes (0.0 to 1.0)
+
+        ⚡ Bit-level: 1 - Hamming distance / bits (popcount of the XOR), so a 0.95
+        threshold means at most 3 of 64 bits differ
+        """
+        return hash_similarity(hash1, hash2)
+
+    def _is_duplicate_segment(
+        self,
+        current_hash: str,
         previous_hash: Optional[str],
         segment_index: int,
-        estimated_segments: int,
         current_scroll_position: Optional[int] = None,
         previous_scroll_position: Optional[int] = None,
         scroll_position_tolerance: int = 10
-    ) -> Tuple[bool, str]:
+    ) -> bool:
         """
-        Check if segment is duplicate and handle accordingly
+        Check if a segment is a duplicate of the previous one
 
         ✅ IMPROVED: Now checks BOTH scroll position AND image similarity
 
@@ -4188,24 +4321,20 @@ class ScreenshotService:
         1. Scroll position is the same (within tolerance)
         2. Image similarity is above threshold (95%)
 
-        ✅ OPTIMIZATION: Extracted duplicate detection logic to avoid code duplication
+        ⚡ OPTIMIZATION: Runs on the in-memory screenshot hash BEFORE anything is written,
+        so duplicates never cost a file write, re-read and delete
 
         Args:
-            filepath: Path to the screenshot file
+            current_hash: Hash of the current segment
             previous_hash: Hash of the previous segment (or None for first segment)
             segment_index: Current segment index
-            estimated_segments: Total estimated segments
             current_scroll_position: Current scroll position in pixels (optional)
             previous_scroll_position: Previous scroll position in pixels (optional)
             scroll_position_tolerance: Tolerance for scroll position comparison (default: 10px)
 
         Returns:
-            Tuple of (is_duplicate, current_hash)
-            - is_duplicate: True if segment was a duplicate and was deleted
-            - current_hash: Hash of the current segment
+            True if the segment is a duplicate (and should not be saved)
         """
-        current_hash = self._get_image_hash(filepath)
-
         if previous_hash:
             # ✅ NEW: Check scroll position first (if provided)
             if current_scroll_position is not None and previous_scroll_position is not None:
@@ -4215,25 +4344,23 @@ class ScreenshotService:
                 # (even if images look similar due to fixed headers/sidebars)
                 if scroll_diff > scroll_position_tolerance:
                     print(f"   ✅ Segment {segment_index} kept (different scroll position: {scroll_diff}px difference)")
-                    return False, current_hash
+                    return False
 
                 # Scroll positions are same, now check image similarity
                 similarity = self._hash_similarity(previous_hash, current_hash)
 
                 if similarity > self.DUPLICATE_SIMILARITY_THRESHOLD:
                     print(f"⏭️  Segment {segment_index} skipped (duplicate: same scroll position + {similarity:.1%} similar)")
-                    os.remove(filepath)  # Delete duplicate
-                    return True, current_hash
+                    return True
             else:
                 # ✅ FALLBACK: Old behavior (image similarity only) if scroll positions not provided
                 similarity = self._hash_similarity(previous_hash, current_hash)
 
                 if similarity > self.DUPLICATE_SIMILARITY_THRESHOLD:
                     print(f"⏭️  Segment {segment_index} skipped (duplicate, {similarity:.1%} similar)")
-                    os.remove(filepath)  # Delete duplicate
-                    return True, current_hash
+                    return True
 
-        return False, current_hash
+        return False
 
     def _to_pascal_case(self, text: str) -> str:
         """
@@ -4270,7 +4397,15 @@ class ScreenshotService:
 
         return result
 
-    def _generate_filename(self, url: str, base_url: str, words_to_remove: str, segment_index: int, total_segments: int) -> str:
+    def _generate_filename(
+        self,
+        url: str,
+        base_url: str,
+        words_to_remove: str,
+        segment_index: int,
+        total_segments: int,
+        extension: str = ".png"
+    ) -> str:
         """
         Generate filename based on base URL logic with PascalCase naming
 
@@ -4286,6 +4421,7 @@ class ScreenshotService:
           -> "Accounting_AutoPostingSettings.png"
         - base_url="https://example.com/", url="https://example.com/dse-v2/scheduling/general", words_to_remove="dse-v2", segments=1
           -> "Scheduling_General.png"
+        - extension=".webp" -> "Scheduling_General.webp"
         """
         if base_url and url.startswith(base_url):
             # Subtract base URL from full URL
@@ -4361,19 +4497,19 @@ class ScreenshotService:
             # Generate filename based on segment count
             if total_segments == 1:
                 # Single screenshot
-                filename = f"{base_name}.png"
+                filename = f"{base_name}{extension}"
             else:
                 # Multiple screenshots - add sequence number
-                filename = f"{base_name}_{segment_index:03d}.png"
+                filename = f"{base_name}_{segment_index:03d}{extension}"
         else:
             # No base URL or URL doesn't match - use old behavior (domain + timestamp)
             domain = url.split("//")[1].split("/")[0].replace(":", "_")
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
             if total_segments == 1:
-                filename = f"{domain}_{timestamp}.png"
+                filename = f"{domain}_{timestamp}{extension}"
             else:
-                filename = f"{domain}_{segment_index:03d}_{timestamp}.png"
+                filename = f"{domain}_{segment_index:03d}_{timestamp}{extension}"
 
         return filename
 
@@ -4654,12 +4790,11 @@ class ScreenshotService:
                         else:
                             raise
 
-                # Get stats
-                with open(storage_state_path, 'r') as f:
-                    state = json.load(f)
-
-                cookie_count = len(state.get('cookies', []))
-                ls_count = sum(len(origin.get('localStorage', [])) for origin in state.get('origins', []))
+                # Get stats (invalidate first - a same-second rewrite of equal size looks unchanged)
+                auth_states.invalidate(storage_state_path)
+                state = auth_states.get(storage_state_path)
+                cookie_count = state.cookie_count if state else 0
+                ls_count = state.local_storage_count if state else 0
 
                 print(f"   📊 Also saved to {storage_state_path}:")
                 print(f"      Cookies: {cookie_count}")
@@ -4677,12 +4812,11 @@ class ScreenshotService:
                         else:
                             raise
 
-                # Get stats
-                with open(storage_state_path, 'r') as f:
-                    state = json.load(f)
-
-                cookie_count = len(state.get('cookies', []))
-                ls_count = sum(len(origin.get('localStorage', [])) for origin in state.get('origins', []))
+                # Get stats (invalidate first - a same-second rewrite of equal size looks unchanged)
+                auth_states.invalidate(storage_state_path)
+                state = auth_states.get(storage_state_path)
+                cookie_count = state.cookie_count if state else 0
+                ls_count = state.local_storage_count if state else 0
 
                 print(f"✅ Auth state saved successfully!")
                 print(f"   📊 Cookies: {cookie_count}")
@@ -4727,7 +4861,7 @@ class ScreenshotService:
             print(f"⚠️  Cleanup warning: {str(e)}")
 
     async def close(self):
-        """Close browser instance (supports Playwright, Camoufox, and CDP)"""
+        """Close all browser instances (supports Playwright, Camoufox, and CDP)"""
         # Close CDP browser (disconnect, don't close the actual Chrome)
         if self.cdp_browser:
             try:
@@ -4738,23 +4872,20 @@ class ScreenshotService:
             self.cdp_browser = None
             self.cdp_active_page = None
 
-        # Close Camoufox browser
-        if self.camoufox_browser:
-            try:
-                await self.camoufox_browser.__aexit__(None, None, None)
-            except:
-                pass
-            self.camoufox_browser = None
+        # Close pre-warmed contexts, then every pooled browser (Playwright and Camoufox, all modes)
+        await self.context_pool.close_all()
+        await self.browser_pool.close_all()
+
+        # ⚡ Commit any buffered hashes
+        self.hash_store.flush()
+
+        # ⚡ Stop the image worker processes
+        self.image_workers.shutdown()
 
-        # Close standard Playwright browser
-        if self.browser:
-            await self.browser.close()
-            self.browser = None
         if self.playwright:
             await self.playwright.stop()
             self.playwright = None
 
         # Reset mode tracking
         self.current_browser_mode = None
-        self.current_mode_is_real_browser = None
 
@@ -0,0 +1,281 @@
+"""
+⚡ Scroll Container Detector
+Finds the element that actually scrolls (SPAs often scroll an inner <div>, not the window)
+
+The old detection ran getComputedStyle() on every element (querySelectorAll('*') /
+querySelectorAll('div')), which takes seconds on 30k+ node pages like Tekion.
+
+This detector only looks where the content is:
+1. Probe document.elementFromPoint() at a grid of viewport points
+2. Walk up each hit's ancestor chain and check only those elements (deduplicated)
+3. Also check a few well-known container selectors via querySelector (single element each)
+4. Pick the candidate with the largest scroll potential and cache it in window.__scrollableElement
+
+The winner's selector is cached per URL pattern (or base_url), so repeated captures of
+the same app skip the probe entirely and just re-resolve the selector.
+
+Usage:
+    container = await detect_scroll_container(page, cache, cache_key=scroll_cache_key(url, base_url))
+"""
+
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+
+SCROLL_CONTAINER_PROBE_SCRIPT = """
+({ cachedSelector, minPotential, hintSelectors }) => {
+    const start = performance.now();
+    const docHeight = Math.max(
+        document.body ? document.body.scrollHeight : 0,
+        document.body ? document.body.offsetHeight : 0,
+        document.documentElement.clientHeight,
+        document.documentElement.scrollHeight,
+        document.documentElement.offsetHeight
+    );
+
+    const describe = (el) => ({
+        tag: el.tagName,
+        className: typeof el.className === 'string' ? el.className : '',
+        id: el.id || '',
+        scrollHeight: el.scrollHeight,
+        clientHeight: el.clientHeight,
+        scrollPotential: el.scrollHeight - el.clientHeight,
+    });
+
+    const isScrollable = (el) => {
+        // Cheap geometry check first - getComputedStyle only when it can scroll at all
+        if (el.scrollHeight - el.clientHeight <= minPotential) return false;
+        const style = window.getComputedStyle(el);
+        const overflowY = style.overflowY;
+        return (
+            (overflowY === 'auto' || overflowY === 'scroll' || overflowY === 'overlay') &&
+            style.display !== 'none' &&
+            style.visibility !== 'hidden'
+        );
+    };
+
+    // Stable selector: #id, or an nth-of-type path from the nearest ancestor with an id
+    const selectorFor = (el) => {
+        const parts = [];
+        let node = el;
+        while (node && node.nodeType === 1 && node !== document.documentElement) {
+            if (node.id) {
+                parts.unshift('#' + CSS.escape(node.id));
+                return parts.join(' > ');
+            }
+            let index = 1;
+            for (let sib = node.previousElementSibling; sib; sib = sib.previousElementSibling) {
+                if (sib.tagName === node.tagName) index++;
+            }
+            parts.unshift(node.tagName.toLowerCase() + ':nth-of-type(' + index + ')');
+            node = node.parentElement;
+        }
+        parts.unshift('html');
+        return parts.join(' > ');
+    };
+
+    const finish = (best, extra) => {
+        window.__scrollableElement = best;
+        return {
+            found: !!best,
+            selector: best ? selectorFor(best) : 'window',
+            container: best ? describe(best) : null,
+            docHeight,
+            viewportHeight: window.innerHeight,
+            windowScrolls: document.documentElement.scrollHeight > window.innerHeight + 100,
+            elapsedMs: Math.round(performance.now() - start),
+            ...extra,
+        };
+    };
+
+    // Cache hit: re-resolve the selector and make sure it still scrolls
+    if (cachedSelector) {
+        if (cachedSelector === 'window') {
+            return finish(null, { fromCache: true, checked: 0, candidates: [], maxOffsetHeight: docHeight });
+        }
+        try {
+            const el = document.querySelector(cachedSelector);
+            if (el && isScrollable(el)) {
+                return finish(el, { fromCache: true, checked: 1, candidates: [describe(el)], maxOffsetHeight: docHeight });
+            }
+        } catch (e) {
+            // Invalid/stale selector - fall through to probing
+        }
+    }
+
+    // Probe a 3x3 grid of viewport points and check only their ancestor chains
+    const seen = new Set();
+    const candidates = [];
+    let maxOffsetHeight = docHeight;
+    const consider = (el) => {
+        for (let node = el; node && node !== document.documentElement; node = node.parentElement) {
+            if (seen.has(node)) break;  // Rest of this chain was already checked
+            seen.add(node);
+            if (node.offsetHeight > maxOffsetHeight) maxOffsetHeight = node.offsetHeight;
+            if (isScrollable(node)) candidates.push(node);
+        }
+    };
+
+    const w = window.innerWidth, h = window.innerHeight;
+    for (const fx of [0.25, 0.5, 0.75]) {
+        for (const fy of [0.25, 0.5, 0.75]) {
+            const hit = document.elementFromPoint(w * fx, h * fy);
+            if (hit) consider(hit);
+        }
+    }
+    for (const selector of hintSelectors) {
+        try {
+            const el = document.querySelector(selector);
+            if (el) consider(el);
+        } catch (e) {
+            // Invalid selector - skip it
+        }
+    }
+
+    candidates.sort((a, b) => (b.scrollHeight - b.clientHeight) - (a.scrollHeight - a.clientHeight));
+    return finish(candidates[0] || null, {
+        fromCache: false,
+        checked: seen.size,
+        candidates: candidates.slice(0, 5).map(describe),
+        maxOffsetHeight,
+    });
+}
+"""
+
+# Well-known app containers checked in addition to the probes (one querySelector each)
+DEFAULT_HINT_SELECTORS = ['#tekion-workspace', '[role="main"]', 'main', '#main', '#content']
+
+
+@dataclass
+class ScrollContainer:
+    """Detected scroll target for a page"""
+    found: bool  # False = scroll the window
+    selector: str  # CSS selector of the container ('window' if none)
+    doc_height: int
+    scroll_height: int
+    client_height: int
+    scroll_potential: int = 0
+    tag: str = ""
+    class_name: str = ""
+    element_id: str = ""
+    max_offset_height: int = 0  # Tallest element seen on the probed ancestor chains
+    candidates: List[Dict[str, Any]] = field(default_factory=list)  # Top 5 by scroll potential
+    checked: int = 0  # Elements inspected
+    from_cache: bool = False
+    elapsed_ms: int = 0
+
+    def describe(self) -> str:
+        """One-line summary for logs"""
+        source = "cached" if self.from_cache else f"probed {self.checked} elements"
+        if not self.found:
+            return f"WINDOW ({source}, {self.elapsed_ms}ms)"
+        return (f"<{self.tag}> {self.selector[:60]} ({self.scroll_potential}px potential, "
+                f"{source}, {self.elapsed_ms}ms)")
+
+
+def scroll_cache_key(url: str, base_url: str = "") -> str:
+    """
+    Cache key for an app's scroll container.
+
+    Uses base_url when given (all pages of one app share a layout). Otherwise uses
+    host + path with IDs (numbers, UUIDs, long hex) replaced by '*'.
+    """
+    if base_url:
+        return base_url.rstrip('/')
+    try:
+        parsed = urlparse(url)
+    except Exception:
+        return url
+    segments = [
+        '*' if re.fullmatch(r'\d+|[0-9a-fA-F-]{16,}', segment) else segment
+        for segment in parsed.path.split('/')
+        if segment
+    ]
+    return f"{parsed.netloc.lower()}/{'/'.join(segments)}"
+
+
+class ScrollContainerCache:
+    """LRU map of cache key -> container selector ('window' = scroll the window)"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        selector = self._entries.get(key)
+        if selector is not None:
+            self._entries.move_to_end(key)
+        return selector
+
+    def put(self, key: str, selector: str):
+        self._entries[key] = selector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: str):
+        self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+async def detect_scroll_container(
+    page,
+    cache: Optional[ScrollContainerCache] = None,
+    cache_key: Optional[str] = None,
+    min_potential: int = 0,
+    hint_selectors: Optional[List[str]] = None
+) -> ScrollContainer:
+    """
+    Find the page's scroll container and store it in window.__scrollableElement.
+
+    Args:
+        page: Playwright page
+        cache: Selector cache shared across captures (None = no caching)
+        cache_key: Key for this page's app (see scroll_cache_key)
+        min_potential: Minimum scrollable distance (px) for a container to count
+        hint_selectors: Extra selectors to check (default: DEFAULT_HINT_SELECTORS)
+
+    Returns:
+        ScrollContainer
+    """
+    started = time.monotonic()
+    cached = cache.get(cache_key) if cache is not None and cache_key else None
+    result = await page.evaluate(SCROLL_CONTAINER_PROBE_SCRIPT, {
+        "cachedSelector": cached,
+        "minPotential": min_potential,
+        "hintSelectors": DEFAULT_HINT_SELECTORS if hint_selectors is None else hint_selectors,
+    })
+
+    container = result.get("container") or {}
+    detected = ScrollContainer(
+        found=result["found"],
+        selector=result["selector"],
+        doc_height=result["docHeight"],
+        scroll_height=container.get("scrollHeight", result["docHeight"]),
+        client_height=container.get("clientHeight", result.get("viewportHeight", 0)),
+        scroll_potential=container.get("scrollPotential", 0),
+        tag=container.get("tag", ""),
+        class_name=container.get("className", ""),
+        element_id=container.get("id", ""),
+        max_offset_height=result.get("maxOffsetHeight", result["docHeight"]),
+        candidates=result.get("candidates", []),
+        checked=result.get("checked", 0),
+        from_cache=result.get("fromCache", False),
+        elapsed_ms=int((time.monotonic() - started) * 1000),
+    )
+
+    if cache is not None and cache_key and not detected.from_cache:
+        if cached:
+            cache.invalidate(cache_key)  # Cached container is gone (layout changed)
+        # Only remember "window" for pages that actually scroll - an SPA that hasn't
+        # rendered its container yet must not poison the cache
+        if detected.found or result.get("windowScrolls"):
+            cache.put(cache_key, detected.selector)
+
+    return detected
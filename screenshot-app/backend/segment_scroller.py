@@ -0,0 +1,229 @@
+"""
+⚡ Segment Scroller
+One page.evaluate() round trip per segment in segmented captures
+
+Positioning a segment used to take 5-8 CDP round trips (scroll, sleep, read scroll info,
+retry up to 3x, scroll again, re-read actual_scroll, read final_scroll_check). With
+50-200 segments per page that protocol chatter adds up.
+
+An installed in-page helper (window.__segmentStep) now does all of it in one call:
+1. Scroll the cached scroll container (window.__scrollableElement) or the window
+2. Wait for the scroll to settle (animation frames) and verify it stuck, retrying if not
+3. Wait the per-segment delay, then for lazy-loaded content (DOM node count stable)
+4. Re-force the position if something reset it during the wait
+5. Return the geometry at the moment the screenshot should be taken
+
+Usage:
+    await install_segment_scroller(page)   # once, after the scroll container is cached
+    step = await scroll_to_segment(page, target=1200, delay_ms=1000, lazy_load=True)
+    await page.screenshot(...)
+"""
+
+from dataclasses import dataclass
+
+
+# Defines window.__segmentStep (idempotent - safe to evaluate again after a reload)
+SEGMENT_SCROLLER_SCRIPT = """
+(() => {
+    if (window.__segmentStep) return;
+
+    // rAF never fires in background tabs (CDP mode) - fall back to a short timeout
+    const frame = () => new Promise(resolve => { requestAnimationFrame(() => resolve()); setTimeout(resolve, 50); });
+    const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+    const scrollTo = (target) => {
+        const el = window.__scrollableElement;
+        if (el && el.isConnected) {
+            // Instant positioning (no smooth scroll)
+            const originalBehavior = el.style.scrollBehavior;
+            el.style.scrollBehavior = 'auto';
+            el.scrollTop = target;
+            el.style.scrollBehavior = originalBehavior;
+        } else {
+            window.scrollTo({ top: target, behavior: 'auto' });
+        }
+    };
+
+    const geometry = () => {
+        const el = window.__scrollableElement;
+        if (el && el.isConnected) {
+            return {
+                scrollTop: el.scrollTop,
+                scrollHeight: el.scrollHeight,
+                clientHeight: el.clientHeight,
+                offsetTop: el.offsetTop,
+                offsetLeft: el.offsetLeft,
+                usedElement: true,
+            };
+        }
+        return {
+            scrollTop: window.scrollY,
+            scrollHeight: document.documentElement.scrollHeight,
+            clientHeight: window.innerHeight,
+            offsetTop: 0,
+            offsetLeft: 0,
+            usedElement: false,
+        };
+    };
+
+    const nodeCount = () => (window.__scrollableElement || document.body).querySelectorAll('*').length;
+
+    window.__segmentStep = async ({ target, tolerance, retries, settleMs, delayMs, lazyLoad }) => {
+        const start = performance.now();
+
+        // 1-2. Scroll and verify (retry if the page fights back)
+        let attempts = 0;
+        let geo;
+        do {
+            attempts++;
+            scrollTo(target);
+            await frame();
+            await frame();
+            if (settleMs) await sleep(settleMs);
+            geo = geometry();
+        } while (Math.abs(geo.scrollTop - target) > tolerance && attempts < retries);
+        const settledScroll = geo.scrollTop;
+
+        // 3. Per-segment delay + lazy-load stabilization
+        if (delayMs) await sleep(delayMs);
+        let lazyLoadMs = 0;
+        if (lazyLoad && lazyLoad.enabled) {
+            const lazyStart = performance.now();
+            let previous = nodeCount();
+            let stable = 0;
+            while (performance.now() - lazyStart < lazyLoad.maxMs) {
+                await sleep(lazyLoad.intervalMs);
+                const current = nodeCount();
+                stable = current === previous ? stable + 1 : 0;
+                previous = current;
+                if (stable >= lazyLoad.stableChecks) break;
+            }
+            lazyLoadMs = Math.round(performance.now() - lazyStart);
+        }
+
+        // 4. Something (SPA scroll restoration, focus) may have reset the scroll during the wait
+        geo = geometry();
+        const resetDetected = Math.abs(geo.scrollTop - target) > tolerance;
+        if (resetDetected) {
+            scrollTo(target);
+            await frame();
+            await frame();
+            geo = geometry();
+        }
+
+        // 5. Geometry at screenshot time
+        return {
+            ...geo,
+            captureStart: geo.scrollTop,
+            captureEnd: geo.scrollTop + geo.clientHeight,
+            settledScroll,
+            attempts,
+            resetDetected,
+            lazyLoadMs,
+            elapsedMs: Math.round(performance.now() - start),
+        };
+    };
+})();
+"""
+
+_STEP_CALL = "(args) => window.__segmentStep(args)"
+
+
+@dataclass
+class SegmentStep:
+    """Geometry of one positioned segment (as seen right before the screenshot)"""
+    target: int
+    scroll_top: float
+    scroll_height: int
+    client_height: int
+    offset_top: int = 0
+    offset_left: int = 0
+    used_element: bool = False  # True if window.__scrollableElement was scrolled
+    attempts: int = 1  # Scroll attempts until the position stuck
+    reset_detected: bool = False  # Position was reset during the delay and forced again
+    lazy_load_ms: int = 0
+    elapsed_ms: int = 0
+
+    @property
+    def capture_start(self) -> float:
+        return self.scroll_top
+
+    @property
+    def capture_end(self) -> float:
+        return self.scroll_top + self.client_height
+
+    def reached(self, tolerance: int = 10) -> bool:
+        """Check if the final scroll position is within `tolerance` px of the target"""
+        return abs(self.scroll_top - self.target) <= tolerance
+
+
+async def install_segment_scroller(page):
+    """Install window.__segmentStep on the current document (call once before the segment loop)"""
+    await page.evaluate(SEGMENT_SCROLLER_SCRIPT)
+
+
+async def scroll_to_segment(
+    page,
+    target: int,
+    delay_ms: int = 0,
+    lazy_load: bool = False,
+    lazy_load_max_ms: int = 3000,
+    lazy_load_interval_ms: int = 500,
+    lazy_load_stable_checks: int = 2,
+    settle_ms: int = 0,
+    retries: int = 3,
+    tolerance: int = 10
+) -> SegmentStep:
+    """
+    Position a segment in ONE round trip (scroll, verify, wait, re-verify, measure).
+
+    Args:
+        page: Playwright page
+        target: Scroll position (px) for this segment
+        delay_ms: Wait after the scroll settles (content render time)
+        lazy_load: Wait until the DOM node count is stable (lazy-loaded content)
+        lazy_load_max_ms: Upper bound for the lazy-load wait
+        lazy_load_interval_ms: Interval between node counts
+        lazy_load_stable_checks: Consecutive equal counts needed to call it stable
+        settle_ms: Extra wait after the animation frames on each scroll attempt
+        retries: Scroll attempts before giving up on reaching the target
+        tolerance: Allowed distance (px) from the target
+
+    Returns:
+        SegmentStep with the geometry at screenshot time
+    """
+    args = {
+        "target": target,
+        "tolerance": tolerance,
+        "retries": max(1, retries),
+        "settleMs": settle_ms,
+        "delayMs": delay_ms,
+        "lazyLoad": {
+            "enabled": lazy_load,
+            "maxMs": lazy_load_max_ms,
+            "intervalMs": lazy_load_interval_ms,
+            "stableChecks": lazy_load_stable_checks,
+        },
+    }
+    try:
+        result = await page.evaluate(_STEP_CALL, args)
+    except Exception as e:
+        if "__segmentStep" not in str(e) and "not a function" not in str(e):
+            raise
+        # Helper is gone (page reloaded) - reinstall and retry once
+        await install_segment_scroller(page)
+        result = await page.evaluate(_STEP_CALL, args)
+
+    return SegmentStep(
+        target=target,
+        scroll_top=result["scrollTop"],
+        scroll_height=result["scrollHeight"],
+        client_height=result["clientHeight"],
+        offset_top=result.get("offsetTop", 0),
+        offset_left=result.get("offsetLeft", 0),
+        used_element=result.get("usedElement", False),
+        attempts=result.get("attempts", 1),
+        reset_detected=result.get("resetDetected", False),
+        lazy_load_ms=result.get("lazyLoadMs", 0),
+        elapsed_ms=result.get("elapsedMs", 0),
+    )
@@ -0,0 +1,157 @@
+"""
+⚡ SPA Route Mode
+Captures many routes of one single-page app from a single booted page
+
+Every URL used to get its own context, goto, cross-domain cookie setup and React /
+network waits - so an app like Tekion re-downloaded its bundle, redid the auth
+handshake and reloaded dealer context for each of dozens of routes.
+
+Route mode boots the app once (the normal capture of the first URL), then moves to
+each further route client-side:
+1. history.pushState(route) + a popstate event - what React Router, Vue Router and
+   most history-based routers listen to - or a user-supplied router hook
+   (e.g. "(path) => window.__APP_ROUTER__.push(path)")
+2. Wait until location reflects the route (routers may normalize or redirect it)
+3. The caller then waits only for route-level readiness (fetch/XHR + DOM quiet)
+
+Routes on another origin can't be pushed and fall back to a real page.goto().
+
+Usage:
+    change = await change_route(page, "https://app.example.com/accounting/settings")
+    print(change.describe())
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlparse
+
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Client-side navigation: router hook if given, otherwise pushState + popstate
+ROUTE_CHANGE_SCRIPT = """
+async ({ url, hook, settleTimeoutMs }) => {
+    const target = new URL(url, location.href);
+    const path = target.pathname + target.search + target.hash;
+    const from = location.href;
+    let via = 'pushState';
+
+    if (hook) {
+        // Hook is a function expression: (path, url) => router.push(path)
+        const routerHook = (0, eval)('(' + hook + ')');
+        await routerHook(path, target.href);
+        via = 'hook';
+    } else {
+        history.pushState(history.state, '', path);
+        window.dispatchEvent(new PopStateEvent('popstate', { state: history.state }));
+    }
+    window.scrollTo(0, 0);
+    if (window.__scrollableElement && window.__scrollableElement.isConnected) {
+        window.__scrollableElement.scrollTop = 0;
+    }
+
+    // Routers update location asynchronously (hooks, redirects) - wait for it to settle
+    const started = performance.now();
+    while (location.pathname !== target.pathname && performance.now() - started < settleTimeoutMs) {
+        await new Promise((resolve) => setTimeout(resolve, 25));
+    }
+    await new Promise((resolve) => requestAnimationFrame(() => resolve()));
+    return { from, finalUrl: location.href, via, matched: location.pathname === target.pathname };
+}
+"""
+
+
+@dataclass
+class RouteChange:
+    """Outcome of moving the booted app to another route"""
+    url: str  # Requested route
+    final_url: str  # Where the app ended up
+    via: str  # "pushState", "hook" or "goto"
+    matched: bool  # final_url has the requested path (False = router redirected)
+    elapsed_ms: int
+
+    def describe(self) -> str:
+        """One-line summary for logs"""
+        landing = "" if self.matched else f", redirected to {self.final_url}"
+        return f"{self.via} -> {self.url} ({self.elapsed_ms}ms{landing})"
+
+
+def same_origin(url: str, other: str) -> bool:
+    """True when both URLs share scheme + host + port (client-side routing is possible)"""
+    a, b = urlparse(url), urlparse(other)
+    return (a.scheme, a.netloc.lower()) == (b.scheme, b.netloc.lower())
+
+
+def same_app(url: str, base_url: str) -> bool:
+    """
+    True when `url` belongs to the app at `base_url`: same scheme, host and port, and a
+    path at or below base_url's path ("/app" matches "/app/x" but not "/apple").
+
+    A plain string prefix would also match "https://app.com.evil.net" for "https://app.com".
+    """
+    a, b = urlparse(url), urlparse(base_url)
+    try:
+        if (a.scheme.lower(), a.hostname, a.port or _DEFAULT_PORTS.get(a.scheme.lower())) != \
+                (b.scheme.lower(), b.hostname, b.port or _DEFAULT_PORTS.get(b.scheme.lower())):
+            return False
+    except ValueError:
+        return False  # Invalid port
+    if not a.hostname:
+        return False
+    base_path = b.path.rstrip("/")
+    return not base_path or a.path == base_path or a.path.startswith(base_path + "/")
+
+
+async def change_route(
+    page,
+    url: str,
+    router_hook: Optional[str] = None,
+    settle_timeout_ms: int = 2000,
+    goto_timeout_ms: int = 30000
+) -> RouteChange:
+    """
+    Navigate the already-booted app to `url` without reloading it.
+
+    Args:
+        page: Playwright page with the app loaded
+        url: Route to show (absolute URL)
+        router_hook: JS function expression called with (path, url) instead of pushState
+        settle_timeout_ms: How long to wait for location to reflect the route
+        goto_timeout_ms: page.goto() timeout for cross-origin routes
+
+    Returns:
+        RouteChange
+    """
+    started = time.monotonic()
+    if not same_origin(url, page.url):
+        # Different app/origin: a real navigation is the only option
+        await page.goto(url, wait_until="domcontentloaded", timeout=goto_timeout_ms)
+        return RouteChange(
+            url=url,
+            final_url=page.url,
+            via="goto",
+            matched=urlparse(page.url).path == urlparse(url).path,
+            elapsed_ms=int((time.monotonic() - started) * 1000),
+        )
+
+    result = await page.evaluate(ROUTE_CHANGE_SCRIPT, {
+        "url": url,
+        "hook": router_hook or "",
+        "settleTimeoutMs": settle_timeout_ms,
+    })
+    return RouteChange(
+        url=url,
+        final_url=result["finalUrl"],
+        via=result["via"],
+        matched=result["matched"],
+        elapsed_ms=int((time.monotonic() - started) * 1000),
+    )
+
+
+@dataclass
+class RouteCapture:
+    """One route captured from the booted app (path on success, error otherwise)"""
+    url: str
+    path: Optional[str] = None
+    error: Optional[str] = None
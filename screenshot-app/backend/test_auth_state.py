@@ -0,0 +1,98 @@
+"""Tests for registrable-domain sharding of auth state files"""
+
+import json
+import os
+
+from auth_state import AuthStateRepository, registrable_domain
+
+
+STATE = {
+    "cookies": [
+        {"name": "JSESSIONID", "value": "1", "domain": "preprodapp.tekioncloud.com", "path": "/"},
+        {"name": "sso_token", "value": "2", "domain": ".tekion.com", "path": "/"},
+        {"name": "okta-session", "value": "3", "domain": "tekion.okta.com", "path": "/"},
+        {"name": "NID", "value": "4", "domain": ".google.com", "path": "/"},
+        {"name": "prefs", "value": "5", "domain": "shop.example.co.uk", "path": "/"},
+    ],
+    "origins": [
+        {"origin": "https://preprodapp.tekioncloud.com", "localStorage": [{"name": "authToken", "value": "x"}]},
+        {"origin": "https://www.google.com", "localStorage": [{"name": "theme", "value": "dark"}]},
+    ],
+}
+
+
+def _write_state(tmp_path, state=STATE):
+    path = tmp_path / "auth_state.json"
+    path.write_text(json.dumps(state))
+    return path
+
+
+def test_registrable_domain():
+    assert registrable_domain("preprodapp.tekioncloud.com") == "tekioncloud.com"
+    assert registrable_domain(".tekion.com") == "tekion.com"
+    assert registrable_domain("tekioncloud.com") == "tekioncloud.com"
+    assert registrable_domain(".app.example.co.uk") == "example.co.uk"
+    assert registrable_domain("Shop.Example.COM.") == "example.com"
+    assert registrable_domain("localhost") == "localhost"
+    assert registrable_domain("192.168.1.20") == "192.168.1.20"
+    assert registrable_domain("") == ""
+
+
+def test_shards_for_target_site_only(tmp_path):
+    auth = AuthStateRepository().get(_write_state(tmp_path))
+    assert auth.sites == {"tekioncloud.com", "tekion.com", "okta.com", "google.com", "example.co.uk"}
+    assert auth.shards_for("https://preprodapp.tekioncloud.com/home") == ("tekioncloud.com",)
+    assert auth.shards_for("https://unknown.example.org/") == ()
+
+
+def test_shards_for_groups_and_identity_providers(tmp_path):
+    auth = AuthStateRepository().get(_write_state(tmp_path))
+    groups = [["tekion.com", "tekioncloud.com"]]
+
+    assert auth.shards_for("https://preprodapp.tekioncloud.com/", groups=groups) == ("tekion.com", "tekioncloud.com")
+    assert auth.shards_for(
+        "https://preprodapp.tekioncloud.com/", groups=groups, always=["tekion.okta.com"]
+    ) == ("okta.com", "tekion.com", "tekioncloud.com")
+    # A group only applies to its own members
+    assert auth.shards_for("https://www.google.com/", groups=groups) == ("google.com",)
+    # Shards that aren't in the file are dropped
+    assert auth.shards_for("https://preprodapp.tekioncloud.com/", always=["auth0.com"]) == ("tekioncloud.com",)
+
+
+def test_playwright_state_limited_to_shards(tmp_path):
+    auth = AuthStateRepository().get(_write_state(tmp_path))
+    state = auth.playwright_state(("tekion.com", "tekioncloud.com"))
+
+    assert sorted(cookie["name"] for cookie in state["cookies"]) == ["JSESSIONID", "sso_token"]
+    assert [origin["origin"] for origin in state["origins"]] == ["https://preprodapp.tekioncloud.com"]
+    assert auth.playwright_state(("tekion.com", "tekioncloud.com")) is state  # Memoized
+    assert len(auth.playwright_state()["cookies"]) == len(STATE["cookies"])
+    assert set(auth.domain_cookies(("tekion.com",))) == {".tekion.com"}
+
+
+def test_repository_reparses_only_when_file_changes(tmp_path):
+    repository = AuthStateRepository()
+    path = _write_state(tmp_path)
+
+    first = repository.get(path)
+    assert repository.get(path) is first
+    assert repository.parses == 1
+
+    changed = dict(STATE, cookies=STATE["cookies"][:1])
+    path.write_text(json.dumps(changed))
+    os.utime(path, ns=(first.mtime_ns + 1_000_000, first.mtime_ns + 1_000_000))
+    second = repository.get(path)
+    assert second is not first
+    assert second.cookie_count == 1
+    assert second.digest != first.digest
+    assert repository.parses == 2
+
+
+def test_repository_missing_or_invalid_file(tmp_path):
+    repository = AuthStateRepository()
+    assert repository.get(tmp_path / "missing.json") is None
+    assert repository.get(None) is None
+
+    broken = tmp_path / "broken.json"
+    broken.write_text("{not json")
+    assert repository.get(broken) is None
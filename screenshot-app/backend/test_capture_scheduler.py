@@ -0,0 +1,152 @@
+"""Tests for the global capture scheduler and per-host token buckets"""
+
+import asyncio
+
+import capture_scheduler
+from capture_scheduler import CaptureScheduler, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeFuture:
+    """Stand-in for an asyncio.Future the dispatcher resolves"""
+
+    def __init__(self):
+        self.resolved = False
+
+    def done(self) -> bool:
+        return self.resolved
+
+    def set_result(self, result):
+        self.resolved = True
+
+
+def test_token_bucket_allows_burst_then_paces(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(capture_scheduler.time, "monotonic", clock)
+    bucket = TokenBucket(rate=2.0, capacity=3)
+
+    for _ in range(3):
+        assert bucket.time_until_token() == 0
+        bucket.take()
+
+    assert bucket.time_until_token() == 0.5  # 1 token at 2 tokens/s
+
+    clock.now += 0.25
+    assert bucket.time_until_token() == 0.25
+
+    clock.now += 0.25
+    assert bucket.time_until_token() == 0
+
+
+def test_token_bucket_refill_is_capped(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(capture_scheduler.time, "monotonic", clock)
+    bucket = TokenBucket(rate=10.0, capacity=2)
+    bucket.take()
+    bucket.take()
+
+    clock.now += 60  # Idle for a minute - still only `capacity` tokens
+    bucket.take()
+    bucket.take()
+    assert bucket.time_until_token() > 0
+
+
+def test_token_bucket_zero_rate_is_unlimited():
+    bucket = TokenBucket(rate=0, capacity=1)
+    for _ in range(10):
+        assert bucket.time_until_token() == 0
+        bucket.take()
+
+
+def test_scheduler_enforces_global_cap():
+    async def run():
+        scheduler = CaptureScheduler(max_concurrent=2, host_rate=0)
+        running = 0
+        peak = 0
+
+        async def capture(index: int):
+            nonlocal running, peak
+            async with scheduler.slot(f"https://site{index}.example.com/"):
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(capture(i) for i in range(6)))
+        return peak, scheduler.stats()
+
+    peak, stats = asyncio.run(run())
+    assert peak == 2
+    assert stats["running"] == 0
+    assert stats["queued"] == 0
+
+
+def test_rate_limited_host_does_not_block_other_hosts():
+    async def run():
+        scheduler = CaptureScheduler(max_concurrent=5, host_rate=2.0, host_burst=1)
+        order = []
+
+        async def capture(url: str):
+            async with scheduler.slot(url):
+                order.append(url)
+
+        await asyncio.gather(
+            capture("https://a.example.com/1"),
+            capture("https://a.example.com/2"),  # Out of tokens until the bucket refills
+            capture("https://b.example.com/1"),
+        )
+        return order
+
+    order = asyncio.run(run())
+    assert order == ["https://a.example.com/1", "https://b.example.com/1", "https://a.example.com/2"]
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def run():
+        scheduler = CaptureScheduler(max_concurrent=1, host_rate=0)
+        await scheduler.acquire("a.example.com")
+
+        waiter = asyncio.create_task(scheduler.acquire("b.example.com"))
+        await asyncio.sleep(0.01)
+        assert scheduler.stats()["queued"] == 1
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+        scheduler.release("a.example.com")
+        await asyncio.sleep(0.01)
+        return scheduler.stats()
+
+    stats = asyncio.run(run())
+    assert stats["running"] == 0
+    assert stats["queued"] == 0
+
+
+def test_idle_host_buckets_are_pruned_once_refilled(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(capture_scheduler.time, "monotonic", clock)
+    scheduler = CaptureScheduler(max_concurrent=5, host_rate=1.0, host_burst=2)
+    scheduler._wakeup = asyncio.Event()
+
+    for host in ("a.example.com", "b.example.com"):
+        scheduler._queue.append(capture_scheduler._Waiter(host=host, future=FakeFuture()))
+    scheduler._admit_ready()
+    scheduler.release("b.example.com")
+    scheduler._admit_ready()
+    assert set(scheduler._buckets) == {"a.example.com", "b.example.com"}  # b is still refilling
+
+    clock.now += 1.0
+    scheduler._admit_ready()
+    assert set(scheduler._buckets) == {"a.example.com"}  # a is still running
+
+    scheduler.release("a.example.com")
+    clock.now += 1.0
+    scheduler._admit_ready()
+    assert scheduler._buckets == {}
+
@@ -0,0 +1,181 @@
+"""Tests for scrubbing pooled BrowserContexts between captures"""
+
+import asyncio
+from urllib.parse import urlsplit
+
+from browser_pool import BrowserKey, PooledBrowser
+from context_pool import RESTORE_LOCAL_STORAGE_SCRIPT, ContextKey, ContextPool
+
+
+APP = "https://app.example.com"
+TRACKER = "https://tracker.example.net"
+
+
+class FakeFrame:
+    def __init__(self, url: str):
+        self.url = url
+
+
+class FakePage:
+    """Just enough of a Playwright page: navigation events and the restore script"""
+
+    def __init__(self, context: "FakeContext"):
+        self.context = context
+        self.url = "about:blank"
+        self.routed = False
+        self._handlers = {}
+
+    def on(self, event: str, handler):
+        self._handlers.setdefault(event, []).append(handler)
+
+    async def route(self, pattern: str, handler):
+        self.routed = True
+
+    async def goto(self, url: str, **kwargs):
+        self.url = url
+        for handler in self._handlers.get("framenavigated", []):
+            handler(FakeFrame(url))
+
+    async def evaluate(self, script: str, arg=None):
+        assert script == RESTORE_LOCAL_STORAGE_SCRIPT
+        assert self.routed, "restore page must not reach the network"
+        parts = urlsplit(self.url)
+        self.context.local_storage[f"{parts.scheme}://{parts.netloc}"] = {item["name"]: item["value"] for item in arg}
+
+    async def close(self):
+        self.context.pages.remove(self)
+
+
+class FakeCdpSession:
+    def __init__(self, context: "FakeContext"):
+        self.context = context
+
+    async def send(self, method: str, params=None):
+        if method == "Storage.clearDataForOrigin" and "local_storage" in params["storageTypes"].split(","):
+            self.context.local_storage.pop(params["origin"], None)
+
+    async def detach(self):
+        pass
+
+
+class FakeContext:
+    """BrowserContext with localStorage kept per origin"""
+
+    def __init__(self, local_storage: dict, cookies: list):
+        self.local_storage = {origin: dict(items) for origin, items in local_storage.items()}
+        self.cookie_jar = list(cookies)
+        self.pages = []
+        self._handlers = {}
+
+    def on(self, event: str, handler):
+        self._handlers.setdefault(event, []).append(handler)
+
+    async def new_page(self):
+        page = FakePage(self)
+        self.pages.append(page)
+        for handler in self._handlers.get("page", []):
+            handler(page)
+        return page
+
+    async def new_cdp_session(self, page):
+        return FakeCdpSession(self)
+
+    async def storage_state(self):
+        return {
+            "cookies": list(self.cookie_jar),
+            "origins": [
+                {"origin": origin, "localStorage": [{"name": k, "value": v} for k, v in items.items()]}
+                for origin, items in self.local_storage.items()
+            ],
+        }
+
+    async def clear_cookies(self):
+        self.cookie_jar = []
+
+    async def add_cookies(self, cookies):
+        self.cookie_jar.extend(cookies)
+
+
+class FakeBrowser:
+    def is_connected(self) -> bool:
+        return True
+
+
+async def _noop():
+    pass
+
+
+def _owner(key: ContextKey) -> PooledBrowser:
+    return PooledBrowser(key=key.browser_key, browser=FakeBrowser(), closer=_noop)
+
+
+def _key(engine: str = "playwright") -> ContextKey:
+    return ContextKey(
+        browser_key=BrowserKey(engine=engine, headless=True, stealth=False, persistent=False),
+        viewport_width=1280,
+        viewport_height=720,
+        stealth=False,
+        storage_state="auth_state.json",
+    )
+
+
+def _pool(context: FakeContext) -> ContextPool:
+    async def factory(browser, key):
+        return context, (key.viewport_width, key.viewport_height)
+    return ContextPool(factory, warm_size=0)
+
+
+async def _visit(context: FakeContext, url: str):
+    page = await context.new_page()
+    await page.goto(url)
+
+
+def test_scrub_restores_seeded_local_storage():
+    async def run():
+        cookie = {"name": "sid", "value": "1", "domain": "app.example.com", "path": "/"}
+        context = FakeContext({APP: {"authToken": "seeded"}}, [cookie])
+        pool = _pool(context)
+        key = _key()
+        pooled = await pool._create(key, _owner(key))
+
+        # The capture: the app rewrites its storage, a third-party frame stores an ID
+        await _visit(context, f"{APP}/home")
+        await _visit(context, f"{TRACKER}/pixel")
+        context.local_storage[APP].update(authToken="rotated", draft="unsaved form")
+        context.local_storage[TRACKER] = {"visitor": "42"}
+        context.cookie_jar.append({"name": "tracking", "value": "x", "domain": "tracker.example.net", "path": "/"})
+
+        assert await pool._scrub(pooled)
+        return context, pooled, cookie
+
+    context, pooled, cookie = asyncio.run(run())
+    assert context.local_storage == {APP: {"authToken": "seeded"}}
+    assert context.cookie_jar == [cookie]
+    assert context.pages == []
+    assert pooled.origins == set()
+
+
+def test_scrub_without_navigation_keeps_context_as_is():
+    async def run():
+        context = FakeContext({APP: {"authToken": "seeded"}}, [])
+        pool = _pool(context)
+        key = _key()
+        pooled = await pool._create(key, _owner(key))
+        await context.new_page()  # Opened but never navigated
+        return await pool._scrub(pooled), context
+
+    reusable, context = asyncio.run(run())
+    assert reusable
+    assert context.local_storage == {APP: {"authToken": "seeded"}}
+
+
+def test_contexts_without_cdp_are_discarded_after_navigating():
+    async def run():
+        context = FakeContext({}, [])
+        pool = _pool(context)
+        key = _key(engine="camoufox")
+        pooled = await pool._create(key, _owner(key))
+        await _visit(context, f"{APP}/home")
+        return await pool._scrub(pooled)
+
+    assert asyncio.run(run()) is False
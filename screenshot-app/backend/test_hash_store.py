@@ -0,0 +1,88 @@
+"""Tests for the content-addressed perceptual hash store"""
+
+import sqlite3
+import time
+
+from hash_store import HashStore, content_digest
+
+
+def _committed(store: HashStore) -> dict:
+    """Rows actually in the database (bypasses the write buffer)"""
+    conn = sqlite3.connect(str(store.db_path))
+    try:
+        return {(digest, algo): hash_val for digest, algo, hash_val in
+                conn.execute("SELECT digest, algo, hash FROM image_hashes")}
+    finally:
+        conn.close()
+
+
+def test_content_digest_matches_for_bytes_and_file(tmp_path):
+    path = tmp_path / "shot.png"
+    path.write_bytes(b"png bytes")
+    assert content_digest(path) == content_digest(b"png bytes")
+    assert content_digest(b"png bytes") != content_digest(b"other bytes")
+    assert len(content_digest(b"")) == 32
+
+
+def test_writes_are_buffered_until_commit_every(tmp_path):
+    store = HashStore(tmp_path / "hashes.sqlite3", commit_every=3, commit_interval=3600)
+
+    store.put("d1", "ahash", "ffff0000ffff0000")
+    store.put("d2", "ahash", "0000ffff0000ffff")
+    assert _committed(store) == {}
+    assert store.get("d1", "ahash") == "ffff0000ffff0000"  # Served from the buffer
+
+    store.put("d3", "ahash", "00000000ffffffff")
+    assert set(_committed(store)) == {("d1", "ahash"), ("d2", "ahash"), ("d3", "ahash")}
+    store.close()
+
+
+def test_hashes_are_keyed_by_algorithm(tmp_path):
+    store = HashStore(tmp_path / "hashes.sqlite3", commit_every=1)
+    store.put("d1", "ahash", "aaaaaaaaaaaaaaaa")
+    store.put("d1", "phash", "bbbbbbbbbbbbbbbb")
+
+    assert store.get("d1", "ahash") == "aaaaaaaaaaaaaaaa"
+    assert store.get("d1", "phash") == "bbbbbbbbbbbbbbbb"
+    assert store.get("d1", "dhash") is None
+    store.close()
+
+
+def test_get_many_spans_buffer_and_database(tmp_path):
+    store = HashStore(tmp_path / "hashes.sqlite3", commit_every=1000, commit_interval=3600)
+    store.put("committed", "ahash", "1111111111111111")
+    store.flush()
+    store.put("buffered", "ahash", "2222222222222222")
+
+    found = store.get_many(["committed", "buffered", "missing", "committed"], "ahash")
+    assert found == {"committed": "1111111111111111", "buffered": "2222222222222222"}
+    store.close()
+
+
+def test_persists_across_instances(tmp_path):
+    db_path = tmp_path / "hashes.sqlite3"
+    store = HashStore(db_path, commit_every=1000, commit_interval=3600)
+    store.put("d1", "ahash", "abcdefabcdefabcd")
+    store.close()  # Flushes the buffer
+
+    reopened = HashStore(db_path)
+    assert reopened.get("d1", "ahash") == "abcdefabcdefabcd"
+    assert len(reopened) == 1
+    reopened.close()
+
+
+def test_evicts_least_recently_used_beyond_cap(tmp_path):
+    store = HashStore(tmp_path / "hashes.sqlite3", max_entries=2, commit_every=1)
+    store.put("old", "ahash", "1111111111111111")
+    time.sleep(0.01)
+    store.put("newer", "ahash", "2222222222222222")
+    time.sleep(0.01)
+
+    # Reading "old" refreshes its last_used, so "newer" is now the least recently used
+    assert store.get("old", "ahash") == "1111111111111111"
+    time.sleep(0.01)
+    store.put("newest", "ahash", "3333333333333333")
+
+    assert set(_committed(store)) == {("old", "ahash"), ("newest", "ahash")}
+    assert store.get("newer", "ahash") is None
+    store.close()
@@ -0,0 +1,59 @@
+"""Tests for bit-level hash comparison and the BK-tree index"""
+
+import random
+
+from image_similarity import BKTree, hamming_distance, hash_similarity
+
+
+def _random_hashes(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    return [f"{rng.getrandbits(64):016x}" for _ in range(count)]
+
+
+def test_hamming_distance_counts_bits_not_hex_digits():
+    assert hamming_distance("0000000000000000", "0000000000000000") == 0
+    assert hamming_distance("0000000000000000", "000000000000000f") == 4  # One hex digit, four bits
+    assert hamming_distance("0000000000000000", "0000000000000001") == 1
+    assert hamming_distance("ffffffffffffffff", "0000000000000000") == 64
+
+
+def test_hash_similarity():
+    assert hash_similarity("ffffffffffffffff", "ffffffffffffffff") == 1.0
+    assert hash_similarity("ffffffffffffffff", "0000000000000000") == 0.0
+    assert hash_similarity("0000000000000000", "0000000000000007") == 1.0 - 3 / 64
+    assert hash_similarity("", "0000000000000000") == 0.0
+    assert hash_similarity("00", "0000") == 0.0  # Different hash sizes never match
+
+
+def test_bktree_search_matches_brute_force():
+    hashes = _random_hashes(500)
+    tree = BKTree()
+    for index, hash_hex in enumerate(hashes):
+        tree.add(hash_hex, index)
+    assert len(tree) == len(hashes)
+
+    for query in _random_hashes(20, seed=11) + hashes[:5]:
+        for radius in (0, 8, 24):
+            expected = sorted(
+                (hamming_distance(query, hash_hex), index)
+                for index, hash_hex in enumerate(hashes)
+                if hamming_distance(query, hash_hex) <= radius
+            )
+            found = tree.search(query, radius)
+            assert sorted(found) == expected
+            assert [distance for distance, _ in found] == sorted(distance for distance, _ in found)
+
+
+def test_bktree_keeps_every_item_with_the_same_hash():
+    tree = BKTree()
+    tree.add("00000000000000ff", "a.png")
+    tree.add("00000000000000ff", "b.png")
+    tree.add("00000000000000fe", "c.png")
+
+    assert tree.search("00000000000000ff", 0) == [(0, "a.png"), (0, "b.png")]
+    assert sorted(tree.search("00000000000000ff", 1)) == [(0, "a.png"), (0, "b.png"), (1, "c.png")]
+    assert len(tree) == 3
+
+
+def test_empty_bktree():
+    assert BKTree().search("0000000000000000", 64) == []
@@ -0,0 +1,112 @@
+"""Tests for segment overlap / sticky chrome detection and the streaming stitcher"""
+
+import numpy as np
+from PIL import Image
+
+from image_stitcher import _detect_chrome, _detect_overlap, concatenate_tiles, stitch_segments
+
+
+WIDTH = 8
+HEADER = 10
+FOOTER = 5
+
+
+def _rows(values: np.ndarray, blue: int) -> np.ndarray:
+    """One distinct RGB row per value (distinct even after ROW_QUANTIZE_SHIFT)"""
+    rows = np.zeros((len(values), WIDTH, 3), dtype=np.uint8)
+    rows[:, :, 0] = (values[:, None] % 64) * 4
+    rows[:, :, 1] = (values[:, None] // 64) * 4
+    rows[:, :, 2] = blue
+    return rows
+
+
+def _page(height: int) -> np.ndarray:
+    return _rows(np.arange(height), blue=128)
+
+
+def _save(pixels: np.ndarray, path) -> str:
+    Image.fromarray(pixels, "RGB").save(path)
+    return str(path)
+
+
+def test_detect_overlap_exact_match():
+    prev = [1, 2, 3, 4, 5, 6]
+    cur = [4, 5, 6, 7, 8]
+    assert _detect_overlap(prev, cur) == 3
+
+
+def test_detect_overlap_none_when_nothing_matches():
+    assert _detect_overlap([1, 2, 3], [7, 8, 9]) is None
+    assert _detect_overlap([], [1]) is None
+
+
+def test_detect_overlap_prefers_nominal_on_blank_runs():
+    # Blank rows (0) match at several overlaps - the nominal one breaks the tie
+    prev = [1, 2, 0, 0, 0, 0]
+    cur = [0, 0, 0, 0, 3, 4]
+    assert _detect_overlap(prev, cur) == 4  # No nominal overlap: largest
+    assert _detect_overlap(prev, cur, nominal=2) == 2
+
+
+def test_detect_chrome_finds_header_and_footer():
+    prev = [100, 101, 1, 2, 3, 4, 5, 6, 7, 8, 200]
+    cur = [100, 101, 5, 6, 7, 8, 9, 10, 11, 12, 200]
+    assert _detect_chrome(prev, cur) == (2, 1)
+
+
+def test_detect_chrome_ignores_mostly_identical_segments():
+    rows = list(range(10))
+    assert _detect_chrome(rows, list(rows)) == (0, 0)
+
+
+def test_stitch_segments_trims_overlap_and_sticky_chrome(tmp_path):
+    page = _page(300)
+    header = _rows(np.arange(HEADER), blue=0)
+    footer = _rows(np.arange(FOOTER), blue=255)
+    viewport, scroll_step = 100, 80
+
+    paths = []
+    for index, offset in enumerate([0, 80, 160, 200]):  # Last segment clamped to the page end
+        body = page[offset + HEADER:offset + viewport - FOOTER]
+        paths.append(_save(np.vstack((header, body, footer)), tmp_path / f"segment_{index:03d}.png"))
+
+    output = tmp_path / "stitched.png"
+    result = stitch_segments(paths, output, scroll_step=scroll_step)
+
+    expected = np.vstack((header, page[HEADER:300 - FOOTER], footer))
+    with Image.open(output) as image:
+        stitched = np.asarray(image.convert("RGB"))
+    assert stitched.shape == expected.shape
+    assert np.array_equal(stitched, expected)
+    assert (result.width, result.height) == (WIDTH, expected.shape[0])
+    assert result.overlaps == [5, 5, 45]
+    assert (result.header_rows, result.footer_rows) == (HEADER, FOOTER)
+    assert result.fallbacks == 0
+
+
+def test_stitch_segments_rejects_width_mismatch(tmp_path):
+    first = _save(_page(50), tmp_path / "a.png")
+    second = _save(np.zeros((50, WIDTH + 1, 3), dtype=np.uint8), tmp_path / "b.png")
+    output = tmp_path / "stitched.png"
+    try:
+        stitch_segments([first, second], output)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("width mismatch was not rejected")
+    assert not output.exists()  # Partial file removed
+
+
+def test_concatenate_tiles_skips_rows_already_written(tmp_path):
+    page = _page(250)
+    tiles = [
+        (_save(page[0:100], tmp_path / "tile_1.png"), 0),
+        (_save(page[100:200], tmp_path / "tile_2.png"), 0),
+        (_save(page[150:250], tmp_path / "tile_3.png"), 50),  # Clamped last tile
+    ]
+    output = tmp_path / "tiled.png"
+    result = concatenate_tiles(tiles, output)
+
+    with Image.open(output) as image:
+        assert np.array_equal(np.asarray(image.convert("RGB")), page)
+    assert (result.width, result.height, result.segments) == (WIDTH, 250, 3)
@@ -0,0 +1,126 @@
+"""Tests for durable capture jobs (resume, retry of failed items, result sequencing)"""
+
+import json
+
+from job_store import (
+    ITEM_PENDING,
+    JOB_CANCELLED,
+    JOB_COMPLETED,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    JobStore,
+)
+
+
+URLS = ["https://a.example.com/", "https://b.example.com/", "https://c.example.com/", "https://d.example.com/"]
+
+
+def _result(url: str, status: str) -> str:
+    return json.dumps({"url": url, "status": status})
+
+
+def test_create_and_get(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    store.create("job-1", {"capture_mode": "viewport"}, URLS)
+
+    job = store.get("job-1")
+    assert job.status == JOB_QUEUED
+    assert job.total == 4
+    assert job.counts == {ITEM_PENDING: 4}
+    assert job.done == 0
+    assert store.options("job-1") == {"capture_mode": "viewport"}
+    assert store.get("missing") is None
+    store.close()
+
+
+def test_resume_runs_only_items_without_a_result(tmp_path):
+    db_path = tmp_path / "jobs.sqlite3"
+    store = JobStore(db_path)
+    store.create("job-1", {}, URLS)
+    store.set_status("job-1", JOB_RUNNING)
+    store.record_result("job-1", 0, "success", _result(URLS[0], "success"))
+    store.record_result("job-1", 2, "failed", _result(URLS[2], "failed"))
+    store.close()  # "Crash" with the job still running
+
+    reopened = JobStore(db_path)
+    assert reopened.active_jobs() == ["job-1"]
+    assert reopened.pending_items("job-1") == [(1, URLS[1]), (3, URLS[3])]
+    job = reopened.get("job-1")
+    assert job.counts == {"success": 1, "failed": 1, ITEM_PENDING: 2}
+    assert job.done == 2
+    reopened.close()
+
+
+def test_finished_jobs_are_not_resumed(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    store.create("done", {}, URLS[:1])
+    store.create("stopped", {}, URLS[:1])
+    store.set_status("done", JOB_COMPLETED)
+    store.set_status("stopped", JOB_CANCELLED)
+
+    assert store.active_jobs() == []
+    assert store.get("done").finished_at is not None
+    store.close()
+
+
+def test_retry_failed_keeps_successful_items(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    store.create("job-1", {}, URLS)
+    for index, status in enumerate(["success", "failed", "success", "failed"]):
+        store.record_result("job-1", index, status, _result(URLS[index], status))
+
+    assert store.retry_failed("job-1") == 2
+    assert store.pending_items("job-1") == [(1, URLS[1]), (3, URLS[3])]
+
+    items = store.results("job-1")
+    assert [item["status"] for item in items] == ["success", ITEM_PENDING, "success", ITEM_PENDING]
+    assert items[1]["result"] is None
+    assert items[1]["attempts"] == 1  # Attempts survive the retry
+
+    store.record_result("job-1", 1, "success", _result(URLS[1], "success"))
+    assert store.results("job-1", status="success")[1]["attempts"] == 2
+    assert store.retry_failed("job-1") == 0  # Item 3 is still pending, not failed
+    store.close()
+
+
+def test_results_since_follows_recording_order(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    store.create("job-1", {}, URLS)
+    store.create("job-2", {}, URLS)  # Sequence numbers are per job
+
+    for index in (2, 0, 3):
+        store.record_result("job-1", index, "success", _result(URLS[index], "success"))
+    store.record_result("job-2", 1, "success", _result(URLS[1], "success"))
+
+    events = store.results_since("job-1", 0)
+    assert [(item["seq"], item["index"]) for item in events] == [(1, 2), (2, 0), (3, 3)]
+    assert events[0]["result"] == {"url": URLS[2], "status": "success"}
+    assert store.get("job-1").result_seq == 3
+
+    # A reconnecting stream continues after the last sequence number it saw
+    assert [item["index"] for item in store.results_since("job-1", 2)] == [3]
+    assert store.results_since("job-1", 3) == []
+    assert [item["seq"] for item in store.results_since("job-2", 0)] == [1]
+
+    # A retried item gets a new sequence number when its new result lands
+    store.retry_failed("job-1")
+    store.record_result("job-1", 1, "failed", _result(URLS[1], "failed"))
+    assert store.retry_failed("job-1") == 1
+    store.record_result("job-1", 1, "success", _result(URLS[1], "success"))
+    assert [(item["seq"], item["index"]) for item in store.results_since("job-1", 3)] == [(5, 1)]
+    store.close()
+
+
+def test_results_pagination_and_list_and_delete(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    store.create("job-1", {}, URLS)
+
+    assert [item["index"] for item in store.results("job-1", offset=1, limit=2)] == [1, 2]
+    assert [job.id for job in store.list()] == ["job-1"]
+    assert store.list()[0].counts == {ITEM_PENDING: 4}
+
+    assert store.delete("job-1")
+    assert store.get("job-1") is None
+    assert store.results("job-1") == []
+    assert not store.delete("job-1")
+    store.close()
@@ -0,0 +1,233 @@
+"""
+⚡ Tiled Full-Page Capture
+Full-page screenshots past Chromium's 16384px texture limit and of inner-scroll apps
+
+page.screenshot(full_page=True) renders the whole document as one surface: pages taller
+than ~16384 device pixels come back truncated/repeated (or the GPU process runs out of
+memory), and apps that scroll an inner container (#tekion-workspace) only yield the
+viewport, because the document itself is one viewport tall.
+
+Tiled mode:
+1. Expand the scroll container: its height becomes its scrollHeight and overflow is
+   made visible on it and its ancestors, so the document grows to the full content
+   (original inline styles and scroll positions are restored afterwards)
+2. Capture tiles of at most tile_height CSS px with Page.captureScreenshot clips
+   (captureBeyondViewport, no scrolling); browsers without CDP scroll the window one
+   viewport per tile instead
+3. Stream the tiles into one PNG (image_stitcher.concatenate_tiles) in the image worker
+   pool - only one decoded tile is in memory at a time
+
+Usage:
+    result = await capture_tiled(page, Path("screenshots/Page.png"), workers)
+    print(result.describe())
+"""
+
+import asyncio
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from cdp_capture import open_cdp_screenshotter
+from image_stitcher import concatenate_tiles
+
+
+# Largest surface Chromium renders in one piece (device pixels per side)
+CHROMIUM_MAX_TEXTURE = 16384
+
+
+# Expands window.__scrollableElement (set by scroll_detector) so the document holds all content
+EXPAND_CONTAINER_SCRIPT = """
+() => {
+    const root = document.documentElement;
+    const body = document.body;
+    const restore = [];
+    const override = (el, props) => {
+        restore.push([el, el.style.cssText]);
+        for (const [name, value] of Object.entries(props)) {
+            el.style.setProperty(name, value, 'important');
+        }
+    };
+
+    let container = window.__scrollableElement || null;
+    if (container === root || container === body || (container && !container.isConnected)) {
+        container = null;
+    }
+    const state = {
+        restore,
+        container,
+        containerScrollTop: container ? container.scrollTop : 0,
+        windowScrollY: window.scrollY,
+    };
+
+    let containerHeight = 0;
+    if (container) {
+        containerHeight = container.scrollHeight;
+        container.scrollTop = 0;
+        const unpin = (el, props) => {
+            // Fixed/absolute boxes stretched with top+bottom would keep their viewport height
+            const position = window.getComputedStyle(el).position;
+            if (position === 'fixed' || position === 'absolute') {
+                props.position = 'absolute';
+                props.bottom = 'auto';
+            }
+            override(el, props);
+        };
+        unpin(container, {
+            height: containerHeight + 'px',
+            'max-height': 'none',
+            overflow: 'visible',
+            flex: '0 0 auto',
+        });
+        for (let node = container.parentElement; node && node !== root && node !== body; node = node.parentElement) {
+            unpin(node, { height: 'auto', 'max-height': 'none', overflow: 'visible', flex: '0 0 auto' });
+        }
+    }
+    for (const el of [root, body]) {
+        if (el) override(el, { height: 'auto', 'max-height': 'none', overflow: 'visible' });
+    }
+    window.__tiledRestore = state;
+    window.scrollTo(0, 0);
+
+    // Two frames so the new layout is committed before the first tile
+    return new Promise((resolve) => requestAnimationFrame(() => requestAnimationFrame(() => resolve({
+        expanded: !!container,
+        containerHeight,
+        documentHeight: Math.max(root.scrollHeight, body ? body.scrollHeight : 0),
+        width: root.clientWidth,
+        viewportHeight: window.innerHeight,
+        devicePixelRatio: window.devicePixelRatio || 1,
+    }))));
+}
+"""
+
+RESTORE_CONTAINER_SCRIPT = """
+() => {
+    const state = window.__tiledRestore;
+    if (!state) return false;
+    for (const [el, cssText] of state.restore.reverse()) {
+        el.style.cssText = cssText;
+    }
+    if (state.container) state.container.scrollTop = state.containerScrollTop;
+    window.scrollTo(0, state.windowScrollY);
+    delete window.__tiledRestore;
+    return true;
+}
+"""
+
+# Window-scroll fallback: scroll, wait two frames, report where the window really is
+SCROLL_TILE_SCRIPT = """
+(y) => {
+    window.scrollTo(0, y);
+    return new Promise((resolve) => requestAnimationFrame(() => requestAnimationFrame(() => resolve(window.scrollY))));
+}
+"""
+
+
+@dataclass
+class TiledCaptureResult:
+    """Outcome of a tiled full-page capture"""
+    path: str
+    width: int  # Output pixels
+    height: int
+    tiles: int
+    engine: str  # "cdp" (clips) or "scroll" (window scrolled per tile)
+    expanded: bool  # An inner scroll container was expanded
+    container_height: int  # Its scrollHeight (CSS px)
+    document_height: int  # Captured document height (CSS px)
+    file_size: int
+    elapsed_ms: int
+
+    def describe(self) -> str:
+        """One-line summary for logs"""
+        container = f", container expanded to {self.container_height}px" if self.expanded else ""
+        return (f"{self.tiles} {self.engine} tiles -> {self.width}x{self.height} "
+                f"({self.file_size / 1024:.0f} KB{container}, {self.elapsed_ms}ms)")
+
+
+async def capture_tiled(
+    page,
+    output_path: Path,
+    workers,
+    tile_height: int = 4096,
+    screenshot_timeout: int = 30000,
+    max_height: int = 0
+) -> TiledCaptureResult:
+    """
+    Capture the full page as tiles and stream them into one PNG.
+
+    Call detect_scroll_container() first - the container it stores in
+    window.__scrollableElement is the one that gets expanded (none = the window scrolls).
+
+    Args:
+        page: Playwright page
+        output_path: PNG to write
+        workers: ImageWorkerPool that runs the tile concatenation
+        tile_height: Tile height in CSS px (capped below the texture limit for the page's DPR)
+        screenshot_timeout: Timeout per tile in milliseconds
+        max_height: Stop after this many CSS px (0 = whole document)
+
+    Returns:
+        TiledCaptureResult
+    """
+    started = time.monotonic()
+    layout = await page.evaluate(EXPAND_CONTAINER_SCRIPT)
+    tile_dir = Path(tempfile.mkdtemp(prefix=".tiles_", dir=output_path.parent))
+    shooter = None
+    try:
+        device_scale = layout["devicePixelRatio"]
+        document_height = layout["documentHeight"]
+        if max_height:
+            document_height = min(document_height, max_height)
+        width = layout["width"]
+        tile_css = max(1, min(tile_height, int(CHROMIUM_MAX_TEXTURE // device_scale)))
+
+        tiles = []
+        shooter = await open_cdp_screenshotter(page)
+        if shooter is not None:
+            engine = "cdp"
+            for index, top in enumerate(range(0, document_height, tile_css)):
+                clip = (0, top, width, min(tile_css, document_height - top))
+                data = await asyncio.wait_for(shooter.capture(clip=clip), timeout=screenshot_timeout / 1000)
+                tile_path = tile_dir / f"tile_{index:05d}.png"
+                await asyncio.to_thread(tile_path.write_bytes, data)
+                tiles.append((str(tile_path), 0))
+        else:
+            # No CDP (Firefox/Camoufox): one viewport per tile. The last scroll is clamped
+            # by the browser, so its rows already written are skipped when concatenating.
+            engine = "scroll"
+            viewport_height = max(1, layout["viewportHeight"])
+            top = 0
+            while top < document_height:
+                actual = await page.evaluate(SCROLL_TILE_SCRIPT, top)
+                data = await page.screenshot(full_page=False, type="png", timeout=screenshot_timeout)
+                tile_path = tile_dir / f"tile_{len(tiles):05d}.png"
+                await asyncio.to_thread(tile_path.write_bytes, data)
+                tiles.append((str(tile_path), int(round(max(0, top - actual) * device_scale))))
+                if actual + viewport_height >= document_height:
+                    break
+                top += viewport_height
+
+        stitched = await workers.run(concatenate_tiles, tiles, output_path)
+    finally:
+        if shooter is not None:
+            await shooter.detach()
+        try:
+            await page.evaluate(RESTORE_CONTAINER_SCRIPT)
+        except Exception:
+            pass  # Page navigated/closed - nothing to restore
+        shutil.rmtree(tile_dir, ignore_errors=True)
+
+    return TiledCaptureResult(
+        path=str(output_path),
+        width=stitched.width,
+        height=stitched.height,
+        tiles=len(tiles),
+        engine=engine,
+        expanded=layout["expanded"],
+        container_height=layout["containerHeight"],
+        document_height=document_height,
+        file_size=stitched.file_size,
+        elapsed_ms=int((time.monotonic() - started) * 1000),
+    )